@@ -0,0 +1 @@
+"""Benchmarks and local protocol stubs for performance work."""
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark: blocking db helpers vs backend.utils.async_db under concurrent
+dashboard load.
+
+Each simulated dashboard request is an async handler issuing --queries
+statements (pg_sleep stands in for query time; every --slow-every'th
+request runs a slow one). --concurrency requests are started at once and
+the batch is repeated --rounds times.
+
+  blocking  backend.utils.db helpers called from the coroutine, as the
+            routers did: the event loop is blocked for every query
+  async     awaited backend.utils.async_db helpers: bounded worker pool,
+            one pooled connection per in-flight statement
+
+Reports per-request latency percentiles and throughput for each mode.
+Connection settings come from PG_HOST/PG_PORT/PG_DATABASE/PG_USER/PG_PASSWORD.
+
+Run with: python backend/benchmarks/bench_async_db.py --concurrency 200 --workers 20
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.utils import db as sync_db
+from backend.utils.async_db import AsyncDatabase
+from backend.utils import async_db
+
+
+QUERY = "SELECT pg_sleep(%s) AS slept, %s AS n"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def query_seconds(args, request_no, query_no):
+    slow = args.slow_every and request_no % args.slow_every == 0 and query_no == 0
+    return (args.slow_ms if slow else args.query_ms) / 1000.0
+
+
+async def blocking_request(args, request_no, arrived):
+    for q in range(args.queries):
+        sync_db.db_query(QUERY, (query_seconds(args, request_no, q), q))
+    return time.perf_counter() - arrived
+
+
+async def async_request(args, request_no, arrived):
+    for q in range(args.queries):
+        await async_db.db_query(QUERY, (query_seconds(args, request_no, q), q))
+    return time.perf_counter() - arrived
+
+
+async def run_mode(handler, args):
+    latencies = []
+    started = time.perf_counter()
+    for r in range(args.rounds):
+        # The whole batch arrives at once; latency includes time queued
+        # behind other requests, as a client would see it
+        base = r * args.concurrency
+        arrived = time.perf_counter()
+        latencies += await asyncio.gather(*(handler(args, base + i, arrived) for i in range(args.concurrency)))
+    return latencies, time.perf_counter() - started
+
+
+def report(name, latencies, elapsed):
+    ms = [l * 1000 for l in latencies]
+    print(f"  {name:<9} p50 {percentile(ms, 50):9.1f}ms  p99 {percentile(ms, 99):9.1f}ms  "
+          f"max {max(ms):9.1f}ms  {len(ms) / elapsed:8.1f} req/s")
+
+
+def main(args):
+    print(f"{args.concurrency} concurrent requests x {args.rounds} rounds, "
+          f"{args.queries} queries of {args.query_ms}ms each"
+          + (f", every {args.slow_every}th request one {args.slow_ms}ms query" if args.slow_every else ""))
+
+    modes = args.modes.split(',')
+    if 'blocking' in modes:
+        report('blocking', *asyncio.run(run_mode(blocking_request, args)))
+        sync_db.get_db().close()
+
+    if 'async' in modes:
+        async_db._async_db = AsyncDatabase(workers=args.workers)
+        report('async', *asyncio.run(run_mode(async_request, args)))
+        pool = sync_db.get_db().get_stats()
+        print(f"  executor: {async_db.get_async_db().get_stats()}")
+        print(f"  pool: size {pool['size']}, waited {pool['checkouts_waited']}/{pool['checkouts']}, "
+              f"wait {pool['pool_wait']}")
+        async_db.close_async_db()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark blocking vs pooled async database access")
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--queries', type=int, default=3, help="Statements per dashboard request")
+    parser.add_argument('--query-ms', type=float, default=2.0)
+    parser.add_argument('--slow-every', type=int, default=20, help="0 disables slow queries")
+    parser.add_argument('--slow-ms', type=float, default=250.0)
+    parser.add_argument('--workers', type=int, default=20, help="async_db worker threads")
+    parser.add_argument('--modes', default='blocking,async')
+    main(parser.parse_args())
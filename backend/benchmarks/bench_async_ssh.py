@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SSH fan-out memory and threads, paramiko threads vs asyncssh.
+
+--devices SAOS stubs (backend/benchmarks/saos_ssh_stub.py) listen on
+loopback addresses in a separate process, each holding every exec command
+for --hold-ms so all sessions are open at once. Each mode then runs one
+command on every device from a fresh client process:
+
+  threads   SSHExecutor.execute_batch: a worker thread per in-flight
+            session plus paramiko's transport thread
+  async     AsyncSSHExecutor.execute_batch: one event loop (asyncssh)
+
+Peak client RSS, virtual size and thread count are sampled while the
+sessions are open; per-session figures are the peak growth divided by
+the number of devices. Virtual size includes the stack reserved for each
+thread, which RSS only counts once it is touched.
+
+Run with: python backend/benchmarks/bench_async_ssh.py --devices 500
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def device_address(i):
+    return f'127.0.{4 + i // 250}.{1 + i % 250}'
+
+
+def proc_status():
+    """(RSS in KB, virtual size in KB, thread count) of this process."""
+    values = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            values[key] = value.split()
+    return int(values['VmRSS'][0]), int(values['VmSize'][0]), int(values['Threads'][0])
+
+
+def serve_stubs(args, ready, stop):
+    import paramiko
+    from backend.benchmarks.saos_ssh_stub import SAOSShellStub
+
+    key = paramiko.RSAKey.generate(2048)
+    stubs, port = [], 0
+    for i in range(args.devices):
+        stub = SAOSShellStub(command_delay=args.hold_ms / 1000.0, host_key=key)
+        _, port = stub.start(host=device_address(i), port=port)
+        stubs.append(stub)
+    ready.send(port)
+    stop.wait()
+    for stub in stubs:
+        stub.stop()
+
+
+def run_client(mode, args, port, report):
+    # Both modes import both stacks so the baseline is the same
+    import asyncssh  # noqa: F401
+    import paramiko  # noqa: F401
+    from backend.executors.async_ssh_executor import AsyncSSHEngine, AsyncSSHExecutor
+    from backend.executors.ssh_executor import SSHExecutor
+
+    targets = [device_address(i) for i in range(args.devices)]
+    config = {'username': 'su', 'password': 'wwp', 'port': port, 'timeout': 60}
+    if mode == 'async':
+        executor = AsyncSSHExecutor(AsyncSSHEngine(max_concurrent=args.devices, per_host_rate=0))
+    else:
+        executor = SSHExecutor()
+
+    base_rss, base_vsz, base_threads = proc_status()
+    peak = {'rss': base_rss, 'vsz': base_vsz, 'threads': base_threads}
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            rss, vsz, threads = proc_status()
+            peak['rss'] = max(peak['rss'], rss)
+            peak['vsz'] = max(peak['vsz'], vsz)
+            peak['threads'] = max(peak['threads'], threads)
+            time.sleep(0.02)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    started = time.perf_counter()
+    results = executor.execute_batch(targets, 'system show', config)
+    elapsed = time.perf_counter() - started
+    done.set()
+    sampler.join()
+
+    report.send({
+        'ok': sum(1 for r in results if r.get('success')),
+        'elapsed': elapsed,
+        'rss_kb': peak['rss'] - base_rss,
+        'vsz_kb': peak['vsz'] - base_vsz,
+        'threads': peak['threads'] - base_threads,
+    })
+
+
+def main(args):
+    ctx = multiprocessing.get_context('fork')
+    ready_recv, ready_send = ctx.Pipe(duplex=False)
+    stop = ctx.Event()
+    server = ctx.Process(target=serve_stubs, args=(args, ready_send, stop), daemon=True)
+    server.start()
+    port = ready_recv.recv()
+
+    print(f"{args.devices} devices, one command each held {args.hold_ms:.0f}ms on the device")
+    for mode in args.modes.split(','):
+        report_recv, report_send = ctx.Pipe(duplex=False)
+        client = ctx.Process(target=run_client, args=(mode, args, port, report_send))
+        client.start()
+        report = report_recv.recv()
+        client.join()
+        print(f"  {mode:<8} {report['ok']:>5}/{args.devices} ok  {report['elapsed']:6.2f}s  "
+              f"RSS +{report['rss_kb'] / 1024:6.1f} MB ({report['rss_kb'] / args.devices:6.1f} KB/session)  "
+              f"virtual +{report['vsz_kb'] / 1024:7.1f} MB ({report['vsz_kb'] / args.devices:7.1f} KB/session)  "
+              f"+{report['threads']} threads")
+
+    stop.set()
+    server.join(timeout=10)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark SSH fan-out memory: paramiko threads vs asyncssh")
+    parser.add_argument('--devices', type=int, default=500)
+    parser.add_argument('--hold-ms', type=float, default=5000.0, help="Device-side time per command")
+    parser.add_argument('--modes', default='threads,async')
+    main(parser.parse_args())
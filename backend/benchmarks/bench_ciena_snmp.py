@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Ciena SNMP fleet poll (system, RAPS, virtual rings, alarms)
+against local SAOS agent stubs (backend/benchmarks/snmp_agent_stub.py).
+
+--switches agents run in a separate process on loopback addresses, each
+answering after --latency-ms. Modes:
+
+  legacy      the previous request pattern, one switch after another: a
+              GET per scalar and per ring attribute, GETNEXT walks, and
+              the alarm columns walked in turn. Run on --legacy-sample
+              switches and extrapolated to the fleet
+  concurrent  poll_multiple_switches: multi-OID GETs, GETBULK walks, the
+              tables of a switch read together and --concurrency switches
+              at once on one loop and SnmpEngine
+
+Run with: python backend/benchmarks/bench_ciena_snmp.py --switches 1000
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.services import ciena_snmp_service
+from backend.services.ciena_snmp_service import CES_ALARM_OIDS, CIENA_OIDS, WWP_OIDS, CienaSNMPService
+
+
+def switch_address(i):
+    return f'127.0.{11 + i // 250}.{1 + i % 250}'
+
+
+def serve_agents(args, ready, stop):
+    from backend.benchmarks.snmp_agent_stub import SNMPAgentStub, build_ciena_mib
+
+    async def run():
+        mib = build_ciena_mib(num_rings=args.rings, num_alarms=args.alarms)
+        agents, port = [], 0
+        for i in range(args.switches):
+            agent = SNMPAgentStub(mib, latency=args.latency_ms / 1000.0)
+            _, port = await agent.start(host=switch_address(i), port=port)
+            agents.append(agent)
+        ready.send(port)
+        while not stop.is_set():
+            await asyncio.sleep(0.1)
+        ready.send(sum(agent.requests_received for agent in agents))
+
+    asyncio.run(run())
+
+
+def legacy_poll(host, port):
+    """The request pattern poll_switch used before fleet polling."""
+    service = CienaSNMPService(host, port=port)
+    for attr in ('name', 'descr', 'uptime', 'location', 'contact'):
+        service._snmp_get(CIENA_OIDS['system'][attr])
+    for attr in ('global_state', 'num_rings', 'node_id'):
+        service._snmp_get(WWP_OIDS['raps'][attr])
+    for oid, _ in service._snmp_walk(WWP_OIDS['virtual_ring']['name']):
+        ring_index = oid.split('.')[-1]
+        for attr, base_oid in WWP_OIDS['virtual_ring'].items():
+            if attr != 'name':
+                service._snmp_get(f"{base_oid}.{ring_index}")
+    for column in ('active_severity', 'active_object_class', 'active_object_interpret',
+                   'active_object_instance', 'active_acknowledged', 'active_description',
+                   'active_timestamp'):
+        service._snmp_walk(CES_ALARM_OIDS[column])
+
+
+def main(args):
+    ctx = multiprocessing.get_context('fork')
+    parent, child = ctx.Pipe()
+    stop = ctx.Event()
+    server = ctx.Process(target=serve_agents, args=(args, child, stop), daemon=True)
+    server.start()
+    port = parent.recv()
+    hosts = [switch_address(i) for i in range(args.switches)]
+
+    print(f"{args.switches} switches, {args.rings} rings and {args.alarms} alarms each, "
+          f"agent latency {args.latency_ms}ms")
+
+    if 'legacy' in args.modes:
+        sample = hosts[:args.legacy_sample]
+        started = time.perf_counter()
+        for host in sample:
+            legacy_poll(host, port)
+        per_switch = (time.perf_counter() - started) / len(sample)
+        print(f"  legacy      {per_switch * 1000:7.1f}ms/switch over {len(sample)} switches, "
+              f"fleet estimate {per_switch * args.switches / 60:6.1f} min")
+
+    if 'concurrent' in args.modes:
+        first = []
+        started = time.perf_counter()
+        results = ciena_snmp_service.poll_multiple_switches(
+            hosts, max_concurrent=args.concurrency, port=port,
+            on_result=lambda result: first or first.append(time.perf_counter() - started),
+        )
+        elapsed = time.perf_counter() - started
+        ok = sum(1 for r in results if r['success'])
+        rings = sum(len(r['virtual_rings']) for r in results)
+        alarms = sum(len(r['active_alarms']) for r in results)
+        print(f"  concurrent  {elapsed:6.2f}s for the fleet ({ok}/{len(hosts)} ok, {rings} rings, "
+              f"{alarms} alarms), first result after {first[0] * 1000:.0f}ms")
+
+    stop.set()
+    print(f"  agent requests served: {parent.recv()}")
+    server.join(timeout=5)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark Ciena SNMP fleet polling against SAOS agent stubs")
+    parser.add_argument('--switches', type=int, default=1000)
+    parser.add_argument('--rings', type=int, default=2)
+    parser.add_argument('--alarms', type=int, default=3)
+    parser.add_argument('--latency-ms', type=float, default=10.0, help="Agent response delay")
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--legacy-sample', type=int, default=10, help="Switches polled in legacy mode")
+    parser.add_argument('--modes', default='legacy,concurrent')
+    main(parser.parse_args())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CienaSSHService per-switch poll latency against local SAOS shell
+stubs (backend/benchmarks/saos_ssh_stub.py).
+
+--switches stub servers are started on loopback, each answering the seven
+DEFAULT_COMMANDS after --command-ms and adding --rtt-ms per round trip.
+Every mode polls the whole fleet --rounds times through poll_switches:
+
+  legacy   the previous shell loop: fixed command_delay sleeps, recv_ready
+           polling and --More-- answered with a space
+  expect   prompt-driven reads with paging disabled (ssh_expect.ExpectShell)
+  batch    expect, with each poll's commands sent in one write and split on
+           sentinel lines
+
+All modes use a fresh SSH session pool, so the first round pays the
+handshakes and later rounds reuse sessions.
+
+Run with: python backend/benchmarks/bench_ciena_ssh.py --switches 20 --rounds 3
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.benchmarks.saos_ssh_stub import SAOSShellStub
+from backend.services.ciena_ssh_service import CienaSSHService
+from backend.services.ssh_pool import SSHSessionPool
+
+
+class LegacyCienaSSHService(CienaSSHService):
+    """CienaSSHService with the sleep-paced shell loop it used before ssh_expect."""
+
+    def _execute_commands(self, client, commands):
+        results = {}
+        shell = client.invoke_shell(width=200, height=1000)
+        time.sleep(0.5)  # Wait for shell to initialize
+        if shell.recv_ready():
+            shell.recv(65535)
+        try:
+            for cmd in commands:
+                shell.send(cmd + '\n')
+                output = ''
+                iterations = 0
+                while iterations < 50:
+                    time.sleep(self.command_delay)
+                    if not shell.recv_ready():
+                        time.sleep(0.3)
+                        if not shell.recv_ready():
+                            break
+                    chunk = shell.recv(65535).decode('utf-8', errors='ignore')
+                    output += chunk
+                    if '--More--' in chunk:
+                        shell.send(' ')
+                        iterations += 1
+                        continue
+                    if chunk.strip().endswith('>'):
+                        break
+                    iterations += 1
+                output = re.sub(r'--More--\s*', '', output)
+                results[cmd] = re.sub(r'\x1b\[[0-9;]*[a-zA-Z]', '', output)
+        finally:
+            shell.close()
+        return results
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_mode(name, hosts, port, args):
+    service_class = LegacyCienaSSHService if name == 'legacy' else CienaSSHService
+    pool = SSHSessionPool(max_per_host=1)
+    service = service_class(
+        timeout=10, max_concurrent=args.concurrency, pool=pool,
+        batch_commands=(name == 'batch'), port=port,
+    )
+    first, later, failures, ports_parsed = [], [], 0, 0
+    started = time.perf_counter()
+    for round_no in range(args.rounds):
+        for data in service.poll_switches(hosts):
+            if not data.success:
+                failures += 1
+                continue
+            ports_parsed += len(data.ports)
+            (first if round_no == 0 else later).append(data.collection_time_ms)
+    elapsed = time.perf_counter() - started
+    stats = pool.get_stats()
+    pool.close()
+
+    def fmt(values):
+        if not values:
+            return f"{'-':>24}"
+        return f"p50 {percentile(values, 50):6.0f}ms p99 {percentile(values, 99):6.0f}ms"
+
+    print(f"  {name:<7} first round {fmt(first)}   reused {fmt(later)}   "
+          f"total {elapsed:6.2f}s  failures {failures}  ports {ports_parsed}  "
+          f"handshake saved {stats['handshake_ms_saved'] / 1000:.1f}s")
+
+
+def main(args):
+    stubs = []
+    port = None
+    for i in range(args.switches):
+        stub = SAOSShellStub(
+            hostname=f'stub-5160-{i + 1}',
+            auth_delay=args.auth_ms / 1000.0,
+            command_delay=args.command_ms / 1000.0,
+            rtt=args.rtt_ms / 1000.0,
+        )
+        # One port, one loopback address per switch
+        _, port = stub.start(host=f'127.0.1.{i + 1}', port=port or 0)
+        stubs.append(stub)
+    hosts = [stub.address[0] for stub in stubs]
+
+    print(f"{args.switches} switches x {args.rounds} rounds, 7 commands of {args.command_ms}ms, "
+          f"rtt {args.rtt_ms}ms, auth {args.auth_ms}ms, {args.concurrency} concurrent polls")
+    for mode in args.modes.split(','):
+        run_mode(mode, hosts, port, args)
+
+    for stub in stubs:
+        stub.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark Ciena SSH polling against SAOS shell stubs")
+    parser.add_argument('--switches', type=int, default=20)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--command-ms', type=float, default=20.0, help="Switch-side time per command")
+    parser.add_argument('--rtt-ms', type=float, default=5.0, help="Added per round trip")
+    parser.add_argument('--auth-ms', type=float, default=300.0, help="Added to each login")
+    parser.add_argument('--modes', default='legacy,expect,batch')
+    main(parser.parse_args())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-row INSERT vs execute_values vs COPY metric ingestion.
+
+Builds a synthetic poll cycle (devices x ports interface and optical rows)
+and writes it to a local Postgres through MetricIngestBuffer with each
+method. Rows go to TEMP tables that shadow interface_metrics,
+optical_metrics and polling_data, so nothing touches real data.
+
+Connection settings come from PG_HOST/PG_PORT/PG_DATABASE/PG_USER/PG_PASSWORD.
+
+Run with: python backend/benchmarks/bench_metric_ingest.py --devices 500 --ports 48
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.services.metric_ingest import INGEST_METHODS, MetricIngestBuffer
+
+
+TEMP_TABLES = """
+    CREATE TEMP TABLE IF NOT EXISTS interface_metrics (
+        id BIGSERIAL, device_ip INET NOT NULL, interface_name VARCHAR(64),
+        interface_index INTEGER, rx_bytes BIGINT, tx_bytes BIGINT,
+        rx_packets BIGINT, tx_packets BIGINT, rx_bps BIGINT, tx_bps BIGINT,
+        rx_errors BIGINT, rx_discards BIGINT,
+        recorded_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    );
+    CREATE TEMP TABLE IF NOT EXISTS optical_metrics (
+        id BIGSERIAL, device_ip INET NOT NULL, interface_name VARCHAR(64),
+        interface_index INTEGER, rx_power NUMERIC(8,3), tx_power NUMERIC(8,3),
+        recorded_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    );
+    CREATE TEMP TABLE IF NOT EXISTS polling_data (
+        id BIGSERIAL, poll_type VARCHAR(100) NOT NULL, device_ip VARCHAR(45) NOT NULL,
+        collected_at TIMESTAMPTZ NOT NULL DEFAULT NOW(), data JSONB NOT NULL DEFAULT '{}'
+    );
+"""
+
+
+def fill(ingest: MetricIngestBuffer, devices: int, ports: int):
+    recorded_at = datetime.now(timezone.utc)
+    for d in range(devices):
+        device_ip = f"10.{d // 65536 % 256}.{d // 256 % 256}.{d % 256}"
+        for port in range(1, ports + 1):
+            ingest.add('interface_metrics', {
+                'device_ip': device_ip,
+                'interface_name': f"port{port}",
+                'interface_index': port,
+                'rx_bytes': port * 1_000_003,
+                'tx_bytes': port * 2_000_003,
+                'rx_packets': port * 1000,
+                'tx_packets': port * 2000,
+                'rx_bps': 12_345_000,
+                'tx_bps': 23_456_000,
+                'rx_errors': 0,
+                'rx_discards': 0,
+                'recorded_at': recorded_at,
+            })
+            ingest.add('optical_metrics', {
+                'device_ip': device_ip,
+                'interface_name': f"port{port}",
+                'interface_index': port,
+                'rx_power': -3.25,
+                'tx_power': -1.5,
+                'recorded_at': recorded_at,
+            })
+        ingest.add('polling_data', {
+            'poll_type': 'bench',
+            'device_ip': device_ip,
+            'collected_at': recorded_at,
+            'data': {'sys_name': f"bench-{d}", 'note': "tab\there"},
+        })
+
+
+def main(args):
+    conn = psycopg2.connect(
+        host=os.getenv('PG_HOST', 'localhost'),
+        port=int(os.getenv('PG_PORT', 5432)),
+        dbname=os.getenv('PG_DATABASE', 'network_scan'),
+        user=os.getenv('PG_USER', 'postgres'),
+        password=os.getenv('PG_PASSWORD', 'postgres'),
+    )
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute(TEMP_TABLES)
+
+    total = args.devices * (args.ports * 2 + 1)
+    print(f"{args.devices} devices x {args.ports} ports = {total} rows per cycle")
+
+    methods = args.methods.split(',') if args.methods else INGEST_METHODS
+    for method in methods:
+        ingest = MetricIngestBuffer(method=method)
+        for _ in range(args.cycles):
+            fill(ingest, args.devices, args.ports)
+            ingest.flush(conn)
+        stats = ingest.get_stats()
+        print(f"  {method:<7} {stats['rows_per_second']:12.0f} rows/s  "
+              f"flush {stats['flush_ms'] / stats['flushes']:9.1f}ms/cycle")
+        with conn.cursor() as cursor:
+            cursor.execute("TRUNCATE interface_metrics, optical_metrics, polling_data")
+
+    conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark metric ingestion methods against Postgres")
+    parser.add_argument('--devices', type=int, default=500)
+    parser.add_argument('--ports', type=int, default=48)
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--methods', default='', help="Comma-separated subset of row,values,copy")
+    main(parser.parse_args())
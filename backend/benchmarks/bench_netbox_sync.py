@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark: NetBox device cache sync against a local NetBox API stub
+(backend/benchmarks/netbox_api_stub.py) and Postgres.
+
+The stub serves --devices devices from a separate process, adding
+--latency-ms to every request and --row-ms per device returned. Modes,
+each run on an emptied netbox_device_cache:
+
+  legacy       the previous sync: dcim/devices/ read 100 full objects at a
+               time, one request after another, then one INSERT ... ON
+               CONFLICT per device
+  full         NetBoxCacheService.sync_devices_to_cache(): 1000-row pages
+               fetched concurrently with ?fields=, one bulk upsert
+  incremental  a full sync, then --changed devices edited in NetBox and
+               sync_devices_to_cache(incremental=True); then once more with
+               nothing changed
+
+Needs the netbox_device_cache table (migrations 001 and 023) in the
+database named by PG_HOST/PG_PORT/PG_DATABASE/PG_USER/PG_PASSWORD.
+
+Run with: python backend/benchmarks/bench_netbox_sync.py --devices 20000
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import psycopg2.pool
+import requests
+
+from backend.services.netbox_cache_service import NetBoxCacheService
+from backend.services.netbox_service import NetBoxService
+
+
+def serve_stub(args, control):
+    from backend.benchmarks.netbox_api_stub import NetBoxAPIStub
+
+    stub = NetBoxAPIStub(num_devices=args.devices, latency=args.latency_ms / 1000.0,
+                         row_latency=args.row_ms / 1000.0)
+    stub.start()
+    control.send(stub.url)
+    while True:
+        command, value = control.recv()
+        if command == 'touch':
+            stub.touch(value)
+            control.send(None)
+        elif command == 'stats':
+            control.send((stub.requests_served, stub.bytes_sent))
+        else:
+            stub.stop()
+            return
+
+
+def legacy_sync(url, db_pool):
+    """The fetch and per-row upsert loop sync_devices_to_cache used before bulk reads."""
+    devices = []
+    params = {'limit': 100, 'offset': 0}
+    while True:
+        data = requests.get(f"{url}/api/dcim/devices/", params=params, timeout=30,
+                            headers={'Authorization': 'Token x', 'Accept': 'application/json'}).json()
+        devices.extend(data.get('results', []))
+        if not data.get('next'):
+            break
+        params['offset'] += params['limit']
+    conn = db_pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            for device in devices:
+                cur.execute("""
+                    INSERT INTO netbox_device_cache
+                    (netbox_device_id, device_ip, device_name, device_type, manufacturer,
+                     site_id, site_name, role_name, cached_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW())
+                    ON CONFLICT (netbox_device_id) DO UPDATE SET
+                        device_ip = EXCLUDED.device_ip,
+                        device_name = EXCLUDED.device_name,
+                        device_type = EXCLUDED.device_type,
+                        manufacturer = EXCLUDED.manufacturer,
+                        site_id = EXCLUDED.site_id,
+                        site_name = EXCLUDED.site_name,
+                        role_name = EXCLUDED.role_name,
+                        cached_at = NOW()
+                    RETURNING (xmax = 0) as inserted
+                """, (
+                    device['id'], device['primary_ip']['address'].split('/')[0], device['name'],
+                    device['device_type']['model'], device['device_type']['manufacturer']['name'],
+                    device['site']['id'], device['site']['name'], device['role']['name'],
+                ))
+                cur.fetchone()
+        conn.commit()
+    finally:
+        db_pool.putconn(conn)
+    return len(devices)
+
+
+def main(args):
+    ctx = multiprocessing.get_context('fork')
+    control, child = ctx.Pipe()
+    server = ctx.Process(target=serve_stub, args=(args, child), daemon=True)
+    server.start()
+    url = control.recv()
+
+    db_pool = psycopg2.pool.ThreadedConnectionPool(
+        1, 2,
+        host=os.environ.get('PG_HOST', 'localhost'),
+        port=os.environ.get('PG_PORT', '5432'),
+        database=os.environ.get('PG_DATABASE', 'network_scan'),
+        user=os.environ.get('PG_USER', 'postgres'),
+        password=os.environ.get('PG_PASSWORD', 'postgres'),
+    )
+
+    def reset():
+        conn = db_pool.getconn()
+        with conn.cursor() as cur:
+            cur.execute("TRUNCATE netbox_device_cache")
+        conn.commit()
+        db_pool.putconn(conn)
+
+    def traffic(before):
+        control.send(('stats', None))
+        requests_served, bytes_sent = control.recv()
+        return requests_served - before[0], (bytes_sent - before[1]) / 1e6, (requests_served, bytes_sent)
+
+    control.send(('stats', None))
+    mark = control.recv()
+    service = NetBoxCacheService(db_pool=db_pool, netbox=NetBoxService(url=url, token='x'))
+    print(f"{args.devices} devices, NetBox latency {args.latency_ms:.0f}ms/request "
+          f"+ {args.row_ms}ms/device")
+
+    if 'legacy' in args.modes:
+        reset()
+        started = time.perf_counter()
+        total = legacy_sync(url, db_pool)
+        elapsed = time.perf_counter() - started
+        reqs, mb, mark = traffic(mark)
+        print(f"  legacy       {elapsed:7.2f}s  {total} devices  {reqs} requests  {mb:6.1f} MB")
+
+    if 'full' in args.modes or 'incremental' in args.modes:
+        reset()
+        started = time.perf_counter()
+        result = service.sync_devices_to_cache()
+        elapsed = time.perf_counter() - started
+        reqs, mb, mark = traffic(mark)
+        print(f"  full         {elapsed:7.2f}s  {result['total']} devices ({result['inserted']} inserted)  "
+              f"{reqs} requests  {mb:6.1f} MB")
+
+    if 'incremental' in args.modes:
+        control.send(('touch', args.changed))
+        control.recv()
+        for label in ('changed', 'idle'):
+            started = time.perf_counter()
+            result = service.sync_devices_to_cache(incremental=True)
+            elapsed = time.perf_counter() - started
+            reqs, mb, mark = traffic(mark)
+            print(f"  incremental  {elapsed:7.2f}s  {label:<8} fetched {result['total']}, "
+                  f"{result['updated']} updated, {result['unchanged']} unchanged  "
+                  f"{reqs} requests  {mb:6.2f} MB")
+
+    control.send(('stop', None))
+    server.join(timeout=5)
+    db_pool.closeall()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark NetBox device cache sync against a NetBox API stub")
+    parser.add_argument('--devices', type=int, default=20000)
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="Added to each NetBox request")
+    parser.add_argument('--row-ms', type=float, default=1.0, help="Added per device returned")
+    parser.add_argument('--changed', type=int, default=200, help="Devices edited before the incremental sync")
+    parser.add_argument('--modes', default='legacy,full,incremental')
+    main(parser.parse_args())
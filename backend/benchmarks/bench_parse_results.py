@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark: linear-scan vs compiled-trie parse_snmp_results.
+
+Builds a Ciena SAOS6 result set (xcvr + port_stats columns from
+010_seed_ciena_mappings.sql) for one device with N ports and times the
+previous O(results x mappings) parser against the compiled mapping trie
+(steady state: resolved OIDs are remembered across devices).
+
+Run with: python backend/benchmarks/bench_parse_results.py --ports 500
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.tasks.generic_polling_task import (
+    apply_transform, get_compiled_mappings, parse_snmp_results,
+)
+
+
+XCVR = '1.3.6.1.4.1.6141.2.60.4.1.1.1.1'
+PORT_STATS = '1.3.6.1.4.1.6141.2.60.3.1.1.2.1'
+
+CIENA_MAPPINGS = [
+    ('xcvr', XCVR, 'id', 1, None),
+    ('xcvr', XCVR, 'oper_state', 2, None),
+    ('xcvr', XCVR, 'identifier_type', 3, None),
+    ('xcvr', XCVR, 'vendor_name', 7, None),
+    ('xcvr', XCVR, 'vendor_pn', 9, None),
+    ('xcvr', XCVR, 'serial_num', 11, None),
+    ('xcvr', XCVR, 'wavelength', 15, None),
+    ('xcvr', XCVR, 'temperature', 16, None),
+    ('xcvr', XCVR, 'los_state', 28, None),
+    ('xcvr', XCVR, 'rx_power_dbm', 105, 'divide:10000'),
+    ('xcvr', XCVR, 'tx_power_dbm', 106, 'divide:10000'),
+    ('port_stats', PORT_STATS, 'rx_bytes', 2, None),
+    ('port_stats', PORT_STATS, 'rx_pkts', 3, None),
+    ('port_stats', PORT_STATS, 'rx_crc_errors', 4, None),
+    ('port_stats', PORT_STATS, 'tx_bytes', 16, None),
+    ('port_stats', PORT_STATS, 'tx_pkts', 18, None),
+    ('port_stats', PORT_STATS, 'link_flap_count', 58, None),
+    ('port_stats', PORT_STATS, 'rx_discard', 62, None),
+]
+
+
+def build_mappings():
+    return [
+        {'oid': f"{base}.{column}", 'name': name, 'transform': transform, 'group_name': group}
+        for group, base, name, column, transform in CIENA_MAPPINGS
+    ]
+
+
+def build_results(ports: int):
+    results = {'.1.3.6.1.2.1.1.3.0': '123456'}
+    for _, base, name, column, transform in CIENA_MAPPINGS:
+        for port in range(1, ports + 1):
+            results[f".{base}.{column}.{port}"] = '-31250' if transform else str(port * 1000)
+    return results
+
+
+def legacy_parse(results, oid_mappings):
+    """The parser as it was before the compiled trie (for comparison)."""
+    parsed = {}
+    for oid, raw_value in results.items():
+        normalized_oid = oid.lstrip('.')
+        for mapping in oid_mappings:
+            mapping_oid = mapping['oid'].lstrip('.')
+            if normalized_oid.startswith(mapping_oid + '.') or normalized_oid == mapping_oid:
+                try:
+                    index = int(normalized_oid.split('.')[-1])
+                    if index not in parsed:
+                        parsed[index] = {}
+                    value = apply_transform(raw_value, mapping.get('transform'))
+                    parsed[index][mapping['name']] = value
+                    parsed[index][f"_group_{mapping['name']}"] = mapping['group_name']
+                except (ValueError, IndexError):
+                    continue
+                break
+    return parsed
+
+
+def timed(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        out = fn()
+    return (time.perf_counter() - start) / iterations, out
+
+
+def main(args):
+    mappings = build_mappings()
+    results = build_results(args.ports)
+    print(f"{len(results)} varbinds, {len(mappings)} mappings, {args.ports} ports")
+
+    legacy_s, legacy_out = timed(lambda: legacy_parse(results, mappings), args.iterations)
+    compiled = get_compiled_mappings(mappings)
+    trie_s, trie_out = timed(lambda: parse_snmp_results(results, compiled), args.iterations)
+
+    assert trie_out == legacy_out
+
+    print(f"  linear scan  {legacy_s * 1000:8.2f} ms/device  {len(results) / legacy_s:12.0f} varbinds/s")
+    print(f"  trie         {trie_s * 1000:8.2f} ms/device  {len(results) / trie_s:12.0f} varbinds/s")
+    print(f"  speedup      {legacy_s / trie_s:8.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark parse_snmp_results")
+    parser.add_argument('--ports', type=int, default=500)
+    parser.add_argument('--iterations', type=int, default=20)
+    main(parser.parse_args())
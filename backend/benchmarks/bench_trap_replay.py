@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SNMP trap receiver throughput under a trap storm.
+
+Replays SNMPv2c trap PDUs over local UDP into a running SNMPTrapReceiver
+and reports receive, persist and drop rates. PDUs come from a recording
+(one hex-encoded datagram per line, see --record) or a synthetic link-flap
+storm: Ciena alarm raise/clear pairs and linkDown/linkUp across --devices
+ports, with repeats so dedup is exercised.
+
+Rows go to TEMP tables that shadow trap_log, trap_events, netbox_device_cache
+and trap_receiver_status, so nothing touches real data. Connection settings come
+from PG_HOST/PG_PORT/PG_DATABASE/PG_USER/PG_PASSWORD. With --no-db the batch
+writer only counts, which measures the receive/decode/route ceiling.
+
+--writer-only skips UDP and pysnmp: PDUs are decoded with the native codec
+and fed straight to the receiver's routing and TrapBatchWriter in
+--batch-size batches, isolating the write stage.
+
+--processes 1,2,4 runs the replay once per count with that many receiver
+processes sharing the port via SO_REUSEPORT (as SNMP_TRAP_PROCESSES does),
+sending from --sources loopback addresses so source steering spreads the
+load, and prints the scaling against the first count. Each process writes
+its own TEMP tables.
+
+Run with: python backend/benchmarks/bench_trap_replay.py --traps 50000
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.services.snmp_transport import (
+    PDU_TRAP_V2, SNMP_VERSION_2C, TAG_INTEGER, TAG_OCTET_STRING, TAG_OID, TAG_TIMETICKS,
+    decode_message, encode_message, render_value,
+)
+
+
+TEMP_TABLES = """
+    CREATE TEMP TABLE IF NOT EXISTS trap_log (
+        id BIGSERIAL PRIMARY KEY, received_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        source_ip INET NOT NULL, source_port INTEGER, snmp_version VARCHAR(10),
+        community VARCHAR(255), enterprise_oid VARCHAR(255), trap_oid VARCHAR(255),
+        trap_type VARCHAR(100), vendor VARCHAR(50), uptime BIGINT,
+        varbinds JSONB NOT NULL DEFAULT '{}', processed BOOLEAN DEFAULT FALSE,
+        processed_at TIMESTAMPTZ, handler VARCHAR(100), event_id BIGINT, raw_hex TEXT
+    );
+    CREATE TEMP TABLE IF NOT EXISTS trap_events (
+        id BIGSERIAL PRIMARY KEY, created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        source_ip INET NOT NULL, device_name VARCHAR(255), event_type VARCHAR(100) NOT NULL,
+        severity VARCHAR(20) NOT NULL DEFAULT 'info', object_type VARCHAR(50),
+        object_id VARCHAR(255), description TEXT, details JSONB DEFAULT '{}',
+        trap_log_id BIGINT REFERENCES trap_log(id), alarm_id VARCHAR(255),
+        is_clear BOOLEAN DEFAULT FALSE, cleared_event_id BIGINT,
+        acknowledged BOOLEAN DEFAULT FALSE, acknowledged_at TIMESTAMPTZ, acknowledged_by VARCHAR(100),
+        occurrence_count INTEGER NOT NULL DEFAULT 1, last_seen_at TIMESTAMPTZ
+    );
+    CREATE TEMP TABLE IF NOT EXISTS netbox_device_cache (
+        netbox_device_id INTEGER PRIMARY KEY, device_ip INET, device_name VARCHAR(255),
+        device_type VARCHAR(255), manufacturer VARCHAR(100), site_id INTEGER,
+        site_name VARCHAR(255), role_name VARCHAR(100), tags TEXT[],
+        cached_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    );
+    INSERT INTO netbox_device_cache (netbox_device_id, device_ip, device_name, manufacturer)
+    VALUES (1, '127.0.0.1', 'bench-switch', 'Ciena') ON CONFLICT DO NOTHING;
+    CREATE OR REPLACE TEMP VIEW active_trap_alarms AS
+    SELECT e.id, e.alarm_id, e.severity, e.created_at, e.occurrence_count, e.last_seen_at
+    FROM trap_events e
+    WHERE e.is_clear = FALSE AND e.alarm_id IS NOT NULL
+      AND NOT EXISTS (
+          SELECT 1 FROM trap_events c
+          WHERE c.alarm_id = e.alarm_id AND c.is_clear = TRUE AND c.created_at > e.created_at
+      );
+"""
+
+STATUS_TABLE = """
+    CREATE TEMP TABLE IF NOT EXISTS trap_receiver_status (
+        id INTEGER PRIMARY KEY, started_at TIMESTAMPTZ, last_trap_at TIMESTAMPTZ,
+        traps_received BIGINT, traps_processed BIGINT, traps_errors BIGINT,
+        queue_depth INTEGER, is_running BOOLEAN, updated_at TIMESTAMPTZ
+    );
+    INSERT INTO trap_receiver_status (id) VALUES (1) ON CONFLICT DO NOTHING;
+"""
+
+SYS_UPTIME = '1.3.6.1.2.1.1.3.0'
+SNMP_TRAP_OID = '1.3.6.1.6.3.1.1.4.1.0'
+CIENA_RAISED = '1.3.6.1.4.1.6141.2.60.5.0.1'
+CIENA_CLEARED = '1.3.6.1.4.1.6141.2.60.5.0.2'
+LINK_DOWN = '1.3.6.1.6.3.1.1.5.3'
+LINK_UP = '1.3.6.1.6.3.1.1.5.4'
+
+
+def storm_pdus(count: int, devices: int, community: str) -> List[bytes]:
+    """Synthetic link-flap storm: each port raises twice, then clears."""
+    pdus = []
+    for n in range(count):
+        port = n % devices + 1
+        phase = n // devices % 3
+        if n % 2:
+            trap_oid = LINK_UP if phase == 2 else LINK_DOWN
+            extra = [(f'1.3.6.1.2.1.2.2.1.1.{port}', TAG_INTEGER, port)]
+        else:
+            trap_oid = CIENA_CLEARED if phase == 2 else CIENA_RAISED
+            extra = [
+                ('1.3.6.1.4.1.6141.2.60.5.1.1.1', TAG_OCTET_STRING, f'Port {port}'),
+                ('1.3.6.1.4.1.6141.2.60.5.1.1.2', TAG_INTEGER, 4),
+                ('1.3.6.1.4.1.6141.2.60.5.1.1.3', TAG_OCTET_STRING, f'Port {port} loss of signal'),
+                ('1.3.6.1.4.1.6141.2.60.5.1.1.5', TAG_OCTET_STRING, f'los-{port}'),
+            ]
+        pdus.append(encode_message(SNMP_VERSION_2C, community, PDU_TRAP_V2, n, [
+            (SYS_UPTIME, TAG_TIMETICKS, 100 + n),
+            (SNMP_TRAP_OID, TAG_OID, trap_oid),
+        ] + extra))
+    return pdus
+
+
+def decoded_traps(pdus: List[bytes]):
+    """Decode PDUs the way SNMPTrapReceiver._trap_callback does."""
+    from datetime import datetime, timezone
+    from backend.services.snmp_trap_receiver import DecodedTrap
+
+    traps = []
+    for n, pdu in enumerate(pdus):
+        uptime, trap_oid, varbinds = 0, '', {}
+        for oid, tag, value in decode_message(pdu).varbinds:
+            if oid == SYS_UPTIME:
+                uptime = int(value)
+            elif oid == SNMP_TRAP_OID:
+                trap_oid = value
+            else:
+                varbinds[oid] = value if tag == TAG_OID else render_value(tag, value)
+        traps.append(DecodedTrap(
+            received_at=datetime.now(timezone.utc), source_ip='127.0.0.1', source_port=40000 + n % 1000,
+            snmp_version='v2c', community='', enterprise_oid=trap_oid.rsplit('.', 2)[0],
+            trap_oid=trap_oid, generic_trap=0, specific_trap=0, uptime=uptime, varbinds=varbinds,
+        ))
+    return traps
+
+
+def run_writer_only(receiver, pdus: List[bytes], batch_size: int):
+    traps = decoded_traps(pdus)
+    started = time.perf_counter()
+    for i in range(0, len(traps), batch_size):
+        items = [item for item in map(receiver._route_trap, traps[i:i + batch_size]) if item]
+        receiver.traps_processed += receiver.writer.write(items)
+    elapsed = time.perf_counter() - started
+    print(f"Write stage: {len(traps)} traps in batches of {batch_size}")
+    print(f"  persisted  {receiver.traps_processed:>8} in {elapsed:6.2f}s  "
+          f"({receiver.traps_processed / elapsed:10.0f} traps/s, routing included)")
+
+
+class NullConnection:
+    """Status connection for --no-db: every statement is a no-op."""
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, *args):
+        pass
+
+    def fetchone(self):
+        return None
+
+
+def connect():
+    import psycopg2
+    from psycopg2.extras import RealDictCursor
+    conn = psycopg2.connect(
+        host=os.getenv('PG_HOST', 'localhost'),
+        port=int(os.getenv('PG_PORT', 5432)),
+        dbname=os.getenv('PG_DATABASE', 'network_scan'),
+        user=os.getenv('PG_USER', 'postgres'),
+        password=os.getenv('PG_PASSWORD', 'postgres'),
+        cursor_factory=RealDictCursor,
+    )
+    conn.autocommit = True
+    return conn
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def build_receiver(args, port: int, worker_index: int = 0, processes: int = 1):
+    from backend.services.device_directory import DeviceDirectory
+    from backend.services.snmp_trap_receiver import SNMPTrapReceiver
+
+    receiver = SNMPTrapReceiver('127.0.0.1', port, worker_index, processes)
+    receiver.communities = [args.community]
+    if args.no_db:
+        receiver.writer.write = len
+        receiver._update_status = lambda: asyncio.sleep(0)
+        receiver._get_db_connection = NullConnection
+    else:
+        conn = connect()
+        with conn.cursor() as cursor:
+            cursor.execute(TEMP_TABLES)
+        receiver.writer._connect = lambda: conn
+        receiver.writer.directory = DeviceDirectory(conn)
+        receiver.db_conn = connect()
+        with receiver.db_conn.cursor() as cursor:
+            cursor.execute(STATUS_TABLE)
+    return receiver
+
+
+def configure(args):
+    os.environ.setdefault('SNMP_TRAP_BATCH_SIZE', str(args.batch_size))
+    os.environ.setdefault('SNMP_TRAP_BATCH_MS', str(args.batch_ms))
+    os.environ.setdefault('SNMP_TRAP_QUEUE_SIZE', str(args.queue_size))
+    os.environ.setdefault('SNMP_TRAP_RCVBUF', str(args.rcvbuf))
+    os.environ.setdefault('DEVICE_DIRECTORY_LISTEN', 'false')
+
+
+def worker(args, port: int, worker_index: int, processes: int, counters, ready, stop, results):
+    """One receiver process; publishes received/processed/errors into counters."""
+    configure(args)
+    receiver = build_receiver(args, port, worker_index, processes)
+
+    def serve():
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        receiver.start()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    while receiver.snmp_engine is None or receiver.queue is None:
+        time.sleep(0.01)
+    ready.release()
+    base = worker_index * 3
+    while True:
+        counters[base:base + 3] = [receiver.traps_received, receiver.traps_processed, receiver.traps_errors]
+        if stop.wait(0.05):
+            break
+    receiver.snmp_engine.transport_dispatcher.loop.call_soon_threadsafe(receiver.stop)
+    thread.join(timeout=5)
+    counters[base:base + 3] = [receiver.traps_received, receiver.traps_processed, receiver.traps_errors]
+    results.put(None if args.no_db else receiver.writer.get_stats())
+
+
+def replay(args, pdus: List[bytes], processes: int) -> float:
+    """Replay into `processes` receivers; returns persisted traps/s."""
+    ctx = multiprocessing.get_context('spawn')
+    port = free_port()
+    counters = ctx.Array('q', processes * 3, lock=False)
+    ready = ctx.Semaphore(0)
+    stop = ctx.Event()
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=worker, args=(args, port, index, processes, counters, ready, stop, results))
+        for index in range(processes)
+    ]
+    for proc in procs:
+        proc.start()
+    for _ in procs:
+        ready.acquire()
+    time.sleep(0.5)
+
+    def totals():
+        return [sum(counters[i::3]) for i in range(3)]
+
+    # One socket per source address: steering hashes the source IP
+    socks = []
+    for n in range(args.sources):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((f'127.0.{n // 250}.{n % 250 + 1}', 0))
+        socks.append(sock)
+    interval = 1.0 / args.rate if args.rate else 0.0
+    print(f"Replaying {len(pdus)} traps to 127.0.0.1:{port} from {len(socks)} sources"
+          f" at {args.rate or 'max'} traps/s into {processes} process(es)"
+          f" ({'no db' if args.no_db else 'postgres'})")
+    started = time.perf_counter()
+    for n, pdu in enumerate(pdus):
+        socks[n % len(socks)].sendto(pdu, ('127.0.0.1', port))
+        if interval:
+            delay = started + (n + 1) * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    send_seconds = time.perf_counter() - started
+
+    # Wait until everything received is persisted, or progress stalls
+    last, progressed_at = -1, time.perf_counter()
+    while time.perf_counter() - progressed_at < args.idle:
+        _, processed, errors = totals()
+        done = processed + errors
+        if done != last:
+            last, progressed_at = done, time.perf_counter()
+        if done >= len(pdus):
+            break
+        time.sleep(0.01)
+    total_seconds = progressed_at - started
+
+    stop.set()
+    stats = [results.get(timeout=10) for _ in procs]
+    for proc in procs:
+        proc.join(timeout=5)
+    for sock in socks:
+        sock.close()
+
+    received, processed, errors = totals()
+    rate = processed / total_seconds
+    print(f"  sent       {len(pdus):>8} in {send_seconds:6.2f}s  ({len(pdus) / send_seconds:10.0f} traps/s)")
+    print(f"  received   {received:>8}  (lost in socket: {len(pdus) - received})")
+    print(f"  persisted  {processed:>8} in {total_seconds:6.2f}s  ({rate:10.0f} traps/s)")
+    print(f"  errors     {errors:>8}  (includes queue-full drops)")
+    print(f"  per process received: {list(counters[0::3])}")
+    for worker_stats in stats:
+        if worker_stats:
+            print_writer_stats(worker_stats)
+    return rate
+
+
+def main(args):
+    configure(args)
+
+    if args.replay:
+        with open(args.replay) as f:
+            pdus = [bytes.fromhex(line.strip()) for line in f if line.strip()]
+    else:
+        pdus = storm_pdus(args.traps, args.devices, args.community)
+    if args.record:
+        with open(args.record, 'w') as f:
+            f.writelines(pdu.hex() + '\n' for pdu in pdus)
+        print(f"Recorded {len(pdus)} PDUs to {args.record}")
+        return
+
+    if args.writer_only:
+        receiver = build_receiver(args, free_port())
+        run_writer_only(receiver, pdus, args.batch_size)
+        if not args.no_db:
+            print_writer_stats(receiver.writer.get_stats())
+        return
+
+    counts = [int(n) for n in args.processes.split(',')]
+    rates = [replay(args, pdus, processes) for processes in counts]
+    if len(counts) > 1:
+        print(f"Scaling ({os.cpu_count()} CPUs):")
+        for processes, rate in zip(counts, rates):
+            print(f"  {processes:>3} process(es)  {rate:10.0f} traps/s  "
+                  f"{rate / rates[0]:5.2f}x  ({rate / rates[0] / (processes / counts[0]):.0%} of linear)")
+
+
+def print_writer_stats(stats):
+    print(f"  writer     {stats['batches']} batches, avg {stats['avg_batch_size']} traps, "
+          f"{stats['traps_per_second']:.0f} traps/s write-side, "
+          f"{stats['events_written']} events, {stats['repeats']} repeats")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay a trap storm into SNMPTrapReceiver over local UDP")
+    parser.add_argument('--traps', type=int, default=50000)
+    parser.add_argument('--devices', type=int, default=500, help="Distinct ports in the synthetic storm")
+    parser.add_argument('--rate', type=float, default=5000, help="Send rate in traps/s (0 = as fast as possible)")
+    parser.add_argument('--community', default='public')
+    parser.add_argument('--replay', help="File of hex-encoded PDUs to replay instead of a synthetic storm")
+    parser.add_argument('--record', help="Write the synthetic storm to this file and exit")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--batch-ms', type=float, default=50)
+    parser.add_argument('--queue-size', type=int, default=100000)
+    parser.add_argument('--idle', type=float, default=3.0, help="Seconds without progress before giving up")
+    parser.add_argument('--no-db', action='store_true', help="Count batches instead of writing them")
+    parser.add_argument('--writer-only', action='store_true',
+                        help="Feed decoded PDUs straight to the batch writer (no UDP/pysnmp)")
+    parser.add_argument('--processes', default='1',
+                        help="Comma-separated receiver process counts to compare, e.g. 1,2,4")
+    parser.add_argument('--sources', type=int, default=64, help="Distinct loopback source addresses")
+    parser.add_argument('--rcvbuf', type=int, default=8 << 20,
+                        help="SO_RCVBUF per receiver socket (capped by net.core.rmem_max)")
+    main(parser.parse_args())
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Benchmark: linear-scan vs compiled trap routing and decode.
+
+Routes a trap mix through SNMPTrapReceiver's routing stage (vendor lookup,
+trap type decode, handler, varbind extraction) twice: once with the
+previous prefix scans re-created below, once with the compiled dispatch
+table. The mix is a recording (one hex-encoded datagram per line, as
+written by bench_trap_replay.py --record) or bench_trap_replay's link-flap
+storm plus traps from every other vendor, unknown enterprises and
+standard traps, which fall through the whole vendor scan.
+
+Run with: python backend/benchmarks/bench_trap_routing.py --traps 20000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.benchmarks.bench_trap_replay import (
+    SNMP_TRAP_OID, SYS_UPTIME, decoded_traps, storm_pdus,
+)
+from backend.services.snmp_trap_receiver import (
+    CienaTrapHandler, GenericTrapHandler, TrapRouter, _link_field_by_column,
+)
+from backend.services.snmp_transport import (
+    PDU_TRAP_V2, SNMP_VERSION_2C, TAG_INTEGER, TAG_OCTET_STRING, TAG_OID, TAG_TIMETICKS,
+    encode_message,
+)
+
+
+# (trap OID, varbinds) outside the Ciena alarm/link storm
+OTHER_TRAPS = [
+    ('1.3.6.1.4.1.6141.2.60.47.0.2', [('1.3.6.1.4.1.6141.2.60.47.1.1.1.3.1', TAG_OCTET_STRING, 'ring-1')]),
+    ('1.3.6.1.4.1.6141.2.60.6.0.1', [('1.3.6.1.4.1.6141.2.60.6.1.1.1.2.1', TAG_INTEGER, 3)]),
+    ('1.3.6.1.4.1.6141.2.60.2.0.2', [('1.3.6.1.2.1.2.2.1.1.9', TAG_INTEGER, 9),
+                                    ('1.3.6.1.2.1.31.1.1.1.1.9', TAG_OCTET_STRING, '9')]),
+    ('1.3.6.1.4.1.9.9.41.2.0.1', [('1.3.6.1.4.1.9.9.41.1.2.3.1.2.1', TAG_OCTET_STRING, 'LINK')]),
+    ('1.3.6.1.4.1.2636.4.1.1', [('1.3.6.1.4.1.2636.3.1.15.1.5.1', TAG_OCTET_STRING, 'PEM 0')]),
+    ('1.3.6.1.4.1.8072.4.0.2', []),
+    ('1.3.6.1.4.1.674.10892.1.0.1004', [('1.3.6.1.4.1.674.10892.1.5000.10.1', TAG_OCTET_STRING, 'fan')]),
+    ('1.3.6.1.4.1.30065.3.11.0.1', [('1.3.6.1.4.1.30065.3.11.1.1.1', TAG_INTEGER, 2)]),
+    ('1.3.6.1.6.3.1.1.5.1', []),
+    ('1.3.6.1.6.3.1.1.5.5', []),
+]
+
+
+def mixed_pdus(count: int, devices: int, community: str):
+    """Link-flap storm with every fourth trap from OTHER_TRAPS."""
+    storm = iter(storm_pdus(count, devices, community))
+    pdus = []
+    for n in range(count):
+        if n % 4 == 3:
+            trap_oid, extra = OTHER_TRAPS[n // 4 % len(OTHER_TRAPS)]
+            pdus.append(encode_message(SNMP_VERSION_2C, community, PDU_TRAP_V2, n, [
+                (SYS_UPTIME, TAG_TIMETICKS, 100 + n),
+                (SNMP_TRAP_OID, TAG_OID, trap_oid),
+            ] + extra))
+        else:
+            pdus.append(next(storm))
+    return pdus
+
+
+class LegacyRouter(TrapRouter):
+    """The router as it was before the compiled table (for comparison)."""
+
+    def dispatch(self, trap):
+        vendor = self.route(trap)
+        return vendor, self.handlers.get(vendor, self.handlers['generic']), None
+
+    def route(self, trap):
+        for prefix, vendor in self.VENDOR_OIDS.items():
+            if trap.enterprise_oid and trap.enterprise_oid.startswith(prefix):
+                return vendor
+            if trap.trap_oid and trap.trap_oid.startswith(prefix):
+                return vendor
+        if trap.trap_oid in self.STANDARD_TRAPS:
+            return 'standard'
+        return 'generic'
+
+
+class LegacyExtractor:
+    """Classifies every varbind on every trap, as the old handler loops did."""
+
+    def __init__(self, rule):
+        self.rule = rule
+
+    def extract(self, varbinds):
+        fields = {}
+        for oid, value in varbinds.items():
+            name = self.rule(oid)
+            if name is not None:
+                fields[name] = value
+        return fields
+
+
+def legacy_alarm_field(oid):
+    if '6141.2.60.5.1.1.1' in oid or oid.endswith('.1'):
+        return 'alarm_object'
+    elif '6141.2.60.5.1.1.2' in oid or oid.endswith('.2'):
+        return 'alarm_severity'
+    elif '6141.2.60.5.1.1.3' in oid or oid.endswith('.3'):
+        return 'alarm_description'
+    elif '6141.2.60.5.1.1.5' in oid:
+        return 'alarm_id'
+    return None
+
+
+def legacy_raps_field(oid):
+    if 'ringId' in oid.lower() or '.47.' in oid:
+        return 'ring_id'
+    if 'state' in oid.lower():
+        return 'ring_state'
+    return None
+
+
+class LegacyCienaTrapHandler(CienaTrapHandler):
+    """Ciena handler with per-trap type scans and varbind matching."""
+
+    ALARM_FIELDS = LegacyExtractor(legacy_alarm_field)
+    LINK_FIELDS = LegacyExtractor(_link_field_by_column)
+    RAPS_FIELDS = LegacyExtractor(legacy_raps_field)
+
+    def handle(self, trap, decoded=None):
+        trap_type, handler = self.resolve(trap.trap_oid)
+        return handler(trap, trap_type)
+
+    def _get_trap_type(self, trap_oid):
+        if trap_oid in self.TRAP_TYPES:
+            return self.TRAP_TYPES[trap_oid]
+        for oid, name in self.TRAP_TYPES.items():
+            if trap_oid.startswith(oid):
+                return name
+        return 'unknown'
+
+
+def handlers(ciena):
+    generic = GenericTrapHandler()
+    return {
+        'ciena': ciena, 'generic': generic, 'standard': generic, 'cisco': generic,
+        'juniper': generic, 'linux': generic, 'hp': generic, 'dell': generic,
+    }
+
+
+def route_all(router, traps):
+    events = []
+    for trap in traps:
+        vendor, handler, decoded = router.dispatch(trap)
+        events.append((vendor, handler.handle(trap, decoded)))
+    return events
+
+
+def dispatch_all(router, traps):
+    """Vendor and trap type only (the legacy handler decoded on every trap)."""
+    decoded_types = []
+    for trap in traps:
+        vendor, handler, decoded = router.dispatch(trap)
+        if decoded is None:
+            decoded = handler.resolve(trap.trap_oid)
+        decoded_types.append((vendor, decoded))
+    return decoded_types
+
+
+def timed(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        out = fn()
+    return (time.perf_counter() - start) / iterations, out
+
+
+def main(args):
+    if args.replay:
+        with open(args.replay) as f:
+            pdus = [bytes.fromhex(line.strip()) for line in f if line.strip()]
+    else:
+        pdus = mixed_pdus(args.traps, args.devices, 'public')
+    traps = decoded_traps(pdus)
+    print(f"{len(traps)} traps, {len({t.trap_oid for t in traps})} distinct trap OIDs")
+
+    legacy = LegacyRouter()
+    legacy.handlers = handlers(LegacyCienaTrapHandler())
+    compiled = TrapRouter(handlers(CienaTrapHandler()))
+
+    stages = (
+        ('dispatch', dispatch_all),
+        ('dispatch + handler', route_all),
+    )
+    for stage, fn in stages:
+        legacy_s, legacy_out = timed(lambda: fn(legacy, traps), args.iterations)
+        compiled_s, compiled_out = timed(lambda: fn(compiled, traps), args.iterations)
+        if fn is route_all:
+            assert compiled_out == legacy_out
+
+        print(stage)
+        for name, seconds in (('linear scan', legacy_s), ('compiled', compiled_s)):
+            print(f"  {name:12} {seconds / len(traps) * 1e6:8.2f} us/trap  {len(traps) / seconds:12.0f} traps/s")
+        print(f"  speedup      {legacy_s / compiled_s:8.1f}x")
+    print(f"decode cache {compiled.table.get_stats()}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark trap routing and decode")
+    parser.add_argument('--traps', type=int, default=20000)
+    parser.add_argument('--devices', type=int, default=500, help="Distinct ports in the synthetic storm")
+    parser.add_argument('--replay', help="File of hex-encoded PDUs (bench_trap_replay.py --record)")
+    parser.add_argument('--iterations', type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,209 @@
+"""
+Local NetBox REST API stub.
+
+Serves dcim/devices/ (and an empty virtualization/virtual-machines/) the way
+NetBox 4 does: limit/offset pagination capped at MAX_PAGE_SIZE with
+count/next, ?fields= selection with nested objects in brief form, ?brief=,
+last_updated__gte and ordering=id. Full device objects carry the bulky
+fields a real NetBox returns (config context, custom fields, comments) so
+payload sizes are realistic. Used by benchmarks and tests to exercise the
+NetBox readers without a NetBox instance.
+"""
+
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+_BRIEF = {
+    'primary_ip': ('id', 'url', 'display', 'family', 'address', 'description'),
+    'device_type': ('id', 'url', 'display', 'manufacturer', 'model', 'slug', 'description'),
+    'site': ('id', 'url', 'display', 'name', 'slug', 'description'),
+    'role': ('id', 'url', 'display', 'name', 'slug', 'description'),
+}
+
+
+def build_device(device_id: int, last_updated: datetime, sites: int = 50, rev: int = 0) -> Dict:
+    """A full NetBox 4 device object."""
+    site_id = 1 + device_id % sites
+    manufacturer = {'id': 1, 'url': '/api/dcim/manufacturers/1/', 'display': 'Ciena',
+                    'name': 'Ciena', 'slug': 'ciena', 'description': ''}
+    return {
+        'id': device_id,
+        'url': f'/api/dcim/devices/{device_id}/',
+        'display': f'sw-{device_id:05d}',
+        'name': f'sw-{device_id:05d}' + (f'-r{rev}' if rev else ''),
+        'device_type': {'id': 3, 'url': '/api/dcim/device-types/3/', 'display': '5160',
+                        'manufacturer': manufacturer, 'model': '5160', 'slug': '5160',
+                        'description': '', 'device_count': 0},
+        'role': {'id': 2, 'url': '/api/dcim/device-roles/2/', 'display': 'Access Switch',
+                 'name': 'Access Switch', 'slug': 'access-switch', 'description': ''},
+        'tenant': None,
+        'platform': {'id': 1, 'url': '/api/dcim/platforms/1/', 'display': 'SAOS',
+                     'name': 'SAOS', 'slug': 'saos', 'description': ''},
+        'serial': f'M{device_id:09d}',
+        'asset_tag': None,
+        'site': {'id': site_id, 'url': f'/api/dcim/sites/{site_id}/', 'display': f'Site {site_id}',
+                 'name': f'Site {site_id}', 'slug': f'site-{site_id}', 'description': ''},
+        'location': None,
+        'rack': None,
+        'position': None,
+        'face': None,
+        'latitude': None,
+        'longitude': None,
+        'parent_device': None,
+        'status': {'value': 'active', 'label': 'Active'},
+        'airflow': None,
+        'primary_ip': {'id': device_id, 'url': f'/api/ipam/ip-addresses/{device_id}/',
+                       'display': f'10.{device_id // 65536}.{device_id // 256 % 256}.{device_id % 256}/24',
+                       'family': {'value': 4, 'label': 'IPv4'},
+                       'address': f'10.{device_id // 65536}.{device_id // 256 % 256}.{device_id % 256}/24',
+                       'description': ''},
+        'primary_ip4': None,
+        'primary_ip6': None,
+        'oob_ip': None,
+        'cluster': None,
+        'virtual_chassis': None,
+        'vc_position': None,
+        'vc_priority': None,
+        'description': '',
+        'comments': 'Installed by field services. ' * 8,
+        'config_template': None,
+        'config_context': {'ntp': ['10.255.0.1', '10.255.0.2'], 'syslog': ['10.255.1.1'],
+                           'snmp': {'community': 'public', 'location': f'Site {site_id}'}},
+        'local_context_data': None,
+        'tags': [{'id': 1, 'url': '/api/extras/tags/1/', 'display': 'managed',
+                  'name': 'managed', 'slug': 'managed', 'color': '9e9e9e'}],
+        'custom_fields': {'circuit_id': f'CKT-{device_id}', 'install_date': '2024-05-01',
+                          'support_contract': 'GOLD', 'rack_unit': None},
+        'created': '2024-05-01T00:00:00Z',
+        'last_updated': last_updated.isoformat().replace('+00:00', 'Z'),
+        'console_port_count': 1,
+        'interface_count': 28,
+        'module_bay_count': 0,
+    }
+
+
+def _brief(value, key):
+    if isinstance(value, dict) and key in _BRIEF:
+        return {k: value[k] for k in _BRIEF[key] if k in value}
+    return value
+
+
+class NetBoxAPIStub:
+    """
+    HTTP server presenting a NetBox device inventory.
+
+    Args:
+        num_devices: Devices served (ids 1..num_devices)
+        latency: Seconds added to each request (network + NetBox query time)
+        row_latency: Seconds added per object served (NetBox serialization)
+        max_page_size: Largest page served, like NetBox's MAX_PAGE_SIZE
+    """
+
+    def __init__(self, num_devices: int = 1000, latency: float = 0.0, row_latency: float = 0.0,
+                 max_page_size: int = 1000):
+        self.latency = latency
+        self.row_latency = row_latency
+        self.max_page_size = max_page_size
+        self.requests_served = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._clock = EPOCH
+        self._devices: List[Dict] = []
+        for device_id in range(1, num_devices + 1):
+            self._devices.append(build_device(device_id, self._tick()))
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def _tick(self) -> datetime:
+        self._clock += timedelta(milliseconds=1)
+        return self._clock
+
+    def touch(self, count: int):
+        """Rename the first count devices, bumping their last_updated."""
+        with self._lock:
+            for device in self._devices[:count]:
+                rev = int(device['name'].rsplit('-r', 1)[1]) + 1 if '-r' in device['name'] else 1
+                self._devices[device['id'] - 1] = build_device(device['id'], self._tick(), rev=rev)
+
+    def start(self, host: str = '127.0.0.1', port: int = 0) -> Tuple[str, int]:
+        """Serve in a background thread and return the bound (host, port)."""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub._handle(self)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server.server_address
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _handle(self, handler: BaseHTTPRequestHandler):
+        if self.latency:
+            time.sleep(self.latency)
+        parsed = urlparse(handler.path)
+        query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        if parsed.path.rstrip('/') == '/api/dcim/devices':
+            body = self._list(parsed.path, query)
+            status = 200
+        elif parsed.path.rstrip('/') == '/api/virtualization/virtual-machines':
+            body = {'count': 0, 'next': None, 'previous': None, 'results': []}
+            status = 200
+        else:
+            body, status = {'detail': 'Not found.'}, 404
+        if self.row_latency and body.get('results'):
+            time.sleep(self.row_latency * len(body['results']))
+        payload = json.dumps(body).encode()
+        with self._lock:
+            self.requests_served += 1
+            self.bytes_sent += len(payload)
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def _list(self, path: str, query: Dict[str, str]) -> Dict:
+        with self._lock:
+            devices = list(self._devices)
+        since = query.get('last_updated__gte')
+        if since:
+            since_dt = datetime.fromisoformat(since.replace('Z', '+00:00'))
+            devices = [d for d in devices
+                       if datetime.fromisoformat(d['last_updated'].replace('Z', '+00:00')) >= since_dt]
+        limit = min(int(query.get('limit', 50)) or self.max_page_size, self.max_page_size)
+        offset = int(query.get('offset', 0))
+        page = devices[offset:offset + limit]
+
+        if query.get('fields'):
+            fields = query['fields'].split(',')
+            page = [{f: _brief(d[f], f) for f in fields if f in d} for d in page]
+        elif query.get('brief', '').lower() in ('1', 'true'):
+            page = [{k: d[k] for k in ('id', 'url', 'display', 'name', 'description')} for d in page]
+
+        next_url = None
+        if offset + limit < len(devices):
+            params = {**query, 'limit': limit, 'offset': offset + limit}
+            next_url = f"{self.url}{path}?" + '&'.join(f'{k}={v}' for k, v in params.items())
+        return {'count': len(devices), 'next': next_url, 'previous': None, 'results': page}
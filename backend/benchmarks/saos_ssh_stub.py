@@ -0,0 +1,254 @@
+"""
+Local Ciena SAOS SSH shell stub.
+
+A paramiko SSH server with a SAOS-like interactive shell: hostname prompt,
+--More-- paging until 'system shell set more off', '!' comment lines, and
+canned output for the commands CienaSSHService polls. Used by benchmarks
+and tests to exercise the SSH services without real switches.
+"""
+
+import queue
+import socket
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import paramiko
+
+
+def _table(header, rows):
+    width = [max(len(str(r[i])) for r in [header] + rows) for i in range(len(header))]
+    line = '+' + '+'.join('-' * (w + 2) for w in width) + '+'
+    fmt = lambda r: '| ' + ' | '.join(str(v).ljust(w) for v, w in zip(r, width)) + ' |'
+    return '\n'.join([line, fmt(header), line] + [fmt(r) for r in rows] + [line])
+
+
+def build_saos_outputs(num_ports: int = 24, hostname: str = 'stub-5160') -> Dict[str, str]:
+    """Canned command outputs for a SAOS 3942/5160-style switch."""
+    ports = range(1, num_ports + 1)
+    optical = []
+    for port in ports:
+        optical.append(f"+------------- XCVR DIAGNOSTICS - Port {port} -------------+")
+        optical.append(_table(
+            ['Parameter', 'Value', 'Threshold', 'Alarm'],
+            [['Temp (C)', '+35.1200', 'HIGH +75.0000', '0'],
+             ['Vcc (volts)', '3.3000', '', '0'],
+             ['Bias (mA)', '6.4000', '', '0'],
+             ['Tx Power (mW)', '0.5000', '', '0'],
+             ['Tx Power (dBm)', '-3.0103', 'HIGH +5.0000', '0'],
+             ['', '', 'LOW -8.0000', '0'],
+             ['Rx Power (mW)', '0.3000', '', '0'],
+             ['Rx Power (dBm)', '-5.2288', 'HIGH +2.0000', '0'],
+             ['', '', 'LOW -20.0000', '0']],
+        ))
+    pm = []
+    for port in ports:
+        pm.append(_table(['Instance Name', str(port)], [
+            ['Rx Bytes', port * 1000], ['Tx Bytes', port * 2000],
+            ['Rx Frames', port * 10], ['Tx Frames', port * 20],
+        ]))
+    return {
+        'port xcvr show port 1-24 diagnostics': '\n'.join(optical),
+        'port show': _table(
+            ['Port', 'Name', 'Type', 'Admin', 'Oper', 'Speed', 'Duplex', 'STP'],
+            [[p, f'port{p}', '10/100/G', 'Ena', 'Up', '1000', 'FULL', 'Fwd'] for p in ports],
+        ),
+        'pm show pm-instance 1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,17,18,19,20,21,22,23,24 bin-number 1': '\n'.join(pm),
+        'alarm show': _table(
+            ['Idx', 'Sev', 'Cond', 'Object', 'Time', 'Description'],
+            [[1, 'major', 'SET', 'port 21', '2026-01-01 00:00:00', 'Link down']],
+        ),
+        'chassis show': _table(['Fan', 'Status'], [[1, 'ok'], [2, 'ok']]),
+        'ring-protection virtual-ring show': _table(
+            ['Name', 'State', 'West', 'WState', 'East', 'EState'],
+            [['ring1', 'ok', 21, 'fwd', 22, 'fwd']],
+        ),
+        'system show': _table(['Attribute', 'Value'], [['Host Name', hostname], ['Software', 'saos-06-20-00']]),
+        'system shell set more off': '',
+    }
+
+
+class _ShellServer(paramiko.ServerInterface):
+    def __init__(self, stub: 'SAOSShellStub'):
+        self.stub = stub
+        # ('shell', None) or ('exec', command) per accepted channel
+        self.requests: 'queue.Queue' = queue.Queue()
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED if kind == 'session' else paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        time.sleep(self.stub.auth_delay)
+        if (username, password) == (self.stub.username, self.stub.password):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_pty_request(self, *args):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        self.requests.put(('shell', None))
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        self.requests.put(('exec', command.decode(errors='ignore').strip()))
+        return True
+
+
+class SAOSShellStub:
+    """
+    SSH server presenting a SAOS-like shell.
+
+    Args:
+        outputs: Mapping of command -> output (build_saos_outputs() by default)
+        hostname: Prompt hostname ("<hostname>> ")
+        auth_delay: Seconds added to each password check (KEX + auth cost)
+        command_delay: Seconds each command takes before its output appears
+        rtt: Seconds added once per chunk of input received (network round trip)
+        page_lines: Lines per --More-- page until paging is turned off
+        host_key: Server key to present (a new 2048-bit RSA key by default;
+            share one across many stubs to skip generating each)
+    """
+
+    def __init__(
+        self,
+        outputs: Dict[str, str] = None,
+        hostname: str = 'stub-5160',
+        username: str = 'su',
+        password: str = 'wwp',
+        auth_delay: float = 0.0,
+        command_delay: float = 0.0,
+        rtt: float = 0.0,
+        page_lines: int = 24,
+        host_key: paramiko.PKey = None,
+    ):
+        self.outputs = outputs or build_saos_outputs(hostname=hostname)
+        self.hostname = hostname
+        self.username = username
+        self.password = password
+        self.auth_delay = auth_delay
+        self.command_delay = command_delay
+        self.rtt = rtt
+        self.page_lines = page_lines
+        self.host_key = host_key or paramiko.RSAKey.generate(2048)
+        self.address: Optional[Tuple[str, int]] = None
+        self.connections = 0
+        self.commands_run = 0
+        self._socket: Optional[socket.socket] = None
+        self._stopped = threading.Event()
+
+    def start(self, host: str = '127.0.0.1', port: int = 0) -> Tuple[str, int]:
+        """Listen in a background thread and return the bound (host, port)."""
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((host, port))
+        self._socket.listen(128)
+        self.address = self._socket.getsockname()
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        return self.address
+
+    def stop(self):
+        self._stopped.set()
+        if self._socket:
+            self._socket.close()
+
+    def _accept_loop(self):
+        while not self._stopped.is_set():
+            try:
+                sock, _ = self._socket.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._serve_transport, args=(sock,), daemon=True).start()
+
+    def _serve_transport(self, sock):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        transport = paramiko.Transport(sock)
+        transport.add_server_key(self.host_key)
+        server = _ShellServer(self)
+        try:
+            transport.start_server(server=server)
+        except paramiko.SSHException:
+            return
+        while transport.is_active() and not self._stopped.is_set():
+            channel = transport.accept(1)
+            if channel is None:
+                continue
+            try:
+                kind, command = server.requests.get(timeout=5)
+            except queue.Empty:
+                channel.close()
+                continue
+            serve = self._serve_shell if kind == 'shell' else self._serve_exec
+            args = (channel,) if kind == 'shell' else (channel, command)
+            threading.Thread(target=serve, args=args, daemon=True).start()
+
+    def _serve_exec(self, channel, command: str):
+        try:
+            if self.rtt:
+                time.sleep(self.rtt)
+            self.commands_run += 1
+            if self.command_delay:
+                time.sleep(self.command_delay)
+            output = self.outputs.get(command)
+            if output is None:
+                channel.sendall_stderr(f'SHELL PARSER FAILURE: {command}\n')
+                channel.send_exit_status(1)
+            else:
+                channel.sendall(output + '\n')
+                channel.send_exit_status(0)
+        except (EOFError, OSError, paramiko.SSHException):
+            pass
+        finally:
+            channel.close()
+
+    def _serve_shell(self, channel):
+        prompt = f'{self.hostname}> '
+        paging = True
+        try:
+            channel.sendall(f'\r\nSAOS stub shell\r\n\r\n{prompt}')
+            buffer = b''
+            while True:
+                data = channel.recv(4096)
+                if not data:
+                    return
+                if self.rtt:
+                    time.sleep(self.rtt)
+                buffer += data
+                while b'\n' in buffer:
+                    raw, buffer = buffer.split(b'\n', 1)
+                    line = raw.decode(errors='ignore').strip('\r')
+                    # Type-ahead is echoed when the shell reads it
+                    channel.sendall(line + '\r\n')
+                    command = line.strip()
+                    if command == 'system shell set more off':
+                        paging = False
+                    if command and not command.startswith('!'):
+                        self.commands_run += 1
+                        if self.command_delay:
+                            time.sleep(self.command_delay)
+                        output = self.outputs.get(command)
+                        if output is None:
+                            output = f'SHELL PARSER FAILURE: {command}'
+                        if not self._send_output(channel, output, paging):
+                            return
+                    channel.sendall(prompt)
+        except (EOFError, OSError, paramiko.SSHException):
+            return
+        finally:
+            channel.close()
+
+    def _send_output(self, channel, output: str, paging: bool) -> bool:
+        lines = output.split('\n') if output else []
+        for start in range(0, len(lines), self.page_lines if paging else max(1, len(lines))):
+            page = lines[start:start + (self.page_lines if paging else len(lines))]
+            channel.sendall('\r\n'.join(page) + '\r\n')
+            if paging and start + self.page_lines < len(lines):
+                channel.sendall('--More--')
+                if not channel.recv(1):
+                    return False
+                channel.sendall('\x08' * 8 + ' ' * 8 + '\x08' * 8)
+        return True
@@ -0,0 +1,172 @@
+"""
+Local SNMP agent stub.
+
+A tiny asyncio UDP responder serving a static MIB (GET, GETNEXT, GETBULK)
+over the native BER codec. Used by benchmarks and tests to exercise the
+SNMP engines without real devices.
+"""
+
+import asyncio
+import bisect
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.services.snmp_transport import (
+    PDU_GET, PDU_GETNEXT, PDU_GETBULK, PDU_RESPONSE,
+    TAG_COUNTER64, TAG_END_OF_MIB_VIEW, TAG_INTEGER, TAG_NO_SUCH_OBJECT,
+    TAG_OCTET_STRING, TAG_TIMETICKS,
+    SNMPDecodeError, decode_message, encode_message,
+)
+
+
+def _oid_key(oid: str) -> Tuple[int, ...]:
+    return tuple(int(arc) for arc in oid.strip('.').split('.'))
+
+
+def build_interface_mib(num_ports: int = 48, sys_name: str = "stub-switch") -> Dict[str, Tuple[int, Any]]:
+    """Build a MIB with system scalars and an ifXTable-style counter table."""
+    mib = {
+        '1.3.6.1.2.1.1.1.0': (TAG_OCTET_STRING, b'Ciena SAOS stub agent'),
+        '1.3.6.1.2.1.1.3.0': (TAG_TIMETICKS, 123456789),
+        '1.3.6.1.2.1.1.5.0': (TAG_OCTET_STRING, sys_name.encode()),
+    }
+    for port in range(1, num_ports + 1):
+        mib[f'1.3.6.1.2.1.31.1.1.1.1.{port}'] = (TAG_OCTET_STRING, f'port{port}'.encode())
+        mib[f'1.3.6.1.2.1.31.1.1.1.6.{port}'] = (TAG_COUNTER64, 10_000_000_000 + port * 1000)
+        mib[f'1.3.6.1.2.1.31.1.1.1.7.{port}'] = (TAG_COUNTER64, 5_000_000 + port)
+        mib[f'1.3.6.1.2.1.31.1.1.1.10.{port}'] = (TAG_COUNTER64, 20_000_000_000 + port * 1000)
+        mib[f'1.3.6.1.2.1.31.1.1.1.11.{port}'] = (TAG_COUNTER64, 6_000_000 + port)
+        mib[f'1.3.6.1.2.1.2.2.1.14.{port}'] = (TAG_INTEGER, port % 3)
+        mib[f'1.3.6.1.2.1.2.2.1.13.{port}'] = (TAG_INTEGER, 0)
+    return mib
+
+
+def build_ciena_mib(num_rings: int = 2, num_alarms: int = 3, sys_name: str = "stub-5160") -> Dict[str, Tuple[int, Any]]:
+    """Build a SAOS-style MIB: system scalars, RAPS global and virtual rings, CES active alarms."""
+    from backend.services.ciena_snmp_service import CES_ALARM_OIDS, WWP_OIDS
+
+    mib = {
+        '1.3.6.1.2.1.1.1.0': (TAG_OCTET_STRING, b'Ciena 5160 SAOS 6.20 stub agent'),
+        '1.3.6.1.2.1.1.3.0': (TAG_TIMETICKS, 123456789),
+        '1.3.6.1.2.1.1.4.0': (TAG_OCTET_STRING, b'noc@example.net'),
+        '1.3.6.1.2.1.1.5.0': (TAG_OCTET_STRING, sys_name.encode()),
+        '1.3.6.1.2.1.1.6.0': (TAG_OCTET_STRING, b'stub rack'),
+        WWP_OIDS['raps']['global_state']: (TAG_INTEGER, 2),
+        WWP_OIDS['raps']['node_id']: (TAG_OCTET_STRING, b'00:03:18:00:00:01'),
+        WWP_OIDS['raps']['num_rings']: (TAG_INTEGER, num_rings),
+    }
+    for ring in range(1, num_rings + 1):
+        for attr, base_oid in WWP_OIDS['virtual_ring'].items():
+            value = (TAG_OCTET_STRING, f'VR{ring}'.encode()) if attr == 'name' else (TAG_INTEGER, 2)
+            mib[f'{base_oid}.{ring}'] = value
+    for alarm in range(1, num_alarms + 1):
+        mib[f"{CES_ALARM_OIDS['active_severity']}.{alarm}"] = (TAG_INTEGER, 4)
+        mib[f"{CES_ALARM_OIDS['active_object_class']}.{alarm}"] = (TAG_INTEGER, 4)
+        mib[f"{CES_ALARM_OIDS['active_object_interpret']}.{alarm}"] = (TAG_OCTET_STRING, b'Port ID')
+        mib[f"{CES_ALARM_OIDS['active_object_instance']}.{alarm}"] = (TAG_OCTET_STRING, str(20 + alarm).encode())
+        mib[f"{CES_ALARM_OIDS['active_acknowledged']}.{alarm}"] = (TAG_INTEGER, 2)
+        mib[f"{CES_ALARM_OIDS['active_description']}.{alarm}"] = (TAG_OCTET_STRING, b'Link down')
+        mib[f"{CES_ALARM_OIDS['active_timestamp']}.{alarm}"] = (TAG_OCTET_STRING, b'2026-01-01 00:00:00')
+    return mib
+
+
+class SNMPAgentStub(asyncio.DatagramProtocol):
+    """
+    Static-MIB SNMP responder.
+    
+    Args:
+        mib: Mapping of OID -> (tag, value)
+        community: Community string to accept (others are ignored)
+        latency: Seconds to delay each response
+        drop_rate: Fraction of requests silently dropped (0.0 - 1.0)
+    """
+    
+    def __init__(
+        self,
+        mib: Dict[str, Tuple[int, Any]],
+        community: str = 'public',
+        latency: float = 0.0,
+        drop_rate: float = 0.0,
+    ):
+        self.mib = {oid.strip('.'): value for oid, value in mib.items()}
+        self.sorted_oids = sorted(self.mib, key=_oid_key)
+        self._sorted_keys = [_oid_key(oid) for oid in self.sorted_oids]
+        self.community = community
+        self.latency = latency
+        self.drop_rate = drop_rate
+        self.requests_received = 0
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.address: Optional[Tuple[str, int]] = None
+    
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> Tuple[str, int]:
+        """Bind the stub and return its (host, port)."""
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: self, local_addr=(host, port)
+        )
+        self.address = self.transport.get_extra_info('sockname')[:2]
+        return self.address
+    
+    def stop(self):
+        if self.transport:
+            self.transport.close()
+            self.transport = None
+    
+    def _next(self, oid: str) -> Optional[str]:
+        idx = bisect.bisect_right(self._sorted_keys, _oid_key(oid))
+        return self.sorted_oids[idx] if idx < len(self.sorted_oids) else None
+    
+    def _respond(self, request) -> List[Tuple[str, int, Any]]:
+        names = [vb[0] for vb in request.varbinds]
+        if request.pdu_type == PDU_GET:
+            return [(oid, *self.mib.get(oid, (TAG_NO_SUCH_OBJECT, None))) for oid in names]
+        if request.pdu_type == PDU_GETNEXT:
+            out = []
+            for oid in names:
+                nxt = self._next(oid)
+                out.append((nxt, *self.mib[nxt]) if nxt else (oid, TAG_END_OF_MIB_VIEW, None))
+            return out
+        # GETBULK: error_status = non-repeaters, error_index = max-repetitions
+        non_repeaters = max(0, request.error_status)
+        max_repetitions = max(0, request.error_index)
+        out = []
+        for oid in names[:non_repeaters]:
+            nxt = self._next(oid)
+            out.append((nxt, *self.mib[nxt]) if nxt else (oid, TAG_END_OF_MIB_VIEW, None))
+        cursors = names[non_repeaters:]
+        for _ in range(max_repetitions):
+            for i, oid in enumerate(cursors):
+                nxt = self._next(oid) if oid else None
+                if nxt:
+                    out.append((nxt, *self.mib[nxt]))
+                    cursors[i] = nxt
+                else:
+                    out.append((oid or names[non_repeaters + i], TAG_END_OF_MIB_VIEW, None))
+                    cursors[i] = None
+        return out
+    
+    def datagram_received(self, data: bytes, addr):
+        try:
+            request = decode_message(data)
+        except SNMPDecodeError:
+            return
+        if request.community != self.community:
+            return
+        if request.pdu_type not in (PDU_GET, PDU_GETNEXT, PDU_GETBULK):
+            return
+        self.requests_received += 1
+        if self.drop_rate and random.random() < self.drop_rate:
+            return
+        
+        payload = encode_message(
+            request.version, request.community, PDU_RESPONSE,
+            request.request_id, self._respond(request),
+        )
+        if self.latency:
+            asyncio.get_running_loop().call_later(self.latency, self._send, payload, addr)
+        else:
+            self._send(payload, addr)
+    
+    def _send(self, payload: bytes, addr):
+        if self.transport:
+            self.transport.sendto(payload, addr)
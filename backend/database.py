@@ -1,68 +1,484 @@
 """
 Database connection management for backend.
 
-Provides a centralized database connection that can be used by repositories.
+Provides a centralized, pooled database connection manager used by
+repositories and services.
+
+Connections come from one bounded pool per process:
+- cursor() / connection() check a connection out for the calling thread and
+  return it when the outermost block exits; nested blocks on the same thread
+  reuse it, so a helper called inside another helper's cursor never waits
+  for a second connection
+- transaction() checks out a dedicated, non-autocommit connection and
+  commits or rolls back on exit
+- when the pool is at DB_POOL_MAX, checkouts wait up to DB_POOL_TIMEOUT
+  seconds, then raise PoolExhausted
+- connections that are closed, or fail a ping after sitting idle, are
+  replaced at checkout; ones that were lost mid-use are discarded on return
+- every statement runs under DB_STATEMENT_TIMEOUT_MS
+
+get_stats() reports pool size, checkout counts, pool-wait time and
+per-statement latency histograms.
 """
 
 import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import threading
+import time
 from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+import psycopg2.pool
+
+
+POOL_MIN = int(os.environ.get('DB_POOL_MIN', '2'))
+POOL_MAX = int(os.environ.get('DB_POOL_MAX', '40'))
+POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '30'))
+STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', '300000'))
+# Idle connections are pinged before reuse after this long, and closed
+# (down to POOL_MIN) after IDLE_TIMEOUT
+IDLE_CHECK_SECONDS = float(os.environ.get('DB_POOL_IDLE_CHECK', '30'))
+IDLE_TIMEOUT_SECONDS = float(os.environ.get('DB_POOL_IDLE_TIMEOUT', '300'))
+
+# Upper bounds (ms) of the per-statement latency histogram buckets
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+_BROKEN = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class PoolExhausted(psycopg2.pool.PoolError):
+    """No connection became free within DB_POOL_TIMEOUT."""
+
+
+def _new_sketch():
+    # Imported late: backend.services imports this module
+    from backend.services.latency_sketch import LatencySketch
+    return LatencySketch()
+
+
+class PoolStats:
+    """Thread-safe checkout and statement counters for one pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.waited = 0
+            self.timeouts = 0
+            self.connects = 0
+            self.reconnects = 0
+            self.discarded = 0
+            self.wait = None
+            self.queries: Dict[str, Any] = {}
+            self.histogram: Dict[str, list] = {}
+            self.query_errors = 0
+
+    def record_checkout(self, wait_seconds: float, waited: bool):
+        with self._lock:
+            self.checkouts += 1
+            if waited:
+                self.waited += 1
+            if self.wait is None:
+                self.wait = _new_sketch()
+            self.wait.add(wait_seconds)
+
+    def record_query(self, verb: str, seconds: float, failed: bool):
+        with self._lock:
+            sketch = self.queries.get(verb)
+            if sketch is None:
+                sketch = self.queries[verb] = _new_sketch()
+                self.histogram[verb] = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+            sketch.add(seconds)
+            ms = seconds * 1000
+            bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if ms <= bound),
+                          len(LATENCY_BUCKETS_MS))
+            self.histogram[verb][bucket] += 1
+            if failed:
+                self.query_errors += 1
+
+    def count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"le_{bound}ms" for bound in LATENCY_BUCKETS_MS] + ['inf']
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'checkouts_waited': self.waited,
+                'checkout_timeouts': self.timeouts,
+                'connects': self.connects,
+                'reconnects': self.reconnects,
+                'discarded': self.discarded,
+                'pool_wait': self.wait.summary() if self.wait else _new_sketch().summary(),
+                'query_errors': self.query_errors,
+                'queries': {verb: sketch.summary() for verb, sketch in self.queries.items()},
+                'query_histogram': {verb: dict(zip(labels, counts))
+                                    for verb, counts in self.histogram.items()},
+            }
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that carries its pool's stats and idle time."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats: Optional[PoolStats] = None
+        self.last_used = time.monotonic()
+
+
+def _statement_verb(query) -> str:
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    elif not isinstance(query, str):
+        return 'OTHER'  # psycopg2.sql.Composed
+    words = query.lstrip(' \t\r\n(').split(None, 1)
+    verb = words[0].upper() if words else ''
+    return verb if verb in ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH') else 'OTHER'
+
+
+class _TimedCursorMixin:
+    """Records each statement's latency in the connection's PoolStats."""
+
+    def _timed(self, method, query, args):
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = method(query, args)
+            failed = False
+            return result
+        finally:
+            stats = getattr(self.connection, 'stats', None)
+            if stats is not None:
+                stats.record_query(_statement_verb(query), time.perf_counter() - start, failed)
+
+    def execute(self, query, vars=None):
+        return self._timed(super().execute, query, vars)
+
+    def executemany(self, query, vars_list):
+        return self._timed(super().executemany, query, vars_list)
+
+
+class TimedCursor(_TimedCursorMixin, psycopg2.extensions.cursor):
+    """Tuple rows, timed."""
+
+
+class TimedRealDictCursor(_TimedCursorMixin, psycopg2.extras.RealDictCursor):
+    """Dict rows, timed (the pool's default cursor)."""
+
+
+class _ThreadRelease:
+    """Returns a thread's pinned connection when the thread's locals go away."""
+
+    def __init__(self, db: 'DatabaseConnection', conn):
+        self.db = db
+        self.conn = conn
+
+    def __del__(self):
+        conn, self.conn = self.conn, None
+        if conn is not None:
+            try:
+                self.db._release(conn)
+            except Exception:
+                pass
 
 
 class DatabaseConnection:
     """
     Database connection manager.
-    
+
     Provides connection pooling and context management for database operations.
     """
-    
+
     _instance = None
-    
+    _instance_lock = threading.Lock()
+
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._initialized = False
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._initialized = False
+                    cls._instance = instance
         return cls._instance
-    
+
     def __init__(self):
         if self._initialized:
             return
-        
+
         self._initialized = True
-        self._connection = None
-        
+
         # Load connection parameters from environment
         self.host = os.environ.get('PG_HOST', 'localhost')
         self.port = os.environ.get('PG_PORT', '5432')
         self.database = os.environ.get('PG_DATABASE', 'network_scan')
         self.user = os.environ.get('PG_USER', 'postgres')
         self.password = os.environ.get('PG_PASSWORD', 'postgres')
-    
+
+        self.min_size = POOL_MIN
+        self.max_size = max(POOL_MAX, 1)
+        self.timeout = POOL_TIMEOUT
+        self.statement_timeout_ms = STATEMENT_TIMEOUT_MS
+
+        self.stats = PoolStats()
+        self._cond = threading.Condition()
+        self._idle = []
+        self._size = 0
+        self._waiting = 0
+        self._local = threading.local()
+
+    # ------------------------------------------------------------------
+    # Pool
+    # ------------------------------------------------------------------
+
+    def _connect(self):
+        kwargs = {}
+        if self.statement_timeout_ms:
+            kwargs['options'] = f"-c statement_timeout={self.statement_timeout_ms}"
+        conn = psycopg2.connect(
+            host=self.host,
+            port=self.port,
+            database=self.database,
+            user=self.user,
+            password=self.password,
+            connection_factory=PooledConnection,
+            cursor_factory=TimedRealDictCursor,
+            **kwargs
+        )
+        conn.autocommit = True
+        conn.stats = self.stats
+        self.stats.count('connects')
+        return conn
+
+    def _alive(self, conn) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - conn.last_used < IDLE_CHECK_SECONDS:
+            return True
+        try:
+            with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except _BROKEN:
+            return False
+
+    def _checkout(self):
+        """Take a connection from the pool, waiting up to self.timeout."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats.count('timeouts')
+                    raise PoolExhausted(
+                        f"No database connection free after {self.timeout}s "
+                        f"({self.max_size} in use)"
+                    )
+                waited = True
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+        # Time queued for a slot; connecting and pinging are not pool wait
+        wait_seconds = time.monotonic() - start
+
+        try:
+            if conn is not None and not self._alive(conn):
+                self._close_quietly(conn)
+                self.stats.count('reconnects')
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        self.stats.record_checkout(wait_seconds, waited)
+        return conn
+
+    def _release(self, conn, broken: bool = False):
+        """
+        Return a connection to the pool, discarding it if unusable.
+
+        psycopg2 marks a connection closed when the server goes away, so a
+        failed statement alone (e.g. a statement timeout) keeps it pooled.
+        """
+        if not broken and not conn.closed:
+            try:
+                if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if not conn.autocommit:
+                    conn.autocommit = True
+            except _BROKEN:
+                broken = True
+
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            if broken or conn.closed:
+                self._size -= 1
+                self.stats.count('discarded')
+                expired.append(conn)
+            else:
+                conn.last_used = now
+                self._idle.append(conn)
+                # Trim connections idle past IDLE_TIMEOUT, oldest first
+                while (self._size > self.min_size and self._idle
+                       and now - self._idle[0].last_used > IDLE_TIMEOUT_SECONDS):
+                    expired.append(self._idle.pop(0))
+                    self._size -= 1
+            self._cond.notify()
+        for old in expired:
+            self._close_quietly(old)
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    # ------------------------------------------------------------------
+    # Checkouts
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def connection(self):
+        """
+        Connection for the calling thread (autocommit, dict rows).
+
+        The outermost block checks one out and returns it on exit; nested
+        blocks on the same thread get the same connection.
+        """
+        local = self._local
+        held = getattr(local, 'conn', None)
+        if held is not None and held.closed:
+            self.release()
+            held = None
+        if held is not None:
+            local.depth += 1
+            try:
+                yield held
+            finally:
+                local.depth -= 1
+            return
+
+        conn = self._checkout()
+        local.conn, local.depth = conn, 1
+        try:
+            yield conn
+        finally:
+            local.depth -= 1
+            if local.depth == 0 and getattr(local, 'guard', None) is None:
+                local.conn = None
+                self._release(conn)
+
+    @contextmanager
+    def transaction(self, dict_rows: bool = True):
+        """
+        Dedicated connection in a transaction: commits when the block
+        exits normally, rolls back on an exception.
+
+        Args:
+            dict_rows: cursors return dicts (True) or tuples (False)
+        """
+        conn = self._checkout()
+        try:
+            conn.autocommit = False
+            conn.cursor_factory = TimedRealDictCursor if dict_rows else TimedCursor
+            yield conn
+            conn.commit()
+        except BaseException:
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except _BROKEN:
+                    pass
+            raise
+        finally:
+            conn.cursor_factory = TimedRealDictCursor
+            self._release(conn)
+
     def get_connection(self):
-        """Get database connection, creating if needed."""
-        if self._connection is None or self._connection.closed:
-            self._connection = psycopg2.connect(
-                host=self.host,
-                port=self.port,
-                database=self.database,
-                user=self.user,
-                password=self.password,
-                cursor_factory=RealDictCursor
-            )
-            self._connection.autocommit = True
-        return self._connection
-    
+        """
+        Get the calling thread's connection.
+
+        Inside a cursor()/connection() block this is that block's connection.
+        Otherwise a connection is checked out and stays with the thread until
+        release() or until the thread exits; prefer connection() for new code.
+        """
+        local = self._local
+        held = getattr(local, 'conn', None)
+        if held is not None and not held.closed:
+            return held
+        if held is not None:
+            self.release()
+        conn = self._checkout()
+        local.conn, local.depth = conn, 0
+        local.guard = _ThreadRelease(self, conn)
+        return conn
+
+    def release(self):
+        """Return a connection pinned by get_connection() to the pool."""
+        local = self._local
+        guard = getattr(local, 'guard', None)
+        local.guard = None
+        if guard is None or getattr(local, 'depth', 0) > 0:
+            if guard is not None:
+                local.guard = guard
+            return
+        conn, guard.conn = guard.conn, None
+        local.conn = None
+        if conn is not None:
+            self._release(conn, broken=bool(conn.closed))
+
+    def getconn(self):
+        """psycopg2.pool-style checkout, for services written against a pool."""
+        return self._checkout()
+
+    def putconn(self, conn, close: bool = False):
+        """Return a connection taken with getconn()."""
+        self._release(conn, broken=close)
+
     @contextmanager
     def cursor(self):
         """Context manager for database cursor."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        try:
-            yield cursor
-        finally:
-            cursor.close()
-    
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+
+    def commit(self):
+        """Commit the calling thread's connection (no-op in autocommit)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and not conn.closed and not conn.autocommit:
+            conn.commit()
+
+    def rollback(self):
+        """Roll back the calling thread's connection (no-op in autocommit)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and not conn.closed and not conn.autocommit:
+            conn.rollback()
+
     def execute_query(self, query, params=None, fetch=True):
         """Execute a query and return results."""
         with self.cursor() as cursor:
@@ -70,7 +486,7 @@ class DatabaseConnection:
             if fetch and cursor.description:
                 return cursor.fetchall()
             return None
-    
+
     def execute_one(self, query, params=None):
         """Execute a query and return single result."""
         with self.cursor() as cursor:
@@ -78,12 +494,29 @@ class DatabaseConnection:
             if cursor.description:
                 return cursor.fetchone()
             return None
-    
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool occupancy, checkout/wait counters and statement latency."""
+        with self._cond:
+            pool = {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'waiting': self._waiting,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+            }
+        return {**pool, **self.stats.snapshot()}
+
     def close(self):
-        """Close the database connection."""
-        if self._connection and not self._connection.closed:
-            self._connection.close()
-            self._connection = None
+        """Close idle connections and the calling thread's pinned one."""
+        self.release()
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
 
 
 # Singleton instance
@@ -3,6 +3,7 @@
 from .base import BaseExecutor
 from .registry import ExecutorRegistry
 from .ssh_executor import SSHExecutor
+from .async_ssh_executor import AsyncSSHExecutor, AsyncSSHEngine, get_async_ssh_engine
 from .ping_executor import PingExecutor
 from .snmp_executor import SNMPExecutor
 from .discovery_executor import DiscoveryExecutor
@@ -13,6 +14,9 @@ __all__ = [
     'BaseExecutor',
     'ExecutorRegistry',
     'SSHExecutor',
+    'AsyncSSHExecutor',
+    'AsyncSSHEngine',
+    'get_async_ssh_engine',
     'PingExecutor',
     'SNMPExecutor',
     'DiscoveryExecutor',
@@ -0,0 +1,442 @@
+"""
+Async SSH executor.
+
+Fans SSH commands out to thousands of devices from one event loop:
+- One asyncssh connection per target, no thread per session
+- Global concurrency limit (SSH_ASYNC_MAX_CONCURRENT) plus a per-site
+  limit (SSH_ASYNC_PER_SITE) so one site's jump hosts and TACACS servers
+  are not flooded
+- Per-host rate limit (SSH_ASYNC_HOST_RATE session starts and commands
+  per second to the same host)
+- Results streamed back as each host finishes
+
+A paramiko session costs a worker thread plus paramiko's own transport
+thread; an asyncssh session is a few objects on the loop. Without
+asyncssh installed the engine falls back to the pooled SSHExecutor on a
+bounded thread pool, keeping the limits and streaming.
+
+Usage:
+    engine = get_async_ssh_engine()
+
+    async for index, result in engine.stream(targets, ['show version'], config):
+        ...
+
+    results = run_sync(engine.run_all(targets, ['show version'], config))
+"""
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .base import BaseExecutor
+from .registry import register_executor
+
+try:
+    import asyncssh
+    ASYNCSSH_AVAILABLE = True
+except ImportError:
+    ASYNCSSH_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENT = int(os.environ.get('SSH_ASYNC_MAX_CONCURRENT', '2000'))
+DEFAULT_PER_SITE = int(os.environ.get('SSH_ASYNC_PER_SITE', '200'))
+DEFAULT_HOST_RATE = float(os.environ.get('SSH_ASYNC_HOST_RATE', '5'))
+
+# Thread cap for the paramiko fallback when asyncssh is not installed
+FALLBACK_MAX_THREADS = 200
+
+
+def run_sync(coro):
+    """Run a coroutine to completion from synchronous code."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Called from inside an event loop (an async route): use a fresh loop in a worker thread
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+class HostRateLimiter:
+    """
+    Spaces operations against the same host at least 1/rate seconds apart.
+
+    Each caller reserves the next free slot for its host and sleeps until
+    it, so bursts queue up in order instead of retrying.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+        self.waits = 0
+
+    async def wait(self, host: str):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, 0.0))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            self.waits += 1
+            await asyncio.sleep(slot - now)
+
+
+class _RunLimits:
+    """Semaphores and rate limiter for one run (asyncio primitives are per loop)."""
+
+    def __init__(self, max_concurrent: int, per_site: int, host_rate: float):
+        self.slots = asyncio.Semaphore(max_concurrent)
+        self.per_site = per_site
+        self.sites: Dict[str, asyncio.Semaphore] = {}
+        self.host_rate = HostRateLimiter(host_rate)
+
+    @asynccontextmanager
+    async def acquire(self, site: Optional[str]):
+        # Site first: a target waiting on a busy site does not hold a global slot
+        if site and self.per_site:
+            if site not in self.sites:
+                self.sites[site] = asyncio.Semaphore(self.per_site)
+            async with self.sites[site]:
+                async with self.slots:
+                    yield
+        else:
+            async with self.slots:
+                yield
+
+
+class AsyncSSHEngine:
+    """
+    Concurrent SSH command runner on asyncio.
+
+    Args:
+        max_concurrent: Sessions open at once across all targets
+        per_site_limit: Sessions open at once per site (0 disables)
+        per_host_rate: Session starts and commands per second per host (0 disables)
+        queue_size: Finished results buffered before workers wait on the consumer
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+        per_site_limit: int = DEFAULT_PER_SITE,
+        per_host_rate: float = DEFAULT_HOST_RATE,
+        queue_size: int = 1000,
+    ):
+        self.max_concurrent = max_concurrent
+        self.per_site_limit = per_site_limit
+        self.per_host_rate = per_host_rate
+        self.queue_size = queue_size
+        self._threads: Optional[ThreadPoolExecutor] = None
+
+        # Statistics
+        self.sessions = 0
+        self.session_errors = 0
+        self.commands_run = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.rate_limit_waits = 0
+        self.handshake_ms_total = 0.0
+
+    # ------------------------------------------------------------------
+    # One target
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _connect_options(config: Dict) -> Dict:
+        options = {
+            'port': int(config.get('port') or 22),
+            'username': config.get('username') or None,
+            'password': config.get('password') or None,
+            'known_hosts': None,
+            'connect_timeout': config.get('timeout', 30),
+            'client_keys': None,
+        }
+        if config.get('private_key'):
+            options['client_keys'] = [
+                asyncssh.import_private_key(config['private_key'], config.get('passphrase'))
+            ]
+        elif config.get('look_for_keys'):
+            options.pop('client_keys')
+        if not config.get('allow_agent'):
+            options['agent_path'] = None
+        return options
+
+    @staticmethod
+    def _error_message(error: BaseException, timeout: float) -> str:
+        if isinstance(error, asyncio.TimeoutError):
+            return f'Connection timed out after {timeout}s'
+        if ASYNCSSH_AVAILABLE and isinstance(error, asyncssh.PermissionDenied):
+            return f'Authentication failed: {error}'
+        if ASYNCSSH_AVAILABLE and isinstance(error, asyncssh.Error):
+            return f'SSH error: {error}'
+        if isinstance(error, OSError):
+            return f'Connection error: {error}'
+        return str(error) or type(error).__name__
+
+    async def run_target(
+        self,
+        target: str,
+        commands: Sequence[str],
+        config: Dict = None,
+        site: Optional[str] = None,
+        limits: Optional[_RunLimits] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run commands on one target over a single session.
+
+        Returns:
+            Dict with target, site, success, error, duration and commands
+            (each with command, success, output, error, exit_status)
+        """
+        config = config or {}
+        limits = limits or _RunLimits(self.max_concurrent, self.per_site_limit, self.per_host_rate)
+        timeout = config.get('timeout', 30)
+        start_time = time.time()
+        result = {'target': target, 'site': site, 'success': True, 'error': None, 'commands': []}
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            if ASYNCSSH_AVAILABLE:
+                await self._run_asyncssh(target, commands, config, limits, result)
+            else:
+                await self._run_threaded(target, commands, config, limits, result)
+        except Exception as e:
+            self.session_errors += 1
+            result['success'] = False
+            result['error'] = self._error_message(e, timeout)
+        finally:
+            self.in_flight -= 1
+            self.rate_limit_waits = limits.host_rate.waits
+
+        result['duration'] = time.time() - start_time
+        return result
+
+    async def _run_asyncssh(self, target, commands, config, limits, result):
+        timeout = config.get('timeout', 30)
+        await limits.host_rate.wait(target)
+        started = time.perf_counter()
+        async with asyncssh.connect(target, **self._connect_options(config)) as conn:
+            self.sessions += 1
+            self.handshake_ms_total += (time.perf_counter() - started) * 1000
+            for command in commands:
+                await limits.host_rate.wait(target)
+                self.commands_run += 1
+                try:
+                    completed = await conn.run(command, check=False, timeout=timeout)
+                except (asyncssh.Error, asyncio.TimeoutError, OSError) as e:
+                    result['success'] = False
+                    result['commands'].append({
+                        'command': command, 'success': False, 'output': '',
+                        'error': self._error_message(e, timeout), 'exit_status': None,
+                    })
+                    continue
+                result['commands'].append({
+                    'command': command,
+                    'success': True,
+                    'output': completed.stdout or '',
+                    'error': completed.stderr or None,
+                    'exit_status': completed.exit_status,
+                })
+
+    async def _run_threaded(self, target, commands, config, limits, result):
+        from .ssh_executor import SSHExecutor
+
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(
+                max_workers=min(self.max_concurrent, FALLBACK_MAX_THREADS),
+                thread_name_prefix='ssh-async-fallback',
+            )
+        loop = asyncio.get_running_loop()
+        executor = SSHExecutor()
+        self.sessions += 1
+        for command in commands:
+            await limits.host_rate.wait(target)
+            self.commands_run += 1
+            outcome = await loop.run_in_executor(self._threads, executor.execute, target, command, config)
+            if not outcome.get('success'):
+                result['success'] = False
+            result['commands'].append({
+                'command': command,
+                'success': outcome.get('success', False),
+                'output': outcome.get('output', ''),
+                'error': outcome.get('error'),
+                'exit_status': None,
+            })
+
+    # ------------------------------------------------------------------
+    # Fan-out
+    # ------------------------------------------------------------------
+
+    async def stream(
+        self,
+        targets: Sequence[str],
+        commands: Sequence[str],
+        config: Dict = None,
+        site_of: Optional[Callable[[str], Optional[str]]] = None,
+        resolve_config: Optional[Callable[[str], Dict]] = None,
+    ) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Run commands on every target, yielding (index, result) as each finishes.
+
+        Results are buffered on a bounded queue, so a slow consumer holds
+        finished sessions back rather than letting results pile up.
+        Closing the generator early cancels the targets still running.
+
+        Args:
+            targets: Target addresses
+            commands: Commands run in order on each target's session
+            config: Shared SSH config (username, password, port, timeout, ...)
+            site_of: Maps a target to its site for the per-site limit
+            resolve_config: Blocking per-target config lookup (e.g. vault
+                credentials); runs in the loop's default executor and is
+                merged over config
+        """
+        config = config or {}
+        limits = _RunLimits(self.max_concurrent, self.per_site_limit, self.per_host_rate)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        loop = asyncio.get_running_loop()
+
+        async def one(index: int, target: str):
+            site = site_of(target) if site_of else None
+            async with limits.acquire(site):
+                target_config = config
+                try:
+                    if resolve_config:
+                        resolved = await loop.run_in_executor(None, resolve_config, target)
+                        target_config = {**config, **(resolved or {})}
+                except Exception as e:
+                    result = {
+                        'target': target, 'site': site, 'success': False,
+                        'error': str(e), 'commands': [], 'duration': 0.0,
+                    }
+                else:
+                    result = await self.run_target(target, commands, target_config, site, limits)
+            await queue.put((index, result))
+
+        tasks = [asyncio.ensure_future(one(i, target)) for i, target in enumerate(targets)]
+        try:
+            for _ in range(len(tasks)):
+                yield await queue.get()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run_all(
+        self,
+        targets: Sequence[str],
+        commands: Sequence[str],
+        config: Dict = None,
+        site_of: Optional[Callable[[str], Optional[str]]] = None,
+        resolve_config: Optional[Callable[[str], Dict]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Run commands on every target and return results in target order."""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(targets)
+        async for index, result in self.stream(targets, commands, config, site_of, resolve_config):
+            results[index] = result
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'backend': 'asyncssh' if ASYNCSSH_AVAILABLE else 'paramiko-threads',
+            'sessions': self.sessions,
+            'session_errors': self.session_errors,
+            'commands_run': self.commands_run,
+            'in_flight': self.in_flight,
+            'peak_in_flight': self.peak_in_flight,
+            'rate_limit_waits': self.rate_limit_waits,
+            'avg_handshake_ms': round(self.handshake_ms_total / self.sessions, 1) if self.sessions else 0.0,
+            'max_concurrent': self.max_concurrent,
+            'per_site_limit': self.per_site_limit,
+            'per_host_rate': self.per_host_rate,
+        }
+
+    def close(self):
+        if self._threads is not None:
+            self._threads.shutdown(wait=False)
+            self._threads = None
+
+
+_engine: Optional[AsyncSSHEngine] = None
+
+
+def get_async_ssh_engine() -> AsyncSSHEngine:
+    """Get the process-wide async SSH engine."""
+    global _engine
+    if _engine is None:
+        _engine = AsyncSSHEngine()
+    return _engine
+
+
+@register_executor
+class AsyncSSHExecutor(BaseExecutor):
+    """Executor for SSH commands fanned out on the async SSH engine."""
+
+    def __init__(self, engine: AsyncSSHEngine = None):
+        self.engine = engine or get_async_ssh_engine()
+
+    @property
+    def executor_type(self) -> str:
+        return 'ssh_async'
+
+    def get_default_config(self) -> Dict:
+        """Get default SSH configuration."""
+        return {
+            'timeout': 30,
+            'port': 22,
+            'username': '',
+            'password': '',
+            'look_for_keys': False,
+            'allow_agent': False,
+        }
+
+    def validate_config(self, config: Dict) -> bool:
+        """Validate SSH configuration."""
+        if not config.get('username'):
+            return False
+        return bool(config.get('password') or config.get('private_key'))
+
+    @staticmethod
+    def _command_result(result: Dict[str, Any]) -> Dict:
+        """Flatten a one-command engine result to the BaseExecutor result shape."""
+        if result['commands']:
+            command = result['commands'][0]
+            return {
+                'success': command['success'],
+                'output': command['output'],
+                'error': command['error'],
+                'duration': result['duration'],
+            }
+        return {'success': False, 'output': '', 'error': result['error'], 'duration': result['duration']}
+
+    def execute(self, target: str, command: str, config: Dict = None) -> Dict:
+        """
+        Execute an SSH command on a target device.
+
+        Args:
+            target: Target IP address or hostname
+            command: Command to execute
+            config: SSH configuration (username, password, port, timeout)
+
+        Returns:
+            Dict with success, output, error, duration
+        """
+        config = self.merge_config(config)
+        return self._command_result(run_sync(self.engine.run_target(target, [command], config)))
+
+    def execute_batch(self, targets: List[str], command: str, config: Dict = None) -> List[Dict]:
+        """Execute command against multiple targets on the engine, in target order."""
+        config = self.merge_config(config)
+        results = run_sync(self.engine.run_all(targets, [command], config))
+        flattened = []
+        for target, result in zip(targets, results):
+            flat = self._command_result(result)
+            flat['target'] = target
+            flattened.append(flat)
+        return flattened
@@ -1,7 +1,9 @@
 """
 SSH command executor.
 
-Executes commands on remote devices via SSH.
+Executes commands on remote devices via SSH. Sessions come from the shared
+SSH session pool (backend.services.ssh_pool), so repeated commands to a
+device reuse its authenticated transport.
 """
 
 import socket
@@ -39,6 +41,16 @@ class SSHExecutor(BaseExecutor):
             return False
         return True
     
+    @staticmethod
+    def _connect_options(config: Dict) -> Dict:
+        """Key and agent options passed through to the session pool."""
+        return {
+            'private_key': config.get('private_key'),
+            'passphrase': config.get('passphrase'),
+            'look_for_keys': config.get('look_for_keys', False),
+            'allow_agent': config.get('allow_agent', False),
+        }
+    
     def execute(self, target: str, command: str, config: Dict = None) -> Dict:
         """
         Execute an SSH command on a target device.
@@ -62,32 +74,19 @@ class SSHExecutor(BaseExecutor):
         
         try:
             import paramiko
+            from ..services.ssh_pool import get_ssh_pool
             
-            # Create SSH client
-            client = paramiko.SSHClient()
-            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            def run(client):
+                stdin, stdout, stderr = client.exec_command(command, timeout=timeout)
+                return (
+                    stdout.read().decode('utf-8', errors='replace'),
+                    stderr.read().decode('utf-8', errors='replace'),
+                )
             
-            # Connect
-            client.connect(
-                hostname=target,
-                port=port,
-                username=username,
-                password=password,
-                timeout=timeout,
-                look_for_keys=config.get('look_for_keys', False),
-                allow_agent=config.get('allow_agent', False),
+            output, error_output = get_ssh_pool().run(
+                run, target, username, password, port, timeout, **self._connect_options(config)
             )
             
-            # Execute command
-            stdin, stdout, stderr = client.exec_command(command, timeout=timeout)
-            
-            # Read output
-            output = stdout.read().decode('utf-8', errors='replace')
-            error_output = stderr.read().decode('utf-8', errors='replace')
-            
-            # Close connection
-            client.close()
-            
             return {
                 'success': True,
                 'output': output,
@@ -169,38 +168,31 @@ class SSHExecutor(BaseExecutor):
         outputs = []
         
         try:
-            import paramiko
+            from ..services.ssh_pool import get_ssh_pool
             
-            client = paramiko.SSHClient()
-            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            
-            client.connect(
-                hostname=target,
-                port=port,
-                username=username,
-                password=password,
-                timeout=timeout,
-                look_for_keys=config.get('look_for_keys', False),
-                allow_agent=config.get('allow_agent', False),
-            )
-            
-            # Get interactive shell
-            shell = client.invoke_shell()
-            shell.settimeout(timeout)
-            
-            # Wait for initial prompt
-            self._wait_for_prompt(shell, prompt_pattern, timeout)
-            
-            # Execute each command
-            for cmd in commands:
-                shell.send(cmd + '\n')
-                output = self._wait_for_prompt(shell, prompt_pattern, timeout)
-                outputs.append({
-                    'command': cmd,
-                    'output': output,
-                })
+            def run(client):
+                # Start over if the pool retries on a new session
+                outputs.clear()
+                
+                # Get interactive shell
+                shell = client.invoke_shell()
+                shell.settimeout(timeout)
+                try:
+                    # Wait for initial prompt
+                    self._wait_for_prompt(shell, prompt_pattern, timeout)
+                    
+                    # Execute each command
+                    for cmd in commands:
+                        shell.send(cmd + '\n')
+                        output = self._wait_for_prompt(shell, prompt_pattern, timeout)
+                        outputs.append({
+                            'command': cmd,
+                            'output': output,
+                        })
+                finally:
+                    shell.close()
             
-            client.close()
+            get_ssh_pool().run(run, target, username, password, port, timeout, **self._connect_options(config))
             
             return {
                 'success': True,
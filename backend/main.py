@@ -28,6 +28,8 @@ async def lifespan(app: FastAPI):
     logger.info("OpsConductor API starting up...")
     yield
     logger.info("OpsConductor API shutting down...")
+    from backend.utils.async_db import close_async_db
+    close_async_db()
 
 
 # Create FastAPI application
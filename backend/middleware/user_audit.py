@@ -97,12 +97,12 @@ def log_user_action(action_type, resource_type=None, resource_id=None, details=N
         }
         
         db = get_db()
-        with db.get_connection().cursor() as cursor:
+        with db.cursor() as cursor:
             cursor.execute("""
                 INSERT INTO system_logs (timestamp, level, category, source, message, details)
                 VALUES (%(timestamp)s, %(level)s, %(category)s, %(source)s, %(message)s, %(details)s)
             """, log_entry)
-            db.get_connection().commit()
+            db.commit()
             
     except Exception as e:
         logger.error(f"Failed to log user action: {e}")
@@ -0,0 +1,39 @@
+-- ============================================================================
+-- Migration: 017_polling_schedule_slots
+-- Description: Time-wheel schedule for polling.scheduler_tick_v2. Each
+--              polling config is split into device shards; every shard has
+--              a fixed phase offset within the config's interval and is
+--              claimed with FOR UPDATE SKIP LOCKED when due.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS polling_schedule_slots (
+    id SERIAL PRIMARY KEY,
+    config_id INTEGER NOT NULL REFERENCES polling_configs(id) ON DELETE CASCADE,
+    shard_index INTEGER NOT NULL DEFAULT 0,
+    shard_count INTEGER NOT NULL DEFAULT 1,
+    interval_seconds INTEGER NOT NULL,
+    phase_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+    device_count INTEGER NOT NULL DEFAULT 0,
+    next_run_at TIMESTAMPTZ NOT NULL,
+    last_dispatched_at TIMESTAMPTZ,
+    UNIQUE (config_id, shard_index)
+);
+
+CREATE INDEX IF NOT EXISTS idx_polling_slots_next_run ON polling_schedule_slots (next_run_at);
+
+-- Single-row state shared by every scheduler process: the fleet-wide
+-- dispatch pacing horizon and the last slot re-sync
+CREATE TABLE IF NOT EXISTS polling_scheduler_state (
+    id INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    paced_until TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    synced_at TIMESTAMPTZ
+);
+
+INSERT INTO polling_scheduler_state (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
+
+-- ============================================================================
+-- RECORD MIGRATION
+-- ============================================================================
+INSERT INTO schema_versions (version, description) 
+VALUES ('017', 'Add polling_schedule_slots time wheel and polling_scheduler_state')
+ON CONFLICT (version) DO NOTHING;
@@ -0,0 +1,47 @@
+-- ============================================================================
+-- Migration: 018_trap_alarm_occurrences
+-- Description: Repeat raises of an open alarm are folded into the raising
+--              event (occurrence_count / last_seen_at) by the trap
+--              receiver's in-memory alarm index instead of being dropped.
+-- ============================================================================
+
+ALTER TABLE trap_events ADD COLUMN IF NOT EXISTS occurrence_count INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE trap_events ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMP WITH TIME ZONE;
+
+UPDATE trap_events SET last_seen_at = created_at WHERE last_seen_at IS NULL;
+
+-- New columns go last so CREATE OR REPLACE keeps the existing ones
+CREATE OR REPLACE VIEW active_trap_alarms AS
+SELECT 
+    e.id,
+    e.created_at,
+    e.source_ip,
+    e.device_name,
+    e.event_type,
+    e.severity,
+    e.object_type,
+    e.object_id,
+    e.description,
+    e.details,
+    e.alarm_id,
+    e.acknowledged,
+    e.acknowledged_at,
+    e.acknowledged_by,
+    e.occurrence_count,
+    COALESCE(e.last_seen_at, e.created_at) AS last_seen_at
+FROM trap_events e
+WHERE e.is_clear = FALSE
+  AND e.alarm_id IS NOT NULL
+  AND NOT EXISTS (
+      SELECT 1 FROM trap_events c 
+      WHERE c.alarm_id = e.alarm_id 
+        AND c.is_clear = TRUE 
+        AND c.created_at > e.created_at
+  );
+
+-- ============================================================================
+-- RECORD MIGRATION
+-- ============================================================================
+INSERT INTO schema_versions (version, description) 
+VALUES ('018', 'Add trap_events occurrence_count and last_seen_at')
+ON CONFLICT (version) DO NOTHING;
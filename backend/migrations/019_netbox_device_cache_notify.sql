@@ -0,0 +1,35 @@
+-- ============================================================================
+-- Migration: 019_netbox_device_cache_notify
+-- Description: NOTIFY netbox_device_cache (payload: TG_OP) after every
+--              statement that changes the cache, so in-process device
+--              directories refresh without waiting for their max age.
+--              Statement-level, and Postgres folds identical notifications
+--              within one transaction, so a full sync sends a handful.
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION notify_netbox_device_cache() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('netbox_device_cache', TG_OP);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_netbox_device_cache_notify ON netbox_device_cache;
+CREATE TRIGGER trg_netbox_device_cache_notify
+    AFTER INSERT OR UPDATE OR DELETE ON netbox_device_cache
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_netbox_device_cache();
+
+DROP TRIGGER IF EXISTS trg_netbox_device_cache_notify_truncate ON netbox_device_cache;
+CREATE TRIGGER trg_netbox_device_cache_notify_truncate
+    AFTER TRUNCATE ON netbox_device_cache
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_netbox_device_cache();
+
+-- Incremental directory refreshes filter on cached_at
+CREATE INDEX IF NOT EXISTS idx_netbox_cache_cached_at ON netbox_device_cache (cached_at);
+
+-- ============================================================================
+-- RECORD MIGRATION
+-- ============================================================================
+INSERT INTO schema_versions (version, description) 
+VALUES ('019', 'Add netbox_device_cache change notifications for the device directory')
+ON CONFLICT (version) DO NOTHING;
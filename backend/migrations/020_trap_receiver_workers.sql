@@ -0,0 +1,30 @@
+-- ============================================================================
+-- Migration: 020_trap_receiver_workers
+-- Description: Per-process trap receiver statistics. With
+--              SNMP_TRAP_PROCESSES > 1 several receiver processes share
+--              UDP/162 via SO_REUSEPORT; each reports its own counters here
+--              and trap_receiver_status (id = 1) holds the fleet totals.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS trap_receiver_workers (
+    hostname VARCHAR(255) NOT NULL,
+    worker_index INTEGER NOT NULL,
+    pid INTEGER,
+    started_at TIMESTAMP WITH TIME ZONE,
+    last_trap_at TIMESTAMP WITH TIME ZONE,
+    traps_received BIGINT DEFAULT 0,
+    traps_processed BIGINT DEFAULT 0,
+    traps_errors BIGINT DEFAULT 0,
+    queue_depth INTEGER DEFAULT 0,
+    batches BIGINT DEFAULT 0,
+    is_running BOOLEAN DEFAULT FALSE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (hostname, worker_index)
+);
+
+-- ============================================================================
+-- RECORD MIGRATION
+-- ============================================================================
+INSERT INTO schema_versions (version, description) 
+VALUES ('020', 'Add trap_receiver_workers for multi-process trap ingestion')
+ON CONFLICT (version) DO NOTHING;
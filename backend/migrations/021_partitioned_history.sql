@@ -0,0 +1,214 @@
+-- ============================================================================
+-- Migration: 021_partitioned_history
+-- Description: Convert polling_data, trap_log, trap_events and system_logs
+--              to RANGE-partitioned tables so retention drops whole
+--              partitions (backend/services/partition_manager.py) instead
+--              of row-level DELETEs.
+--
+--              Each existing table is renamed to <table>_before_<period>
+--              and attached unchanged as the partition for everything up to
+--              the end of the current period; new partitions start after
+--              it. The only rewrite is the (id, <time>) primary key index
+--              built on the old table. Run during a quiet period.
+--
+--              trap_events.trap_log_id no longer has a foreign key: a
+--              partitioned trap_log has no unique constraint on id alone.
+-- ============================================================================
+
+-- Partitions of p_table for [p_from, p_until), one per day or month,
+-- named <table>_YYYY_MM_DD / <table>_YYYY_MM (as the partition manager does)
+CREATE OR REPLACE FUNCTION create_time_partitions(
+    p_table TEXT,
+    p_unit TEXT,
+    p_from TIMESTAMPTZ,
+    p_until TIMESTAMPTZ
+) RETURNS VOID AS $$
+DECLARE
+    lower_bound TIMESTAMPTZ := p_from;
+    upper_bound TIMESTAMPTZ;
+BEGIN
+    WHILE lower_bound < p_until LOOP
+        upper_bound := (date_trunc(p_unit, lower_bound AT TIME ZONE 'UTC') + ('1 ' || p_unit)::INTERVAL) AT TIME ZONE 'UTC';
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+            p_table || '_' || to_char(lower_bound AT TIME ZONE 'UTC', CASE p_unit WHEN 'day' THEN 'YYYY_MM_DD' ELSE 'YYYY_MM' END),
+            p_table, lower_bound, upper_bound
+        );
+        lower_bound := upper_bound;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Turn p_table into a table partitioned on p_column, keeping its rows in
+-- place as the first partition. No-op when it is already partitioned.
+CREATE OR REPLACE FUNCTION partition_existing_table(
+    p_table TEXT,
+    p_column TEXT,
+    p_unit TEXT,
+    p_premake INTEGER
+) RETURNS VOID AS $$
+DECLARE
+    boundary TIMESTAMPTZ;
+    newest TIMESTAMPTZ;
+    legacy TEXT;
+    constraint_name TEXT;
+    seq TEXT;
+    idx RECORD;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = p_table::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    -- Old rows end at the next period boundary after the newest row
+    EXECUTE format('SELECT max(%I) FROM %I', p_column, p_table) INTO newest;
+    boundary := (date_trunc(p_unit, GREATEST(COALESCE(newest, NOW()), NOW()) AT TIME ZONE 'UTC')
+                 + ('1 ' || p_unit)::INTERVAL) AT TIME ZONE 'UTC';
+    legacy := p_table || '_before_' || to_char(boundary AT TIME ZONE 'UTC', CASE p_unit WHEN 'day' THEN 'YYYY_MM_DD' ELSE 'YYYY_MM' END);
+
+    EXECUTE format('ALTER TABLE %I RENAME TO %I', p_table, legacy);
+
+    -- Free index and constraint names for the new parent
+    FOR idx IN
+        SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = legacy::regclass
+    LOOP
+        EXECUTE format('ALTER INDEX %I RENAME TO %I', idx.relname, left(idx.relname, 55) || '_legacy');
+    END LOOP;
+
+    -- The parent's key must include the partition column
+    SELECT conname INTO constraint_name FROM pg_constraint
+    WHERE conrelid = legacy::regclass AND contype = 'p';
+    IF constraint_name IS NOT NULL THEN
+        EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', legacy, constraint_name);
+    END IF;
+
+    EXECUTE format(
+        'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING COMMENTS) PARTITION BY RANGE (%I)',
+        p_table, legacy, p_column
+    );
+    EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (id, %I)', p_table, p_column);
+
+    -- The id sequence must outlive the old table once it is dropped
+    seq := pg_get_serial_sequence(legacy, 'id');
+    IF seq IS NOT NULL THEN
+        EXECUTE format('ALTER SEQUENCE %s OWNED BY %I.id', seq, p_table);
+    END IF;
+
+    -- A validated CHECK matching the range lets ATTACH skip its own scan
+    EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I CHECK (%I IS NOT NULL AND %I < %L)',
+                   legacy, legacy || '_range', p_column, p_column, boundary);
+    EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (MINVALUE) TO (%L)',
+                   p_table, legacy, boundary);
+    EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', legacy, legacy || '_range');
+
+    PERFORM create_time_partitions(
+        p_table, p_unit, boundary,
+        boundary + (p_premake || ' ' || p_unit)::INTERVAL
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+BEGIN;
+
+-- ----------------------------------------------------------------------------
+-- polling_data: daily partitions on collected_at
+-- ----------------------------------------------------------------------------
+SELECT partition_existing_table('polling_data', 'collected_at', 'day', 14);
+
+ALTER TABLE polling_data ADD CONSTRAINT polling_data_device_time UNIQUE (poll_type, device_ip, collected_at);
+CREATE INDEX IF NOT EXISTS idx_polling_data_poll_type ON polling_data(poll_type);
+CREATE INDEX IF NOT EXISTS idx_polling_data_device_ip ON polling_data(device_ip);
+CREATE INDEX IF NOT EXISTS idx_polling_data_collected_at ON polling_data(collected_at DESC);
+CREATE INDEX IF NOT EXISTS idx_polling_data_site ON polling_data(site_name);
+CREATE INDEX IF NOT EXISTS idx_polling_data_jsonb ON polling_data USING GIN (data);
+
+-- Views bind to the table they were created on; point them at the parent
+CREATE OR REPLACE VIEW polling_data_recent AS
+SELECT
+    pd.*,
+    pt.display_name as poll_type_name,
+    p.vendor
+FROM polling_data pd
+LEFT JOIN snmp_poll_types pt ON pt.name = pd.poll_type
+LEFT JOIN snmp_profiles p ON p.id = pt.profile_id
+WHERE pd.collected_at > NOW() - INTERVAL '24 hours'
+ORDER BY pd.collected_at DESC;
+
+-- ----------------------------------------------------------------------------
+-- trap_log: daily partitions on received_at
+-- ----------------------------------------------------------------------------
+ALTER TABLE trap_events DROP CONSTRAINT IF EXISTS trap_events_trap_log_id_fkey;
+
+SELECT partition_existing_table('trap_log', 'received_at', 'day', 14);
+
+CREATE INDEX IF NOT EXISTS idx_trap_log_source ON trap_log(source_ip);
+CREATE INDEX IF NOT EXISTS idx_trap_log_received ON trap_log(received_at DESC);
+CREATE INDEX IF NOT EXISTS idx_trap_log_oid ON trap_log(trap_oid);
+CREATE INDEX IF NOT EXISTS idx_trap_log_vendor ON trap_log(vendor);
+CREATE INDEX IF NOT EXISTS idx_trap_log_unprocessed ON trap_log(processed) WHERE processed = FALSE;
+
+-- ----------------------------------------------------------------------------
+-- trap_events: monthly partitions on created_at (open alarms keep theirs)
+-- ----------------------------------------------------------------------------
+SELECT partition_existing_table('trap_events', 'created_at', 'month', 3);
+
+CREATE INDEX IF NOT EXISTS idx_trap_events_source ON trap_events(source_ip);
+CREATE INDEX IF NOT EXISTS idx_trap_events_type ON trap_events(event_type);
+CREATE INDEX IF NOT EXISTS idx_trap_events_severity ON trap_events(severity);
+CREATE INDEX IF NOT EXISTS idx_trap_events_created ON trap_events(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_trap_events_alarm_id ON trap_events(alarm_id);
+CREATE INDEX IF NOT EXISTS idx_trap_events_active ON trap_events(is_clear) WHERE is_clear = FALSE;
+
+CREATE OR REPLACE VIEW active_trap_alarms AS
+SELECT
+    e.id,
+    e.created_at,
+    e.source_ip,
+    e.device_name,
+    e.event_type,
+    e.severity,
+    e.object_type,
+    e.object_id,
+    e.description,
+    e.details,
+    e.alarm_id,
+    e.acknowledged,
+    e.acknowledged_at,
+    e.acknowledged_by,
+    e.occurrence_count,
+    COALESCE(e.last_seen_at, e.created_at) AS last_seen_at
+FROM trap_events e
+WHERE e.is_clear = FALSE
+  AND e.alarm_id IS NOT NULL
+  AND NOT EXISTS (
+      SELECT 1 FROM trap_events c
+      WHERE c.alarm_id = e.alarm_id
+        AND c.is_clear = TRUE
+        AND c.created_at > e.created_at
+  );
+
+-- ----------------------------------------------------------------------------
+-- system_logs: daily partitions on timestamp
+-- ----------------------------------------------------------------------------
+SELECT partition_existing_table('system_logs', 'timestamp', 'day', 14);
+
+CREATE INDEX IF NOT EXISTS idx_system_logs_timestamp ON system_logs(timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_system_logs_level ON system_logs(level);
+CREATE INDEX IF NOT EXISTS idx_system_logs_source ON system_logs(source);
+CREATE INDEX IF NOT EXISTS idx_system_logs_category ON system_logs(category);
+CREATE INDEX IF NOT EXISTS idx_system_logs_request_id ON system_logs(request_id);
+CREATE INDEX IF NOT EXISTS idx_system_logs_job_id ON system_logs(job_id);
+CREATE INDEX IF NOT EXISTS idx_system_logs_workflow_id ON system_logs(workflow_id);
+CREATE INDEX IF NOT EXISTS idx_system_logs_execution_id ON system_logs(execution_id);
+CREATE INDEX IF NOT EXISTS idx_system_logs_device_ip ON system_logs(device_ip);
+CREATE INDEX IF NOT EXISTS idx_system_logs_source_level_time
+    ON system_logs(source, level, timestamp DESC);
+
+COMMIT;
+
+-- ============================================================================
+-- RECORD MIGRATION
+-- ============================================================================
+INSERT INTO schema_versions (version, description)
+VALUES ('021', 'Partition polling_data, trap_log, trap_events and system_logs by time')
+ON CONFLICT (version) DO NOTHING;
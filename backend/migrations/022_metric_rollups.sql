@@ -0,0 +1,71 @@
+-- ============================================================================
+-- Migration: 022_metric_rollups
+-- Description: Rollup tiers for interface, optical and availability metrics
+--              (backend/services/metric_rollups.py): metrics_5min is new,
+--              metrics_hourly and metrics_daily from 001 become the 1h and
+--              1d tiers. Each poll cycle upserts the buckets it touched, so
+--              charts over long ranges read a bounded number of rows.
+--
+--              Series are keyed by (device_ip, interface_name, metric_name,
+--              bucket); device-level metrics use interface_name ''.
+--              val_delta is the counter increase over the bucket (counters
+--              only; resets are skipped).
+-- ============================================================================
+
+-- 5-minute tier, daily partitions (kept 30 days by the partition manager)
+CREATE TABLE IF NOT EXISTS metrics_5min (
+    device_ip INET NOT NULL,
+    site_id INTEGER,
+    interface_name VARCHAR(100) NOT NULL DEFAULT '',
+    metric_name VARCHAR(50) NOT NULL,
+    stat_time TIMESTAMPTZ NOT NULL,
+
+    -- Statistical aggregates
+    sample_count INTEGER,
+    val_min NUMERIC,
+    val_max NUMERIC,
+    val_avg NUMERIC,
+    val_sum NUMERIC,
+    val_p95 NUMERIC,
+    val_delta NUMERIC,
+
+    PRIMARY KEY (device_ip, interface_name, metric_name, stat_time)
+) PARTITION BY RANGE (stat_time);
+
+-- From the start of the retention window so existing raw rows can be backfilled
+SELECT create_time_partitions(
+    'metrics_5min', 'day',
+    date_trunc('day', (NOW() - INTERVAL '30 days') AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+    NOW() + INTERVAL '15 days'
+);
+
+CREATE INDEX IF NOT EXISTS idx_5min_device_metric ON metrics_5min (device_ip, metric_name, stat_time DESC);
+
+-- 1-hour tier: widen the aggregates (bps and byte deltas overflow
+-- NUMERIC(12,4)) and key rows for upserts
+ALTER TABLE metrics_hourly
+    ALTER COLUMN val_min TYPE NUMERIC,
+    ALTER COLUMN val_max TYPE NUMERIC,
+    ALTER COLUMN val_avg TYPE NUMERIC,
+    ALTER COLUMN val_sum TYPE NUMERIC,
+    ALTER COLUMN val_p95 TYPE NUMERIC,
+    ADD COLUMN IF NOT EXISTS val_delta NUMERIC;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_hourly_series
+    ON metrics_hourly (device_ip, interface_name, metric_name, stat_hour);
+
+-- 1-day tier
+ALTER TABLE metrics_daily
+    ALTER COLUMN val_min TYPE NUMERIC,
+    ALTER COLUMN val_max TYPE NUMERIC,
+    ALTER COLUMN val_avg TYPE NUMERIC,
+    ALTER COLUMN val_p95 TYPE NUMERIC,
+    ADD COLUMN IF NOT EXISTS val_sum NUMERIC,
+    ADD COLUMN IF NOT EXISTS val_delta NUMERIC;
+
+-- ============================================================================
+-- RECORD MIGRATION
+-- ============================================================================
+INSERT INTO schema_versions (version, description)
+VALUES ('022', 'Add 5-minute metric rollups and upsert keys for hourly/daily tiers')
+ON CONFLICT (version) DO NOTHING;
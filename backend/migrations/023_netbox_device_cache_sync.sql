@@ -0,0 +1,23 @@
+-- ============================================================================
+-- Migration: 023_netbox_device_cache_sync
+-- Description: Keep each device's NetBox last_updated in netbox_device_cache
+--              so NetBoxCacheService can sync incrementally: the newest
+--              value is the watermark sent as last_updated__gte on the next
+--              run (backend/services/netbox_cache_service.py).
+--
+--              Rows synced before this migration have no value; the first
+--              incremental run after it falls back to a full sync.
+-- ============================================================================
+
+ALTER TABLE netbox_device_cache
+    ADD COLUMN IF NOT EXISTS netbox_last_updated TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_netbox_cache_last_updated
+    ON netbox_device_cache (netbox_last_updated);
+
+-- ============================================================================
+-- RECORD MIGRATION
+-- ============================================================================
+INSERT INTO schema_versions (version, description)
+VALUES ('023', 'Add netbox_last_updated watermark for incremental NetBox cache syncs')
+ON CONFLICT (version) DO NOTHING;
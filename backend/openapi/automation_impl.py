@@ -13,7 +13,7 @@ from fastapi import HTTPException, status
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.utils.db import db_query, db_query_one, db_execute, table_exists, db_paginate, db_transaction
+from backend.utils.async_db import db_query, db_query_one, db_execute, table_exists, db_paginate, db_transaction
 from backend.services.logging_service import get_logger, LogSource
 
 logger = get_logger(__name__, LogSource.SYSTEM)
@@ -63,7 +63,7 @@ async def list_workflows_paginated(
     
     where_clause = "WHERE " + " AND ".join(where_clauses)
     
-    return db_paginate(
+    return await db_paginate(
         f"""SELECT w.id::text as id, w.name, w.description, 
                w.folder_id::text as folder_id, w.enabled,
                w.is_template, w.created_at, w.updated_at, w.last_run_at,
@@ -78,11 +78,11 @@ async def get_workflow_by_id(workflow_id: str) -> Dict[str, Any]:
     Get workflow details by ID
     Migrated from legacy /api/workflows/{id}
     """
-    if not table_exists('workflows'):
+    if not await table_exists('workflows'):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
             detail={"code": "WORKFLOW_NOT_FOUND", "message": f"Workflow with ID '{workflow_id}' not found"})
     
-    workflow = db_query_one("""
+    workflow = await db_query_one("""
         SELECT w.id, w.name, w.description, w.category, w.status,
                w.version, w.definition, w.parameters, w.created_at,
                w.updated_at, w.created_by, w.schedule_enabled,
@@ -119,7 +119,7 @@ async def list_job_executions_paginated(
     
     where_clause = "WHERE " + " AND ".join(where_clauses) if where_clauses else ""
     
-    return db_paginate(
+    return await db_paginate(
         f"""SELECT e.id, e.workflow_id, e.status, e.started_at, e.completed_at,
                e.duration_seconds, e.trigger_type, e.triggered_by,
                e.result, e.error_message, e.progress,
@@ -139,8 +139,8 @@ async def trigger_workflow_execution(
     Trigger a workflow execution
     Migrated from legacy /api/jobs/run
     """
-    with db_transaction() as tx:
-        workflow = tx.query_one("SELECT id, name, status FROM workflows WHERE id = %s", (workflow_id,))
+    async with db_transaction() as tx:
+        workflow = await tx.query_one("SELECT id, name, status FROM workflows WHERE id = %s", (workflow_id,))
         if not workflow:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                 detail={"code": "WORKFLOW_NOT_FOUND", "message": f"Workflow with ID '{workflow_id}' not found"})
@@ -149,13 +149,13 @@ async def trigger_workflow_execution(
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                 detail={"code": "WORKFLOW_INACTIVE", "message": f"Workflow '{workflow['name']}' is not active"})
         
-        result = tx.execute("""
+        result = await tx.execute("""
             INSERT INTO workflow_executions (workflow_id, status, started_at, trigger_type, triggered_by, parameters)
             VALUES (%s, 'running', NOW(), 'manual', %s, %s) RETURNING id
         """, (workflow_id, triggered_by, json.dumps(parameters or {})))
         execution_id = result['id']
         
-        tx.execute("UPDATE workflows SET last_run_at = NOW() WHERE id = %s", (workflow_id,))
+        await tx.execute("UPDATE workflows SET last_run_at = NOW() WHERE id = %s", (workflow_id,))
         logger.info(f"Workflow {workflow_id} triggered by {triggered_by}, execution {execution_id}")
         
         return {"execution_id": str(execution_id), "status": "running", "message": "Workflow execution started successfully"}
@@ -165,11 +165,11 @@ async def get_execution_status(execution_id: str) -> Dict[str, Any]:
     Get execution status and progress
     Migrated from legacy /api/scheduler/executions/{id}/progress
     """
-    if not table_exists('workflow_executions'):
+    if not await table_exists('workflow_executions'):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
             detail={"code": "EXECUTION_NOT_FOUND", "message": f"Execution with ID '{execution_id}' not found"})
     
-    execution = db_query_one("""
+    execution = await db_query_one("""
         SELECT e.id, e.workflow_id, e.status, e.started_at, e.completed_at,
                e.duration_seconds, e.trigger_type, e.triggered_by,
                e.result, e.error_message, e.progress, e.log_output,
@@ -189,8 +189,8 @@ async def cancel_execution(execution_id: str, cancelled_by: str) -> Dict[str, st
     Cancel a running execution
     Migrated from legacy /api/scheduler/executions/{id}/cancel
     """
-    with db_transaction() as tx:
-        execution = tx.query_one("SELECT id, status, workflow_id FROM workflow_executions WHERE id = %s", (execution_id,))
+    async with db_transaction() as tx:
+        execution = await tx.query_one("SELECT id, status, workflow_id FROM workflow_executions WHERE id = %s", (execution_id,))
         if not execution:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                 detail={"code": "EXECUTION_NOT_FOUND", "message": f"Execution with ID '{execution_id}' not found"})
@@ -199,7 +199,7 @@ async def cancel_execution(execution_id: str, cancelled_by: str) -> Dict[str, st
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                 detail={"code": "EXECUTION_NOT_CANCELLABLE", "message": f"Execution cannot be cancelled (current status: {execution['status']})"})
         
-        tx.execute("""
+        await tx.execute("""
             UPDATE workflow_executions SET status = 'cancelled', completed_at = NOW(),
                 error_message = 'Cancelled by ' || %s WHERE id = %s
         """, (cancelled_by, execution_id))
@@ -212,9 +212,9 @@ async def list_schedules() -> List[Dict[str, Any]]:
     List workflow schedules
     Migrated from legacy /api/scheduler/schedules
     """
-    if not table_exists('workflows'):
+    if not await table_exists('workflows'):
         return []
-    return db_query("""
+    return await db_query("""
         SELECT w.id, w.name, w.schedule_cron, w.schedule_enabled,
                w.last_run_at, w.next_run_at, w.created_at,
                (SELECT COUNT(*) FROM workflow_executions e 
@@ -226,26 +226,26 @@ async def get_job_statistics() -> Dict[str, Any]:
     """
     Get job execution statistics
     """
-    if not table_exists('workflow_executions'):
+    if not await table_exists('workflow_executions'):
         return {"total_executions": 0, "by_status": {}, "by_trigger_type": {},
                 "recent_24h": 0, "recent_7d": 0, "average_duration": 0}
     
-    total_row = db_query_one("SELECT COUNT(*) as total FROM workflow_executions")
+    total_row = await db_query_one("SELECT COUNT(*) as total FROM workflow_executions")
     total = total_row['total'] if total_row else 0
     
-    status_rows = db_query("SELECT status, COUNT(*) as count FROM workflow_executions GROUP BY status")
+    status_rows = await db_query("SELECT status, COUNT(*) as count FROM workflow_executions GROUP BY status")
     by_status = {row['status']: row['count'] for row in status_rows}
     
-    trigger_rows = db_query("SELECT trigger_type, COUNT(*) as count FROM workflow_executions GROUP BY trigger_type")
+    trigger_rows = await db_query("SELECT trigger_type, COUNT(*) as count FROM workflow_executions GROUP BY trigger_type")
     by_trigger_type = {row['trigger_type']: row['count'] for row in trigger_rows}
     
-    recent_24h_row = db_query_one("SELECT COUNT(*) as count FROM workflow_executions WHERE started_at >= NOW() - INTERVAL '24 hours'")
+    recent_24h_row = await db_query_one("SELECT COUNT(*) as count FROM workflow_executions WHERE started_at >= NOW() - INTERVAL '24 hours'")
     recent_24h = recent_24h_row['count'] if recent_24h_row else 0
     
-    recent_7d_row = db_query_one("SELECT COUNT(*) as count FROM workflow_executions WHERE started_at >= NOW() - INTERVAL '7 days'")
+    recent_7d_row = await db_query_one("SELECT COUNT(*) as count FROM workflow_executions WHERE started_at >= NOW() - INTERVAL '7 days'")
     recent_7d = recent_7d_row['count'] if recent_7d_row else 0
     
-    avg_row = db_query_one("SELECT AVG(duration_seconds) as avg_duration FROM workflow_executions WHERE status = 'completed' AND duration_seconds IS NOT NULL")
+    avg_row = await db_query_one("SELECT AVG(duration_seconds) as avg_duration FROM workflow_executions WHERE status = 'completed' AND duration_seconds IS NOT NULL")
     avg_duration = avg_row['avg_duration'] or 0 if avg_row else 0
     
     return {"total_executions": total, "by_status": by_status, "by_trigger_type": by_trigger_type,
@@ -15,7 +15,7 @@ from typing import Optional, List, Dict, Any
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.utils.db import db_query, db_query_one, db_execute, table_exists, db_paginate
+from backend.utils.async_db import db_query, db_query_one, db_execute, table_exists, db_paginate
 from backend.services.logging_service import get_logger, LogSource
 
 # Configuration
@@ -76,7 +76,7 @@ async def authenticate_user(username: str, password: str) -> Dict[str, Any]:
     """
     try:
         logger.info(f"Attempting authentication for user: {username}")
-        if not table_exists('users'):
+        if not await table_exists('users'):
             logger.error("Users table does not exist")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -84,7 +84,7 @@ async def authenticate_user(username: str, password: str) -> Dict[str, Any]:
             )
         
         # Query user
-        user = db_query_one("""
+        user = await db_query_one("""
             SELECT id, username, email, password_hash, created_at,
                    username as display_name, '' as first_name, '' as last_name,
                    'active' as status, false as two_factor_enabled
@@ -169,9 +169,9 @@ async def get_current_user_from_token(token: str) -> Dict[str, Any]:
         FROM users WHERE """
     
     if user_id.startswith('enterprise_'):
-        user = db_query_one(user_query + "username = %s", (username,))
+        user = await db_query_one(user_query + "username = %s", (username,))
     else:
-        user = db_query_one(user_query + "id = %s AND username = %s", (user_id, username))
+        user = await db_query_one(user_query + "id = %s AND username = %s", (user_id, username))
     
     if not user:
         if user_id.startswith('enterprise_'):
@@ -185,7 +185,7 @@ async def get_current_user_from_token(token: str) -> Dict[str, Any]:
                           detail={"code": "USER_NOT_FOUND", "message": "User not found"})
     
     # Get user roles
-    roles_data = db_query("""
+    roles_data = await db_query("""
         SELECT r.name FROM roles r
         JOIN user_roles ur ON r.id = ur.role_id WHERE ur.user_id = %s
     """, (user['id'],))
@@ -207,7 +207,7 @@ async def list_users_paginated(
     Enterprise users are managed via Roles page, not Users page.
     """
     # Get local users only
-    local_users = db_query("""
+    local_users = await db_query("""
         SELECT u.id, u.username, u.email, u.created_at, u.username as display_name,
                '' as first_name, '' as last_name, 'active' as status, false as two_factor_enabled,
                'local' as auth_type,
@@ -230,9 +230,9 @@ async def list_roles_with_counts() -> List[Dict[str, Any]]:
     List roles with user and permission counts
     Includes both local users and enterprise users in user_count
     """
-    if not table_exists('roles'):
+    if not await table_exists('roles'):
         return []
-    return db_query("""
+    return await db_query("""
         SELECT r.*, 
                (SELECT COUNT(*) FROM user_roles ur WHERE ur.role_id = r.id) + 
                (SELECT COUNT(*) FROM enterprise_user_roles eur WHERE eur.role_id = r.id) as user_count,
@@ -245,7 +245,7 @@ async def get_role_members(role_id: int) -> Dict[str, Any]:
     Get all users in a specific role - both local and enterprise users
     """
     # Get local users
-    local_users = db_query("""
+    local_users = await db_query("""
         SELECT u.id, u.username, u.email, u.created_at,
                u.username as display_name, 'local' as auth_type
         FROM users u
@@ -254,7 +254,7 @@ async def get_role_members(role_id: int) -> Dict[str, Any]:
     """, (role_id,))
     
     # Get enterprise users
-    enterprise_users = db_query("""
+    enterprise_users = await db_query("""
         SELECT eur.id, eur.username, eur.email, eur.assigned_at as created_at,
                eur.display_name, 'enterprise' as auth_type
         FROM enterprise_user_roles eur
@@ -270,7 +270,7 @@ async def get_role_members(role_id: int) -> Dict[str, Any]:
 
 async def get_role_permissions(role_id: int) -> List[Dict[str, Any]]:
     """Get all permissions assigned to a role"""
-    return db_query("""
+    return await db_query("""
         SELECT p.id, p.code, p.module, p.resource, p.action, 
                p.display_name, p.description
         FROM permissions p
@@ -282,7 +282,7 @@ async def get_role_permissions(role_id: int) -> List[Dict[str, Any]]:
 
 async def get_all_permissions() -> List[Dict[str, Any]]:
     """Get all available permissions grouped by module"""
-    return db_query("""
+    return await db_query("""
         SELECT id, code, module, resource, action, display_name, description
         FROM permissions
         ORDER BY module, resource, action
@@ -299,10 +299,10 @@ async def get_password_policy() -> Dict[str, Any]:
         "prevent_reuse": 5, "lockout_attempts": 5, "lockout_duration_minutes": 30
     }
     
-    if not table_exists('settings'):
+    if not await table_exists('settings'):
         return default_policy
     
-    result = db_query_one("SELECT value FROM settings WHERE key = 'password_policy'")
+    result = await db_query_one("SELECT value FROM settings WHERE key = 'password_policy'")
     if result and result.get('value'):
         try:
             return {**default_policy, **json.loads(result['value'])}
@@ -315,8 +315,8 @@ async def update_password_policy(policy_data: Dict[str, Any]) -> Dict[str, str]:
     Update password policy settings
     Migrated from legacy /api/auth/password-policy PUT
     """
-    if table_exists('settings'):
-        db_execute("""
+    if await table_exists('settings'):
+        await db_execute("""
             INSERT INTO settings (key, value, updated_at)
             VALUES ('password_policy', %s, NOW())
             ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, updated_at = NOW()
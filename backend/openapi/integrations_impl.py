@@ -13,7 +13,7 @@ from fastapi import HTTPException, status
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.utils.db import db_query, db_query_one, db_execute, table_exists, get_settings_by_prefix, db_paginate, db_transaction
+from backend.utils.async_db import db_query, db_query_one, db_execute, table_exists, get_settings_by_prefix, db_paginate, db_transaction
 from backend.services.logging_service import get_logger, LogSource
 
 logger = get_logger(__name__, LogSource.SYSTEM)
@@ -60,7 +60,7 @@ async def list_integrations_paginated(
     
     where_clause = "WHERE " + " AND ".join(where_clauses) if where_clauses else ""
     
-    return db_paginate(
+    return await db_paginate(
         f"""SELECT i.id, i.name, i.integration_type, i.status, i.description,
                i.config, i.created_at, i.updated_at, i.last_sync_at,
                i.sync_enabled, i.error_message
@@ -73,11 +73,11 @@ async def get_integration_by_id(integration_id: str) -> Dict[str, Any]:
     """
     Get integration details by ID
     """
-    if not table_exists('integrations'):
+    if not await table_exists('integrations'):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
             detail={"code": "INTEGRATION_NOT_FOUND", "message": f"Integration with ID '{integration_id}' not found"})
     
-    integration = db_query_one("""
+    integration = await db_query_one("""
         SELECT i.id, i.name, i.integration_type, i.status, i.description,
                i.config, i.created_at, i.updated_at, i.last_sync_at,
                i.sync_enabled, i.error_message
@@ -103,8 +103,8 @@ async def test_netbox_connection(netbox_config: Dict[str, Any]) -> Dict[str, Any
         
         # If no config provided, get from database
         if not url or not token:
-            from backend.utils.db import get_settings_by_prefix
-            settings = get_settings_by_prefix('netbox_')
+            from backend.utils.async_db import get_settings_by_prefix
+            settings = await get_settings_by_prefix('netbox_')
             if not url:
                 url = settings.get('netbox_url', '').rstrip('/')
             if not token:
@@ -231,10 +231,10 @@ async def get_mcp_services_status() -> Dict[str, Any]:
     Get MCP (Model Context Protocol) services status
     Migrated from legacy /api/mcp/services
     """
-    if not table_exists('mcp_services'):
+    if not await table_exists('mcp_services'):
         return {"services": [], "total_count": 0, "active_count": 0, "last_updated": datetime.now().isoformat()}
     
-    services = db_query("""
+    services = await db_query("""
         SELECT id, name, service_type, status, endpoint, config,
                created_at, updated_at, last_check_at
         FROM mcp_services ORDER BY name
@@ -247,9 +247,9 @@ async def get_mcp_devices() -> List[Dict[str, Any]]:
     Get MCP devices
     Migrated from legacy /api/mcp/devices
     """
-    if not table_exists('mcp_devices'):
+    if not await table_exists('mcp_devices'):
         return []
-    return db_query("""
+    return await db_query("""
         SELECT id, name, device_type, status, endpoint, config,
                created_at, updated_at, last_seen_at
         FROM mcp_devices ORDER BY name
@@ -259,10 +259,10 @@ async def get_integration_status(integration_type: str) -> Dict[str, Any]:
     """
     Get status for a specific integration type
     """
-    if not table_exists('integrations'):
+    if not await table_exists('integrations'):
         return {"integration_type": integration_type, "status": "unavailable", "message": "Integrations table not found"}
     
-    stats = db_query_one("""
+    stats = await db_query_one("""
         SELECT COUNT(*) as total,
                COUNT(*) FILTER (WHERE status = 'active') as active,
                COUNT(*) FILTER (WHERE sync_enabled = true) as sync_enabled,
@@ -281,8 +281,8 @@ async def sync_integration(integration_id: str, triggered_by: str) -> Dict[str,
     """
     Trigger manual sync for an integration
     """
-    with db_transaction() as tx:
-        integration = tx.query_one("SELECT id, name, integration_type, status FROM integrations WHERE id = %s", (integration_id,))
+    async with db_transaction() as tx:
+        integration = await tx.query_one("SELECT id, name, integration_type, status FROM integrations WHERE id = %s", (integration_id,))
         if not integration:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                 detail={"code": "INTEGRATION_NOT_FOUND", "message": f"Integration with ID '{integration_id}' not found"})
@@ -291,7 +291,7 @@ async def sync_integration(integration_id: str, triggered_by: str) -> Dict[str,
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                 detail={"code": "INTEGRATION_INACTIVE", "message": f"Integration '{integration['name']}' is not active"})
         
-        tx.execute("UPDATE integrations SET last_sync_at = NOW(), error_message = NULL WHERE id = %s", (integration_id,))
+        await tx.execute("UPDATE integrations SET last_sync_at = NOW(), error_message = NULL WHERE id = %s", (integration_id,))
         logger.info(f"Integration {integration_id} ({integration['name']}) synced by {triggered_by}")
         
         return {"success": True, "message": "Integration sync triggered successfully",
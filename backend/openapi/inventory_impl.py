@@ -13,8 +13,9 @@ from fastapi import HTTPException, status
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.utils.db import db_query, db_query_one, db_execute, table_exists, db_paginate
+from backend.utils.async_db import db_query, db_execute, table_exists, db_paginate
 from backend.services.logging_service import get_logger, LogSource
+from backend.services.device_directory import get_device_directory
 
 logger = get_logger(__name__, LogSource.SYSTEM)
 
@@ -68,7 +69,7 @@ async def list_devices_paginated(
     
     where_clause = "WHERE " + " AND ".join(where_clauses)
     
-    return db_paginate(
+    return await db_paginate(
         f"""SELECT netbox_device_id::text as id, device_name as name, 
                COALESCE(device_ip::text, '') as ip_address, COALESCE(device_type, '') as device_type, 
                COALESCE(manufacturer, '') as vendor, COALESCE(site_name, '') as site_name, 
@@ -81,21 +82,26 @@ async def list_devices_paginated(
 
 async def get_device_by_id(device_id: str) -> Dict[str, Any]:
     """
-    Get device details by ID
-    Uses netbox_device_cache table (same as legacy)
+    Get device details by NetBox id or IP
+    Served from the in-process device directory (netbox_device_cache)
     """
-    device = db_query_one("""
-        SELECT netbox_device_id as id, device_name as name, device_ip::text as ip_address,
-               device_type, manufacturer as vendor, site_name, role_name as role,
-               site_id, cached_at as created_at, cached_at as updated_at, cached_at as last_seen
-        FROM netbox_device_cache WHERE netbox_device_id = %s OR device_ip::text = %s
-    """, (device_id, device_id))
+    directory = get_device_directory()
+    device = None
+    if str(device_id).isdigit():
+        device = directory.get_by_id(int(device_id))
+    if device is None:
+        device = directory.get_by_ip(str(device_id))
     
     if not device:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
             detail={"code": "DEVICE_NOT_FOUND", "message": f"Device with ID '{device_id}' not found"})
     
-    return device
+    return {
+        "id": device.netbox_device_id, "name": device.device_name, "ip_address": device.device_ip,
+        "device_type": device.device_type, "vendor": device.manufacturer, "site_name": device.site_name,
+        "role": device.role_name, "site_id": device.site_id, "created_at": device.cached_at,
+        "updated_at": device.cached_at, "last_seen": device.cached_at,
+    }
 
 async def list_device_interfaces(device_id: str) -> List[Dict[str, Any]]:
     """
@@ -110,7 +116,7 @@ async def get_network_topology() -> Dict[str, Any]:
     Get network topology graph
     Uses netbox_device_cache table (same as legacy)
     """
-    devices = db_query("""
+    devices = await db_query("""
         SELECT netbox_device_id as id, device_name as name, device_ip::text as ip_address,
                device_type, manufacturer as vendor, site_name
         FROM netbox_device_cache ORDER BY device_name
@@ -121,8 +127,8 @@ async def get_network_topology() -> Dict[str, Any]:
              for d in devices]
     
     links = []
-    if table_exists('links'):
-        link_rows = db_query("SELECT source_device_id, target_device_id, link_type, bandwidth, status FROM links WHERE status = 'active'")
+    if await table_exists('links'):
+        link_rows = await db_query("SELECT source_device_id, target_device_id, link_type, bandwidth, status FROM links WHERE status = 'active'")
         links = [{"source": str(l['source_device_id']), "target": str(l['target_device_id']),
                   "type": l['link_type'], "bandwidth": l['bandwidth'], "status": l['status']} for l in link_rows]
     
@@ -133,9 +139,9 @@ async def list_sites() -> List[Dict[str, Any]]:
     List all sites
     Migrated from legacy /api/inventory/sites
     """
-    if not table_exists('sites'):
+    if not await table_exists('sites'):
         return []
-    return db_query("""
+    return await db_query("""
         SELECT s.id, s.name, s.description, s.address, s.city,
                s.state, s.country, s.latitude, s.longitude,
                s.created_at, s.updated_at,
@@ -148,18 +154,18 @@ async def list_modules(device_id: Optional[str] = None) -> List[Dict[str, Any]]:
     List device modules
     Migrated from legacy /api/inventory/modules
     """
-    if not table_exists('modules'):
+    if not await table_exists('modules'):
         return []
     
     if device_id:
-        return db_query("""
+        return await db_query("""
             SELECT m.id, m.device_id, m.name, m.description, m.type,
                    m.part_number, m.serial_number, m.status, m.created_at, m.updated_at,
                    d.name as device_name
             FROM modules m LEFT JOIN devices d ON m.device_id = d.id
             WHERE m.device_id = %s ORDER BY m.device_id, m.name
         """, (device_id,))
-    return db_query("""
+    return await db_query("""
         SELECT m.id, m.device_id, m.name, m.description, m.type,
                m.part_number, m.serial_number, m.status, m.created_at, m.updated_at,
                d.name as device_name
@@ -171,17 +177,17 @@ async def list_racks(site_id: Optional[str] = None) -> List[Dict[str, Any]]:
     List racks
     Migrated from legacy /api/inventory/racks
     """
-    if not table_exists('racks'):
+    if not await table_exists('racks'):
         return []
     
     if site_id:
-        return db_query("""
+        return await db_query("""
             SELECT r.id, r.site_id, r.name, r.description, r.height,
                    r.position, r.status, r.created_at, r.updated_at, s.name as site_name
             FROM racks r LEFT JOIN sites s ON r.site_id = s.id
             WHERE r.site_id = %s ORDER BY r.site_id, r.name
         """, (site_id,))
-    return db_query("""
+    return await db_query("""
         SELECT r.id, r.site_id, r.name, r.description, r.height,
                r.position, r.status, r.created_at, r.updated_at, s.name as site_name
         FROM racks r LEFT JOIN sites s ON r.site_id = s.id ORDER BY r.site_id, r.name
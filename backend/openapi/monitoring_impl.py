@@ -6,14 +6,14 @@ This implements the actual business logic for monitoring endpoints
 import os
 import sys
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict, Any
 from fastapi import HTTPException, status
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.utils.db import db_query, db_query_one, db_execute, table_exists, db_paginate, db_transaction
+from backend.utils.async_db import get_async_db, db_query, db_query_one, db_execute, table_exists, db_paginate, db_transaction
 from backend.services.logging_service import get_logger, LogSource
 
 logger = get_logger(__name__, LogSource.SYSTEM)
@@ -49,7 +49,7 @@ async def list_alerts_paginated(
     List alerts with pagination and filtering
     Uses alert_history table which has the actual alert data
     """
-    if not table_exists('alert_history'):
+    if not await table_exists('alert_history'):
         return {'items': [], 'total': 0, 'limit': limit, 'cursor': None}
     
     where_clauses = ["1=1"]
@@ -65,7 +65,7 @@ async def list_alerts_paginated(
     
     where_clause = " AND ".join(where_clauses)
     
-    return db_paginate(
+    return await db_paginate(
         f"""SELECT id, original_alert_id, rule_id, alert_key, severity, category,
                title, message, details, status, triggered_at, 
                acknowledged_at, acknowledged_by, resolved_at, archived_at
@@ -79,12 +79,12 @@ async def acknowledge_alert(alert_id: str, acknowledged_by: str) -> Dict[str, st
     Acknowledge an alert
     Migrated from legacy /api/alerts/{id}/acknowledge
     """
-    if not table_exists('alerts'):
+    if not await table_exists('alerts'):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
             detail={"code": "ALERT_NOT_FOUND", "message": f"Alert with ID '{alert_id}' not found"})
     
-    with db_transaction() as tx:
-        alert = tx.query_one("SELECT id, status, acknowledged_at FROM alerts WHERE id = %s", (alert_id,))
+    async with db_transaction() as tx:
+        alert = await tx.query_one("SELECT id, status, acknowledged_at FROM alerts WHERE id = %s", (alert_id,))
         if not alert:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                 detail={"code": "ALERT_NOT_FOUND", "message": f"Alert with ID '{alert_id}' not found"})
@@ -92,7 +92,7 @@ async def acknowledge_alert(alert_id: str, acknowledged_by: str) -> Dict[str, st
         if alert['acknowledged_at']:
             return {"success": True, "message": "Alert already acknowledged", "acknowledged_at": alert['acknowledged_at'].isoformat()}
         
-        tx.execute("""
+        await tx.execute("""
             UPDATE alerts SET status = 'acknowledged', acknowledged_at = NOW(),
                 acknowledged_by = %s, updated_at = NOW() WHERE id = %s
         """, (acknowledged_by, alert_id))
@@ -105,15 +105,15 @@ async def get_device_optical_metrics(device_id: str, hours: int = 24) -> List[Di
     Get optical power metrics for a device
     Migrated from legacy /api/metrics/optical/{ip}
     """
-    device = db_query_one("SELECT id, ip_address FROM devices WHERE id = %s", (device_id,))
+    device = await db_query_one("SELECT id, ip_address FROM devices WHERE id = %s", (device_id,))
     if not device:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
             detail={"code": "DEVICE_NOT_FOUND", "message": f"Device with ID '{device_id}' not found"})
     
-    if not table_exists('optical_metrics'):
+    if not await table_exists('optical_metrics'):
         return []
     
-    return db_query(f"""
+    return await db_query(f"""
         SELECT interface_name, rx_power, tx_power, rx_power_low_alarm, rx_power_high_alarm,
                tx_power_low_alarm, tx_power_high_alarm, timestamp, unit
         FROM optical_metrics WHERE device_id = %s AND timestamp >= NOW() - INTERVAL '{hours} hours'
@@ -125,15 +125,15 @@ async def get_device_interface_metrics(device_id: str, hours: int = 24) -> List[
     Get interface utilization metrics for a device
     Migrated from legacy /api/metrics/interfaces/{ip}
     """
-    device = db_query_one("SELECT id, ip_address FROM devices WHERE id = %s", (device_id,))
+    device = await db_query_one("SELECT id, ip_address FROM devices WHERE id = %s", (device_id,))
     if not device:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
             detail={"code": "DEVICE_NOT_FOUND", "message": f"Device with ID '{device_id}' not found"})
     
-    if not table_exists('interface_metrics'):
+    if not await table_exists('interface_metrics'):
         return []
     
-    return db_query(f"""
+    return await db_query(f"""
         SELECT interface_name, interface_index, admin_status, oper_status,
                speed, mtu, rx_bytes, tx_bytes, rx_packets, tx_packets,
                rx_errors, tx_errors, rx_drops, tx_drops, timestamp, utilization_in, utilization_out
@@ -146,15 +146,15 @@ async def get_device_availability_metrics(device_id: str, days: int = 30) -> Lis
     Get availability metrics for a device
     Migrated from legacy /api/metrics/availability/{ip}
     """
-    device = db_query_one("SELECT id, ip_address FROM devices WHERE id = %s", (device_id,))
+    device = await db_query_one("SELECT id, ip_address FROM devices WHERE id = %s", (device_id,))
     if not device:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
             detail={"code": "DEVICE_NOT_FOUND", "message": f"Device with ID '{device_id}' not found"})
     
-    if not table_exists('availability_metrics'):
+    if not await table_exists('availability_metrics'):
         return []
     
-    return db_query(f"""
+    return await db_query(f"""
         SELECT DATE(timestamp) as date, COUNT(*) as total_checks,
                COUNT(*) FILTER (WHERE is_up = true) as up_checks,
                ROUND((COUNT(*) FILTER (WHERE is_up = true) * 100.0 / COUNT(*)), 2) as availability_percentage,
@@ -163,6 +163,36 @@ async def get_device_availability_metrics(device_id: str, days: int = 30) -> Lis
         GROUP BY DATE(timestamp) ORDER BY date DESC
     """, (device_id,))
 
+async def get_metric_rollups(table: str, device_ip: Optional[str], hours: int,
+                             max_points: Optional[int] = None, resolution: Optional[str] = None,
+                             **filters) -> Dict[str, Any]:
+    """
+    Rolled-up metrics for the last `hours`, bounded to max_points per series
+    """
+    from backend.services.metric_rollups import query_rollups
+    
+    end = datetime.now(timezone.utc)
+    try:
+        return await get_async_db().run(
+            lambda cursor: query_rollups(cursor, table, end - timedelta(hours=hours), end, device_ip=device_ip,
+                                         max_points=max_points, resolution=resolution, **filters))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": "INVALID_RESOLUTION", "message": str(e)})
+
+async def get_device_metric_rollups(device_id: str, table: str, hours: int = 24,
+                                    max_points: Optional[int] = None,
+                                    resolution: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Rolled-up optical, interface or availability metrics for a device
+    """
+    device = await db_query_one("SELECT id, ip_address FROM devices WHERE id = %s", (device_id,))
+    if not device:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+            detail={"code": "DEVICE_NOT_FOUND", "message": f"Device with ID '{device_id}' not found"})
+    
+    return await get_metric_rollups(table, str(device['ip_address']), hours, max_points, resolution)
+
 async def get_telemetry_status() -> Dict[str, Any]:
     """
     Get telemetry and monitoring service status
@@ -174,16 +204,16 @@ async def get_telemetry_status() -> Dict[str, Any]:
     
     # Check if monitoring tables exist
     for tbl in ['alerts', 'optical_metrics', 'interface_metrics', 'availability_metrics']:
-        exists = table_exists(tbl)
+        exists = await table_exists(tbl)
         result["services"][tbl] = {"status": "available" if exists else "unavailable", "table_exists": exists}
     
     # Get recent activity counts
-    if table_exists('alerts'):
-        row = db_query_one("SELECT COUNT(*) as count FROM alerts WHERE created_at >= NOW() - INTERVAL '1 hour'")
+    if await table_exists('alerts'):
+        row = await db_query_one("SELECT COUNT(*) as count FROM alerts WHERE created_at >= NOW() - INTERVAL '1 hour'")
         result["services"]["alerts"]["last_hour_count"] = row['count'] if row else 0
     
-    if table_exists('optical_metrics'):
-        row = db_query_one("SELECT COUNT(*) as count FROM optical_metrics WHERE timestamp >= NOW() - INTERVAL '1 hour'")
+    if await table_exists('optical_metrics'):
+        row = await db_query_one("SELECT COUNT(*) as count FROM optical_metrics WHERE timestamp >= NOW() - INTERVAL '1 hour'")
         result["services"]["optical_metrics"]["last_hour_count"] = row['count'] if row else 0
     
     return result
@@ -193,22 +223,22 @@ async def get_alert_stats() -> Dict[str, Any]:
     Get alert statistics
     Migrated from legacy /api/alerts/stats
     """
-    if not table_exists('alerts'):
+    if not await table_exists('alerts'):
         return {"total": 0, "by_severity": {}, "by_status": {}, "recent_24h": 0, "acknowledged": 0, "unacknowledged": 0}
     
-    total_row = db_query_one("SELECT COUNT(*) as total FROM alerts")
+    total_row = await db_query_one("SELECT COUNT(*) as total FROM alerts")
     total = total_row['total'] if total_row else 0
     
-    severity_rows = db_query("SELECT severity, COUNT(*) as count FROM alerts GROUP BY severity")
+    severity_rows = await db_query("SELECT severity, COUNT(*) as count FROM alerts GROUP BY severity")
     by_severity = {row['severity']: row['count'] for row in severity_rows}
     
-    status_rows = db_query("SELECT status, COUNT(*) as count FROM alerts GROUP BY status")
+    status_rows = await db_query("SELECT status, COUNT(*) as count FROM alerts GROUP BY status")
     by_status = {row['status']: row['count'] for row in status_rows}
     
-    recent_row = db_query_one("SELECT COUNT(*) as count FROM alerts WHERE created_at >= NOW() - INTERVAL '24 hours'")
+    recent_row = await db_query_one("SELECT COUNT(*) as count FROM alerts WHERE created_at >= NOW() - INTERVAL '24 hours'")
     recent_24h = recent_row['count'] if recent_row else 0
     
-    ack_row = db_query_one("""
+    ack_row = await db_query_one("""
         SELECT COUNT(*) FILTER (WHERE acknowledged_at IS NOT NULL) as acknowledged,
                COUNT(*) FILTER (WHERE acknowledged_at IS NULL) as unacknowledged FROM alerts
     """)
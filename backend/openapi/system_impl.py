@@ -8,6 +8,7 @@ import sys
 import json
 import psutil
 import platform
+import time
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
 from fastapi import HTTPException, status
@@ -15,7 +16,8 @@ from fastapi import HTTPException, status
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.utils.db import db_query, db_query_one, db_execute, table_exists
+from backend.database import get_db
+from backend.utils.async_db import get_async_db, db_query, db_query_one, db_execute, table_exists
 from backend.services.logging_service import get_logger, LogSource
 
 logger = get_logger(__name__, LogSource.SYSTEM)
@@ -43,10 +45,15 @@ async def get_system_health() -> Dict[str, Any]:
     
     # Database health check
     try:
-        db_query_one("SELECT 1 as check")
+        started = time.perf_counter()
+        await db_query_one("SELECT 1 as check")
+        pool = get_db().get_stats()
         health_status["checks"]["database"] = {
-            "status": "healthy",
-            "response_time_ms": 0,
+            "status": "healthy" if pool['checkout_timeouts'] == 0 else "warning",
+            "response_time_ms": round((time.perf_counter() - started) * 1000, 2),
+            "pool_in_use": pool['in_use'],
+            "pool_max": pool['max_size'],
+            "pool_wait_p99_ms": pool['pool_wait']['p99_ms'],
             "message": "Database connection successful"
         }
     except Exception as e:
@@ -100,6 +107,17 @@ async def get_system_health() -> Dict[str, Any]:
     
     return health_status
 
+async def get_database_pool_stats() -> Dict[str, Any]:
+    """
+    Connection pool occupancy, checkout waits and per-statement latency
+    for this API process
+    """
+    return {
+        "pool": get_db().get_stats(),
+        "async_executor": get_async_db().get_stats(),
+        "timestamp": datetime.now().isoformat(),
+    }
+
 async def get_system_info() -> Dict[str, Any]:
     """
     Get detailed system information
@@ -142,7 +160,7 @@ async def get_system_logs(
     Get system logs with filtering
     Migrated from legacy /api/logs
     """
-    if not table_exists('system_logs'):
+    if not await table_exists('system_logs'):
         return []
     
     # Build query with filters
@@ -155,7 +173,7 @@ async def get_system_logs(
     
     where_clause = "WHERE " + " AND ".join(where_clauses)
     
-    logs = db_query(f"""
+    logs = await db_query(f"""
         SELECT id, level, message, source, details as context,
                timestamp, created_at
         FROM system_logs 
@@ -171,7 +189,7 @@ async def get_system_settings() -> Dict[str, Any]:
     Get system configuration settings
     Migrated from legacy /api/settings
     """
-    if not table_exists('system_settings'):
+    if not await table_exists('system_settings'):
         return {
             "general": {},
             "security": {},
@@ -180,7 +198,7 @@ async def get_system_settings() -> Dict[str, Any]:
             "message": "Settings table not found"
         }
     
-    rows = db_query("""
+    rows = await db_query("""
         SELECT category, key, value, type, description
         FROM system_settings
         ORDER BY category, key
@@ -225,7 +243,7 @@ async def update_system_setting(
     Migrated from legacy /api/settings
     """
     # Check if setting exists
-    setting = db_query_one("""
+    setting = await db_query_one("""
         SELECT id, type FROM system_settings 
         WHERE category = %s AND key = %s
     """, (category, key))
@@ -247,7 +265,7 @@ async def update_system_setting(
         value_str = str(value)
     
     # Update setting
-    db_execute("""
+    await db_execute("""
         UPDATE system_settings 
         SET value = %s, updated_at = NOW(), updated_by = %s
         WHERE category = %s AND key = %s
@@ -267,7 +285,7 @@ async def get_api_usage_stats(days: int = 30) -> Dict[str, Any]:
     """
     Get API usage statistics
     """
-    if not table_exists('api_usage_logs'):
+    if not await table_exists('api_usage_logs'):
         return {
             "total_requests": 0,
             "requests_by_day": {},
@@ -278,7 +296,7 @@ async def get_api_usage_stats(days: int = 30) -> Dict[str, Any]:
         }
     
     # Get overall stats
-    overall_stats = db_query_one(f"""
+    overall_stats = await db_query_one(f"""
         SELECT COUNT(*) as total,
                AVG(response_time_ms) as avg_response_time
         FROM api_usage_logs 
@@ -286,7 +304,7 @@ async def get_api_usage_stats(days: int = 30) -> Dict[str, Any]:
     """)
     
     # Requests by day
-    day_rows = db_query(f"""
+    day_rows = await db_query(f"""
         SELECT DATE(timestamp) as date, COUNT(*) as count
         FROM api_usage_logs 
         WHERE timestamp >= NOW() - INTERVAL '{days} days'
@@ -296,7 +314,7 @@ async def get_api_usage_stats(days: int = 30) -> Dict[str, Any]:
     requests_by_day = {str(row['date']): row['count'] for row in day_rows}
     
     # Requests by endpoint
-    endpoint_rows = db_query(f"""
+    endpoint_rows = await db_query(f"""
         SELECT endpoint, COUNT(*) as count
         FROM api_usage_logs 
         WHERE timestamp >= NOW() - INTERVAL '{days} days'
@@ -307,7 +325,7 @@ async def get_api_usage_stats(days: int = 30) -> Dict[str, Any]:
     requests_by_endpoint = {row['endpoint']: row['count'] for row in endpoint_rows}
     
     # Requests by status
-    status_rows = db_query(f"""
+    status_rows = await db_query(f"""
         SELECT status_code, COUNT(*) as count
         FROM api_usage_logs 
         WHERE timestamp >= NOW() - INTERVAL '{days} days'
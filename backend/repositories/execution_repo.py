@@ -236,11 +236,9 @@ class ExecutionRepository(BaseRepository):
         query += " ORDER BY created_at DESC LIMIT %s"
         params.append(limit)
         
-        from psycopg2.extras import RealDictCursor
-        
         try:
-            with self.db.get_connection() as conn:
-                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            with self.db.connection() as conn:
+                with conn.cursor() as cur:
                     cur.execute(query, params)
                     rows = cur.fetchall()
                     # RealDictCursor handles JSONB columns properly
@@ -9,7 +9,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional, List, Dict, Any
 import logging
 
-from backend.utils.db import db_query
+from backend.utils.async_db import db_query
 from backend.openapi.automation_impl import (
     list_workflows_paginated, get_workflow_by_id, list_job_executions_paginated,
     trigger_workflow_execution, get_execution_status, cancel_execution,
@@ -43,7 +43,7 @@ async def get_workflow_folders(
 ):
     """Get workflow folders"""
     try:
-        folders = db_query("SELECT id, name, description, created_at FROM workflow_folders ORDER BY name")
+        folders = await db_query("SELECT id, name, description, created_at FROM workflow_folders ORDER BY name")
         return {"folders": folders, "total": len(folders)}
     except Exception as e:
         if 'does not exist' in str(e):
@@ -58,7 +58,7 @@ async def get_workflow_tags(
 ):
     """Get workflow tags"""
     try:
-        tags = db_query("SELECT DISTINCT tag FROM workflow_tags ORDER BY tag")
+        tags = await db_query("SELECT DISTINCT tag FROM workflow_tags ORDER BY tag")
         return {"tags": [t['tag'] for t in tags] if tags else [], "total": len(tags) if tags else 0}
     except Exception as e:
         if 'does not exist' in str(e):
@@ -215,7 +215,7 @@ async def list_queues(credentials: HTTPAuthorizationCredentials = Security(secur
 async def list_jobs(credentials: HTTPAuthorizationCredentials = Security(security)):
     """List scheduled jobs"""
     try:
-        jobs = db_query("SELECT * FROM scheduler_jobs ORDER BY name")
+        jobs = await db_query("SELECT * FROM scheduler_jobs ORDER BY name")
         return {"jobs": jobs, "total": len(jobs)}
     except Exception as e:
         logger.error(f"List jobs error: {str(e)}")
@@ -239,9 +239,9 @@ async def recent_executions(
             FROM workflow_executions e
         """
         if status:
-            executions = db_query(base_query + " WHERE e.status = %s ORDER BY e.started_at DESC LIMIT %s", (status, limit))
+            executions = await db_query(base_query + " WHERE e.status = %s ORDER BY e.started_at DESC LIMIT %s", (status, limit))
         else:
-            executions = db_query(base_query + " ORDER BY e.started_at DESC LIMIT %s", (limit,))
+            executions = await db_query(base_query + " ORDER BY e.started_at DESC LIMIT %s", (limit,))
         return {"executions": executions}
     except Exception as e:
         logger.error(f"Get recent executions error: {str(e)}")
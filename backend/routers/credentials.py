@@ -9,7 +9,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional, List, Dict, Any
 import logging
 
-from backend.utils.db import db_query, db_query_one, db_execute
+from backend.utils.async_db import db_query, db_query_one, db_execute
 
 logger = logging.getLogger(__name__)
 security = HTTPBearer()
@@ -23,8 +23,8 @@ async def get_credential_statistics(
 ):
     """Get credential vault statistics"""
     try:
-        total = db_query_one("SELECT COUNT(*) as count FROM credentials")
-        by_type = db_query("SELECT credential_type, COUNT(*) as count FROM credentials GROUP BY credential_type")
+        total = await db_query_one("SELECT COUNT(*) as count FROM credentials")
+        by_type = await db_query("SELECT credential_type, COUNT(*) as count FROM credentials GROUP BY credential_type")
         
         return {
             "total": total['count'] if total else 0,
@@ -40,12 +40,12 @@ async def get_credential_statistics(
 async def _list_credentials_impl(limit: int = 50, credential_type: Optional[str] = None):
     """Internal implementation for listing credentials"""
     if credential_type:
-        creds = db_query(
+        creds = await db_query(
             "SELECT id, name, credential_type, username, created_at FROM credentials WHERE credential_type = %s ORDER BY name LIMIT %s",
             (credential_type, limit)
         )
     else:
-        creds = db_query(
+        creds = await db_query(
             "SELECT id, name, credential_type, username, created_at FROM credentials ORDER BY name LIMIT %s",
             (limit,)
         )
@@ -87,7 +87,7 @@ async def create_credential(
 ):
     """Create a new credential"""
     try:
-        result = db_execute("""
+        result = await db_execute("""
             INSERT INTO credentials (name, credential_type, username, password, description)
             VALUES (%s, %s, %s, %s, %s) RETURNING id
         """, (request['name'], request.get('credential_type', 'ssh'), 
@@ -120,7 +120,7 @@ async def get_credential_audit(
     """Get credential access/change audit log"""
     try:
         # Check if credential_audit table exists
-        audit = db_query("""
+        audit = await db_query("""
             SELECT id, credential_id, action, user_id, timestamp as performed_at, details,
                    true as success
             FROM credential_audit
@@ -141,7 +141,7 @@ async def get_enterprise_configs(
 ):
     """Get enterprise authentication configurations (AD/LDAP)"""
     try:
-        configs = db_query("""
+        configs = await db_query("""
             SELECT id, name, credential_type, description, created_at 
             FROM credentials 
             WHERE credential_type IN ('active_directory', 'ldap', 'radius')
@@ -159,7 +159,7 @@ async def get_enterprise_users(
 ):
     """Get enterprise users from AD/LDAP"""
     try:
-        users = db_query("""
+        users = await db_query("""
             SELECT id, username, display_name, email, role_id, assigned_at
             FROM enterprise_user_roles
             ORDER BY username
@@ -178,7 +178,7 @@ async def get_credential_groups(
 ):
     """Get credential groups"""
     try:
-        groups = db_query("SELECT id, name, description, created_at FROM credential_groups ORDER BY name")
+        groups = await db_query("SELECT id, name, description, created_at FROM credential_groups ORDER BY name")
         return {"groups": groups, "total": len(groups)}
     except Exception as e:
         if 'does not exist' in str(e):
@@ -195,7 +195,7 @@ async def get_credential_devices(
     """Get devices associated with a credential"""
     try:
         # Check if credential_device_associations table exists
-        devices = db_query("""
+        devices = await db_query("""
             SELECT d.id, d.name, d.ip_address, d.device_type
             FROM devices d
             JOIN credential_device_associations cda ON d.id = cda.device_id
@@ -218,7 +218,7 @@ async def get_credential(
 ):
     """Get credential details (password masked)"""
     try:
-        cred = db_query_one("""
+        cred = await db_query_one("""
             SELECT id, name, credential_type, username, description, created_at
             FROM credentials WHERE id = %s
         """, (credential_id,))
@@ -240,7 +240,7 @@ async def update_credential(
 ):
     """Update a credential"""
     try:
-        db_execute("""
+        await db_execute("""
             UPDATE credentials SET name = %s, username = %s, description = %s
             WHERE id = %s
         """, (request.get('name'), request.get('username'), request.get('description'), credential_id))
@@ -252,7 +252,7 @@ async def update_credential(
 
 async def _delete_credential_impl(credential_id: int):
     """Internal implementation for deleting a credential"""
-    db_execute("DELETE FROM credentials WHERE id = %s", (credential_id,))
+    await db_execute("DELETE FROM credentials WHERE id = %s", (credential_id,))
     return {"success": True}
 
 
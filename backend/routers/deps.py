@@ -12,7 +12,8 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from starlette import status
 import logging
 
-from backend.db import get_db
+from backend.database import get_db
+from backend.utils import async_db
 
 logger = logging.getLogger(__name__)
 
@@ -34,43 +35,28 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Security(securi
     return {"token": credentials.credentials}
 
 
-def db_query(query: str, params: tuple = None, fetch_one: bool = False) -> Any:
+async def db_query(query: str, params: tuple = None, fetch_one: bool = False) -> Any:
     """
     Execute a database query and return results.
     Reduces boilerplate for simple queries.
     """
-    db = get_db()
-    with db.cursor() as cursor:
-        cursor.execute(query, params)
-        if fetch_one:
-            row = cursor.fetchone()
-            return dict(row) if row else None
-        return [dict(row) for row in cursor.fetchall()]
+    if fetch_one:
+        return await async_db.db_query_one(query, params)
+    return await async_db.db_query(query, params)
 
 
-def db_execute(query: str, params: tuple = None) -> bool:
+async def db_execute(query: str, params: tuple = None) -> bool:
     """
     Execute a database command (INSERT/UPDATE/DELETE).
     Returns True on success.
     """
-    db = get_db()
-    with db.cursor() as cursor:
-        cursor.execute(query, params)
-        db.commit()
+    await async_db.db_execute(query, params)
     return True
 
 
-def table_exists(table_name: str) -> bool:
+async def table_exists(table_name: str) -> bool:
     """Check if a database table exists."""
-    db = get_db()
-    with db.cursor() as cursor:
-        cursor.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_name = %s
-            )
-        """, (table_name,))
-        return cursor.fetchone()[0]
+    return await async_db.table_exists(table_name)
 
 
 def handle_db_error(e: Exception, operation: str, request_id: str = None) -> HTTPException:
@@ -10,7 +10,7 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 import logging
 
-from backend.utils.db import db_query, db_query_one, db_execute, table_exists
+from backend.utils.async_db import db_query, db_query_one, db_execute, table_exists
 from backend.openapi.identity_impl import (
     authenticate_user, get_current_user_from_token, list_users_paginated,
     list_roles_with_counts, get_role_members, get_role_permissions, get_all_permissions,
@@ -112,7 +112,7 @@ identity_router = APIRouter(prefix="/identity/v1", tags=["identity", "users", "r
 async def get_enterprise_configs():
     """Get available enterprise authentication providers"""
     try:
-        configs = db_query("""
+        configs = await db_query("""
             SELECT id, name, auth_type, is_default, enabled, priority
             FROM enterprise_auth_configs WHERE enabled = true
             ORDER BY priority ASC, name ASC
@@ -174,12 +174,12 @@ async def create_role(
             raise HTTPException(status_code=400, detail={"code": "INVALID_REQUEST", "message": "name and display_name are required"})
         
         # Check if role name already exists
-        existing = db_query_one("SELECT id FROM roles WHERE name = %s", (name,))
+        existing = await db_query_one("SELECT id FROM roles WHERE name = %s", (name,))
         if existing:
             raise HTTPException(status_code=400, detail={"code": "ROLE_EXISTS", "message": f"Role '{name}' already exists"})
         
         # Create role
-        result = db_execute("""
+        result = await db_execute("""
             INSERT INTO roles (name, display_name, description, role_type, priority, created_at, updated_at)
             VALUES (%s, %s, %s, 'custom', 100, NOW(), NOW())
             RETURNING id
@@ -190,9 +190,9 @@ async def create_role(
         # Add permissions
         if permissions:
             for perm_code in permissions:
-                perm = db_query_one("SELECT id FROM permissions WHERE code = %s", (perm_code,))
+                perm = await db_query_one("SELECT id FROM permissions WHERE code = %s", (perm_code,))
                 if perm:
-                    db_execute("INSERT INTO role_permissions (role_id, permission_id, created_at) VALUES (%s, %s, NOW())", 
+                    await db_execute("INSERT INTO role_permissions (role_id, permission_id, created_at) VALUES (%s, %s, NOW())", 
                               (role_id, perm['id']))
         
         return {"success": True, "id": role_id, "message": f"Role '{display_name}' created"}
@@ -212,7 +212,7 @@ async def update_role(
     """Update an existing role"""
     try:
         # Check role exists
-        role = db_query_one("SELECT * FROM roles WHERE id = %s", (role_id,))
+        role = await db_query_one("SELECT * FROM roles WHERE id = %s", (role_id,))
         if not role:
             raise HTTPException(status_code=404, detail={"code": "ROLE_NOT_FOUND", "message": "Role not found"})
         
@@ -222,12 +222,12 @@ async def update_role(
             permissions = request.get('permissions')
             if permissions is not None:
                 # Clear existing permissions
-                db_execute("DELETE FROM role_permissions WHERE role_id = %s", (role_id,))
+                await db_execute("DELETE FROM role_permissions WHERE role_id = %s", (role_id,))
                 # Add new permissions
                 for perm_code in permissions:
-                    perm = db_query_one("SELECT id FROM permissions WHERE code = %s", (perm_code,))
+                    perm = await db_query_one("SELECT id FROM permissions WHERE code = %s", (perm_code,))
                     if perm:
-                        db_execute("INSERT INTO role_permissions (role_id, permission_id, created_at) VALUES (%s, %s, NOW())", 
+                        await db_execute("INSERT INTO role_permissions (role_id, permission_id, created_at) VALUES (%s, %s, NOW())", 
                                   (role_id, perm['id']))
             return {"success": True, "message": "System role permissions updated"}
         
@@ -236,18 +236,18 @@ async def update_role(
         description = request.get('description', role['description'])
         permissions = request.get('permissions')
         
-        db_execute("""
+        await db_execute("""
             UPDATE roles SET display_name = %s, description = %s, updated_at = NOW()
             WHERE id = %s
         """, (display_name, description, role_id))
         
         # Update permissions if provided
         if permissions is not None:
-            db_execute("DELETE FROM role_permissions WHERE role_id = %s", (role_id,))
+            await db_execute("DELETE FROM role_permissions WHERE role_id = %s", (role_id,))
             for perm_code in permissions:
-                perm = db_query_one("SELECT id FROM permissions WHERE code = %s", (perm_code,))
+                perm = await db_query_one("SELECT id FROM permissions WHERE code = %s", (perm_code,))
                 if perm:
-                    db_execute("INSERT INTO role_permissions (role_id, permission_id, created_at) VALUES (%s, %s, NOW())", 
+                    await db_execute("INSERT INTO role_permissions (role_id, permission_id, created_at) VALUES (%s, %s, NOW())", 
                               (role_id, perm['id']))
         
         return {"success": True, "message": f"Role '{display_name}' updated"}
@@ -265,7 +265,7 @@ async def delete_role(
 ):
     """Delete a role (custom roles only)"""
     try:
-        role = db_query_one("SELECT * FROM roles WHERE id = %s", (role_id,))
+        role = await db_query_one("SELECT * FROM roles WHERE id = %s", (role_id,))
         if not role:
             raise HTTPException(status_code=404, detail={"code": "ROLE_NOT_FOUND", "message": "Role not found"})
         
@@ -273,7 +273,7 @@ async def delete_role(
             raise HTTPException(status_code=400, detail={"code": "CANNOT_DELETE_SYSTEM", "message": "Cannot delete system roles"})
         
         # Check if role has users
-        user_count = db_query_one("""
+        user_count = await db_query_one("""
             SELECT (SELECT COUNT(*) FROM user_roles WHERE role_id = %s) + 
                    (SELECT COUNT(*) FROM enterprise_user_roles WHERE role_id = %s) as total
         """, (role_id, role_id))
@@ -282,9 +282,9 @@ async def delete_role(
             raise HTTPException(status_code=400, detail={"code": "ROLE_HAS_USERS", "message": f"Cannot delete role with {user_count['total']} assigned users"})
         
         # Delete role permissions first
-        db_execute("DELETE FROM role_permissions WHERE role_id = %s", (role_id,))
+        await db_execute("DELETE FROM role_permissions WHERE role_id = %s", (role_id,))
         # Delete role
-        db_execute("DELETE FROM roles WHERE id = %s", (role_id,))
+        await db_execute("DELETE FROM roles WHERE id = %s", (role_id,))
         
         return {"success": True, "message": f"Role '{role['display_name']}' deleted"}
     except HTTPException:
@@ -342,23 +342,23 @@ async def add_role_member(
         
         if auth_type == 'local':
             # Find local user and add to role
-            user = db_query_one("SELECT id FROM users WHERE username = %s", (username,))
+            user = await db_query_one("SELECT id FROM users WHERE username = %s", (username,))
             if not user:
                 raise HTTPException(status_code=404, detail={"code": "USER_NOT_FOUND", "message": f"Local user {username} not found"})
             
             # Check if already assigned
-            existing = db_query_one("SELECT id FROM user_roles WHERE user_id = %s AND role_id = %s", (user['id'], role_id))
+            existing = await db_query_one("SELECT id FROM user_roles WHERE user_id = %s AND role_id = %s", (user['id'], role_id))
             if existing:
                 return {"success": True, "message": "User already assigned to role"}
             
-            db_execute("INSERT INTO user_roles (user_id, role_id) VALUES (%s, %s)", (user['id'], role_id))
+            await db_execute("INSERT INTO user_roles (user_id, role_id) VALUES (%s, %s)", (user['id'], role_id))
         else:
             # Enterprise user - add/update enterprise_user_roles
-            existing = db_query_one("SELECT id FROM enterprise_user_roles WHERE username = %s", (username,))
+            existing = await db_query_one("SELECT id FROM enterprise_user_roles WHERE username = %s", (username,))
             if existing:
-                db_execute("UPDATE enterprise_user_roles SET role_id = %s, assigned_at = NOW() WHERE username = %s", (role_id, username))
+                await db_execute("UPDATE enterprise_user_roles SET role_id = %s, assigned_at = NOW() WHERE username = %s", (role_id, username))
             else:
-                db_execute("""
+                await db_execute("""
                     INSERT INTO enterprise_user_roles (username, role_id, display_name, email, assigned_by, assigned_at)
                     VALUES (%s, %s, %s, %s, 1, NOW())
                 """, (username, role_id, display_name or username, email))
@@ -381,11 +381,11 @@ async def remove_role_member(
     """Remove a user from a role"""
     try:
         if auth_type == 'local':
-            user = db_query_one("SELECT id FROM users WHERE username = %s", (username,))
+            user = await db_query_one("SELECT id FROM users WHERE username = %s", (username,))
             if user:
-                db_execute("DELETE FROM user_roles WHERE user_id = %s AND role_id = %s", (user['id'], role_id))
+                await db_execute("DELETE FROM user_roles WHERE user_id = %s AND role_id = %s", (user['id'], role_id))
         else:
-            db_execute("DELETE FROM enterprise_user_roles WHERE username = %s AND role_id = %s", (username, role_id))
+            await db_execute("DELETE FROM enterprise_user_roles WHERE username = %s AND role_id = %s", (username, role_id))
         
         return {"success": True, "message": f"Removed {username} from role"}
     except Exception as e:
@@ -417,16 +417,16 @@ async def assign_enterprise_role_v2(
             raise HTTPException(status_code=400, detail={"code": "INVALID_REQUEST", "message": "username and role_id are required"})
         
         # Check if role exists
-        role = db_query_one("SELECT id, name FROM roles WHERE id = %s", (role_id,))
+        role = await db_query_one("SELECT id, name FROM roles WHERE id = %s", (role_id,))
         if not role:
             raise HTTPException(status_code=404, detail={"code": "ROLE_NOT_FOUND", "message": f"Role {role_id} not found"})
         
         # Check if user already has a role assignment
-        existing = db_query_one("SELECT id FROM enterprise_user_roles WHERE username = %s", (username,))
+        existing = await db_query_one("SELECT id FROM enterprise_user_roles WHERE username = %s", (username,))
         
         if existing:
             # Update existing assignment
-            db_execute("""
+            await db_execute("""
                 UPDATE enterprise_user_roles 
                 SET role_id = %s, display_name = %s, email = %s, assigned_at = NOW()
                 WHERE username = %s
@@ -434,7 +434,7 @@ async def assign_enterprise_role_v2(
             return {"success": True, "message": f"Updated role for {username} to {role['name']}", "action": "updated"}
         else:
             # Create new assignment
-            db_execute("""
+            await db_execute("""
                 INSERT INTO enterprise_user_roles (username, role_id, display_name, email, assigned_by, assigned_at)
                 VALUES (%s, %s, %s, %s, 1, NOW())
             """, (username, role_id, display_name or f"Enterprise - {username}", email))
@@ -454,11 +454,11 @@ async def remove_enterprise_role_v2(
 ):
     """Remove role assignment from an enterprise user"""
     try:
-        existing = db_query_one("SELECT id FROM enterprise_user_roles WHERE username = %s", (username,))
+        existing = await db_query_one("SELECT id FROM enterprise_user_roles WHERE username = %s", (username,))
         if not existing:
             raise HTTPException(status_code=404, detail={"code": "NOT_FOUND", "message": f"No role assignment found for {username}"})
         
-        db_execute("DELETE FROM enterprise_user_roles WHERE username = %s", (username,))
+        await db_execute("DELETE FROM enterprise_user_roles WHERE username = %s", (username,))
         return {"success": True, "message": f"Removed role assignment for {username}"}
         
     except HTTPException:
@@ -472,7 +472,7 @@ async def remove_enterprise_role_v2(
 async def list_enterprise_users_v2(credentials: HTTPAuthorizationCredentials = Security(security)):
     """List all enterprise users with their role assignments"""
     try:
-        users = db_query("""
+        users = await db_query("""
             SELECT eur.id, eur.username, eur.display_name, eur.email, 
                    eur.role_id, r.name as role_name, eur.assigned_at, eur.assigned_by
             FROM enterprise_user_roles eur
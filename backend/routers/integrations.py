@@ -10,7 +10,7 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 import logging
 
-from backend.utils.db import db_query, db_query_one, get_setting, get_settings_by_prefix, count_rows
+from backend.utils.async_db import db_query, db_query_one, get_setting, get_settings_by_prefix, count_rows
 from backend.utils.http import NetBoxClient
 from backend.openapi.integrations_impl import (
     list_integrations_paginated, get_integration_by_id, test_netbox_connection,
@@ -55,7 +55,7 @@ async def get_integration(
 async def netbox_status(credentials: HTTPAuthorizationCredentials = Security(security)):
     """Get NetBox connection status"""
     try:
-        settings = get_settings_by_prefix('netbox_')
+        settings = await get_settings_by_prefix('netbox_')
         return {
             "connected": bool(settings.get('netbox_url') and settings.get('netbox_token')),
             "url": settings.get('netbox_url', ''),
@@ -86,14 +86,14 @@ async def netbox_devices(
 ):
     """Get devices from NetBox cache"""
     try:
-        devices = db_query("""
+        devices = await db_query("""
             SELECT netbox_device_id as id, device_name as name, 
                    device_ip::text as primary_ip4, device_type, 
                    manufacturer as vendor, site_name as site,
                    role_name as role, cached_at
             FROM netbox_device_cache ORDER BY device_name LIMIT %s
         """, (limit,))
-        total = count_rows('netbox_device_cache')
+        total = await count_rows('netbox_device_cache')
         return {"data": devices, "count": total}
     except Exception as e:
         logger.error(f"Get NetBox devices error: {str(e)}")
@@ -140,8 +140,8 @@ async def netbox_device_interfaces(
 async def netbox_settings(credentials: HTTPAuthorizationCredentials = Security(security)):
     """Get NetBox integration settings"""
     try:
-        url = get_setting('netbox_url') or ''
-        token = get_setting('netbox_token') or get_setting('netbox_api_token') or ''
+        url = await get_setting('netbox_url') or ''
+        token = await get_setting('netbox_token') or await get_setting('netbox_api_token') or ''
         return {
             "success": True,
             "data": {
@@ -200,8 +200,8 @@ async def netbox_tags(credentials: HTTPAuthorizationCredentials = Security(secur
 async def prtg_settings(credentials: HTTPAuthorizationCredentials = Security(security)):
     """Get PRTG integration settings"""
     try:
-        url = get_setting('prtg_url') or ''
-        token = get_setting('prtg_api_token') or ''
+        url = await get_setting('prtg_url') or ''
+        token = await get_setting('prtg_api_token') or ''
         return {
             "success": True,
             "data": {
@@ -219,16 +219,16 @@ async def prtg_settings(credentials: HTTPAuthorizationCredentials = Security(sec
 async def prtg_status(credentials: HTTPAuthorizationCredentials = Security(security)):
     """Get PRTG connection status"""
     try:
-        url = get_setting('prtg_url')
+        url = await get_setting('prtg_url')
         if not url:
             return {"success": True, "data": {"connected": False}}
         
         # Try to test PRTG connection
         result = await test_prtg_connection({
             'url': url,
-            'username': get_setting('prtg_username'),
-            'passhash': get_setting('prtg_passhash'),
-            'api_token': get_setting('prtg_api_token'),
+            'username': await get_setting('prtg_username'),
+            'passhash': await get_setting('prtg_passhash'),
+            'api_token': await get_setting('prtg_api_token'),
             'verify_ssl': False
         })
         
@@ -266,7 +266,7 @@ async def test_mcp(
     """Test MCP connection"""
     try:
         # Use provided URL or fall back to settings
-        url = config.get('url') or get_setting('mcp_url') or ''
+        url = config.get('url') or await get_setting('mcp_url') or ''
         if not url:
             return {"success": True, "data": {"success": False, "message": "MCP URL not configured"}}
         
@@ -281,7 +281,7 @@ async def test_mcp(
                         # Count Ciena devices from inventory
                         device_count = 0
                         try:
-                            result = db_query_one("SELECT COUNT(*) as cnt FROM netbox_device_cache WHERE manufacturer ILIKE '%ciena%'")
+                            result = await db_query_one("SELECT COUNT(*) as cnt FROM netbox_device_cache WHERE manufacturer ILIKE '%ciena%'")
                             device_count = result['cnt'] if result else 0
                         except:
                             pass
@@ -297,8 +297,8 @@ async def test_mcp(
 async def mcp_settings(credentials: HTTPAuthorizationCredentials = Security(security)):
     """Get MCP integration settings"""
     try:
-        url = get_setting('mcp_url') or ''
-        token = get_setting('mcp_api_token') or ''
+        url = await get_setting('mcp_url') or ''
+        token = await get_setting('mcp_api_token') or ''
         return {
             "success": True,
             "data": {
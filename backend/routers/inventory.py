@@ -14,6 +14,7 @@ from backend.openapi.inventory_impl import (
     get_network_topology, list_sites, list_modules, list_racks,
     test_inventory_endpoints
 )
+from backend.services.device_directory import get_device_directory
 
 logger = logging.getLogger(__name__)
 security = HTTPBearer()
@@ -38,6 +39,16 @@ async def list_devices(
         raise HTTPException(status_code=500, detail={"code": "LIST_DEVICES_ERROR", "message": str(e)})
 
 
+@router.get("/devices/directory", summary="Get device directory status")
+async def device_directory_status(credentials: HTTPAuthorizationCredentials = Security(security)):
+    """Get size, hit/miss counters and freshness of this process's device directory"""
+    try:
+        return get_device_directory().get_stats()
+    except Exception as e:
+        logger.error(f"Get device directory status error: {str(e)}")
+        raise HTTPException(status_code=500, detail={"code": "DEVICE_DIRECTORY_ERROR", "message": str(e)})
+
+
 @router.get("/devices/{device_id}", summary="Get device")
 async def get_device(
     device_id: int = Path(...),
@@ -4,15 +4,19 @@ Monitoring API Router (/monitoring/v1)
 Handles alerts, metrics, SNMP polling, MIB profiles, and device monitoring.
 """
 
+from functools import partial
 from fastapi import APIRouter, Query, Path, Body, Security, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional, List, Dict, Any
 import logging
 
-from backend.utils.db import db_query, db_query_one
+from backend.utils.async_db import db_query, db_query_one, get_async_db
+from backend.services.latency_sketch import load_fleet_poller_stats, top_devices
+from backend.services.polling_daemon import load_daemon_status
 from backend.openapi.monitoring_impl import (
     list_alerts_paginated, acknowledge_alert, get_device_optical_metrics,
     get_device_interface_metrics, get_device_availability_metrics,
+    get_device_metric_rollups, get_metric_rollups,
     get_telemetry_status, get_alert_stats, test_monitoring_endpoints
 )
 
@@ -21,6 +25,17 @@ security = HTTPBearer()
 
 router = APIRouter(prefix="/monitoring/v1", tags=["monitoring", "alerts", "metrics"])
 
+# Longest range served from raw rows; longer ranges always use rollups
+RAW_MAX_HOURS = 168
+ROLLUP_DEFAULT_POINTS = 500
+
+MAX_POINTS_QUERY = Query(None, ge=1, le=10000, description="Return rollups with at most this many points per series")
+RESOLUTION_QUERY = Query(None, description="Rollup resolution: 5m, 1h or 1d (default: chosen from max_points)")
+
+
+def _use_rollups(hours: int, max_points: Optional[int], resolution: Optional[str]) -> bool:
+    return bool(max_points or resolution) or hours > RAW_MAX_HOURS
+
 
 @router.get("/alerts", summary="List alerts")
 async def list_alerts(
@@ -80,11 +95,20 @@ async def get_rules(credentials: HTTPAuthorizationCredentials = Security(securit
 @router.get("/devices/{device_id}/metrics/optical", summary="Get optical metrics")
 async def get_optical(
     device_id: int = Path(...),
+    hours: Optional[int] = Query(None, ge=1, le=8760),
+    max_points: Optional[int] = MAX_POINTS_QUERY,
+    resolution: Optional[str] = RESOLUTION_QUERY,
     credentials: HTTPAuthorizationCredentials = Security(security)
 ):
     """Get optical power metrics for a device"""
     try:
-        return await get_device_optical_metrics(device_id)
+        if _use_rollups(hours or 24, max_points, resolution):
+            return await get_device_metric_rollups(
+                device_id, 'optical_metrics', hours or 24, max_points or ROLLUP_DEFAULT_POINTS, resolution
+            )
+        return await get_device_optical_metrics(device_id, hours or 24)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Get optical metrics error: {str(e)}")
         raise HTTPException(status_code=500, detail={"code": "OPTICAL_METRICS_ERROR", "message": str(e)})
@@ -93,11 +117,20 @@ async def get_optical(
 @router.get("/devices/{device_id}/metrics/interfaces", summary="Get interface metrics")
 async def get_interfaces(
     device_id: int = Path(...),
+    hours: Optional[int] = Query(None, ge=1, le=8760),
+    max_points: Optional[int] = MAX_POINTS_QUERY,
+    resolution: Optional[str] = RESOLUTION_QUERY,
     credentials: HTTPAuthorizationCredentials = Security(security)
 ):
     """Get interface metrics for a device"""
     try:
-        return await get_device_interface_metrics(device_id)
+        if _use_rollups(hours or 24, max_points, resolution):
+            return await get_device_metric_rollups(
+                device_id, 'interface_metrics', hours or 24, max_points or ROLLUP_DEFAULT_POINTS, resolution
+            )
+        return await get_device_interface_metrics(device_id, hours or 24)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Get interface metrics error: {str(e)}")
         raise HTTPException(status_code=500, detail={"code": "INTERFACE_METRICS_ERROR", "message": str(e)})
@@ -106,11 +139,20 @@ async def get_interfaces(
 @router.get("/devices/{device_id}/metrics/availability", summary="Get availability metrics")
 async def get_availability(
     device_id: int = Path(...),
+    hours: Optional[int] = Query(None, ge=1, le=8760),
+    max_points: Optional[int] = MAX_POINTS_QUERY,
+    resolution: Optional[str] = RESOLUTION_QUERY,
     credentials: HTTPAuthorizationCredentials = Security(security)
 ):
     """Get availability metrics for a device"""
     try:
-        return await get_device_availability_metrics(device_id)
+        if _use_rollups(hours or 24, max_points, resolution):
+            return await get_device_metric_rollups(
+                device_id, 'availability_metrics', hours or 24, max_points or ROLLUP_DEFAULT_POINTS, resolution
+            )
+        return await get_device_availability_metrics(device_id, -(-hours // 24) if hours else 30)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Get availability metrics error: {str(e)}")
         raise HTTPException(status_code=500, detail={"code": "AVAILABILITY_ERROR", "message": str(e)})
@@ -142,11 +184,46 @@ async def polling_status(credentials: HTTPAuthorizationCredentials = Security(se
     return {"status": "running", "configs_enabled": 0, "last_execution": None}
 
 
+@router.get("/polling/latency", summary="Get fleet-wide poll latency")
+async def polling_latency(
+    devices: int = Query(20, ge=0, le=500),
+    max_age: int = Query(3600, ge=60),
+    credentials: HTTPAuthorizationCredentials = Security(security)
+):
+    """Get poll latency percentiles merged across all polling workers"""
+    try:
+        # Blocking Redis reads, kept off the event loop
+        stats, workers = await get_async_db().run_sync(
+            partial(load_fleet_poller_stats, max_age_seconds=max_age)
+        )
+        return {
+            **stats.summary(),
+            "workers": workers,
+            "slowest_devices": top_devices(stats.latency_by_device, limit=devices),
+        }
+    except Exception as e:
+        logger.error(f"Get polling latency error: {str(e)}")
+        raise HTTPException(status_code=500, detail={"code": "POLLING_LATENCY_ERROR", "message": str(e)})
+
+
+@router.get("/polling/daemon", summary="Get polling daemon status")
+async def polling_daemon_status(credentials: HTTPAuthorizationCredentials = Security(security)):
+    """Get throughput and schedule status of the resident polling daemon"""
+    try:
+        status = await get_async_db().run_sync(load_daemon_status)
+    except Exception as e:
+        logger.error(f"Get polling daemon status error: {str(e)}")
+        raise HTTPException(status_code=500, detail={"code": "POLLING_DAEMON_ERROR", "message": str(e)})
+    if status is None:
+        return {"is_running": False}
+    return status
+
+
 @router.get("/polling/configs", summary="Get polling configs")
 async def get_polling_configs(credentials: HTTPAuthorizationCredentials = Security(security)):
     """Get polling configurations from database"""
     try:
-        configs = db_query("""
+        configs = await db_query("""
             SELECT id, name, description, poll_type, enabled, interval_seconds,
                    target_type, target_device_ip, target_site_name, target_role,
                    target_manufacturer, snmp_community, tags, created_at, updated_at,
@@ -166,7 +243,7 @@ async def get_polling_executions(
 ):
     """Get polling executions from database"""
     try:
-        executions = db_query("""
+        executions = await db_query("""
             SELECT e.id, e.config_id, c.name as config_name, e.started_at, e.completed_at, 
                    e.status, e.devices_polled, e.devices_success, e.devices_failed, 
                    e.error_message,
@@ -185,7 +262,7 @@ async def get_polling_executions(
 async def get_poll_types(credentials: HTTPAuthorizationCredentials = Security(security)):
     """Get available poll types from database"""
     try:
-        rows = db_query("""
+        rows = await db_query("""
             SELECT id, name, display_name, description, enabled
             FROM snmp_poll_types WHERE enabled = true ORDER BY display_name
         """)
@@ -212,7 +289,7 @@ async def get_target_types(credentials: HTTPAuthorizationCredentials = Security(
 async def get_mib_profiles(credentials: HTTPAuthorizationCredentials = Security(security)):
     """Get MIB profiles from database"""
     try:
-        profiles = db_query("""
+        profiles = await db_query("""
             SELECT p.id, p.name, p.vendor, p.description, p.created_at,
                    COUNT(g.id) as group_count
             FROM snmp_profiles p
@@ -232,11 +309,11 @@ async def get_mib_profile(
 ):
     """Get MIB profile with groups and mappings"""
     try:
-        profile = db_query_one("SELECT * FROM snmp_profiles WHERE id = %s", (profile_id,))
+        profile = await db_query_one("SELECT * FROM snmp_profiles WHERE id = %s", (profile_id,))
         if not profile:
             return {"profile": None}
         
-        groups = db_query("""
+        groups = await db_query("""
             SELECT g.id, g.name, g.description, g.is_table,
                    array_agg(json_build_object(
                        'id', m.id, 'name', m.name, 'oid', m.oid,
@@ -256,12 +333,16 @@ async def get_mib_profile(
 @router.get("/metrics/optical", summary="Get optical metrics by IP")
 async def get_optical_by_ip(
     device_ip: str = Query(...),
-    hours: int = Query(24, ge=1, le=168),
+    hours: int = Query(24, ge=1, le=8760),
+    max_points: Optional[int] = MAX_POINTS_QUERY,
+    resolution: Optional[str] = RESOLUTION_QUERY,
     credentials: HTTPAuthorizationCredentials = Security(security)
 ):
     """Get optical power metrics for a device by IP address"""
     try:
-        metrics = db_query("""
+        if _use_rollups(hours, max_points, resolution):
+            return await get_metric_rollups('optical_metrics', device_ip, hours, max_points or ROLLUP_DEFAULT_POINTS, resolution)
+        metrics = await db_query("""
             SELECT device_ip, interface_name, tx_power, rx_power, 
                    tx_high_alarm, tx_low_alarm, rx_high_alarm, rx_low_alarm,
                    recorded_at
@@ -270,6 +351,8 @@ async def get_optical_by_ip(
             ORDER BY recorded_at DESC
         """, (device_ip, hours))
         return {"metrics": metrics, "count": len(metrics)}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Get optical metrics error: {str(e)}")
         return {"metrics": [], "count": 0}
@@ -278,18 +361,24 @@ async def get_optical_by_ip(
 @router.get("/metrics/availability", summary="Get availability metrics by IP")
 async def get_availability_by_ip(
     device_ip: str = Query(...),
-    hours: int = Query(24, ge=1, le=168),
+    hours: int = Query(24, ge=1, le=8760),
+    max_points: Optional[int] = MAX_POINTS_QUERY,
+    resolution: Optional[str] = RESOLUTION_QUERY,
     credentials: HTTPAuthorizationCredentials = Security(security)
 ):
     """Get availability metrics for a device by IP address"""
     try:
-        metrics = db_query("""
+        if _use_rollups(hours, max_points, resolution):
+            return await get_metric_rollups('availability_metrics', device_ip, hours, max_points or ROLLUP_DEFAULT_POINTS, resolution)
+        metrics = await db_query("""
             SELECT device_ip, is_reachable, response_time_ms, packet_loss_pct, recorded_at
             FROM device_availability 
             WHERE device_ip = %s AND recorded_at > NOW() - INTERVAL '%s hours'
             ORDER BY recorded_at DESC
         """, (device_ip, hours))
         return {"metrics": metrics, "count": len(metrics)}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Get availability metrics error: {str(e)}")
         return {"metrics": [], "count": 0}
@@ -298,13 +387,17 @@ async def get_availability_by_ip(
 @router.get("/metrics/interface", summary="Get interface metrics by IP")
 async def get_interface_by_ip(
     device_ip: str = Query(...),
-    hours: int = Query(24, ge=1, le=168),
+    hours: int = Query(24, ge=1, le=8760),
+    max_points: Optional[int] = MAX_POINTS_QUERY,
+    resolution: Optional[str] = RESOLUTION_QUERY,
     limit: int = Query(100, ge=1, le=1000),
     credentials: HTTPAuthorizationCredentials = Security(security)
 ):
-    """Get interface traffic metrics for a device by IP address"""
+    """Get interface traffic metrics for a device by IP address (limit applies to raw rows)"""
     try:
-        metrics = db_query("""
+        if _use_rollups(hours, max_points, resolution):
+            return await get_metric_rollups('interface_metrics', device_ip, hours, max_points or ROLLUP_DEFAULT_POINTS, resolution)
+        metrics = await db_query("""
             SELECT device_ip, interface_name, rx_bytes, tx_bytes, rx_bps, tx_bps,
                    rx_errors, tx_errors, recorded_at
             FROM snmp_interface_metrics 
@@ -312,6 +405,8 @@ async def get_interface_by_ip(
             ORDER BY recorded_at DESC LIMIT %s
         """, (device_ip, hours, limit))
         return {"metrics": metrics, "count": len(metrics)}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Get interface metrics error: {str(e)}")
         return {"metrics": [], "count": 0}
@@ -326,7 +421,7 @@ async def get_optical_thresholds(
     """Get optical power thresholds for a device"""
     try:
         if interface_index:
-            row = db_query_one("""
+            row = await db_query_one("""
                 SELECT tx_high_alarm, tx_low_alarm, rx_high_alarm, rx_low_alarm
                 FROM snmp_optical_metrics 
                 WHERE device_ip = %s AND interface_name LIKE %s
@@ -346,7 +441,7 @@ async def get_snmp_alarms(
 ):
     """Get SNMP alarms for a device"""
     try:
-        alarms = db_query("""
+        alarms = await db_query("""
             SELECT id, device_ip, alarm_type, severity, message, first_seen, last_seen, cleared_at
             FROM snmp_alarms 
             WHERE device_ip = %s AND cleared_at IS NULL
@@ -9,7 +9,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional, List, Dict, Any
 import logging
 
-from backend.utils.db import db_query
+from backend.utils.async_db import db_query
 
 logger = logging.getLogger(__name__)
 security = HTTPBearer()
@@ -21,7 +21,7 @@ router = APIRouter(prefix="/notifications/v1", tags=["notifications", "alerts"])
 async def list_channels(credentials: HTTPAuthorizationCredentials = Security(security)):
     """List notification channels (email, slack, webhook, etc.)"""
     try:
-        channels = db_query("SELECT * FROM notification_channels ORDER BY name")
+        channels = await db_query("SELECT * FROM notification_channels ORDER BY name")
         return {"channels": channels, "total": len(channels)}
     except Exception as e:
         logger.error(f"List channels error: {str(e)}")
@@ -41,7 +41,7 @@ async def create_channel(
 async def list_rules(credentials: HTTPAuthorizationCredentials = Security(security)):
     """List notification rules"""
     try:
-        rules = db_query("SELECT * FROM notification_rules ORDER BY name")
+        rules = await db_query("SELECT * FROM notification_rules ORDER BY name")
         return {"rules": rules, "total": len(rules)}
     except Exception as e:
         logger.error(f"List rules error: {str(e)}")
@@ -61,7 +61,7 @@ async def create_rule(
 async def list_templates(credentials: HTTPAuthorizationCredentials = Security(security)):
     """List notification templates"""
     try:
-        templates = db_query("SELECT * FROM notification_templates ORDER BY name")
+        templates = await db_query("SELECT * FROM notification_templates ORDER BY name")
         return {"templates": templates, "total": len(templates)}
     except Exception as e:
         logger.error(f"List templates error: {str(e)}")
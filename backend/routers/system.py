@@ -12,11 +12,12 @@ import logging
 
 from backend.openapi.system_impl import (
     get_system_health, get_system_info, get_system_logs, get_system_settings,
+    get_database_pool_stats,
     update_system_setting, get_api_usage_stats, clear_system_cache,
     test_system_endpoints
 )
 from backend.openapi.identity_impl import get_current_user_from_token
-from backend.utils.db import db_query, db_query_one
+from backend.utils.async_db import db_query, db_query_one
 
 logger = logging.getLogger(__name__)
 security = HTTPBearer()
@@ -96,14 +97,14 @@ async def get_log_stats(
     """Get log statistics"""
     try:
         # Get total count
-        total_result = db_query_one(f"""
+        total_result = await db_query_one(f"""
             SELECT COUNT(*) as total FROM system_logs 
             WHERE timestamp >= NOW() - INTERVAL '{hours} hours'
         """)
         total = total_result['total'] if total_result else 0
         
         # Get counts by level
-        level_results = db_query(f"""
+        level_results = await db_query(f"""
             SELECT level, COUNT(*) as count FROM system_logs 
             WHERE timestamp >= NOW() - INTERVAL '{hours} hours'
             GROUP BY level
@@ -111,7 +112,7 @@ async def get_log_stats(
         by_level = {r['level']: r['count'] for r in level_results}
         
         # Get counts by source
-        source_results = db_query(f"""
+        source_results = await db_query(f"""
             SELECT COALESCE(source, 'unknown') as source, COUNT(*) as count FROM system_logs 
             WHERE timestamp >= NOW() - INTERVAL '{hours} hours'
             GROUP BY source
@@ -176,6 +177,16 @@ async def get_info(credentials: HTTPAuthorizationCredentials = Security(security
         raise HTTPException(status_code=500, detail={"code": "INFO_ERROR", "message": str(e)})
 
 
+@router.get("/database/pool", summary="Get database pool statistics")
+async def database_pool_stats(credentials: HTTPAuthorizationCredentials = Security(security)):
+    """Get connection pool waits, checkout counts and query latency histograms"""
+    try:
+        return await get_database_pool_stats()
+    except Exception as e:
+        logger.error(f"Get database pool stats error: {str(e)}")
+        raise HTTPException(status_code=500, detail={"code": "DATABASE_POOL_ERROR", "message": str(e)})
+
+
 @router.get("/usage/stats", summary="Get API usage statistics")
 async def get_usage_stats(
     days: int = Query(30, ge=1, le=365),
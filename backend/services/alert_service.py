@@ -677,7 +677,7 @@ class AlertEvaluator:
                         str(alert.get('id')),
                         'sent' if success else 'failed'
                     ))
-                    self.db.get_connection().commit()
+                    self.db.commit()
                     
         except Exception as e:
             import logging
@@ -3,6 +3,7 @@ High-Performance Async SNMP Poller
 
 Best-in-class SNMP polling implementation with:
 - True async I/O using asyncio + pysnmp
+- Optional native UDP engine (one socket, no subprocess or thread per query)
 - Connection pooling and session reuse
 - GETBULK for efficient multi-OID queries
 - Staggered polling to distribute load
@@ -23,7 +24,9 @@ from typing import Dict, List, Any, Optional, Tuple, Callable
 from dataclasses import dataclass, field
 from collections import defaultdict
 from contextlib import asynccontextmanager
-import statistics
+from functools import lru_cache
+
+from backend.services.latency_sketch import LatencySketch
 
 logger = logging.getLogger(__name__)
 
@@ -63,20 +66,31 @@ class SNMPResult:
     duration: float = 0.0
     timestamp: float = field(default_factory=time.time)
     retries_used: int = 0
+    rtt: float = 0.0  # Slowest single request/response round trip (native engine)
 
 
 @dataclass
 class PollerStats:
-    """Poller performance statistics."""
+    """
+    Poller performance statistics.
+    
+    Latency is kept in fixed-memory sketches (overall, per device and per
+    error type) rather than a list of every duration, so a long-lived
+    poller does not grow and snapshots from several workers can be merged.
+    """
     total_queries: int = 0
     successful_queries: int = 0
     failed_queries: int = 0
     total_duration: float = 0.0
     min_duration: float = float('inf')
     max_duration: float = 0.0
-    durations: List[float] = field(default_factory=list)
+    latency: LatencySketch = field(default_factory=LatencySketch)
+    latency_by_device: Dict[str, LatencySketch] = field(default_factory=dict)
+    latency_by_error: Dict[str, LatencySketch] = field(default_factory=dict)
     errors_by_type: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
     start_time: float = field(default_factory=time.time)
+    pdus_sent: int = 0
+    pdus_by_device: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
     
     @property
     def success_rate(self) -> float:
@@ -86,17 +100,21 @@ class PollerStats:
     
     @property
     def avg_duration(self) -> float:
-        if not self.durations:
+        if self.total_queries == 0:
             return 0.0
-        return statistics.mean(self.durations)
+        return self.total_duration / self.total_queries
+    
+    @property
+    def p50_duration(self) -> float:
+        return self.latency.quantile(0.50)
     
     @property
     def p95_duration(self) -> float:
-        if len(self.durations) < 20:
-            return self.max_duration
-        sorted_durations = sorted(self.durations)
-        idx = int(len(sorted_durations) * 0.95)
-        return sorted_durations[idx]
+        return self.latency.quantile(0.95)
+    
+    @property
+    def p99_duration(self) -> float:
+        return self.latency.quantile(0.99)
     
     @property
     def queries_per_second(self) -> float:
@@ -105,12 +123,29 @@ class PollerStats:
             return 0.0
         return self.total_queries / elapsed
     
+    @property
+    def avg_pdus_per_device(self) -> float:
+        if not self.pdus_by_device:
+            return 0.0
+        return self.pdus_sent / len(self.pdus_by_device)
+    
+    def record_pdus(self, device_ip: str, count: int = 1):
+        """Count request PDUs (including retransmits) sent to a device."""
+        self.pdus_sent += count
+        self.pdus_by_device[device_ip] += count
+    
     def record(self, result: SNMPResult):
+        duration = result.duration
         self.total_queries += 1
-        self.durations.append(result.duration)
-        self.total_duration += result.duration
-        self.min_duration = min(self.min_duration, result.duration)
-        self.max_duration = max(self.max_duration, result.duration)
+        self.total_duration += duration
+        self.min_duration = min(self.min_duration, duration)
+        self.max_duration = max(self.max_duration, duration)
+        self.latency.add(duration)
+        
+        device = self.latency_by_device.get(result.target.ip)
+        if device is None:
+            device = self.latency_by_device[result.target.ip] = LatencySketch()
+        device.add(duration)
         
         if result.success:
             self.successful_queries += 1
@@ -118,6 +153,90 @@ class PollerStats:
             self.failed_queries += 1
             error_type = result.error.split(':')[0] if result.error else 'Unknown'
             self.errors_by_type[error_type] += 1
+            by_error = self.latency_by_error.get(error_type)
+            if by_error is None:
+                by_error = self.latency_by_error[error_type] = LatencySketch()
+            by_error.add(duration)
+    
+    def merge(self, other: 'PollerStats'):
+        """Fold another worker's (or cycle's) statistics into this one."""
+        self.total_queries += other.total_queries
+        self.successful_queries += other.successful_queries
+        self.failed_queries += other.failed_queries
+        self.total_duration += other.total_duration
+        self.min_duration = min(self.min_duration, other.min_duration)
+        self.max_duration = max(self.max_duration, other.max_duration)
+        self.start_time = min(self.start_time, other.start_time)
+        self.pdus_sent += other.pdus_sent
+        self.latency.merge(other.latency)
+        for ip, sketch in other.latency_by_device.items():
+            self.latency_by_device.setdefault(ip, LatencySketch()).merge(sketch)
+        for error_type, sketch in other.latency_by_error.items():
+            self.latency_by_error.setdefault(error_type, LatencySketch()).merge(sketch)
+        for error_type, count in other.errors_by_type.items():
+            self.errors_by_type[error_type] += count
+        for ip, count in other.pdus_by_device.items():
+            self.pdus_by_device[ip] += count
+    
+    def summary(self) -> Dict[str, Any]:
+        """Return headline figures with latency in milliseconds."""
+        return {
+            'total_queries': self.total_queries,
+            'successful_queries': self.successful_queries,
+            'failed_queries': self.failed_queries,
+            'success_rate': round(self.success_rate, 2),
+            'queries_per_second': round(self.queries_per_second, 2),
+            'devices': len(self.latency_by_device),
+            'pdus_sent': self.pdus_sent,
+            'latency': self.latency.summary(),
+            'errors_by_type': dict(self.errors_by_type),
+            'latency_by_error': {
+                error_type: sketch.summary()
+                for error_type, sketch in self.latency_by_error.items()
+            },
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for publishing to other processes."""
+        return {
+            'total_queries': self.total_queries,
+            'successful_queries': self.successful_queries,
+            'failed_queries': self.failed_queries,
+            'total_duration': self.total_duration,
+            'min_duration': self.min_duration if self.total_queries else None,
+            'max_duration': self.max_duration,
+            'start_time': self.start_time,
+            'pdus_sent': self.pdus_sent,
+            'pdus_by_device': dict(self.pdus_by_device),
+            'errors_by_type': dict(self.errors_by_type),
+            'latency': self.latency.to_dict(),
+            'latency_by_device': {ip: s.to_dict() for ip, s in self.latency_by_device.items()},
+            'latency_by_error': {e: s.to_dict() for e, s in self.latency_by_error.items()},
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PollerStats':
+        stats = cls(
+            total_queries=data.get('total_queries', 0),
+            successful_queries=data.get('successful_queries', 0),
+            failed_queries=data.get('failed_queries', 0),
+            total_duration=data.get('total_duration', 0.0),
+            max_duration=data.get('max_duration', 0.0),
+            start_time=data.get('start_time', time.time()),
+            pdus_sent=data.get('pdus_sent', 0),
+            latency=LatencySketch.from_dict(data.get('latency', {})),
+        )
+        if data.get('min_duration') is not None:
+            stats.min_duration = data['min_duration']
+        stats.pdus_by_device.update(data.get('pdus_by_device', {}))
+        stats.errors_by_type.update(data.get('errors_by_type', {}))
+        stats.latency_by_device = {
+            ip: LatencySketch.from_dict(s) for ip, s in data.get('latency_by_device', {}).items()
+        }
+        stats.latency_by_error = {
+            e: LatencySketch.from_dict(s) for e, s in data.get('latency_by_error', {}).items()
+        }
+        return stats
 
 
 class AsyncSNMPEngine:
@@ -146,12 +265,16 @@ class AsyncSNMPEngine:
         self._semaphore: Optional[asyncio.Semaphore] = None
         self._engine = None
         self._stats = PollerStats()
+        self._executor = self._create_executor()
+    
+    def _create_executor(self):
+        """Create the thread pool used for subprocess/pysnmp queries."""
         # Thread pool for concurrent sync SNMP operations
         # Size matches max_concurrent for optimal parallelism with 1000+ devices
         # Each thread handles one SNMP connection, I/O-bound so can exceed CPU count
         from concurrent.futures import ThreadPoolExecutor
-        self._executor = ThreadPoolExecutor(
-            max_workers=max_concurrent,
+        return ThreadPoolExecutor(
+            max_workers=self.max_concurrent,
             thread_name_prefix="snmp_worker"
         )
     
@@ -265,7 +388,6 @@ class AsyncSNMPEngine:
         import subprocess
         
         version_flag = '-v1' if target.version == '1' else '-v2c'
-        timeout_decisecs = max(1, int(target.timeout * 10))  # Convert to deciseconds
         
         # Build command for multiple OIDs in single request
         cmd = [
@@ -273,8 +395,8 @@ class AsyncSNMPEngine:
             '-OQn',  # Quick print, numeric OIDs
             version_flag,
             '-c', target.community,
-            '-t', str(timeout_decisecs // 10),  # Timeout in seconds
-            '-r', '0',  # No retries (we handle retries ourselves)
+            '-t', f'{target.timeout:g}',  # Per-attempt timeout in seconds
+            '-r', str(target.retries),  # net-snmp retransmits on timeout
             f'{target.ip}:{target.port}',
         ] + oids
         
@@ -283,7 +405,8 @@ class AsyncSNMPEngine:
                 cmd,
                 capture_output=True,
                 text=True,
-                timeout=target.timeout + 1,  # Subprocess timeout slightly longer
+                # Subprocess timeout slightly longer than all attempts
+                timeout=target.timeout * (target.retries + 1) + 1,
             )
             
             if result.returncode != 0:
@@ -447,8 +570,8 @@ class AsyncSNMPEngine:
                 '-OQn',
                 '-v1',
                 '-c', target.community,
-                '-t', str(int(target.timeout)),
-                '-r', '0',
+                '-t', f'{target.timeout:g}',
+                '-r', str(target.retries),
                 f'{target.ip}:{target.port}',
                 oid,
             ]
@@ -458,8 +581,8 @@ class AsyncSNMPEngine:
                 '-OQn',
                 '-v2c',
                 '-c', target.community,
-                '-t', str(int(target.timeout)),
-                '-r', '0',
+                '-t', f'{target.timeout:g}',
+                '-r', str(target.retries),
                 '-Cr' + str(max_repetitions),  # Max repetitions
                 f'{target.ip}:{target.port}',
                 oid,
@@ -470,7 +593,7 @@ class AsyncSNMPEngine:
                 cmd,
                 capture_output=True,
                 text=True,
-                timeout=target.timeout * 3,  # Allow more time for bulk
+                timeout=target.timeout * (target.retries + 1) * 3,  # Allow more time for bulk
             )
             
             # Parse output
@@ -543,6 +666,49 @@ class AsyncSNMPEngine:
         except Exception as e:
             return SNMPResult(target=target, success=False, error=str(e))
     
+    async def walk_table(
+        self,
+        target: SNMPTarget,
+        oids: List[str],
+        max_repetitions: int = 25,
+    ) -> SNMPResult:
+        """
+        Walk several base OIDs (e.g. the columns of one table) on a target.
+        
+        This engine walks each OID separately; NativeSNMPEngine overrides
+        it to walk all columns in a single GETBULK stream.
+        
+        Args:
+            target: SNMP target configuration
+            oids: Base OIDs to walk
+            max_repetitions: Max rows to retrieve per request
+        
+        Returns:
+            SNMPResult with values combined from all walks
+        """
+        all_values = {}
+        success = False
+        error = None
+        
+        for oid in oids:
+            try:
+                result = await self.get_bulk(target, oid, max_repetitions)
+                if result.success and result.values:
+                    all_values.update(result.values)
+                    success = True
+                elif result.error and not error:
+                    error = result.error
+            except Exception as e:
+                if not error:
+                    error = str(e)
+        
+        return SNMPResult(
+            target=target,
+            success=success,
+            values=all_values,
+            error=error if not success else None,
+        )
+    
     @property
     def stats(self) -> PollerStats:
         """Get current statistics."""
@@ -551,6 +717,326 @@ class AsyncSNMPEngine:
     def reset_stats(self):
         """Reset statistics."""
         self._stats = PollerStats()
+    
+    def close(self):
+        """Release the worker thread pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class NativeSNMPEngine(AsyncSNMPEngine):
+    """
+    Pure-asyncio SNMPv1/v2c engine.
+    
+    Sends every query over one shared UDP socket (SNMPDatagramTransport)
+    instead of forking net-snmp per query. Requests are multiplexed by
+    request-id and retried by loop timers, so no worker threads are parked
+    on slow devices. Results follow the same SNMPResult contract as
+    AsyncSNMPEngine (values keyed by dotted OID with a leading dot).
+    """
+    
+    def __init__(
+        self,
+        max_concurrent: int = 200,
+        default_timeout: float = 5.0,
+        default_retries: int = 1,
+        transport=None,
+    ):
+        super().__init__(
+            max_concurrent=max_concurrent,
+            default_timeout=default_timeout,
+            default_retries=default_retries,
+        )
+        from .snmp_transport import SNMPDatagramTransport
+        # A transport passed in is shared (e.g. by the polling daemon) and
+        # outlives this engine; only one created here is closed with it
+        self._owns_transport = transport is None
+        self.transport = transport or SNMPDatagramTransport()
+    
+    def _create_executor(self):
+        """The native engine never blocks, so it needs no thread pool."""
+        return None
+    
+    async def _request(
+        self,
+        target: SNMPTarget,
+        pdu_type: int,
+        oids: List[str],
+        max_repetitions: int = 0,
+    ):
+        """Send one PDU to a target, bounded by the engine semaphore."""
+        from .snmp_transport import encode_request, SNMP_VERSION_1, SNMP_VERSION_2C
+        
+        version = SNMP_VERSION_1 if target.version == '1' else SNMP_VERSION_2C
+        semaphore = await self._get_semaphore()
+        async with semaphore:
+            try:
+                response = await self.transport.request(
+                    target.ip,
+                    target.port,
+                    lambda request_id: encode_request(
+                        version, target.community, pdu_type, request_id, oids,
+                        max_repetitions=max_repetitions,
+                    ),
+                    timeout=target.timeout,
+                    retries=target.retries,
+                )
+            except Exception:
+                self._stats.record_pdus(target.ip, 1 + target.retries)
+                raise
+        self._stats.record_pdus(target.ip, 1 + response.retries_used)
+        return response
+    
+    async def _execute_get(
+        self,
+        target: SNMPTarget,
+        oids: List[str],
+    ) -> SNMPResult:
+        """Execute SNMP GET over the shared datagram transport."""
+        from .snmp_transport import (
+            PDU_GET, EXCEPTION_TAGS, ERROR_STATUS_NAMES, SNMPTimeoutError, render_value
+        )
+        
+        try:
+            response = await self._request(target, PDU_GET, oids)
+        except SNMPTimeoutError as e:
+            return SNMPResult(
+                target=target,
+                success=False,
+                error=f"SNMP error: {e}",
+                retries_used=target.retries,
+            )
+        except Exception as e:
+            return SNMPResult(target=target, success=False, error=str(e))
+        
+        if response.error_status:
+            status = ERROR_STATUS_NAMES.get(response.error_status, str(response.error_status))
+            return SNMPResult(
+                target=target,
+                success=False,
+                error=f"SNMP error: {status} at index {response.error_index}",
+                retries_used=response.retries_used,
+            )
+        
+        values = {
+            '.' + oid: render_value(tag, value)
+            for oid, tag, value in response.varbinds
+            if tag not in EXCEPTION_TAGS
+        }
+        return SNMPResult(
+            target=target,
+            success=True,
+            values=values,
+            retries_used=response.retries_used,
+            rtt=response.rtt,
+        )
+    
+    async def _execute_bulk(
+        self,
+        target: SNMPTarget,
+        oid: str,
+        max_repetitions: int,
+    ) -> SNMPResult:
+        """
+        Walk a subtree with GETBULK (v2c) or GETNEXT (v1).
+        
+        Mirrors snmpbulkwalk semantics: stops when the agent leaves the
+        subtree, reports endOfMibView or stops increasing OIDs, keeps
+        partial results on a mid-walk timeout, and falls back to a GET on
+        the base OID when the subtree is empty.
+        """
+        from .snmp_transport import (
+            PDU_GETBULK, PDU_GETNEXT, TAG_END_OF_MIB_VIEW, EXCEPTION_TAGS,
+            SNMPTimeoutError, render_value,
+        )
+        
+        base = oid.strip('.')
+        prefix = base + '.'
+        pdu_type = PDU_GETNEXT if target.version == '1' else PDU_GETBULK
+        values = {}
+        current = base
+        current_key = _oid_key(base)
+        retries_used = 0
+        rtt = 0.0
+        
+        while True:
+            try:
+                response = await self._request(target, pdu_type, [current], max_repetitions)
+            except SNMPTimeoutError as e:
+                retries_used += target.retries
+                if values:
+                    break
+                return SNMPResult(
+                    target=target,
+                    success=False,
+                    error=f"SNMP error: {e}",
+                    retries_used=retries_used,
+                )
+            except Exception as e:
+                if values:
+                    break
+                return SNMPResult(target=target, success=False, error=str(e))
+            
+            retries_used += response.retries_used
+            rtt = max(rtt, response.rtt)
+            if response.error_status or not response.varbinds:
+                # v1 agents signal end of MIB with noSuchName
+                break
+            
+            finished = False
+            last_oid = None
+            for vb_oid, tag, value in response.varbinds:
+                if tag == TAG_END_OF_MIB_VIEW or not vb_oid.startswith(prefix):
+                    finished = True
+                    break
+                if tag in EXCEPTION_TAGS:
+                    continue
+                values['.' + vb_oid] = render_value(tag, value)
+                last_oid = vb_oid
+            
+            if finished or last_oid is None:
+                break
+            last_key = _oid_key(last_oid)
+            if last_key <= current_key:
+                logger.debug(f"{target.ip}: OID not increasing at {last_oid}, stopping walk")
+                break
+            current, current_key = last_oid, last_key
+        
+        if not values:
+            # Like net-snmp, walking an instance OID returns that instance
+            get_result = await self._execute_get(target, [base])
+            if get_result.success:
+                get_result.retries_used += retries_used
+                return get_result
+        
+        return SNMPResult(target=target, success=True, values=values, retries_used=retries_used, rtt=rtt)
+    
+    async def walk_table(
+        self,
+        target: SNMPTarget,
+        oids: List[str],
+        max_repetitions: int = 25,
+        max_varbinds: int = 150,
+    ) -> SNMPResult:
+        """
+        Walk every base OID in one pipelined GETBULK stream.
+        
+        Each request carries one varbind per still-active column, so a
+        6-column interface table costs the round-trips of a single walk.
+        Columns advance independently and are dropped as soon as they leave
+        their subtree; repetitions grow as columns drop out, bounded by
+        max_varbinds per response. Columns that return nothing (instance
+        OIDs such as sysName.0) are fetched with one GET at the end.
+        
+        Args:
+            target: SNMP target configuration
+            oids: Base OIDs (table columns or scalars) to walk
+            max_repetitions: Upper bound on rows per request
+            max_varbinds: Upper bound on varbinds per response
+        
+        Returns:
+            SNMPResult with values from all columns
+        """
+        from .snmp_transport import (
+            PDU_GETBULK, PDU_GETNEXT, TAG_END_OF_MIB_VIEW, EXCEPTION_TAGS,
+            SNMPTimeoutError, render_value,
+        )
+        
+        start_time = time.time()
+        bases = list(dict.fromkeys(oid.strip('.') for oid in oids))
+        prefixes = {base: base + '.' for base in bases}
+        cursors = {base: (base, _oid_key(base)) for base in bases}
+        found = {base: False for base in bases}
+        active = list(bases)
+        pdu_type = PDU_GETNEXT if target.version == '1' else PDU_GETBULK
+        values = {}
+        error = None
+        retries_used = 0
+        rtt = 0.0
+        
+        while active:
+            repetitions = max(1, min(max_repetitions, max_varbinds // len(active)))
+            try:
+                response = await self._request(
+                    target, pdu_type, [cursors[base][0] for base in active], repetitions
+                )
+            except SNMPTimeoutError as e:
+                retries_used += target.retries
+                error = f"SNMP error: {e}"
+                break
+            except Exception as e:
+                error = str(e)
+                break
+            
+            retries_used += response.retries_used
+            rtt = max(rtt, response.rtt)
+            if response.error_status:
+                if response.error_status == 1 and max_varbinds > len(active):
+                    # tooBig: shrink the response and try again
+                    max_varbinds = max(len(active), max_varbinds // 2)
+                    continue
+                if response.error_status == 2 and 0 < response.error_index <= len(active):
+                    # v1 noSuchName: that column ran off the end of the MIB
+                    active.pop(response.error_index - 1)
+                    continue
+                break
+            if not response.varbinds:
+                break
+            
+            width = len(active)
+            done = set()
+            for position, (vb_oid, tag, value) in enumerate(response.varbinds):
+                base = active[position % width]
+                if base in done:
+                    continue
+                if tag == TAG_END_OF_MIB_VIEW or not vb_oid.startswith(prefixes[base]):
+                    done.add(base)
+                    continue
+                key = _oid_key(vb_oid)
+                if key <= cursors[base][1]:
+                    logger.debug(f"{target.ip}: OID not increasing at {vb_oid}, stopping column")
+                    done.add(base)
+                    continue
+                cursors[base] = (vb_oid, key)
+                if tag not in EXCEPTION_TAGS:
+                    values['.' + vb_oid] = render_value(tag, value)
+                    found[base] = True
+            
+            active = [base for base in active if base not in done]
+        
+        empty = [base for base in bases if not found[base]]
+        if empty and error is None:
+            # Like net-snmp, walking an instance OID returns that instance
+            get_result = await self._execute_get(target, empty)
+            retries_used += get_result.retries_used
+            rtt = max(rtt, get_result.rtt)
+            if get_result.success:
+                values.update(get_result.values)
+        
+        result = SNMPResult(
+            target=target,
+            success=bool(values),
+            values=values,
+            error=error if not values else None,
+            duration=time.time() - start_time,
+            retries_used=retries_used,
+            rtt=rtt,
+        )
+        self._stats.record(result)
+        return result
+    
+    def close(self):
+        """Close the datagram transport if this engine owns it."""
+        if self._owns_transport:
+            self.transport.close()
+
+
+@lru_cache(maxsize=65536)
+def _oid_key(oid: str) -> Tuple[int, ...]:
+    """Numeric sort key for a dotted OID."""
+    return tuple(int(arc) for arc in oid.strip('.').split('.'))
+
 
 
 class AsyncSNMPPoller:
@@ -568,6 +1054,9 @@ class AsyncSNMPPoller:
         default_timeout: float = 5.0,
         default_retries: int = 1,
         progress_callback: Optional[Callable[[int, int], None]] = None,
+        transport: str = "subprocess",
+        latency_tracker=None,
+        snmp_transport=None,
     ):
         """
         Initialize the poller.
@@ -579,21 +1068,60 @@ class AsyncSNMPPoller:
             default_timeout: Default SNMP timeout
             default_retries: Default retry count
             progress_callback: Optional callback(completed, total) for progress
+            transport: 'subprocess' (net-snmp via thread pool) or
+                       'native' (pure-asyncio UDP engine)
+            latency_tracker: Optional DeviceLatencyTracker that sets each
+                             target's timeout/retries and defers slow-lane devices
+            snmp_transport: Optional SNMPDatagramTransport to share with other
+                            pollers (native transport only); left open on close()
         """
-        self.engine = AsyncSNMPEngine(
+        if transport not in ENGINE_CLASSES:
+            raise ValueError(f"Unknown SNMP transport '{transport}'")
+        self.transport = transport
+        engine_kwargs = {}
+        if snmp_transport is not None:
+            if transport != 'native':
+                raise ValueError("snmp_transport requires the native transport")
+            engine_kwargs['transport'] = snmp_transport
+        self.engine = ENGINE_CLASSES[transport](
             max_concurrent=max_concurrent,
             default_timeout=default_timeout,
             default_retries=default_retries,
+            **engine_kwargs,
         )
         self.batch_size = batch_size
         self.stagger_delay = stagger_delay
         self.progress_callback = progress_callback
+        self.latency_tracker = latency_tracker
+        # Targets skipped by the last poll because they are in the slow lane
+        self.deferred: List[SNMPTarget] = []
+    
+    def schedule(self, targets: List[SNMPTarget]) -> List[SNMPTarget]:
+        """
+        Apply learned timeouts and drop slow-lane devices not yet due.
+        
+        The poll methods call this themselves; callers that need the
+        scheduled targets first (e.g. to size a poll cycle) call it once
+        and pass scheduled=True. Deferred targets are kept in self.deferred.
+        """
+        if self.latency_tracker is None:
+            self.deferred = []
+            return list(targets)
+        targets, self.deferred = self.latency_tracker.schedule(targets)
+        if self.deferred:
+            logger.info(f"Deferring {len(self.deferred)} slow-lane devices this cycle")
+        return targets
+    
+    def _observe(self, result: SNMPResult):
+        if self.latency_tracker is not None:
+            self.latency_tracker.observe(result)
     
     async def poll_devices(
         self,
         targets: List[SNMPTarget],
         oids: List[str],
         use_bulk: bool = False,
+        scheduled: bool = False,
     ) -> List[SNMPResult]:
         """
         Poll multiple devices for the same OIDs.
@@ -602,11 +1130,14 @@ class AsyncSNMPPoller:
             targets: List of SNMP targets
             oids: List of OIDs to query from each device
             use_bulk: Use GETBULK instead of GET (for table OIDs)
+            scheduled: Targets already went through schedule() this cycle
         
         Returns:
             List of SNMPResult for each target
         """
         self.engine.reset_stats()
+        if not scheduled:
+            targets = self.schedule(targets)
         total = len(targets)
         completed = [0]  # Use list for mutable closure
         
@@ -623,6 +1154,7 @@ class AsyncSNMPPoller:
                     success=False,
                     error=str(e),
                 )
+            self._observe(result)
             
             completed[0] += 1
             if self.progress_callback:
@@ -711,6 +1243,7 @@ class AsyncSNMPPoller:
         self,
         targets: List[SNMPTarget],
         oids: List[str],
+        scheduled: bool = False,
     ) -> List[SNMPResult]:
         """
         Walk multiple OID trees on multiple devices concurrently.
@@ -718,42 +1251,26 @@ class AsyncSNMPPoller:
         Args:
             targets: List of SNMP targets
             oids: List of base OIDs to walk on each device
+            scheduled: Targets already went through schedule() this cycle
         
         Returns:
             List of SNMPResult for each target (values combined from all OID walks)
         """
         self.engine.reset_stats()
+        if not scheduled:
+            targets = self.schedule(targets)
         total = len(targets)
         completed = [0]
         
         async def walk_target(target: SNMPTarget) -> SNMPResult:
             """Walk all OIDs on a single target."""
-            all_values = {}
-            success = False
-            error = None
-            
-            for oid in oids:
-                try:
-                    result = await self.engine.get_bulk(target, oid)
-                    if result.success and result.values:
-                        all_values.update(result.values)
-                        success = True
-                    elif result.error and not error:
-                        error = result.error
-                except Exception as e:
-                    if not error:
-                        error = str(e)
+            result = await self._walk_one(target, oids)
             
             completed[0] += 1
             if self.progress_callback:
                 self.progress_callback(completed[0], total)
             
-            return SNMPResult(
-                target=target,
-                success=success,
-                values=all_values,
-                error=error if not success else None,
-            )
+            return result
         
         # Launch all walks concurrently
         tasks = [walk_target(target) for target in targets]
@@ -773,10 +1290,75 @@ class AsyncSNMPPoller:
         
         return final_results
     
+    async def stream_walk_devices(
+        self,
+        targets: List[SNMPTarget],
+        oids: List[str],
+        queue: asyncio.Queue,
+        workers: Optional[int] = None,
+        scheduled: bool = False,
+    ) -> int:
+        """
+        Walk devices and put each SNMPResult on a queue as it completes.
+        
+        At most `workers` walks run at once and put() waits while the
+        queue is full, so a slow consumer throttles polling instead of
+        results piling up in memory.
+        
+        Args:
+            targets: List of SNMP targets
+            oids: List of base OIDs to walk on each device
+            queue: Destination queue (bounded for backpressure)
+            workers: Concurrent walks (defaults to the engine's max_concurrent)
+            scheduled: Targets already went through schedule() this cycle
+        
+        Returns:
+            Number of results queued
+        """
+        self.engine.reset_stats()
+        if not scheduled:
+            targets = self.schedule(targets)
+        total = len(targets)
+        completed = [0]
+        pending = iter(targets)
+        
+        async def worker():
+            for target in pending:
+                result = await self._walk_one(target, oids)
+                
+                completed[0] += 1
+                if self.progress_callback:
+                    self.progress_callback(completed[0], total)
+                
+                await queue.put(result)
+        
+        num_workers = min(workers or self.engine.max_concurrent, total)
+        await asyncio.gather(*(worker() for _ in range(num_workers)))
+        return completed[0]
+    
+    async def _walk_one(self, target: SNMPTarget, oids: List[str]) -> SNMPResult:
+        try:
+            result = await self.engine.walk_table(target, oids)
+        except Exception as e:
+            result = SNMPResult(target=target, success=False, error=str(e))
+        self._observe(result)
+        return result
+    
     @property
     def stats(self) -> PollerStats:
         """Get polling statistics."""
         return self.engine.stats
+    
+    def close(self):
+        """Release engine resources (thread pool or UDP socket)."""
+        self.engine.close()
+
+
+# Engine implementations selectable via AsyncSNMPPoller(transport=...)
+ENGINE_CLASSES = {
+    'subprocess': AsyncSNMPEngine,
+    'native': NativeSNMPEngine,
+}
 
 
 # Common OID definitions for network devices
@@ -139,7 +139,7 @@ class AuthService:
                 RETURNING *
             """, params)
             row = cursor.fetchone()
-            self.db.get_connection().commit()
+            self.db.commit()
             return dict(row) if row else self.get_password_policy()
     
     def validate_password(
@@ -265,7 +265,7 @@ class AuthService:
                 )
             """, (user_id, user_id, policy['password_history_count']))
             
-            self.db.get_connection().commit()
+            self.db.commit()
     
     def check_password_expiration(self, user_id: int) -> Dict[str, Any]:
         """Check if user's password is expired or expiring soon."""
@@ -402,7 +402,7 @@ class AuthService:
                         SELECT %s, id FROM roles WHERE is_default = TRUE
                     """, (user['id'],))
                 
-                self.db.get_connection().commit()
+                self.db.commit()
                 
                 # Log event
                 self._log_auth_event(
@@ -415,7 +415,7 @@ class AuthService:
                 return user
                 
         except Exception as e:
-            self.db.get_connection().rollback()
+            self.db.rollback()
             logger.error(f"Error creating user: {e}")
             raise
     
@@ -513,7 +513,7 @@ class AuthService:
                 RETURNING id, username, email, first_name, last_name, display_name,
                           status, auth_method, created_at
             """, values)
-            self.db.get_connection().commit()
+            self.db.commit()
             row = cursor.fetchone()
             return dict(row) if row else None
     
@@ -542,7 +542,7 @@ class AuthService:
                     updated_at = NOW()
                 WHERE id = %s
             """, (new_hash, expiration_days, expiration_days or 0, user_id))
-            self.db.get_connection().commit()
+            self.db.commit()
         
         # Add old password to history
         if user.get('password_hash'):
@@ -667,7 +667,7 @@ class AuthService:
                     END
                 WHERE id = %s
             """, (self.max_failed_attempts, int(self.lockout_duration.total_seconds() / 60), user_id))
-            self.db.get_connection().commit()
+            self.db.commit()
     
     def _reset_failed_attempts(self, user_id: int):
         """Reset failed login attempts."""
@@ -676,7 +676,7 @@ class AuthService:
                 UPDATE users SET failed_login_attempts = 0, locked_until = NULL
                 WHERE id = %s
             """, (user_id,))
-            self.db.get_connection().commit()
+            self.db.commit()
     
     def _update_last_login(self, user_id: int, ip_address: Optional[str]):
         """Update last login timestamp."""
@@ -685,7 +685,7 @@ class AuthService:
                 UPDATE users SET last_login_at = NOW(), last_login_ip = %s
                 WHERE id = %s
             """, (ip_address, user_id))
-            self.db.get_connection().commit()
+            self.db.commit()
     
     # =========================================================================
     # SESSION MANAGEMENT
@@ -720,7 +720,7 @@ class AuthService:
                 expires_at,
                 two_factor_verified
             ))
-            self.db.get_connection().commit()
+            self.db.commit()
         
         return {
             'session_token': session_token,
@@ -775,7 +775,7 @@ class AuthService:
                     UPDATE user_sessions SET last_activity_at = NOW()
                     WHERE id = %s
                 """, (session['session_id'],))
-                self.db.get_connection().commit()
+                self.db.commit()
                 
                 return {
                     'session_id': session['session_id'],
@@ -802,7 +802,7 @@ class AuthService:
                 UPDATE user_sessions SET last_activity_at = NOW()
                 WHERE id = %s
             """, (session['session_id'],))
-            self.db.get_connection().commit()
+            self.db.commit()
             
             return session
     
@@ -831,7 +831,7 @@ class AuthService:
                 UPDATE user_sessions SET revoked = TRUE, revoked_at = NOW(), revoked_reason = 'refreshed'
                 WHERE id = %s
             """, (old_session['id'],))
-            self.db.get_connection().commit()
+            self.db.commit()
         
         # Create new session
         return self._create_session(
@@ -851,7 +851,7 @@ class AuthService:
                 SET revoked = TRUE, revoked_at = NOW(), revoked_reason = %s
                 WHERE session_token_hash = %s
             """, (reason, token_hash))
-            self.db.get_connection().commit()
+            self.db.commit()
     
     def revoke_all_sessions(self, user_id: int, except_session: Optional[str] = None):
         """Revoke all sessions for a user."""
@@ -869,7 +869,7 @@ class AuthService:
                     SET revoked = TRUE, revoked_at = NOW(), revoked_reason = 'revoke_all'
                     WHERE user_id = %s AND revoked = FALSE
                 """, (user_id,))
-            self.db.get_connection().commit()
+            self.db.commit()
     
     # =========================================================================
     # TWO-FACTOR AUTHENTICATION
@@ -906,11 +906,11 @@ class AuthService:
                         totp_backup_codes_encrypted = %s
                     WHERE id = %s
                 """, (encrypted_secret, encrypted_backup, user_id))
-                self.db.get_connection().commit()
+                self.db.commit()
                 logger.info(f"TOTP secret saved for user_id={user_id}")
         except Exception as e:
             logger.error(f"Failed to save TOTP secret: {e}")
-            self.db.get_connection().rollback()
+            self.db.rollback()
             raise
         
         return {
@@ -938,7 +938,7 @@ class AuthService:
                             two_factor_method = 'totp'
                         WHERE id = %s
                     """, (user_id,))
-                    self.db.get_connection().commit()
+                    self.db.commit()
                 
                 self._log_auth_event(
                     user_id=user_id,
@@ -987,7 +987,7 @@ class AuthService:
                     UPDATE users SET totp_backup_codes_encrypted = %s
                     WHERE id = %s
                 """, (encrypted_backup, user_id))
-                self.db.get_connection().commit()
+                self.db.commit()
             
             return True
         
@@ -1059,7 +1059,7 @@ class AuthService:
                     totp_backup_codes_encrypted = NULL
                 WHERE id = %s
             """, (user_id,))
-            self.db.get_connection().commit()
+            self.db.commit()
         
         self._log_auth_event(
             user_id=user_id,
@@ -1094,7 +1094,7 @@ class AuthService:
                 INSERT INTO two_factor_codes (user_id, code_hash, code_type, sent_to, expires_at)
                 VALUES (%s, %s, %s, %s, %s)
             """, (user_id, code_hash, code_type, user['email'], expires_at))
-            self.db.get_connection().commit()
+            self.db.commit()
         
         return code
     
@@ -1117,7 +1117,7 @@ class AuthService:
                     UPDATE two_factor_codes SET attempts = attempts + 1
                     WHERE user_id = %s AND code_type = %s AND expires_at > NOW() AND used_at IS NULL
                 """, (user_id, code_type))
-                self.db.get_connection().commit()
+                self.db.commit()
                 return False
             
             code_record = dict(row)
@@ -1130,7 +1130,7 @@ class AuthService:
                 UPDATE two_factor_codes SET used_at = NOW()
                 WHERE id = %s
             """, (code_record['id'],))
-            self.db.get_connection().commit()
+            self.db.commit()
             
             return True
     
@@ -1191,7 +1191,7 @@ class AuthService:
                     VALUES (%s, %s, %s)
                     ON CONFLICT (user_id, role_id) DO NOTHING
                 """, (user_id, role_id, assigned_by))
-                self.db.get_connection().commit()
+                self.db.commit()
             return True
         except Exception as e:
             logger.error(f"Error assigning role: {e}")
@@ -1204,7 +1204,7 @@ class AuthService:
                 cursor.execute("""
                     DELETE FROM user_roles WHERE user_id = %s AND role_id = %s
                 """, (user_id, role_id))
-                self.db.get_connection().commit()
+                self.db.commit()
             return True
         except Exception as e:
             logger.error(f"Error removing role: {e}")
@@ -1241,7 +1241,7 @@ class AuthService:
                             SELECT %s, id FROM permissions WHERE code = %s
                         """, (role['id'], perm_code))
                 
-                self.db.get_connection().commit()
+                self.db.commit()
                 
                 # Get permissions list
                 role['permissions'] = permissions or []
@@ -1250,7 +1250,7 @@ class AuthService:
         except ValueError:
             raise
         except Exception as e:
-            self.db.get_connection().rollback()
+            self.db.rollback()
             logger.error(f"Error creating role: {e}")
             raise
     
@@ -1293,12 +1293,12 @@ class AuthService:
                             SELECT %s, id FROM permissions WHERE code = %s
                         """, (role_id, perm_code))
                 
-                self.db.get_connection().commit()
+                self.db.commit()
                 
                 return self.get_role(role_id)
                 
         except Exception as e:
-            self.db.get_connection().rollback()
+            self.db.rollback()
             logger.error(f"Error updating role: {e}")
             raise
     
@@ -1312,10 +1312,10 @@ class AuthService:
                 cursor.execute("DELETE FROM role_permissions WHERE role_id = %s", (role_id,))
                 # Delete role
                 cursor.execute("DELETE FROM roles WHERE id = %s AND is_system = FALSE", (role_id,))
-                self.db.get_connection().commit()
+                self.db.commit()
             return True
         except Exception as e:
-            self.db.get_connection().rollback()
+            self.db.rollback()
             logger.error(f"Error deleting role: {e}")
             return False
     
@@ -1423,7 +1423,7 @@ class AuthService:
                     ip_address, user_agent,
                     json.dumps(details) if details else None
                 ))
-                self.db.get_connection().commit()
+                self.db.commit()
         except Exception as e:
             logger.error(f"Error logging auth event: {e}")
     
@@ -1718,7 +1718,7 @@ class AuthService:
                     f"UPDATE enterprise_user_roles SET {', '.join(update_parts)} WHERE id = %s",
                     list(updates.values()) + [row['id']]
                 )
-                self.db.get_connection().commit()
+                self.db.commit()
             
             # Return a virtual user dict (not a real users table record)
             return {
@@ -1763,7 +1763,7 @@ class AuthService:
                 user_agent,
                 user['username']
             ))
-            self.db.get_connection().commit()
+            self.db.commit()
         
         return {
             'session_token': session_token,
@@ -7,29 +7,63 @@ Uses official Ciena MIBs for real-time monitoring of:
 - G.8032 Ring (RAPS) status
 - Port status and statistics
 - Chassis/system information
+
+Fleet polls (poll_multiple_switches / stream_poll_switches) run every
+switch on one event loop and one SnmpEngine, at most
+CIENA_SNMP_MAX_CONCURRENT switches at a time, and hand back each
+switch's result as soon as it is complete.
 """
 
 import logging
 import asyncio
-from typing import Dict, List, Optional, Any
+import os
+import threading
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Dict, List, Optional, Any, Tuple
 from pysnmp.hlapi.v3arch.asyncio import (
     get_cmd, next_cmd, bulk_cmd, walk_cmd,
     SnmpEngine, CommunityData, UdpTransportTarget,
     ContextData, ObjectType, ObjectIdentity,
     Integer, OctetString
 )
+from pysnmp.proto.rfc1905 import EndOfMibView, NoSuchInstance, NoSuchObject
+
+
+_thread_loops = threading.local()
+
+
+@lru_cache(maxsize=8192)
+def _request_varbind(oid: str) -> ObjectType:
+    """
+    Request varbind for a fixed OID, shared across requests.
+    
+    pysnmp resolves every request ObjectType against the MIB tree on
+    first use (a few hundred microseconds) and skips it once resolved.
+    """
+    return ObjectType(ObjectIdentity(oid))
 
 
 def _run_sync(coro):
-    """Run async coroutine synchronously for compatibility with sync code."""
-    loop = asyncio.new_event_loop()
-    try:
-        return loop.run_until_complete(coro)
-    finally:
-        loop.close()
+    """
+    Run async coroutine synchronously for compatibility with sync code.
+    
+    Uses one event loop per thread, kept open: an SnmpEngine's transport
+    is bound to the loop it first ran on, so a fresh loop per call would
+    leave a service's second request waiting on a closed loop.
+    """
+    loop = getattr(_thread_loops, 'loop', None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _thread_loops.loop = loop
+    return loop.run_until_complete(coro)
 
 logger = logging.getLogger(__name__)
 
+# Switches polled at once by poll_multiple_switches / stream_poll_switches.
+# pysnmp spends ~4 ms of CPU decoding each response, so past this point more
+# switches in flight only queue responses towards their timeout
+DEFAULT_MAX_CONCURRENT = int(os.environ.get('CIENA_SNMP_MAX_CONCURRENT', '50'))
+
 
 # WWP (World Wide Packets) Enterprise OID: 1.3.6.1.4.1.6141
 # Ciena 3942/5160 running SAOS use WWP LEOS MIBs
@@ -237,6 +271,14 @@ CES_ALARM_OIDS = {
     'active_timestamp': f'{CIENA_CES_CONFIG}.24.1.3.1.1.8',  # cienaCesAlarmActiveTimeStamp
 }
 
+# Columns of cienaCesAlarmActiveEntry
+CES_ALARM_ACTIVE_COLUMNS = [
+    key for key in CES_ALARM_OIDS if key.startswith('active_') and key != 'active_table'
+]
+
+# Active alarms read per switch
+MAX_ACTIVE_ALARMS = 1000
+
 # Backward compatibility alias
 CIENA_OIDS = WWP_OIDS
 
@@ -370,7 +412,8 @@ class CienaSNMPError(Exception):
 class CienaSNMPService:
     """Service for SNMP polling of Ciena switches."""
     
-    def __init__(self, host: str, community: str = 'public', port: int = 161, timeout: int = 5, retries: int = 2):
+    def __init__(self, host: str, community: str = 'public', port: int = 161, timeout: int = 5, retries: int = 2,
+                 engine: SnmpEngine = None):
         """
         Initialize Ciena SNMP client.
         
@@ -380,13 +423,14 @@ class CienaSNMPService:
             port: SNMP port (default 161)
             timeout: Request timeout in seconds
             retries: Number of retries on failure
+            engine: SnmpEngine shared with other switches polled on the same loop
         """
         self.host = host
         self.community = community
         self.port = port
         self.timeout = timeout
         self.retries = retries
-        self._engine = SnmpEngine()
+        self._engine = engine or SnmpEngine()
         self._transport = None
     
     async def _get_transport_async(self) -> UdpTransportTarget:
@@ -411,7 +455,8 @@ class CienaSNMPService:
             self._get_community(),
             transport,
             ContextData(),
-            ObjectType(ObjectIdentity(oid))
+            _request_varbind(oid),
+            lookupMib=False,
         )
         
         if error_indication:
@@ -428,12 +473,41 @@ class CienaSNMPService:
         """Perform SNMP GET request (sync wrapper)."""
         return _run_sync(self._snmp_get_async(oid))
     
+    async def _snmp_get_many_async(self, oids: List[str]) -> List[Any]:
+        """
+        GET several OIDs in one request (async).
+        
+        Returns values in the order of oids; objects the agent does not
+        have come back as None.
+        """
+        transport = await self._get_transport_async()
+        error_indication, error_status, error_index, var_binds = await get_cmd(
+            self._engine,
+            self._get_community(),
+            transport,
+            ContextData(),
+            *[_request_varbind(oid) for oid in oids],
+            # Values are read by numeric OID; resolving each response varbind
+            # against the MIB tree was most of the client's CPU per request
+            lookupMib=False,
+        )
+        
+        if error_indication:
+            raise CienaSNMPError(f"SNMP error: {error_indication}")
+        elif error_status:
+            raise CienaSNMPError(f"SNMP error: {error_status.prettyPrint()} at {error_index}")
+        
+        return [
+            None if isinstance(var_bind[1], (NoSuchObject, NoSuchInstance, EndOfMibView)) else var_bind[1]
+            for var_bind in var_binds
+        ]
+    
     async def _snmp_walk_async(self, oid: str, max_rows: int = 1000) -> List[tuple]:
         """Perform SNMP WALK request (async) - pysnmp 7.x compatible."""
         results = []
         transport = await self._get_transport_async()
         base_oid = oid
-        current_oid = ObjectIdentity(oid)
+        cursor = _request_varbind(oid)
         
         for _ in range(max_rows):
             error_indication, error_status, error_index, var_binds = await next_cmd(
@@ -441,7 +515,8 @@ class CienaSNMPService:
                 self._get_community(),
                 transport,
                 ContextData(),
-                ObjectType(current_oid),
+                cursor,
+                lookupMib=False,
             )
             
             if error_indication:
@@ -455,10 +530,10 @@ class CienaSNMPService:
             
             for var_bind in var_binds:
                 oid_str = str(var_bind[0])
-                if not oid_str.startswith(base_oid):
+                if not oid_str.startswith(base_oid + '.'):
                     return results
                 results.append((oid_str, var_bind[1]))
-                current_oid = var_bind[0]
+                cursor = ObjectType(ObjectIdentity(oid_str))
         
         return results
     
@@ -471,7 +546,7 @@ class CienaSNMPService:
         results = []
         transport = await self._get_transport_async()
         base_oid = oid
-        current_oid = ObjectIdentity(oid)
+        cursor = _request_varbind(oid)
         
         for _ in range(max_rows // max_repetitions + 1):
             error_indication, error_status, error_index, var_binds = await bulk_cmd(
@@ -480,7 +555,8 @@ class CienaSNMPService:
                 transport,
                 ContextData(),
                 0, max_repetitions,
-                ObjectType(current_oid),
+                cursor,
+                lookupMib=False,
             )
             
             if error_indication:
@@ -495,11 +571,11 @@ class CienaSNMPService:
             done = False
             for var_bind in var_binds:
                 oid_str = str(var_bind[0])
-                if not oid_str.startswith(base_oid):
+                if not oid_str.startswith(base_oid + '.'):
                     done = True
                     break
                 results.append((oid_str, var_bind[1]))
-                current_oid = var_bind[0]
+                cursor = ObjectType(ObjectIdentity(oid_str))
             
             if done:
                 break
@@ -511,15 +587,19 @@ class CienaSNMPService:
         return _run_sync(self._snmp_bulk_async(oid, max_repetitions))
     
     async def _get_system_info_async(self) -> Dict:
-        """Get basic system information via SNMP (async)."""
+        """Get basic system information via SNMP (async, one request)."""
+        system = CIENA_OIDS['system']
         try:
+            name, descr, uptime, location, contact = await self._snmp_get_many_async([
+                system['name'], system['descr'], system['uptime'], system['location'], system['contact'],
+            ])
             return {
                 'host': self.host,
-                'name': str(await self._snmp_get_async(CIENA_OIDS['system']['name']) or ''),
-                'description': str(await self._snmp_get_async(CIENA_OIDS['system']['descr']) or ''),
-                'uptime': int(await self._snmp_get_async(CIENA_OIDS['system']['uptime']) or 0),
-                'location': str(await self._snmp_get_async(CIENA_OIDS['system']['location']) or ''),
-                'contact': str(await self._snmp_get_async(CIENA_OIDS['system']['contact']) or ''),
+                'name': str(name or ''),
+                'description': str(descr or ''),
+                'uptime': int(uptime or 0),
+                'location': str(location or ''),
+                'contact': str(contact or ''),
             }
         except Exception as e:
             logger.error(f"Failed to get system info from {self.host}: {e}")
@@ -529,12 +609,14 @@ class CienaSNMPService:
         """Get basic system information via SNMP (sync wrapper)."""
         return _run_sync(self._get_system_info_async())
     
-    def get_raps_global(self) -> Dict:
-        """Get global RAPS (G.8032) status."""
+    async def _get_raps_global_async(self) -> Dict:
+        """Get global RAPS (G.8032) status (async, one request)."""
         try:
-            state = self._snmp_get(WWP_OIDS['raps']['global_state'])
-            num_rings = self._snmp_get(WWP_OIDS['raps']['num_rings'])
-            node_id = self._snmp_get(WWP_OIDS['raps']['node_id'])
+            state, num_rings, node_id = await self._snmp_get_many_async([
+                WWP_OIDS['raps']['global_state'],
+                WWP_OIDS['raps']['num_rings'],
+                WWP_OIDS['raps']['node_id'],
+            ])
             
             # WWP LEOS: 1=disabled, 2=enabled
             state_str = 'enabled' if state and int(state) == 2 else 'disabled'
@@ -549,103 +631,130 @@ class CienaSNMPService:
             logger.error(f"Failed to get RAPS global from {self.host}: {e}")
             raise CienaSNMPError(f"Failed to get RAPS global: {e}")
     
-    def get_virtual_rings(self) -> List[Dict]:
-        """Get all virtual ring status via SNMP."""
-        rings = []
+    def get_raps_global(self) -> Dict:
+        """Get global RAPS (G.8032) status (sync wrapper)."""
+        return _run_sync(self._get_raps_global_async())
+    
+    async def _get_virtual_ring_async(self, ring_index: str, name: Any) -> Dict:
+        """Get one virtual ring's attributes in a single GET (async)."""
+        ring = {
+            'index': int(ring_index),
+            'name': str(name),
+            'host': self.host,
+        }
+        attrs = [attr for attr in WWP_OIDS['virtual_ring'] if attr != 'name']
+        values = await self._snmp_get_many_async(
+            [f"{WWP_OIDS['virtual_ring'][attr]}.{ring_index}" for attr in attrs]
+        )
+        
+        for attr, value in zip(attrs, values):
+            if value is None:
+                continue
+            try:
+                # Convert enum values
+                if attr == 'state':
+                    ring[attr] = RAPS_STATE.get(int(value), str(value))
+                elif attr == 'status':
+                    ring[attr] = RAPS_STATUS.get(int(value), str(value))
+                elif attr == 'alarm':
+                    ring[attr] = RAPS_ALARM.get(int(value), str(value))
+                elif attr in ('revertive', 'west_port_rpl', 'east_port_rpl'):
+                    ring[attr] = int(value) == 2  # 2 = on/true
+                else:
+                    ring[attr] = int(value) if isinstance(value, Integer) else str(value)
+            except Exception as e:
+                logger.debug(f"Could not get {attr} for ring {ring_index}: {e}")
         
+        return ring
+    
+    async def _get_virtual_rings_async(self) -> List[Dict]:
+        """Get all virtual ring status via SNMP (async, rings fetched concurrently)."""
         try:
             # Walk the virtual ring table
-            name_results = self._snmp_walk(WWP_OIDS['virtual_ring']['name'])
-            
-            for oid, name in name_results:
-                # Extract ring index from OID
-                ring_index = oid.split('.')[-1]
-                
-                try:
-                    ring = {
-                        'index': int(ring_index),
-                        'name': str(name),
-                        'host': self.host,
-                    }
-                    
-                    # Get additional ring attributes
-                    for attr, base_oid in WWP_OIDS['virtual_ring'].items():
-                        if attr == 'name':
-                            continue
-                        try:
-                            value = self._snmp_get(f"{base_oid}.{ring_index}")
-                            if value is not None:
-                                # Convert enum values
-                                if attr == 'state':
-                                    ring[attr] = RAPS_STATE.get(int(value), str(value))
-                                elif attr == 'status':
-                                    ring[attr] = RAPS_STATUS.get(int(value), str(value))
-                                elif attr == 'alarm':
-                                    ring[attr] = RAPS_ALARM.get(int(value), str(value))
-                                elif attr in ('revertive', 'west_port_rpl', 'east_port_rpl'):
-                                    ring[attr] = int(value) == 2  # 2 = on/true
-                                else:
-                                    ring[attr] = int(value) if isinstance(value, Integer) else str(value)
-                        except Exception as e:
-                            logger.debug(f"Could not get {attr} for ring {ring_index}: {e}")
-                    
-                    rings.append(ring)
-                    
-                except Exception as e:
-                    logger.warning(f"Error processing ring {ring_index}: {e}")
+            name_results = await self._snmp_bulk_async(WWP_OIDS['virtual_ring']['name'])
             
+            # Extract ring index from OID
+            fetched = await asyncio.gather(
+                *(self._get_virtual_ring_async(oid.split('.')[-1], name) for oid, name in name_results),
+                return_exceptions=True,
+            )
         except Exception as e:
             logger.error(f"Failed to get virtual rings from {self.host}: {e}")
             raise CienaSNMPError(f"Failed to get virtual rings: {e}")
         
+        rings = []
+        for (oid, _), ring in zip(name_results, fetched):
+            if isinstance(ring, Exception):
+                logger.warning(f"Error processing ring {oid.split('.')[-1]}: {ring}")
+            else:
+                rings.append(ring)
         return rings
     
+    def get_virtual_rings(self) -> List[Dict]:
+        """Get all virtual ring status via SNMP (sync wrapper)."""
+        return _run_sync(self._get_virtual_rings_async())
+    
     async def _get_active_alarms_async(self) -> List[Dict]:
         """Get active alarms via SNMP using Ciena CES Alarm MIB (async)."""
         alarms = {}
+        columns = [
+            'active_severity', 'active_object_class', 'active_object_interpret',
+            'active_object_instance', 'active_acknowledged', 'active_description',
+            'active_timestamp',
+        ]
         
         try:
-            # Walk each column and build alarm dict by index
+            # One bulk walk of the active alarm table (column by column), then
+            # build alarm dict by index. The walk is column-major, so the row
+            # budget covers every column of every alarm.
+            entry = CES_ALARM_OIDS['active_table'] + '.1.'
+            column_of = {CES_ALARM_OIDS[c][len(entry):]: c for c in columns}
+            column_rows = {c: [] for c in columns}
+            table = await self._snmp_bulk_async(
+                CES_ALARM_OIDS['active_table'],
+                max_rows=MAX_ACTIVE_ALARMS * len(CES_ALARM_ACTIVE_COLUMNS),
+            )
+            for oid, val in table:
+                number, _, idx = oid[len(entry):].partition('.')
+                if number in column_of:
+                    column_rows[column_of[number]].append((idx, val))
+            
+            def rows(column):
+                return column_rows[column]
+            
             # Column 1: Severity
-            for oid, val in await self._snmp_walk_async(CES_ALARM_OIDS['active_severity']):
-                idx = oid.replace(CES_ALARM_OIDS['active_severity'] + '.', '')
+            for idx, val in rows('active_severity'):
                 if idx not in alarms:
                     alarms[idx] = {'index': idx, 'host': self.host}
                 alarms[idx]['severity'] = ALARM_SEVERITY.get(int(val), 'unknown') if val else 'unknown'
             
             # Column 3: Object Class
-            for oid, val in await self._snmp_walk_async(CES_ALARM_OIDS['active_object_class']):
-                idx = oid.replace(CES_ALARM_OIDS['active_object_class'] + '.', '')
+            for idx, val in rows('active_object_class'):
                 if idx in alarms:
                     alarms[idx]['object_class'] = ALARM_OBJECT_CLASS.get(int(val), 'unknown') if val else 'unknown'
             
             # Column 4: Object Interpret (e.g. "Port ID", "Virt Ring")
-            for oid, val in await self._snmp_walk_async(CES_ALARM_OIDS['active_object_interpret']):
-                idx = oid.replace(CES_ALARM_OIDS['active_object_interpret'] + '.', '')
+            for idx, val in rows('active_object_interpret'):
                 if idx in alarms:
                     alarms[idx]['object_type'] = str(val).strip() if val else None
             
             # Column 5: Object Instance (e.g. "17", "VR100")
-            for oid, val in await self._snmp_walk_async(CES_ALARM_OIDS['active_object_instance']):
-                idx = oid.replace(CES_ALARM_OIDS['active_object_instance'] + '.', '')
+            for idx, val in rows('active_object_instance'):
                 if idx in alarms:
                     alarms[idx]['object_instance'] = str(val).strip() if val else None
             
             # Column 6: Acknowledged
-            for oid, val in await self._snmp_walk_async(CES_ALARM_OIDS['active_acknowledged']):
-                idx = oid.replace(CES_ALARM_OIDS['active_acknowledged'] + '.', '')
+            for idx, val in rows('active_acknowledged'):
                 if idx in alarms:
                     alarms[idx]['acknowledged'] = (int(val) == 1) if val else False
             
             # Column 7: Description
-            for oid, val in await self._snmp_walk_async(CES_ALARM_OIDS['active_description']):
-                idx = oid.replace(CES_ALARM_OIDS['active_description'] + '.', '')
+            for idx, val in rows('active_description'):
                 if idx in alarms:
                     alarms[idx]['description'] = str(val).strip() if val else 'Unknown'
             
             # Column 8: Timestamp
-            for oid, val in await self._snmp_walk_async(CES_ALARM_OIDS['active_timestamp']):
-                idx = oid.replace(CES_ALARM_OIDS['active_timestamp'] + '.', '')
+            for idx, val in rows('active_timestamp'):
                 if idx in alarms:
                     alarms[idx]['timestamp'] = str(val).strip() if val else None
             
@@ -1104,18 +1213,32 @@ class CienaSNMPService:
             }
 
 
-def poll_switch(host: str, community: str = 'public') -> Dict:
+async def poll_switch_async(
+    host: str,
+    community: str = 'public',
+    engine: SnmpEngine = None,
+    timeout: int = 5,
+    retries: int = 2,
+    port: int = 161,
+) -> Dict:
     """
-    Poll a single Ciena switch for all relevant data.
+    Poll a single Ciena switch for all relevant data (async).
+    
+    System info is read first; if the switch answers, RAPS global,
+    virtual rings and active alarms are read concurrently.
     
     Args:
         host: Switch IP address
         community: SNMP community string
+        engine: SnmpEngine shared with other switches on this loop
+        timeout: Request timeout in seconds
+        retries: Number of retries on failure
+        port: SNMP port
         
     Returns:
         Dict with system info, rings, and alarms
     """
-    service = CienaSNMPService(host, community)
+    service = CienaSNMPService(host, community, port=port, timeout=timeout, retries=retries, engine=engine)
     
     result = {
         'host': host,
@@ -1128,50 +1251,123 @@ def poll_switch(host: str, community: str = 'public') -> Dict:
     }
     
     try:
-        result['system'] = service.get_system_info()
+        result['system'] = await service._get_system_info_async()
         result['success'] = True
     except Exception as e:
         result['error'] = f"System info failed: {e}"
         return result
     
-    try:
-        result['raps_global'] = service.get_raps_global()
-    except Exception as e:
-        logger.warning(f"RAPS global failed for {host}: {e}")
+    raps_global, virtual_rings, active_alarms = await asyncio.gather(
+        service._get_raps_global_async(),
+        service._get_virtual_rings_async(),
+        service._get_active_alarms_async(),
+        return_exceptions=True,
+    )
     
-    try:
-        result['virtual_rings'] = service.get_virtual_rings()
-    except Exception as e:
-        logger.warning(f"Virtual rings failed for {host}: {e}")
+    if isinstance(raps_global, Exception):
+        logger.warning(f"RAPS global failed for {host}: {raps_global}")
+    else:
+        result['raps_global'] = raps_global
     
-    try:
-        result['active_alarms'] = service.get_active_alarms()
-    except Exception as e:
-        logger.warning(f"Active alarms failed for {host}: {e}")
+    if isinstance(virtual_rings, Exception):
+        logger.warning(f"Virtual rings failed for {host}: {virtual_rings}")
+    else:
+        result['virtual_rings'] = virtual_rings
+    
+    if isinstance(active_alarms, Exception):
+        logger.warning(f"Active alarms failed for {host}: {active_alarms}")
+    else:
+        result['active_alarms'] = active_alarms
     
     return result
 
 
-def poll_multiple_switches(hosts: List[str], community: str = 'public') -> List[Dict]:
+def poll_switch(host: str, community: str = 'public') -> Dict:
+    """
+    Poll a single Ciena switch for all relevant data.
+    
+    Args:
+        host: Switch IP address
+        community: SNMP community string
+        
+    Returns:
+        Dict with system info, rings, and alarms
+    """
+    return _run_sync(poll_switch_async(host, community))
+
+
+async def stream_poll_switches(
+    hosts: List[str],
+    community: str = 'public',
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+    timeout: int = 5,
+    retries: int = 2,
+    port: int = 161,
+) -> AsyncIterator[Tuple[int, Dict]]:
+    """
+    Poll switches concurrently, yielding (index, result) as each finishes.
+    
+    Every switch shares one SnmpEngine on the running loop. At most
+    max_concurrent switches are polled at once, and finished results wait
+    on a bounded queue, so a slow consumer holds polling back.
+    
+    Args:
+        hosts: List of switch IP addresses
+        community: SNMP community string
+        max_concurrent: Switches polled at once
+        timeout: Request timeout in seconds
+        retries: Number of retries on failure
+        port: SNMP port
+    """
+    engine = SnmpEngine()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_concurrent))
+    pending = iter(enumerate(hosts))
+    
+    async def worker():
+        for index, host in pending:
+            try:
+                result = await poll_switch_async(host, community, engine, timeout, retries, port)
+            except Exception as e:
+                result = {'host': host, 'success': False, 'error': str(e)}
+            await queue.put((index, result))
+    
+    workers = [asyncio.ensure_future(worker()) for _ in range(min(max_concurrent, len(hosts)))]
+    try:
+        for _ in range(len(hosts)):
+            yield await queue.get()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        engine.close_dispatcher()
+
+
+def poll_multiple_switches(
+    hosts: List[str],
+    community: str = 'public',
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+    on_result: Optional[Callable[[Dict], None]] = None,
+    port: int = 161,
+) -> List[Dict]:
     """
-    Poll multiple Ciena switches.
+    Poll multiple Ciena switches concurrently on one event loop.
     
     Args:
         hosts: List of switch IP addresses
         community: SNMP community string
+        max_concurrent: Switches polled at once
+        on_result: Called with each switch's result as soon as it finishes
+        port: SNMP port
         
     Returns:
-        List of poll results
+        List of poll results, in the order of hosts
     """
-    results = []
-    for host in hosts:
-        try:
-            result = poll_switch(host, community)
-            results.append(result)
-        except Exception as e:
-            results.append({
-                'host': host,
-                'success': False,
-                'error': str(e),
-            })
-    return results
+    async def run():
+        results = [None] * len(hosts)
+        async for index, result in stream_poll_switches(hosts, community, max_concurrent, port=port):
+            results[index] = result
+            if on_result:
+                on_result(result)
+        return results
+    
+    return _run_sync(run())
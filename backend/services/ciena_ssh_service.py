@@ -5,7 +5,9 @@ Provides SSH-based data collection for Ciena SAOS switches (3942, 5160, etc.).
 This is the primary data source for real-time monitoring, replacing unreliable SNMP polling.
 
 Features:
-- Interactive shell session for multiple commands in one connection
+- Interactive shell session for multiple commands in one connection,
+  driven by prompt matching with paging disabled (backend.services.ssh_expect)
+- Authenticated sessions reused across polls (backend.services.ssh_pool)
 - Parallel polling across multiple switches
 - Comprehensive data collection: optical, traffic, alarms, chassis, rings
 - Structured output parsing
@@ -21,6 +23,9 @@ from datetime import datetime
 
 import paramiko
 
+from .ssh_expect import ExpectShell
+from .ssh_pool import SSHSessionPool, get_ssh_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -171,6 +176,11 @@ class CienaSSHService:
         'system show',  # System info
     ]
     
+    # Run once per shell before the poll commands
+    SHELL_SETUP_COMMANDS = [
+        'system shell set more off',  # Disable --More-- paging
+    ]
+    
     def __init__(
         self,
         username: str = 'su',
@@ -178,6 +188,9 @@ class CienaSSHService:
         timeout: int = 10,
         max_concurrent: int = 10,
         command_delay: float = 0.5,
+        pool: SSHSessionPool = None,
+        batch_commands: bool = False,
+        port: int = 22,
     ):
         """
         Initialize Ciena SSH service.
@@ -187,13 +200,19 @@ class CienaSSHService:
             password: SSH password (default: wwp)
             timeout: Connection timeout in seconds
             max_concurrent: Maximum concurrent SSH sessions
-            command_delay: Delay between commands in seconds
+            command_delay: Unused; commands now complete on the prompt (kept for compatibility)
+            pool: SSH session pool (defaults to the shared pool)
+            batch_commands: Send each poll's commands in one write, split on sentinels
+            port: SSH port
         """
         self.username = username
         self.password = password
         self.timeout = timeout
         self.max_concurrent = max_concurrent
         self.command_delay = command_delay
+        self.pool = pool or get_ssh_pool()
+        self.batch_commands = batch_commands
+        self.port = port
     
     def _connect(self, host: str) -> paramiko.SSHClient:
         """
@@ -211,6 +230,7 @@ class CienaSSHService:
         try:
             client.connect(
                 host,
+                port=self.port,
                 username=self.username,
                 password=self.password,
                 timeout=self.timeout,
@@ -225,6 +245,19 @@ class CienaSSHService:
         except Exception as e:
             raise CienaSSHError(f"Failed to connect to {host}: {e}", host=host)
     
+    def _run_pooled(self, host: str, fn):
+        """
+        Call fn(client) on a pooled session to the switch.
+        
+        Connection failures are raised as CienaSSHError, like _connect.
+        """
+        try:
+            return self.pool.run(fn, host, self.username, self.password, self.port, self.timeout)
+        except paramiko.AuthenticationException:
+            raise CienaSSHError(f"Authentication failed for {host}", host=host)
+        except paramiko.SSHException as e:
+            raise CienaSSHError(f"SSH error connecting to {host}: {e}", host=host)
+    
     def _execute_commands(
         self,
         client: paramiko.SSHClient,
@@ -240,57 +273,17 @@ class CienaSSHService:
         Returns:
             Dict mapping command to output
         """
-        results = {}
-        
-        # Get interactive shell with larger terminal to avoid pagination
-        shell = client.invoke_shell(width=200, height=1000)
-        time.sleep(0.5)  # Wait for shell to initialize
-        
-        # Clear initial banner/prompt
-        if shell.recv_ready():
-            shell.recv(65535)
-        
-        for cmd in commands:
-            # Send command
-            shell.send(cmd + '\n')
-            
-            # Collect output with pagination handling
-            output = ''
-            max_iterations = 50  # Safety limit
-            iterations = 0
-            
-            while iterations < max_iterations:
-                time.sleep(self.command_delay)
-                
-                if not shell.recv_ready():
-                    # Wait a bit more and check again
-                    time.sleep(0.3)
-                    if not shell.recv_ready():
-                        break
-                
-                chunk = shell.recv(65535).decode('utf-8', errors='ignore')
-                output += chunk
-                
-                # Handle --More-- pagination by sending space
-                if '--More--' in chunk:
-                    shell.send(' ')
-                    iterations += 1
-                    continue
-                
-                # Check if we've reached the prompt (command complete)
-                if chunk.strip().endswith('>'):
-                    break
-                    
-                iterations += 1
-            
-            # Clean up output - remove --More-- artifacts and ANSI codes
-            output = re.sub(r'--More--\s*', '', output)
-            output = re.sub(r'\x1b\[[0-9;]*[a-zA-Z]', '', output)  # Remove ANSI escape codes
-            
-            results[cmd] = output
-        
-        shell.close()
-        return results
+        # Larger terminal so wide tables are not wrapped
+        shell = ExpectShell(client.invoke_shell(width=200, height=1000), timeout=self.timeout)
+        try:
+            # Each read completes on the device prompt (or the timeout), no fixed sleeps
+            shell.start(setup=self.SHELL_SETUP_COMMANDS)
+            if self.batch_commands:
+                return shell.run_batch(commands)
+            return {cmd: shell.run(cmd) for cmd in commands}
+        finally:
+            # The transport stays open in the session pool; only the shell channel is closed
+            shell.close()
     
     def poll_switch(self, host: str, commands: List[str] = None) -> SwitchData:
         """
@@ -307,11 +300,7 @@ class CienaSSHService:
         commands = commands or self.DEFAULT_COMMANDS
         
         try:
-            client = self._connect(host)
-            try:
-                raw_output = self._execute_commands(client, commands)
-            finally:
-                client.close()
+            raw_output = self._run_pooled(host, lambda client: self._execute_commands(client, commands))
             
             # Parse all outputs
             data = SwitchData(
@@ -394,6 +383,11 @@ class CienaSSHService:
                         error=str(e),
                     ))
         
+        pool_stats = self.pool.get_stats()
+        logger.info(
+            f"Polled {len(hosts)} switches (SSH pool so far: {pool_stats['reuses']} sessions reused, "
+            f"{pool_stats['handshake_ms_saved'] / 1000:.1f}s of handshakes saved)"
+        )
         return results
     
     # ==================== PARSERS ====================
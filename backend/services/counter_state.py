@@ -0,0 +1,363 @@
+"""
+Interface Counter State
+
+Keeps the last rx/tx octet counters per (device_ip, ifIndex) so interface
+rates can be computed without reading the previous row back from
+interface_metrics on every poll:
+- In-process dict, persisting across tasks in the same worker
+- Optional Redis mirror (the broker Redis) shared across workers
+- Warmed from interface_metrics in one query on cold start
+- 32/64-bit counter wrap and discontinuity (sysUpTime reset) handling
+"""
+
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+COUNTER32_MODULUS = 2 ** 32
+COUNTER64_MODULUS = 2 ** 64
+TIMETICKS_MODULUS = 2 ** 32
+
+# Deltas implying more than this are treated as a counter discontinuity
+DEFAULT_MAX_BPS = 400_000_000_000
+
+_TICKS_PAREN = re.compile(r'\((\d+)\)')
+_TICKS_CLOCK = re.compile(r'^(?:(\d+):)?(\d+):(\d+):(\d+)(?:\.(\d+))?$')
+
+
+@dataclass
+class CounterSample:
+    """Last observed counters for one interface."""
+    rx_bytes: Optional[int]
+    tx_bytes: Optional[int]
+    recorded_at: datetime
+
+
+@dataclass
+class UptimeSample:
+    """Last observed sysUpTime for one device."""
+    ticks: int
+    recorded_at: datetime
+
+
+def parse_timeticks(value) -> Optional[int]:
+    """
+    Parse a sysUpTime value into hundredths of a second.
+
+    Accepts raw integers, net-snmp 'Timeticks: (123) 0:00:01.23' output and
+    '-Oq' clock strings such as '12:3:04:05.67' (days:hours:min:sec.cc).
+    """
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    text = str(value).strip()
+    if text.isdigit():
+        return int(text)
+    match = _TICKS_PAREN.search(text)
+    if match:
+        return int(match.group(1))
+    match = _TICKS_CLOCK.match(text)
+    if match:
+        days, hours, minutes, seconds, frac = match.groups()
+        total = int(days or 0) * 86400 + int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+        return total * 100 + int((frac or '0').ljust(2, '0')[:2])
+    return None
+
+
+def counter_delta(
+    prev: int,
+    current: int,
+    counter_bits: Optional[int] = None,
+) -> int:
+    """
+    Delta between two counter readings, correcting for wrap.
+
+    Args:
+        prev: Previous reading
+        current: Current reading
+        counter_bits: 32 or 64; inferred from the readings when None
+                      (any value above 2^32-1 means a 64-bit HC counter)
+
+    Returns:
+        Non-negative delta. A reset of a 64-bit counter shows up as an
+        implausibly large delta; callers bound it with a rate ceiling.
+    """
+    delta = current - prev
+    if delta >= 0:
+        return delta
+    if counter_bits is None:
+        counter_bits = 64 if max(prev, current) >= COUNTER32_MODULUS else 32
+    modulus = COUNTER64_MODULUS if counter_bits == 64 else COUNTER32_MODULUS
+    return delta % modulus
+
+
+class CounterStateStore:
+    """
+    Previous-counter cache keyed by (device_ip, ifIndex).
+
+    Args:
+        redis_url: Optional Redis URL to mirror state across workers
+        ttl_seconds: Redis key expiry and in-process staleness limit
+        max_bps: Rate ceiling; larger deltas are treated as discontinuities
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        ttl_seconds: int = 3600,
+        max_bps: int = DEFAULT_MAX_BPS,
+        key_prefix: str = 'opsconductor:ifcounters',
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_bps = max_bps
+        self.key_prefix = key_prefix
+        self._counters: Dict[Tuple[str, int], CounterSample] = {}
+        self._uptime: Dict[str, UptimeSample] = {}
+        self._known_devices = set()
+        self._dirty_devices = set()
+        self._redis = None
+
+        if redis_url:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(redis_url, socket_timeout=2)
+            except ImportError:
+                logger.warning("redis package not installed; counter state is process-local")
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.redis_loads = 0
+        self.db_loads = 0
+        self.wraps = 0
+        self.discontinuities = 0
+
+    # ------------------------------------------------------------------
+    # Loading / persistence
+    # ------------------------------------------------------------------
+
+    def prefetch(self, cursor, device_ips: Iterable[str]):
+        """
+        Make sure state for the given devices is loaded.
+
+        Devices already seen by this process are skipped; the rest are
+        read from Redis, and anything still missing is warmed from
+        interface_metrics with a single DISTINCT ON query.
+        """
+        missing = [ip for ip in set(device_ips) if ip not in self._known_devices]
+        if not missing:
+            return
+
+        if self._redis is not None:
+            missing = self._load_from_redis(missing)
+        if missing and cursor is not None:
+            self._load_from_db(cursor, missing)
+        self._known_devices.update(missing)
+
+    def _load_from_redis(self, device_ips):
+        remaining = []
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for ip in device_ips:
+                pipe.hgetall(self._key(ip))
+            replies = pipe.execute()
+        except Exception as e:
+            logger.warning(f"Counter state Redis load failed: {e}")
+            return list(device_ips)
+
+        for ip, fields in zip(device_ips, replies):
+            if not fields:
+                remaining.append(ip)
+                continue
+            for field, raw in fields.items():
+                field = field.decode() if isinstance(field, bytes) else field
+                raw = raw.decode() if isinstance(raw, bytes) else raw
+                parts = raw.split(',')
+                recorded_at = datetime.fromtimestamp(float(parts[-1]), tz=timezone.utc)
+                if field == 'uptime':
+                    self._uptime[ip] = UptimeSample(int(parts[0]), recorded_at)
+                else:
+                    self._counters[(ip, int(field))] = CounterSample(
+                        rx_bytes=int(parts[0]) if parts[0] else None,
+                        tx_bytes=int(parts[1]) if parts[1] else None,
+                        recorded_at=recorded_at,
+                    )
+            self._known_devices.add(ip)
+            self.redis_loads += 1
+        return remaining
+
+    def _load_from_db(self, cursor, device_ips):
+        try:
+            cursor.execute("""
+                SELECT DISTINCT ON (device_ip, interface_index)
+                    host(device_ip) AS ip, interface_index, rx_bytes, tx_bytes, recorded_at
+                FROM interface_metrics
+                WHERE device_ip = ANY(%s::inet[])
+                  AND recorded_at > NOW() - make_interval(secs => %s)
+                ORDER BY device_ip, interface_index, recorded_at DESC
+            """, (list(device_ips), self.ttl_seconds))
+            rows = cursor.fetchall()
+        except Exception as e:
+            logger.warning(f"Counter state warm-up failed: {e}")
+            return
+
+        for row in rows:
+            recorded_at = row['recorded_at']
+            if recorded_at.tzinfo is None:
+                recorded_at = recorded_at.replace(tzinfo=timezone.utc)
+            self._counters[(row['ip'], row['interface_index'])] = CounterSample(
+                rx_bytes=row['rx_bytes'],
+                tx_bytes=row['tx_bytes'],
+                recorded_at=recorded_at,
+            )
+        self.db_loads += len(rows)
+
+    def persist(self):
+        """Mirror state of devices updated since the last persist to Redis."""
+        if self._redis is None or not self._dirty_devices:
+            self._dirty_devices.clear()
+            return
+
+        by_device: Dict[str, Dict[str, str]] = {ip: {} for ip in self._dirty_devices}
+        for (ip, if_index), sample in self._counters.items():
+            if ip in by_device:
+                by_device[ip][str(if_index)] = ','.join((
+                    '' if sample.rx_bytes is None else str(sample.rx_bytes),
+                    '' if sample.tx_bytes is None else str(sample.tx_bytes),
+                    str(sample.recorded_at.timestamp()),
+                ))
+        for ip in by_device:
+            uptime = self._uptime.get(ip)
+            if uptime:
+                by_device[ip]['uptime'] = f"{uptime.ticks},{uptime.recorded_at.timestamp()}"
+
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for ip, mapping in by_device.items():
+                if mapping:
+                    pipe.hset(self._key(ip), mapping=mapping)
+                    pipe.expire(self._key(ip), self.ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Counter state Redis persist failed: {e}")
+        self._dirty_devices.clear()
+
+    def _key(self, device_ip: str) -> str:
+        return f"{self.key_prefix}:{device_ip}"
+
+    # ------------------------------------------------------------------
+    # Observation
+    # ------------------------------------------------------------------
+
+    def observe_uptime(self, device_ip: str, ticks: Optional[int], recorded_at: datetime):
+        """
+        Record sysUpTime for a device and detect agent restarts.
+
+        If uptime went backwards (beyond a normal 497-day timeticks wrap)
+        the device rebooted and every counter it reported earlier is
+        discarded, so the next rate starts from a fresh baseline.
+        """
+        if ticks is None:
+            return
+        prev = self._uptime.get(device_ip)
+        if prev is not None and ticks < prev.ticks:
+            elapsed_ticks = (recorded_at - prev.recorded_at).total_seconds() * 100
+            wrapped = prev.ticks + elapsed_ticks >= TIMETICKS_MODULUS
+            if not wrapped:
+                self.discontinuities += 1
+                for key in [k for k in self._counters if k[0] == device_ip]:
+                    del self._counters[key]
+                logger.info(f"sysUpTime reset on {device_ip}; discarding previous counters")
+        self._uptime[device_ip] = UptimeSample(ticks, recorded_at)
+        self._dirty_devices.add(device_ip)
+
+    def observe(
+        self,
+        device_ip: str,
+        if_index: int,
+        rx_bytes: Optional[int],
+        tx_bytes: Optional[int],
+        recorded_at: datetime,
+        counter_bits: Optional[int] = None,
+    ) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Store the current counters and return (rx_bps, tx_bps).
+
+        Rates are None on the first sample, when the previous sample is
+        stale, or when the delta is a discontinuity rather than traffic.
+        """
+        key = (device_ip, if_index)
+        prev = self._counters.get(key)
+        self._counters[key] = CounterSample(rx_bytes, tx_bytes, recorded_at)
+        self._known_devices.add(device_ip)
+        self._dirty_devices.add(device_ip)
+
+        if prev is None:
+            self.misses += 1
+            return None, None
+        self.hits += 1
+
+        delta_seconds = (recorded_at - prev.recorded_at).total_seconds()
+        if delta_seconds <= 0 or delta_seconds > self.ttl_seconds:
+            return None, None
+
+        return (
+            self._rate(prev.rx_bytes, rx_bytes, delta_seconds, counter_bits),
+            self._rate(prev.tx_bytes, tx_bytes, delta_seconds, counter_bits),
+        )
+
+    def _rate(self, prev, current, delta_seconds, counter_bits) -> Optional[int]:
+        if prev is None or current is None:
+            return None
+        bps = counter_delta(prev, current, counter_bits) * 8 / delta_seconds
+        if bps > self.max_bps:
+            self.discontinuities += 1
+            return None
+        if current < prev:
+            self.wraps += 1
+        return int(bps)
+
+    def get_stats(self) -> Dict:
+        """Return cache statistics."""
+        return {
+            'interfaces': len(self._counters),
+            'devices': len(self._known_devices),
+            'hits': self.hits,
+            'misses': self.misses,
+            'redis_loads': self.redis_loads,
+            'db_loads': self.db_loads,
+            'wraps': self.wraps,
+            'discontinuities': self.discontinuities,
+            'redis': self._redis is not None,
+        }
+
+
+_store: Optional[CounterStateStore] = None
+
+
+def get_counter_store() -> CounterStateStore:
+    """
+    Get the process-wide counter state store.
+
+    COUNTER_STATE_BACKEND=redis mirrors state to the configured Redis
+    (REDIS_HOST/REDIS_PORT/REDIS_DB); the default keeps it in process.
+    """
+    global _store
+    if _store is None:
+        redis_url = None
+        if os.environ.get('COUNTER_STATE_BACKEND', 'memory') == 'redis':
+            from backend.config import get_settings
+            redis_url = get_settings().redis_url
+        _store = CounterStateStore(
+            redis_url=redis_url,
+            ttl_seconds=int(os.environ.get('COUNTER_STATE_TTL', 3600)),
+            max_bps=int(os.environ.get('COUNTER_MAX_BPS', DEFAULT_MAX_BPS)),
+        )
+    return _store
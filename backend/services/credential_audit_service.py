@@ -148,7 +148,7 @@ class CredentialAuditService:
             ))
             
             row = cursor.fetchone()
-            db.get_connection().commit()
+            db.commit()
             
             log_id = row['id'] if row else None
             
@@ -212,7 +212,7 @@ class CredentialService:
                   cert_fingerprint, cert_issuer, cert_subject, cert_serial, key_algorithm, key_size, 'active'))
             
             row = cursor.fetchone()
-            db.get_connection().commit()
+            db.commit()
             
             result = dict(row)
             
@@ -437,7 +437,7 @@ class CredentialService:
             """, params)
             
             row = cursor.fetchone()
-            db.get_connection().commit()
+            db.commit()
             
             return dict(row) if row else None
     
@@ -455,7 +455,7 @@ class CredentialService:
                 SET is_deleted = TRUE, updated_at = %s, status = 'deleted'
                 WHERE id = %s AND is_deleted = FALSE
             """, (now_utc(), credential_id))
-            db.get_connection().commit()
+            db.commit()
             
             if cursor.rowcount > 0:
                 # Log the deletion
@@ -483,7 +483,7 @@ class CredentialService:
                 RETURNING id, name, description, created_at, updated_at
             """, (name, description))
             row = cursor.fetchone()
-            db.get_connection().commit()
+            db.commit()
             return dict(row)
     
     def list_groups(self) -> List[Dict[str, Any]]:
@@ -516,7 +516,7 @@ class CredentialService:
                     VALUES (%s, %s)
                     ON CONFLICT DO NOTHING
                 """, (credential_id, group_id))
-                db.get_connection().commit()
+                db.commit()
                 return True
             except Exception:
                 return False
@@ -529,7 +529,7 @@ class CredentialService:
                 DELETE FROM credential_group_members
                 WHERE credential_id = %s AND group_id = %s
             """, (credential_id, group_id))
-            db.get_connection().commit()
+            db.commit()
             return cursor.rowcount > 0
     
     def delete_group(self, group_id: int) -> bool:
@@ -537,7 +537,7 @@ class CredentialService:
         db = get_db()
         with db.cursor() as cursor:
             cursor.execute("DELETE FROM credential_groups WHERE id = %s", (group_id,))
-            db.get_connection().commit()
+            db.commit()
             return cursor.rowcount > 0
     
     # =========================================================================
@@ -565,7 +565,7 @@ class CredentialService:
                     VALUES (%s, %s, %s, %s, %s)
                     ON CONFLICT DO NOTHING
                 """, (device_id, ip_address, credential_id, credential_type, priority))
-                db.get_connection().commit()
+                db.commit()
                 return True
             except Exception:
                 return False
@@ -593,7 +593,7 @@ class CredentialService:
                         DELETE FROM device_credentials 
                         WHERE credential_id = %s AND device_id = %s
                     """, (credential_id, device_id))
-                db.get_connection().commit()
+                db.commit()
                 return cursor.rowcount > 0
             except Exception:
                 return False
@@ -707,7 +707,7 @@ class CredentialService:
                     WHERE id = %s
                 """, (now_utc(), credential_id))
             
-            db.get_connection().commit()
+            db.commit()
     
     def get_usage_log(
         self,
@@ -786,7 +786,7 @@ class CredentialService:
             """)
             
             expired = cursor.fetchall()
-            db.get_connection().commit()
+            db.commit()
             
             # Log expiration events
             if expired:
@@ -1036,7 +1036,7 @@ class CredentialService:
             """, (name, auth_type, credential_id, is_default, priority))
             
             row = cursor.fetchone()
-            db.get_connection().commit()
+            db.commit()
             return dict(row)
     
     def create_enterprise_auth_user(self, name: str, auth_config_id: int,
@@ -1058,7 +1058,7 @@ class CredentialService:
             """, (name, description, auth_config_id, encrypted, username, is_service_account))
             
             row = cursor.fetchone()
-            db.get_connection().commit()
+            db.commit()
             return dict(row)
     
     def list_enterprise_auth_configs(self, auth_type: str = None) -> List[Dict[str, Any]]:
@@ -0,0 +1,394 @@
+"""
+Device Directory
+
+In-process snapshot of netbox_device_cache for hot-path device lookups
+(trap receiver, poll tasks, inventory API):
+- Keyed by IP and by NetBox device id; lookups are dict gets on an
+  immutable snapshot, so readers never take a lock or touch Postgres
+- Refreshed incrementally from cached_at once max_age has passed, with an
+  overlap window for rows committed late by long sync transactions
+- Full reload every full_reload_seconds (picks up deleted devices), or
+  straight away on a netbox_device_cache NOTIFY while a listener runs
+- Hit/miss counters for IP and id lookups
+
+Usage:
+    directory = get_device_directory()
+    directory.device_name('10.1.2.3')
+    directory.select(vendor='ciena', device_filter={'site': 'dc1'})
+"""
+
+import logging
+import os
+import select
+import threading
+import time
+from datetime import datetime, timedelta
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+NOTIFY_CHANNEL = 'netbox_device_cache'
+
+_COLUMNS = """
+    netbox_device_id, host(device_ip) AS device_ip, device_name, device_type,
+    manufacturer, site_id, site_name, role_name,
+    CASE WHEN device_ip IS NULL THEN NULL
+         ELSE abs(hashtext(host(device_ip))) END AS shard_hash,
+    cached_at
+"""
+
+
+class DirectoryDevice(NamedTuple):
+    """One netbox_device_cache row."""
+    netbox_device_id: int
+    device_ip: Optional[str]
+    device_name: Optional[str]
+    device_type: Optional[str]
+    manufacturer: Optional[str]
+    site_id: Optional[int]
+    site_name: Optional[str]
+    role_name: Optional[str]
+    # abs(hashtext(host(device_ip))): the time-wheel shard key
+    shard_hash: Optional[int]
+    cached_at: Optional[datetime]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Same shape as NetBoxCacheService device dicts."""
+        return {
+            'netbox_device_id': self.netbox_device_id,
+            'device_ip': self.device_ip,
+            'device_name': self.device_name,
+            'device_type': self.device_type,
+            'manufacturer': self.manufacturer,
+            'site_id': self.site_id,
+            'site_name': self.site_name,
+            'role_name': self.role_name,
+            'cached_at': self.cached_at.isoformat() if self.cached_at else None,
+        }
+
+
+class DirectorySnapshot(NamedTuple):
+    """Immutable view of the directory at one refresh."""
+    by_ip: Mapping[str, DirectoryDevice]
+    by_id: Mapping[int, DirectoryDevice]
+    loaded_at: float
+    high_water: Optional[datetime]
+
+
+_EMPTY = DirectorySnapshot(MappingProxyType({}), MappingProxyType({}), 0.0, None)
+
+
+def _device(row) -> DirectoryDevice:
+    return DirectoryDevice(**{field: row[field] for field in DirectoryDevice._fields})
+
+
+class DeviceDirectory:
+    """
+    IP/id -> device lookups over a periodically refreshed snapshot.
+
+    Refreshes are serialized, and a reader that finds the snapshot stale
+    while another thread is already refreshing just uses the current one.
+
+    Args:
+        db: DatabaseConnection (or anything with a cursor() context manager);
+            defaults to the backend singleton
+        max_age: Seconds before a lookup triggers an incremental refresh
+        full_reload_seconds: Seconds between full reloads
+        overlap_seconds: How far before the newest cached_at an incremental
+            refresh re-reads
+    """
+
+    def __init__(
+        self,
+        db=None,
+        max_age: float = 30.0,
+        full_reload_seconds: float = 3600.0,
+        overlap_seconds: float = 300.0,
+    ):
+        self.db = db
+        self.max_age = max_age
+        self.full_reload_seconds = full_reload_seconds
+        self.overlap_seconds = overlap_seconds
+        self._snapshot = _EMPTY
+        self._refresh_lock = threading.Lock()
+        self._checked_at = 0.0
+        self._full_at = 0.0
+        self._stale = True
+        self._listener: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.full_reloads = 0
+        self.notifications = 0
+        self.refresh_errors = 0
+        self.last_refresh_seconds = 0.0
+
+    def _get_db(self):
+        if self.db is None:
+            from backend.database import get_db
+            self.db = get_db()
+        return self.db
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+
+    def refresh(self, full: bool = False) -> int:
+        """
+        Load changed rows (or everything) and swap in a new snapshot.
+
+        Returns:
+            Number of rows read
+        """
+        with self._refresh_lock:
+            return self._refresh(full)
+
+    def _refresh(self, full: bool) -> int:
+        started = time.perf_counter()
+        current = self._snapshot
+        full = full or self._stale or current.high_water is None
+
+        with self._get_db().cursor() as cursor:
+            if full:
+                cursor.execute(f"SELECT {_COLUMNS} FROM netbox_device_cache")
+            else:
+                since = current.high_water - timedelta(seconds=self.overlap_seconds)
+                cursor.execute(
+                    f"SELECT {_COLUMNS} FROM netbox_device_cache WHERE cached_at > %s",
+                    (since,),
+                )
+            rows = cursor.fetchall()
+
+        if full:
+            by_id: Dict[int, DirectoryDevice] = {}
+            by_ip: Dict[str, DirectoryDevice] = {}
+        else:
+            by_id = dict(current.by_id)
+            by_ip = dict(current.by_ip)
+        high_water = None if full else current.high_water
+        for row in rows:
+            device = _device(row)
+            previous = by_id.get(device.netbox_device_id)
+            if previous and previous.device_ip and by_ip.get(previous.device_ip) is previous:
+                del by_ip[previous.device_ip]
+            by_id[device.netbox_device_id] = device
+            if device.device_ip:
+                by_ip[device.device_ip] = device
+            if device.cached_at and (high_water is None or device.cached_at > high_water):
+                high_water = device.cached_at
+
+        now = time.monotonic()
+        self._snapshot = DirectorySnapshot(
+            MappingProxyType(by_ip), MappingProxyType(by_id), now, high_water,
+        )
+        self._checked_at = now
+        self._stale = False
+        self.refreshes += 1
+        if full:
+            self._full_at = now
+            self.full_reloads += 1
+        self.last_refresh_seconds = time.perf_counter() - started
+        logger.debug(f"Device directory {'reloaded' if full else 'refreshed'}: "
+                     f"{len(rows)} rows read, {len(by_id)} devices "
+                     f"in {self.last_refresh_seconds * 1000:.1f}ms")
+        return len(rows)
+
+    def _maybe_refresh(self):
+        now = time.monotonic()
+        if not self._stale and now - self._checked_at < self.max_age:
+            return
+        # Only the very first load makes readers wait
+        if not self._refresh_lock.acquire(blocking=self._snapshot is _EMPTY):
+            return
+        try:
+            if self._stale or now - self._checked_at >= self.max_age:
+                self._refresh(full=now - self._full_at >= self.full_reload_seconds)
+        except Exception as e:
+            # Keep serving the last snapshot; retry after max_age
+            self.refresh_errors += 1
+            self._checked_at = now
+            logger.warning(f"Device directory refresh failed: {e}")
+        finally:
+            self._refresh_lock.release()
+
+    def invalidate(self):
+        """Force a full reload on the next lookup."""
+        self._stale = True
+
+    @property
+    def snapshot(self) -> DirectorySnapshot:
+        self._maybe_refresh()
+        return self._snapshot
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def get_by_ip(self, ip: str) -> Optional[DirectoryDevice]:
+        device = self.snapshot.by_ip.get(ip)
+        if device is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return device
+
+    def get_by_id(self, netbox_device_id: int) -> Optional[DirectoryDevice]:
+        device = self.snapshot.by_id.get(netbox_device_id)
+        if device is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return device
+
+    def device_name(self, ip: str) -> Optional[str]:
+        device = self.get_by_ip(ip)
+        return device.device_name if device else None
+
+    def devices(self) -> List[DirectoryDevice]:
+        return list(self.snapshot.by_id.values())
+
+    def select(self, vendor: Optional[str] = None, device_filter: Optional[Dict] = None) -> List[DirectoryDevice]:
+        """
+        Devices with an IP matching a poll config's vendor and device filter.
+
+        Same rules as the SQL target query it replaces: vendor and
+        manufacturer are case-insensitive substrings, site/role are exact,
+        and 'shard': [index, count] keeps devices whose shard_hash % count
+        equals index.
+        """
+        device_filter = device_filter or {}
+        needles = [n.lower() for n in (vendor, device_filter.get('manufacturer')) if n]
+        site = device_filter.get('site')
+        role = device_filter.get('role')
+        shard_index, shard_count = device_filter.get('shard') or (0, 1)
+
+        selected = []
+        for device in self.snapshot.by_id.values():
+            if not device.device_ip:
+                continue
+            if needles and not all(n in (device.manufacturer or '').lower() for n in needles):
+                continue
+            if site and device.site_name != site:
+                continue
+            if role and device.role_name != role:
+                continue
+            if shard_count > 1 and device.shard_hash % shard_count != shard_index:
+                continue
+            selected.append(device)
+        return selected
+
+    # ------------------------------------------------------------------
+    # LISTEN/NOTIFY
+    # ------------------------------------------------------------------
+
+    def start_listener(self, connect: Optional[Callable] = None) -> threading.Thread:
+        """
+        Refresh on netbox_device_cache notifications from a background thread.
+
+        INSERT/UPDATE notifications trigger an incremental refresh,
+        DELETE/TRUNCATE a full reload. Readers keep using the previous
+        snapshot while the listener refreshes.
+        """
+        if self._listener and self._listener.is_alive():
+            return self._listener
+        self._stop.clear()
+        self._listener = threading.Thread(
+            target=self._listen, args=(connect or _listen_connection,),
+            name='device-directory-listener', daemon=True,
+        )
+        self._listener.start()
+        return self._listener
+
+    def stop_listener(self):
+        self._stop.set()
+
+    def _listen(self, connect: Callable):
+        backoff = 1.0
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = connect()
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                logger.info(f"Device directory listening on '{NOTIFY_CHANNEL}'")
+                backoff = 1.0
+                # Changes made before LISTEN would otherwise wait for max_age
+                self.refresh()
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 5.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    if not conn.notifies:
+                        continue
+                    ops = {notify.payload for notify in conn.notifies}
+                    self.notifications += len(conn.notifies)
+                    conn.notifies.clear()
+                    self.refresh(full=bool(ops & {'DELETE', 'TRUNCATE'}))
+            except Exception as e:
+                logger.warning(f"Device directory listener error: {e}; retrying in {backoff:.0f}s")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 60.0)
+            finally:
+                if conn is not None and not conn.closed:
+                    conn.close()
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return directory size, lookup and refresh statistics."""
+        snapshot = self._snapshot
+        lookups = self.hits + self.misses
+        return {
+            'devices': len(snapshot.by_id),
+            'devices_with_ip': len(snapshot.by_ip),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'refreshes': self.refreshes,
+            'full_reloads': self.full_reloads,
+            'refresh_errors': self.refresh_errors,
+            'notifications': self.notifications,
+            'listening': bool(self._listener and self._listener.is_alive()),
+            'age_seconds': round(time.monotonic() - snapshot.loaded_at, 1) if snapshot.loaded_at else None,
+            'last_refresh_ms': round(self.last_refresh_seconds * 1000, 1),
+            'high_water': snapshot.high_water.isoformat() if snapshot.high_water else None,
+        }
+
+
+def _listen_connection():
+    """Dedicated connection for LISTEN (never shared with queries)."""
+    import psycopg2
+    return psycopg2.connect(
+        host=os.environ.get('PG_HOST', 'localhost'),
+        port=os.environ.get('PG_PORT', '5432'),
+        database=os.environ.get('PG_DATABASE', 'network_scan'),
+        user=os.environ.get('PG_USER', 'postgres'),
+        password=os.environ.get('PG_PASSWORD', 'postgres'),
+    )
+
+
+_directory: Optional[DeviceDirectory] = None
+_directory_lock = threading.Lock()
+
+
+def get_device_directory(db=None) -> DeviceDirectory:
+    """Process-wide DeviceDirectory configured from the environment."""
+    global _directory
+    if _directory is None:
+        with _directory_lock:
+            if _directory is None:
+                _directory = DeviceDirectory(
+                    db,
+                    max_age=float(os.environ.get('DEVICE_DIRECTORY_MAX_AGE', 30)),
+                    full_reload_seconds=float(os.environ.get('DEVICE_DIRECTORY_FULL_RELOAD', 3600)),
+                    overlap_seconds=float(os.environ.get('DEVICE_DIRECTORY_OVERLAP', 300)),
+                )
+    return _directory
@@ -0,0 +1,255 @@
+"""
+Per-Device SNMP Latency Tracker
+
+Learns how each device responds and sizes its SNMP timeout and retry
+budget accordingly:
+- EWMA round-trip time and deviation (TCP-style RTO = SRTT + 4 * RTTVAR)
+- Consecutive failure streak per device
+- Slow lane: devices failing repeatedly are polled with exponential
+  backoff instead of every cycle, with a short probe timeout and no retries
+- State shared through Redis between task runs and worker processes,
+  kept in process while Redis is unreachable
+"""
+
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DeviceLatency:
+    """Learned responsiveness of one device."""
+    srtt: Optional[float] = None       # smoothed RTT (seconds)
+    rttvar: float = 0.0                # smoothed RTT deviation (seconds)
+    failure_streak: int = 0
+    last_attempt: float = 0.0
+    last_success: float = 0.0
+
+
+class DeviceLatencyTracker:
+    """
+    Derives per-target timeouts, retries and slow-lane scheduling.
+
+    Args:
+        min_timeout: Lower bound for a learned timeout (seconds)
+        max_timeout: Upper bound for a learned timeout (seconds)
+        default_retries: Retries for healthy devices
+        slow_lane_after: Consecutive failures before a device is demoted
+        slow_lane_base: First slow-lane backoff (seconds)
+        slow_lane_max: Longest slow-lane backoff (seconds)
+        alpha: EWMA gain for SRTT
+        beta: EWMA gain for RTTVAR
+    """
+
+    def __init__(
+        self,
+        min_timeout: float = 0.5,
+        max_timeout: float = 5.0,
+        default_retries: int = 1,
+        slow_lane_after: int = 3,
+        slow_lane_base: float = 300.0,
+        slow_lane_max: float = 3600.0,
+        alpha: float = 0.125,
+        beta: float = 0.25,
+        redis_url: Optional[str] = None,
+        key: str = 'opsconductor:snmp_latency',
+    ):
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.default_retries = default_retries
+        self.slow_lane_after = slow_lane_after
+        self.slow_lane_base = slow_lane_base
+        self.slow_lane_max = slow_lane_max
+        self.alpha = alpha
+        self.beta = beta
+        self.key = key
+        self._devices: Dict[str, DeviceLatency] = {}
+        self._dirty = set()
+        self._redis = None
+        self._redis_down = False
+
+        if redis_url:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(redis_url, socket_timeout=2)
+            except ImportError:
+                logger.warning("redis package not installed; latency state is process-local")
+
+    def get(self, device_ip: str) -> DeviceLatency:
+        state = self._devices.get(device_ip)
+        if state is None:
+            state = self._devices[device_ip] = DeviceLatency()
+        return state
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+
+    def in_slow_lane(self, device_ip: str) -> bool:
+        state = self._devices.get(device_ip)
+        return state is not None and state.failure_streak >= self.slow_lane_after
+
+    def backoff_for(self, state: DeviceLatency) -> float:
+        """Seconds a slow-lane device waits between attempts."""
+        excess = state.failure_streak - self.slow_lane_after
+        return min(self.slow_lane_max, self.slow_lane_base * (2 ** excess))
+
+    def timeout_for(self, target) -> Tuple[float, int]:
+        """
+        Return (timeout, retries) for a target.
+
+        Unknown devices keep the target's configured values. Healthy ones
+        get their RTO; devices with recent failures get twice that; slow-lane
+        probes get a single attempt.
+        """
+        state = self._devices.get(target.ip)
+        if state is None or state.srtt is None:
+            timeout = target.timeout
+        else:
+            rto = state.srtt + 4 * state.rttvar
+            if state.failure_streak:
+                rto *= 2
+            timeout = min(self.max_timeout, max(self.min_timeout, rto))
+
+        if state is not None and state.failure_streak >= self.slow_lane_after:
+            return timeout, 0
+        return timeout, target.retries if state is None else self.default_retries
+
+    def schedule(self, targets: Iterable, now: Optional[float] = None) -> Tuple[List, List]:
+        """
+        Split targets into this cycle's polls and slow-lane deferrals.
+
+        Returns:
+            (targets to poll with timeout/retries applied, deferred targets)
+        """
+        now = now or time.time()
+        to_poll = []
+        deferred = []
+        for target in targets:
+            state = self._devices.get(target.ip)
+            if (state is not None and state.failure_streak >= self.slow_lane_after
+                    and now - state.last_attempt < self.backoff_for(state)):
+                deferred.append(target)
+                continue
+            timeout, retries = self.timeout_for(target)
+            to_poll.append(replace(target, timeout=timeout, retries=retries))
+        return to_poll, deferred
+
+    # ------------------------------------------------------------------
+    # Observation
+    # ------------------------------------------------------------------
+
+    def observe(self, result, now: Optional[float] = None):
+        """Fold one SNMPResult into the device's latency state."""
+        now = now or time.time()
+        state = self.get(result.target.ip)
+        state.last_attempt = now
+        self._dirty.add(result.target.ip)
+
+        if not result.success:
+            state.failure_streak += 1
+            return
+
+        if state.failure_streak >= self.slow_lane_after:
+            logger.info(f"{result.target.ip} responding again; leaving slow lane")
+        state.failure_streak = 0
+        state.last_success = now
+
+        # Karn's rule: after a retransmit the reply may answer an earlier
+        # send, so the sample is ambiguous. Results without a measured
+        # round trip (e.g. the subprocess engine's whole-walk duration)
+        # are not RTT samples either.
+        rtt = result.rtt
+        if result.retries_used or not rtt or rtt <= 0:
+            return
+        if state.srtt is None:
+            state.srtt = rtt
+            state.rttvar = rtt / 2
+        else:
+            state.rttvar = (1 - self.beta) * state.rttvar + self.beta * abs(state.srtt - rtt)
+            state.srtt = (1 - self.alpha) * state.srtt + self.alpha * rtt
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self):
+        """Load device state from Redis (no-op without Redis)."""
+        if self._redis is None:
+            return
+        try:
+            stored = self._redis.hgetall(self.key)
+        except Exception as e:
+            self._fall_back(e)
+            return
+        if self._redis_down:
+            logger.info("Latency state Redis reachable again")
+            self._redis_down = False
+        for device_ip, raw in stored.items():
+            device_ip = device_ip.decode() if isinstance(device_ip, bytes) else device_ip
+            try:
+                self._devices[device_ip] = DeviceLatency(**json.loads(raw))
+            except (TypeError, ValueError):
+                continue
+
+    def save(self):
+        """Write devices observed since the last save to Redis."""
+        if self._redis is None or not self._dirty:
+            self._dirty.clear()
+            return
+        mapping = {ip: json.dumps(asdict(self._devices[ip])) for ip in self._dirty}
+        try:
+            self._redis.hset(self.key, mapping=mapping)
+            self._redis.expire(self.key, int(self.slow_lane_max * 24))
+        except Exception as e:
+            self._fall_back(e)
+        self._dirty.clear()
+
+    def _fall_back(self, error: Exception):
+        # Logged once per outage; load() retries Redis on the next run
+        if not self._redis_down:
+            logger.warning(f"Latency state Redis unreachable ({error}); using process-local state")
+            self._redis_down = True
+
+    def get_stats(self) -> Dict:
+        """Return tracker summary."""
+        known = [s for s in self._devices.values() if s.srtt is not None]
+        return {
+            'devices': len(self._devices),
+            'slow_lane': sum(1 for s in self._devices.values()
+                             if s.failure_streak >= self.slow_lane_after),
+            'failing': sum(1 for s in self._devices.values() if s.failure_streak),
+            'avg_srtt_ms': round(sum(s.srtt for s in known) / len(known) * 1000, 1) if known else 0.0,
+            'redis': self._redis is not None and not self._redis_down,
+        }
+
+
+_tracker: Optional[DeviceLatencyTracker] = None
+
+
+def get_latency_tracker() -> DeviceLatencyTracker:
+    """
+    Get the process-wide latency tracker.
+
+    State is shared through the configured Redis so every Celery worker
+    process sees the same EWMAs and slow lane across task runs, falling
+    back to process-local state while Redis is unreachable.
+    LATENCY_STATE_BACKEND=memory keeps it in process only.
+    """
+    global _tracker
+    if _tracker is None:
+        redis_url = None
+        if os.environ.get('LATENCY_STATE_BACKEND', 'redis') == 'redis':
+            from backend.config import get_settings
+            redis_url = get_settings().redis_url
+        _tracker = DeviceLatencyTracker(
+            max_timeout=float(os.environ.get('SNMP_MAX_TIMEOUT', 5.0)),
+            slow_lane_after=int(os.environ.get('SNMP_SLOW_LANE_AFTER', 3)),
+            redis_url=redis_url,
+        )
+    return _tracker
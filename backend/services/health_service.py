@@ -10,8 +10,9 @@ import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from decimal import Decimal
-import psycopg2
-from psycopg2.extras import execute_values, RealDictCursor
+from psycopg2.extras import execute_values
+
+from backend.database import get_db, TimedRealDictCursor
 
 logger = logging.getLogger(__name__)
 
@@ -35,24 +36,18 @@ class HealthService:
         'capacity': 0.15,
     }
     
-    def __init__(self, db_config: Dict[str, Any] = None):
-        """Initialize the health service."""
-        self.db_config = db_config or self._get_default_config()
-    
-    def _get_default_config(self) -> Dict[str, Any]:
-        """Get default database configuration from environment."""
-        import os
-        return {
-            'host': os.getenv('PG_HOST', 'localhost'),
-            'port': int(os.getenv('PG_PORT', 5432)),
-            'database': os.getenv('PG_DATABASE', 'network_scan'),
-            'user': os.getenv('PG_USER', 'postgres'),
-            'password': os.getenv('PG_PASSWORD', 'postgres'),
-        }
+    def __init__(self, db=None):
+        """
+        Initialize the health service.
+        
+        Args:
+            db: DatabaseConnection (defaults to the shared pool)
+        """
+        self.db = db or get_db()
     
     def _get_connection(self):
-        """Get a database connection."""
-        return psycopg2.connect(**self.db_config)
+        """Transaction on a pooled connection (tuple rows unless a cursor_factory is given)."""
+        return self.db.transaction(dict_rows=False)
     
     def calculate_device_health(
         self,
@@ -83,24 +78,113 @@ class HealthService:
         # Get capacity metrics
         capacity_score = self._calculate_capacity_score(device_ip, start_time)
         
-        # Calculate overall score
+        scores = self.combine_scores(availability_score, performance_score, error_score, capacity_score)
+        return {'device_ip': device_ip, **scores, 'calculated_at': datetime.utcnow()}
+    
+    # ------------------------------------------------------------------
+    # Component scoring (shared by the per-device and fleet paths)
+    # ------------------------------------------------------------------
+    
+    @classmethod
+    def combine_scores(
+        cls,
+        availability_score: float,
+        performance_score: float,
+        error_score: float,
+        capacity_score: float,
+    ) -> Dict[str, float]:
+        """Weight the component scores into an overall score (all rounded to 2 places)."""
         overall_score = (
-            availability_score * self.WEIGHTS['availability'] +
-            performance_score * self.WEIGHTS['performance'] +
-            error_score * self.WEIGHTS['errors'] +
-            capacity_score * self.WEIGHTS['capacity']
+            availability_score * cls.WEIGHTS['availability'] +
+            performance_score * cls.WEIGHTS['performance'] +
+            error_score * cls.WEIGHTS['errors'] +
+            capacity_score * cls.WEIGHTS['capacity']
         )
-        
         return {
-            'device_ip': device_ip,
             'overall_score': round(overall_score, 2),
             'availability_score': round(availability_score, 2),
             'performance_score': round(performance_score, 2),
             'error_score': round(error_score, 2),
             'capacity_score': round(capacity_score, 2),
-            'calculated_at': datetime.utcnow(),
         }
     
+    @staticmethod
+    def score_availability(total, up_count, snmp_up_count) -> float:
+        """Availability score (0-100) from sample counts."""
+        if not total:
+            return 100.0  # No data = assume healthy
+        
+        ping_pct = (up_count / total) * 100
+        snmp_pct = (snmp_up_count / total) * 100 if snmp_up_count else ping_pct
+        
+        # Weight ping more heavily
+        return float(ping_pct * 0.7 + snmp_pct * 0.3)
+    
+    @staticmethod
+    def score_performance(avg_latency) -> float:
+        """Performance score (0-100) from average ping latency in ms."""
+        if avg_latency is None:
+            return 100.0  # No data = assume healthy
+        
+        avg_latency = float(avg_latency)
+        
+        # Score based on latency thresholds
+        # < 10ms = 100, 10-50ms = 90-100, 50-100ms = 70-90, 100-500ms = 30-70, > 500ms = 0-30
+        if avg_latency < 10:
+            return 100.0
+        elif avg_latency < 50:
+            return 90 + (50 - avg_latency) / 40 * 10
+        elif avg_latency < 100:
+            return 70 + (100 - avg_latency) / 50 * 20
+        elif avg_latency < 500:
+            return 30 + (500 - avg_latency) / 400 * 40
+        else:
+            return max(0, 30 - (avg_latency - 500) / 500 * 30)
+    
+    @staticmethod
+    def score_errors(total_errors, total_packets) -> float:
+        """Error score (0-100, higher = fewer errors) from interface counters."""
+        if not total_packets:
+            return 100.0  # No data = assume healthy
+        
+        error_rate = float(total_errors or 0) / float(total_packets)
+        
+        # Score based on error rate
+        # 0% = 100, 0.001% = 95, 0.01% = 80, 0.1% = 50, 1% = 0
+        if error_rate == 0:
+            return 100.0
+        elif error_rate < 0.00001:
+            return 95 + (0.00001 - error_rate) / 0.00001 * 5
+        elif error_rate < 0.0001:
+            return 80 + (0.0001 - error_rate) / 0.00009 * 15
+        elif error_rate < 0.001:
+            return 50 + (0.001 - error_rate) / 0.0009 * 30
+        elif error_rate < 0.01:
+            return max(0, 50 - (error_rate - 0.001) / 0.009 * 50)
+        else:
+            return 0.0
+    
+    @staticmethod
+    def score_capacity(avg_util) -> float:
+        """Capacity score (0-100, higher = more headroom) from average utilization %."""
+        if avg_util is None:
+            return 100.0  # No data = assume healthy
+        
+        avg_util = float(avg_util)
+        
+        # Score based on utilization (inverse - lower util = higher score)
+        # < 50% = 100, 50-70% = 80-100, 70-85% = 50-80, 85-95% = 20-50, > 95% = 0-20
+        if avg_util < 50:
+            return 100.0
+        elif avg_util < 70:
+            return 80 + (70 - avg_util) / 20 * 20
+        elif avg_util < 85:
+            return 50 + (85 - avg_util) / 15 * 30
+        elif avg_util < 95:
+            return 20 + (95 - avg_util) / 10 * 30
+        else:
+            return max(0, 20 - (avg_util - 95) / 5 * 20)
+    
     def _calculate_availability_score(
         self,
         device_ip: str,
@@ -117,18 +201,13 @@ class HealthService:
         """
         
         with self._get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
                 cur.execute(sql, (device_ip, start_time))
                 row = cur.fetchone()
                 
-                if not row or row['total'] == 0:
+                if not row:
                     return 100.0  # No data = assume healthy
-                
-                ping_pct = (row['up_count'] / row['total']) * 100
-                snmp_pct = (row['snmp_up_count'] / row['total']) * 100 if row['snmp_up_count'] else ping_pct
-                
-                # Weight ping more heavily
-                return ping_pct * 0.7 + snmp_pct * 0.3
+                return self.score_availability(row['total'], row['up_count'], row['snmp_up_count'])
     
     def _calculate_performance_score(
         self,
@@ -146,27 +225,13 @@ class HealthService:
         """
         
         with self._get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
                 cur.execute(sql, (device_ip, start_time))
                 row = cur.fetchone()
                 
-                if not row or row['avg_latency'] is None:
+                if not row:
                     return 100.0  # No data = assume healthy
-                
-                avg_latency = float(row['avg_latency'])
-                
-                # Score based on latency thresholds
-                # < 10ms = 100, 10-50ms = 90-100, 50-100ms = 70-90, 100-500ms = 30-70, > 500ms = 0-30
-                if avg_latency < 10:
-                    return 100.0
-                elif avg_latency < 50:
-                    return 90 + (50 - avg_latency) / 40 * 10
-                elif avg_latency < 100:
-                    return 70 + (100 - avg_latency) / 50 * 20
-                elif avg_latency < 500:
-                    return 30 + (500 - avg_latency) / 400 * 40
-                else:
-                    return max(0, 30 - (avg_latency - 500) / 500 * 30)
+                return self.score_performance(row['avg_latency'])
     
     def _calculate_error_score(
         self,
@@ -183,29 +248,13 @@ class HealthService:
         """
         
         with self._get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
                 cur.execute(sql, (device_ip, start_time))
                 row = cur.fetchone()
                 
-                if not row or row['total_packets'] is None or row['total_packets'] == 0:
+                if not row:
                     return 100.0  # No data = assume healthy
-                
-                error_rate = row['total_errors'] / row['total_packets']
-                
-                # Score based on error rate
-                # 0% = 100, 0.001% = 95, 0.01% = 80, 0.1% = 50, 1% = 0
-                if error_rate == 0:
-                    return 100.0
-                elif error_rate < 0.00001:
-                    return 95 + (0.00001 - error_rate) / 0.00001 * 5
-                elif error_rate < 0.0001:
-                    return 80 + (0.0001 - error_rate) / 0.00009 * 15
-                elif error_rate < 0.001:
-                    return 50 + (0.001 - error_rate) / 0.0009 * 30
-                elif error_rate < 0.01:
-                    return max(0, 50 - (error_rate - 0.001) / 0.009 * 50)
-                else:
-                    return 0.0
+                return self.score_errors(row['total_errors'], row['total_packets'])
     
     def _calculate_capacity_score(
         self,
@@ -222,28 +271,13 @@ class HealthService:
         """
         
         with self._get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
                 cur.execute(sql, (device_ip, start_time))
                 row = cur.fetchone()
                 
-                if not row or row['avg_util'] is None:
+                if not row:
                     return 100.0  # No data = assume healthy
-                
-                avg_util = float(row['avg_util'])
-                max_util = float(row['max_util']) if row['max_util'] else avg_util
-                
-                # Score based on utilization (inverse - lower util = higher score)
-                # < 50% = 100, 50-70% = 80-100, 70-85% = 50-80, 85-95% = 20-50, > 95% = 0-20
-                if avg_util < 50:
-                    return 100.0
-                elif avg_util < 70:
-                    return 80 + (70 - avg_util) / 20 * 20
-                elif avg_util < 85:
-                    return 50 + (85 - avg_util) / 15 * 30
-                elif avg_util < 95:
-                    return 20 + (95 - avg_util) / 10 * 30
-                else:
-                    return max(0, 20 - (avg_util - 95) / 5 * 20)
+                return self.score_capacity(row['avg_util'])
     
     def store_health_score(
         self,
@@ -292,7 +326,7 @@ class HealthService:
         """
         
         with self._get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
                 cur.execute(sql, (device_ip, limit))
                 return [dict(row) for row in cur.fetchall()]
     
@@ -310,33 +344,194 @@ class HealthService:
         """
         
         with self._get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
                 cur.execute(sql, (site_id, limit))
                 return [dict(row) for row in cur.fetchall()]
     
-    def calculate_and_store_all_device_health(self) -> int:
+    # Grouped aggregates over the whole fleet: one row per device
+    FLEET_AVAILABILITY_SQL = """
+        SELECT
+            device_ip,
+            (ARRAY_AGG(netbox_device_id ORDER BY recorded_at DESC))[1] as netbox_device_id,
+            (ARRAY_AGG(site_id ORDER BY recorded_at DESC))[1] as site_id,
+            COUNT(*) as total,
+            SUM(CASE WHEN ping_status = 'up' THEN 1 ELSE 0 END) as up_count,
+            SUM(CASE WHEN snmp_status = 'up' THEN 1 ELSE 0 END) as snmp_up_count,
+            AVG(ping_latency_ms) as avg_latency
+        FROM availability_metrics
+        WHERE recorded_at >= NOW() - make_interval(hours => %s)
+        GROUP BY device_ip
+    """
+    
+    FLEET_INTERFACE_SQL = """
+        SELECT
+            device_ip,
+            SUM(COALESCE(rx_errors, 0) + COALESCE(tx_errors, 0)) as total_errors,
+            SUM(COALESCE(rx_packets, 0) + COALESCE(tx_packets, 0)) as total_packets,
+            AVG(GREATEST(COALESCE(rx_utilization_pct, 0), COALESCE(tx_utilization_pct, 0))) as avg_util
+        FROM interface_metrics
+        WHERE recorded_at >= NOW() - make_interval(hours => %s)
+        GROUP BY device_ip
+    """
+    
+    def calculate_fleet_health(
+        self,
+        hours: int = 1,
+        conn=None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Calculate health scores for every device with recent availability metrics.
+        
+        Same scoring as calculate_device_health, but the components for the
+        whole fleet come from two grouped aggregations instead of four
+        queries per device.
+        
+        Args:
+            hours: Hours of data to consider
+            conn: Connection to run on (defaults to a pooled transaction)
+        
+        Returns:
+            List of score dicts, one per device, with netbox_device_id and site_id
+        """
+        if conn is None:
+            with self._get_connection() as conn:
+                return self.calculate_fleet_health(hours, conn=conn)
+        
+        with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
+            cur.execute(self.FLEET_AVAILABILITY_SQL, (hours,))
+            devices = cur.fetchall()
+            cur.execute(self.FLEET_INTERFACE_SQL, (hours,))
+            interfaces = {row['device_ip']: row for row in cur.fetchall()}
+        
+        calculated_at = datetime.utcnow()
+        results = []
+        for device in devices:
+            iface = interfaces.get(device['device_ip'], {})
+            scores = self.combine_scores(
+                self.score_availability(device['total'], device['up_count'], device['snmp_up_count']),
+                self.score_performance(device['avg_latency']),
+                self.score_errors(iface.get('total_errors'), iface.get('total_packets')),
+                self.score_capacity(iface.get('avg_util')),
+            )
+            results.append({
+                'device_ip': device['device_ip'],
+                'netbox_device_id': device['netbox_device_id'],
+                'site_id': device['site_id'],
+                **scores,
+                'calculated_at': calculated_at,
+            })
+        return results
+    
+    @classmethod
+    def rollup_site_health(cls, device_scores: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Roll device scores up to one score per site.
+        
+        Site components are the mean of their devices' components; the
+        warning/critical counts use the same thresholds as
+        get_network_health_summary.
+        """
+        sites: Dict[int, List[Dict[str, Any]]] = {}
+        for scores in device_scores:
+            if scores.get('site_id') is not None:
+                sites.setdefault(scores['site_id'], []).append(scores)
+        
+        results = []
+        for site_id, members in sites.items():
+            def mean(key):
+                return sum(float(m[key]) for m in members) / len(members)
+            
+            scores = cls.combine_scores(
+                mean('availability_score'), mean('performance_score'),
+                mean('error_score'), mean('capacity_score'),
+            )
+            results.append({
+                'site_id': site_id,
+                **scores,
+                'active_warning_count': sum(1 for m in members if 70 <= m['overall_score'] < 90),
+                'active_critical_count': sum(1 for m in members if m['overall_score'] < 70),
+                'calculated_at': members[0]['calculated_at'],
+            })
+        return results
+    
+    def store_health_scores(
+        self,
+        device_scores: List[Dict[str, Any]],
+        site_scores: List[Dict[str, Any]] = None,
+        conn=None,
+    ) -> int:
+        """Store device and site scores with a single multi-row INSERT."""
+        rows = [
+            ('device', s['device_ip'], s.get('netbox_device_id'), s.get('site_id'),
+             s['overall_score'], s['availability_score'], s['performance_score'],
+             s['error_score'], s['capacity_score'], 0, 0, s['calculated_at'])
+            for s in device_scores
+        ] + [
+            ('site', None, None, s['site_id'],
+             s['overall_score'], s['availability_score'], s['performance_score'],
+             s['error_score'], s['capacity_score'],
+             s['active_warning_count'], s['active_critical_count'], s['calculated_at'])
+            for s in site_scores or []
+        ]
+        if not rows:
+            return 0
+        
+        if conn is None:
+            with self._get_connection() as conn:
+                return self.store_health_scores(device_scores, site_scores, conn=conn)
+        
+        sql = """
+            INSERT INTO health_scores (
+                scope_type, device_ip, netbox_device_id, site_id,
+                overall_score, availability_score, performance_score,
+                error_score, capacity_score,
+                active_warning_count, active_critical_count, calculated_at
+            ) VALUES %s
+        """
+        with conn.cursor() as cur:
+            execute_values(cur, sql, rows, page_size=1000)
+        return len(rows)
+    
+    def calculate_and_store_all_device_health(self, hours: int = 1, bulk: bool = True) -> int:
         """
         Calculate and store health scores for all devices with recent metrics.
         
+        In bulk mode (the default) the fleet is scored from grouped
+        aggregations, site scores are rolled up from the device scores, and
+        everything is written in one INSERT on one connection. bulk=False
+        scores and stores each device separately.
+        
+        Args:
+            hours: Hours of data to consider
+            bulk: Use the set-based path
+        
         Returns:
             Number of devices processed
         """
+        if bulk:
+            with self._get_connection() as conn:
+                device_scores = self.calculate_fleet_health(hours, conn=conn)
+                site_scores = self.rollup_site_health(device_scores)
+                self.store_health_scores(device_scores, site_scores, conn=conn)
+            logger.info(f"Stored health scores for {len(device_scores)} devices and {len(site_scores)} sites")
+            return len(device_scores)
+        
         # Get all devices with recent availability metrics
         sql = """
             SELECT DISTINCT device_ip, netbox_device_id, site_id
             FROM availability_metrics
-            WHERE recorded_at >= NOW() - INTERVAL '1 hour'
+            WHERE recorded_at >= NOW() - make_interval(hours => %s)
         """
         
         count = 0
         with self._get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(sql)
+            with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
+                cur.execute(sql, (hours,))
                 devices = cur.fetchall()
         
         for device in devices:
             try:
-                scores = self.calculate_device_health(device['device_ip'])
+                scores = self.calculate_device_health(device['device_ip'], hours=hours)
                 self.store_health_score(
                     device['device_ip'],
                     scores,
@@ -382,7 +577,7 @@ class HealthService:
         """
         
         with self._get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
                 cur.execute(sql)
                 row = cur.fetchone()
                 return dict(row) if row else {}
@@ -9,13 +9,14 @@ import logging
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
-from ..executors import ExecutorRegistry, SSHExecutor, PingExecutor, SNMPExecutor, DiscoveryExecutor
+from ..executors import ExecutorRegistry, PingExecutor, SNMPExecutor, DiscoveryExecutor
 from ..parsers.registry import ParserRegistry
 from ..targeting import TargetingRegistry
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
 from ..config.constants import ACTION_TYPES, JOB_STATUS_SUCCESS, JOB_STATUS_FAILED
 from .credential_service import get_credential_service
+from ..executors.async_ssh_executor import get_async_ssh_engine, run_sync
 
 logger = logging.getLogger(__name__)
 
@@ -376,71 +377,69 @@ class JobExecutor:
         results = []
         success_count = 0
         
-        def execute_ssh_target(target):
+        def resolve_ssh_config(target):
+            # Get SSH credentials from vault, then job config, then settings
+            vault_creds = self._get_credentials_for_target(target, 'ssh', job_config)
+            return {
+                'username': vault_creds.get('username') or job_config.get('ssh_username') or self._get_setting('ssh_username'),
+                'password': vault_creds.get('password') or job_config.get('ssh_password') or self._get_setting('ssh_password'),
+                'port': vault_creds.get('port') or job_config.get('ssh_port') or self._get_setting('ssh_port', 22),
+                'private_key': vault_creds.get('private_key'),
+                'passphrase': vault_creds.get('passphrase'),
+            }
+        
+        def build_target_result(engine_result):
+            target = engine_result['target']
             target_result = {
                 'target': target,
                 'commands': [],
-                'success': True,
+                'success': engine_result['success'],
             }
+            if engine_result.get('error'):
+                target_result['error'] = engine_result['error']
             
-            try:
-                # Get SSH credentials from vault, then job config, then settings
-                vault_creds = self._get_credentials_for_target(target, 'ssh', job_config)
-                
-                ssh_config = {
-                    'username': vault_creds.get('username') or job_config.get('ssh_username') or self._get_setting('ssh_username'),
-                    'password': vault_creds.get('password') or job_config.get('ssh_password') or self._get_setting('ssh_password'),
-                    'port': vault_creds.get('port') or job_config.get('ssh_port') or self._get_setting('ssh_port', 22),
-                    'timeout': job_config.get('timeout', 30),
-                    'private_key': vault_creds.get('private_key'),
-                    'passphrase': vault_creds.get('passphrase'),
+            for cmd_config, cmd_run in zip(commands, engine_result['commands']):
+                parser_name = cmd_config.get('parser')
+                cmd_result = {
+                    'command': cmd_run['command'],
+                    'success': cmd_run['success'],
+                    'output': cmd_run['output'],
+                    'error': cmd_run['error'],
                 }
                 
-                executor = SSHExecutor()
+                # Parse output if parser specified
+                if parser_name and cmd_run['success']:
+                    try:
+                        cmd_result['parsed'] = ParserRegistry.parse(
+                            parser_name,
+                            cmd_run['output'],
+                            {'ip_address': target}
+                        )
+                    except Exception as e:
+                        cmd_result['parse_error'] = str(e)
                 
-                for cmd_config in commands:
-                    cmd = cmd_config.get('command', '')
-                    parser_name = cmd_config.get('parser')
-                    
-                    # Execute command
-                    exec_result = executor.execute(target, cmd, ssh_config)
-                    
-                    cmd_result = {
-                        'command': cmd,
-                        'success': exec_result.get('success', False),
-                        'output': exec_result.get('output', ''),
-                        'error': exec_result.get('error'),
-                    }
-                    
-                    # Parse output if parser specified
-                    if parser_name and exec_result.get('success'):
-                        try:
-                            parsed = ParserRegistry.parse(
-                                parser_name, 
-                                exec_result.get('output', ''),
-                                {'ip_address': target}
-                            )
-                            cmd_result['parsed'] = parsed
-                        except Exception as e:
-                            cmd_result['parse_error'] = str(e)
-                    
-                    target_result['commands'].append(cmd_result)
-                    
-                    if not exec_result.get('success'):
-                        target_result['success'] = False
-                    
-            except Exception as e:
-                target_result['success'] = False
-                target_result['error'] = str(e)
+                target_result['commands'].append(cmd_result)
             
             return target_result
         
-        # Execute SSH commands in parallel
-        cpu_count = os.cpu_count() or 4
-        max_workers = min(cpu_count * 50, len(targets), 1000)
-        
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_results = list(executor.map(execute_ssh_target, targets))
+        # One event loop drives every session (see executors.async_ssh_executor);
+        # credential lookups run on the loop's executor, parsing as each host finishes
+        engine = get_async_ssh_engine()
+        sites = {target: self._site_for_target(target) for target in targets}
+        
+        async def run_targets():
+            ordered = [None] * len(targets)
+            async for index, engine_result in engine.stream(
+                targets,
+                [cmd_config.get('command', '') for cmd_config in commands],
+                {'timeout': job_config.get('timeout', 30)},
+                site_of=sites.get,
+                resolve_config=resolve_ssh_config,
+            ):
+                ordered[index] = build_target_result(engine_result)
+            return ordered
+        
+        future_results = run_sync(run_targets())
         
         for target_result in future_results:
             results.append(target_result)
@@ -665,3 +664,12 @@ class JobExecutor:
             pass
         
         return default
+    
+    def _site_for_target(self, target: str) -> Optional[str]:
+        """Site of a target from the device directory (keys the per-site SSH limit)."""
+        try:
+            from .device_directory import get_device_directory
+            device = get_device_directory().get_by_ip(target)
+        except Exception:
+            return None
+        return device.site_name if device else None
@@ -0,0 +1,246 @@
+"""
+Streaming Latency Sketch
+
+Fixed-memory, mergeable latency distribution for long-lived pollers:
+- Log-bucketed histogram with bounded relative error (DDSketch-style)
+- p50/p95/p99/max without keeping individual samples
+- Sketches from different workers merge by adding bucket counts
+- Per-worker snapshots published to Redis and merged for fleet reports
+"""
+
+import json
+import logging
+import math
+import os
+import socket
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Values at or below this (seconds) share the zero bucket
+MIN_TRACKED_VALUE = 1e-6
+
+
+class LatencySketch:
+    """
+    Quantile sketch over non-negative durations (seconds).
+
+    Every value lands in bucket ceil(log_gamma(value)), so any quantile is
+    reported within +/- relative_accuracy of a real sample. When more than
+    max_buckets are in use the lowest buckets are folded together, which
+    only costs accuracy at the fast end of the distribution.
+
+    Args:
+        relative_accuracy: Relative error bound for quantiles (0.01 = 1%)
+        max_buckets: Upper bound on the number of buckets kept
+    """
+
+    __slots__ = ('relative_accuracy', 'max_buckets', '_gamma_ln', 'buckets',
+                 'zero_count', 'count', 'total', 'min', 'max')
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._gamma_ln = math.log(gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def add(self, value: float):
+        """Record one duration."""
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if value <= MIN_TRACKED_VALUE:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self._gamma_ln)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        """Fold the lowest buckets into one to stay within max_buckets."""
+        keys = sorted(self.buckets)
+        excess = len(keys) - self.max_buckets + 1
+        folded = sum(self.buckets.pop(k) for k in keys[:excess])
+        target = keys[excess]
+        self.buckets[target] = self.buckets.get(target, 0) + folded
+
+    def quantile(self, q: float) -> float:
+        """Return the q-quantile (0..1); 0.0 when empty."""
+        if self.count == 0:
+            return 0.0
+        if q >= 1:
+            return self.max
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return self.min if self.min <= MIN_TRACKED_VALUE else 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                # Bucket midpoint: within relative_accuracy of every value in it
+                value = 2 * math.exp(key * self._gamma_ln) / (1 + math.exp(self._gamma_ln))
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def merge(self, other: 'LatencySketch'):
+        """Add another sketch's samples into this one."""
+        if other.count == 0:
+            return
+        if not math.isclose(other._gamma_ln, self._gamma_ln):
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for key, n in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def summary(self) -> Dict:
+        """Return count, mean and p50/p95/p99/max in milliseconds."""
+        return {
+            'count': self.count,
+            'avg_ms': round(self.mean * 1000, 2),
+            'p50_ms': round(self.quantile(0.50) * 1000, 2),
+            'p95_ms': round(self.quantile(0.95) * 1000, 2),
+            'p99_ms': round(self.quantile(0.99) * 1000, 2),
+            'max_ms': round(self.max * 1000, 2),
+        }
+
+    def to_dict(self) -> Dict:
+        """Serialize for transport between processes."""
+        return {
+            'a': self.relative_accuracy,
+            'b': {str(k): n for k, n in self.buckets.items()},
+            'z': self.zero_count,
+            'n': self.count,
+            's': self.total,
+            'lo': self.min if self.count else None,
+            'hi': self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'LatencySketch':
+        sketch = cls(relative_accuracy=data.get('a', 0.01))
+        sketch.buckets = {int(k): n for k, n in data.get('b', {}).items()}
+        sketch.zero_count = data.get('z', 0)
+        sketch.count = data.get('n', 0)
+        sketch.total = data.get('s', 0.0)
+        sketch.min = data['lo'] if data.get('lo') is not None else float('inf')
+        sketch.max = data.get('hi', 0.0)
+        return sketch
+
+
+# ----------------------------------------------------------------------
+# Fleet-wide aggregation
+# ----------------------------------------------------------------------
+
+FLEET_STATS_KEY = 'opsconductor:poller_stats'
+
+
+def _redis_client():
+    try:
+        import redis
+    except ImportError:
+        logger.warning("redis package not installed; poller stats are not shared")
+        return None
+    from backend.config import get_settings
+    return redis.Redis.from_url(get_settings().redis_url, socket_timeout=2)
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+_worker_stats = None
+
+
+def record_worker_stats(stats, publish: bool = True):
+    """
+    Fold one poll cycle's PollerStats into this worker's running totals
+    and publish the result for fleet-wide reporting.
+    """
+    global _worker_stats
+    if _worker_stats is None:
+        from backend.services.async_snmp_poller import PollerStats
+        _worker_stats = PollerStats()
+    _worker_stats.merge(stats)
+    if publish and os.environ.get('POLLER_STATS_PUBLISH', 'true').lower() == 'true':
+        publish_poller_stats(_worker_stats)
+    return _worker_stats
+
+
+def publish_poller_stats(stats, client=None, ttl_seconds: int = 86400) -> bool:
+    """
+    Store this worker's cumulative PollerStats snapshot in Redis.
+
+    Each worker owns one field of a shared hash, so publishing replaces
+    the worker's previous snapshot instead of double counting it.
+    """
+    client = client or _redis_client()
+    if client is None:
+        return False
+    payload = stats.to_dict()
+    payload['worker'] = worker_id()
+    payload['updated_at'] = time.time()
+    try:
+        client.hset(FLEET_STATS_KEY, payload['worker'], json.dumps(payload))
+        client.expire(FLEET_STATS_KEY, ttl_seconds)
+        return True
+    except Exception as e:
+        logger.warning(f"Publishing poller stats failed: {e}")
+        return False
+
+
+def load_fleet_poller_stats(client=None, max_age_seconds: Optional[float] = 3600):
+    """
+    Merge every worker's published snapshot into one PollerStats.
+
+    Returns:
+        (merged PollerStats, list of contributing worker ids)
+    """
+    from backend.services.async_snmp_poller import PollerStats
+
+    merged = PollerStats()
+    workers: List[str] = []
+    client = client or _redis_client()
+    if client is None:
+        return merged, workers
+
+    now = time.time()
+    for field, raw in client.hgetall(FLEET_STATS_KEY).items():
+        try:
+            data = json.loads(raw)
+        except (TypeError, ValueError):
+            continue
+        if max_age_seconds and now - data.get('updated_at', 0) > max_age_seconds:
+            continue
+        merged.merge(PollerStats.from_dict(data))
+        workers.append(field.decode() if isinstance(field, bytes) else field)
+    return merged, workers
+
+
+def top_devices(by_device: Dict[str, LatencySketch], limit: int = 20,
+                quantile: float = 0.95) -> List[Dict]:
+    """Slowest devices by the given quantile, with their summaries."""
+    ranked = sorted(by_device.items(), key=lambda kv: kv[1].quantile(quantile), reverse=True)
+    return [{'device_ip': ip, **sketch.summary()} for ip, sketch in ranked[:limit]]
+
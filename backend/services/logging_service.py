@@ -94,27 +94,22 @@ class DatabaseLogHandler(logging.Handler):
             return
         
         try:
-            conn = self.db_connection.get_connection()
-            cursor = conn.cursor()
-            
-            insert_sql = """
-                INSERT INTO system_logs (
-                    timestamp, level, source, category, message, details,
-                    request_id, user_id, username, ip_address, job_id, workflow_id,
-                    execution_id, device_ip, duration_ms, status_code
-                ) VALUES (
-                    %(timestamp)s, %(level)s, %(source)s, %(category)s, 
-                    %(message)s, %(details)s, %(request_id)s, %(user_id)s,
-                    %(username)s, %(ip_address)s, %(job_id)s, %(workflow_id)s, 
-                    %(execution_id)s, %(device_ip)s, %(duration_ms)s, %(status_code)s
-                )
-            """
-            
-            for log_entry in batch:
-                cursor.execute(insert_sql, log_entry)
-            
-            conn.commit()
-            cursor.close()
+            with self.db_connection.cursor() as cursor:
+                insert_sql = """
+                    INSERT INTO system_logs (
+                        timestamp, level, source, category, message, details,
+                        request_id, user_id, username, ip_address, job_id, workflow_id,
+                        execution_id, device_ip, duration_ms, status_code
+                    ) VALUES (
+                        %(timestamp)s, %(level)s, %(source)s, %(category)s, 
+                        %(message)s, %(details)s, %(request_id)s, %(user_id)s,
+                        %(username)s, %(ip_address)s, %(job_id)s, %(workflow_id)s, 
+                        %(execution_id)s, %(device_ip)s, %(duration_ms)s, %(status_code)s
+                    )
+                """
+                
+                for log_entry in batch:
+                    cursor.execute(insert_sql, log_entry)
             
         except Exception as e:
             # Log to stderr if database write fails
@@ -355,100 +350,96 @@ class LoggingService:
             return {'logs': [], 'total': 0, 'error': 'Database not configured'}
         
         try:
-            conn = self.db_connection.get_connection()
-            cursor = conn.cursor()
-            
-            # Build query
-            conditions = []
-            params = []
-            
-            if source and source != 'all':
-                conditions.append("source = %s")
-                params.append(source)
-            
-            if level and level != 'all':
-                conditions.append("level = %s")
-                params.append(level.upper())
-            
-            if category:
-                conditions.append("category = %s")
-                params.append(category)
-            
-            if search:
-                conditions.append("message ILIKE %s")
-                params.append(f"%{search}%")
-            
-            if start_time:
-                conditions.append("timestamp >= %s")
-                params.append(start_time)
-            
-            if end_time:
-                conditions.append("timestamp <= %s")
-                params.append(end_time)
-            
-            if job_id:
-                conditions.append("job_id = %s")
-                params.append(job_id)
-            
-            if workflow_id:
-                conditions.append("workflow_id = %s")
-                params.append(workflow_id)
-            
-            if execution_id:
-                conditions.append("execution_id = %s")
-                params.append(execution_id)
-            
-            if device_ip:
-                conditions.append("device_ip = %s")
-                params.append(device_ip)
-            
-            where_clause = " AND ".join(conditions) if conditions else "1=1"
-            
-            # Get total count
-            count_sql = f"SELECT COUNT(*) as cnt FROM system_logs WHERE {where_clause}"
-            cursor.execute(count_sql, params)
-            count_row = cursor.fetchone()
-            total = count_row['cnt'] if isinstance(count_row, dict) else count_row[0]
-            
-            # Get logs
-            query_sql = f"""
-                SELECT id, timestamp, level, source, category, message, details,
-                       request_id, job_id, workflow_id, execution_id, device_ip,
-                       duration_ms, status_code
-                FROM system_logs
-                WHERE {where_clause}
-                ORDER BY timestamp DESC
-                LIMIT %s OFFSET %s
-            """
-            cursor.execute(query_sql, params + [limit, offset])
-            
-            logs = []
-            for row in cursor.fetchall():
-                # RealDictCursor already returns dicts
-                log_entry = dict(row) if isinstance(row, dict) else dict(zip([desc[0] for desc in cursor.description], row))
-                # Convert timestamp to UTC ISO format
-                if log_entry.get('timestamp'):
-                    ts = log_entry['timestamp']
-                    # Convert to UTC if it has timezone info
-                    if hasattr(ts, 'astimezone'):
-                        ts = ts.astimezone(timezone.utc)
-                    log_entry['timestamp'] = ts.isoformat().replace('+00:00', 'Z')
-                # Parse JSON details
-                if log_entry.get('details'):
-                    try:
-                        log_entry['details'] = json.loads(log_entry['details'])
-                    except:
-                        pass
-                logs.append(log_entry)
-            
-            cursor.close()
-            
-            return {
-                'logs': logs,
-                'total': total,
-                'limit': limit,
-                'offset': offset,
-            }
+            with self.db_connection.cursor() as cursor:
+                # Build query
+                conditions = []
+                params = []
+                
+                if source and source != 'all':
+                    conditions.append("source = %s")
+                    params.append(source)
+                
+                if level and level != 'all':
+                    conditions.append("level = %s")
+                    params.append(level.upper())
+                
+                if category:
+                    conditions.append("category = %s")
+                    params.append(category)
+                
+                if search:
+                    conditions.append("message ILIKE %s")
+                    params.append(f"%{search}%")
+                
+                if start_time:
+                    conditions.append("timestamp >= %s")
+                    params.append(start_time)
+                
+                if end_time:
+                    conditions.append("timestamp <= %s")
+                    params.append(end_time)
+                
+                if job_id:
+                    conditions.append("job_id = %s")
+                    params.append(job_id)
+                
+                if workflow_id:
+                    conditions.append("workflow_id = %s")
+                    params.append(workflow_id)
+                
+                if execution_id:
+                    conditions.append("execution_id = %s")
+                    params.append(execution_id)
+                
+                if device_ip:
+                    conditions.append("device_ip = %s")
+                    params.append(device_ip)
+                
+                where_clause = " AND ".join(conditions) if conditions else "1=1"
+                
+                # Get total count
+                count_sql = f"SELECT COUNT(*) as cnt FROM system_logs WHERE {where_clause}"
+                cursor.execute(count_sql, params)
+                count_row = cursor.fetchone()
+                total = count_row['cnt'] if isinstance(count_row, dict) else count_row[0]
+                
+                # Get logs
+                query_sql = f"""
+                    SELECT id, timestamp, level, source, category, message, details,
+                           request_id, job_id, workflow_id, execution_id, device_ip,
+                           duration_ms, status_code
+                    FROM system_logs
+                    WHERE {where_clause}
+                    ORDER BY timestamp DESC
+                    LIMIT %s OFFSET %s
+                """
+                cursor.execute(query_sql, params + [limit, offset])
+                
+                logs = []
+                for row in cursor.fetchall():
+                    # RealDictCursor already returns dicts
+                    log_entry = dict(row) if isinstance(row, dict) else dict(zip([desc[0] for desc in cursor.description], row))
+                    # Convert timestamp to UTC ISO format
+                    if log_entry.get('timestamp'):
+                        ts = log_entry['timestamp']
+                        # Convert to UTC if it has timezone info
+                        if hasattr(ts, 'astimezone'):
+                            ts = ts.astimezone(timezone.utc)
+                        log_entry['timestamp'] = ts.isoformat().replace('+00:00', 'Z')
+                    # Parse JSON details
+                    if log_entry.get('details'):
+                        try:
+                            log_entry['details'] = json.loads(log_entry['details'])
+                        except:
+                            pass
+                    logs.append(log_entry)
+                
+                return {
+                    'logs': logs,
+                    'total': total,
+                    'limit': limit,
+                    'offset': offset,
+                }
             
         except Exception as e:
             return {'logs': [], 'total': 0, 'error': str(e)}
@@ -459,61 +450,57 @@ class LoggingService:
             return {'error': 'Database not configured'}
         
         try:
-            conn = self.db_connection.get_connection()
-            cursor = conn.cursor()
-            
-            since = now_utc() - timedelta(hours=hours)
-            
-            # Count by level
-            cursor.execute("""
-                SELECT level, COUNT(*) as count
-                FROM system_logs
-                WHERE timestamp >= %s
-                GROUP BY level
-            """, (since,))
-            
-            by_level = {row['level']: row['count'] for row in cursor.fetchall()}
-            
-            # Count by source
-            cursor.execute("""
-                SELECT source, COUNT(*) as count
-                FROM system_logs
-                WHERE timestamp >= %s
-                GROUP BY source
-                ORDER BY count DESC
-            """, (since,))
-            
-            by_source = {row['source']: row['count'] for row in cursor.fetchall()}
-            
-            # Recent errors
-            cursor.execute("""
-                SELECT timestamp, source, message
-                FROM system_logs
-                WHERE timestamp >= %s AND level IN ('ERROR', 'CRITICAL')
-                ORDER BY timestamp DESC
-                LIMIT 10
-            """, (since,))
-            
-            recent_errors = []
-            for row in cursor.fetchall():
-                ts = row['timestamp']
-                if hasattr(ts, 'astimezone'):
-                    ts = ts.astimezone(timezone.utc)
-                recent_errors.append({
-                    'timestamp': ts.isoformat().replace('+00:00', 'Z'),
-                    'source': row['source'],
-                    'message': row['message']
-                })
-            
-            cursor.close()
-            
-            return {
-                'period_hours': hours,
-                'by_level': by_level,
-                'by_source': by_source,
-                'recent_errors': recent_errors,
-                'total': sum(by_level.values()),
-            }
+            with self.db_connection.cursor() as cursor:
+                since = now_utc() - timedelta(hours=hours)
+                
+                # Count by level
+                cursor.execute("""
+                    SELECT level, COUNT(*) as count
+                    FROM system_logs
+                    WHERE timestamp >= %s
+                    GROUP BY level
+                """, (since,))
+                
+                by_level = {row['level']: row['count'] for row in cursor.fetchall()}
+                
+                # Count by source
+                cursor.execute("""
+                    SELECT source, COUNT(*) as count
+                    FROM system_logs
+                    WHERE timestamp >= %s
+                    GROUP BY source
+                    ORDER BY count DESC
+                """, (since,))
+                
+                by_source = {row['source']: row['count'] for row in cursor.fetchall()}
+                
+                # Recent errors
+                cursor.execute("""
+                    SELECT timestamp, source, message
+                    FROM system_logs
+                    WHERE timestamp >= %s AND level IN ('ERROR', 'CRITICAL')
+                    ORDER BY timestamp DESC
+                    LIMIT 10
+                """, (since,))
+                
+                recent_errors = []
+                for row in cursor.fetchall():
+                    ts = row['timestamp']
+                    if hasattr(ts, 'astimezone'):
+                        ts = ts.astimezone(timezone.utc)
+                    recent_errors.append({
+                        'timestamp': ts.isoformat().replace('+00:00', 'Z'),
+                        'source': row['source'],
+                        'message': row['message']
+                    })
+                
+                return {
+                    'period_hours': hours,
+                    'by_level': by_level,
+                    'by_source': by_source,
+                    'recent_errors': recent_errors,
+                    'total': sum(by_level.values()),
+                }
             
         except Exception as e:
             return {'error': str(e)}
@@ -524,19 +511,14 @@ class LoggingService:
             return 0
         
         try:
-            conn = self.db_connection.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                DELETE FROM system_logs 
-                WHERE timestamp < NOW() - INTERVAL '%s days'
-            """, (retention_days,))
-            deleted = cursor.rowcount
-            
-            conn.commit()
-            cursor.close()
-            
-            return deleted
+            with self.db_connection.cursor() as cursor:
+                cursor.execute("""
+                    DELETE FROM system_logs 
+                    WHERE timestamp < NOW() - INTERVAL '%s days'
+                """, (retention_days,))
+                deleted = cursor.rowcount
+                
+                return deleted
             
         except Exception as e:
             logging.error(f"Failed to cleanup old logs: {e}")
@@ -0,0 +1,342 @@
+"""
+Metric Rollups
+
+Keeps 5-minute, 1-hour and 1-day rollups of interface, optical and
+availability metrics (count, min, max, avg, p95 and counter deltas):
+- After each poll cycle update_rollups() recomputes only the buckets the
+  cycle wrote to: the 5-minute bucket from the raw rows, then the hour from
+  its 5-minute buckets and the day from its hours
+- query_rollups() serves a time range from the finest tier that fits in
+  max_points buckets per series, so a chart reads a bounded number of rows
+  whatever the range
+
+p95 is exact in the 5-minute tier; the hourly and daily p95 is the 95th
+percentile of the child buckets' p95 values.
+
+Tables: metrics_5min, metrics_hourly, metrics_daily (migration 022).
+Backfill after enabling (or after a gap) with:
+    python -m backend.services.metric_rollups rebuild --table interface_metrics --hours 168
+"""
+
+import logging
+import math
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RollupSource(NamedTuple):
+    """A raw metrics table and the columns rolled up from it."""
+    table: str
+    # Column naming the series within a device; None for device-level metrics
+    interface_column: Optional[str]
+    # (metric_name, SQL expression over the raw row, is_counter)
+    metrics: Tuple[Tuple[str, str, bool], ...]
+
+    @property
+    def metric_names(self) -> List[str]:
+        return [name for name, _, _ in self.metrics]
+
+
+ROLLUP_SOURCES = {
+    'interface_metrics': RollupSource('interface_metrics', 'interface_name', (
+        ('rx_bps', 'rx_bps', False),
+        ('tx_bps', 'tx_bps', False),
+        ('rx_bytes', 'rx_bytes', True),
+        ('tx_bytes', 'tx_bytes', True),
+        ('rx_packets', 'rx_packets', True),
+        ('tx_packets', 'tx_packets', True),
+        ('rx_errors', 'rx_errors', True),
+        ('tx_errors', 'tx_errors', True),
+        ('rx_discards', 'rx_discards', True),
+    )),
+    'optical_metrics': RollupSource('optical_metrics', 'interface_name', (
+        ('rx_power', 'rx_power', False),
+        ('tx_power', 'tx_power', False),
+        ('temperature', 'temperature', False),
+    )),
+    'availability_metrics': RollupSource('availability_metrics', None, (
+        # avg of ping_up is the availability ratio of the bucket
+        ('ping_up', "CASE WHEN ping_status IS NULL THEN NULL WHEN ping_status = 'up' THEN 1 ELSE 0 END", False),
+        ('ping_latency_ms', 'ping_latency_ms', False),
+        ('snmp_response_ms', 'snmp_response_ms', False),
+        ('cpu_utilization_pct', 'cpu_utilization_pct', False),
+        ('memory_utilization_pct', 'memory_utilization_pct', False),
+    )),
+}
+
+# Short names used by the API
+FAMILIES = {
+    'interface': 'interface_metrics',
+    'optical': 'optical_metrics',
+    'availability': 'availability_metrics',
+}
+
+
+class Resolution(NamedTuple):
+    """One rollup tier."""
+    name: str
+    seconds: int
+    table: str
+    time_column: str
+    # Bucket of a timestamptz SQL expression, in time_column's type
+    bucket_sql: str
+    # time_column as a timestamptz
+    time_sql: str
+
+
+def _epoch_bucket(seconds: int) -> str:
+    return f"to_timestamp(floor(extract(epoch FROM {{0}}) / {seconds}) * {seconds})"
+
+
+RESOLUTIONS = (
+    Resolution('5m', 300, 'metrics_5min', 'stat_time', _epoch_bucket(300), 'stat_time'),
+    Resolution('1h', 3600, 'metrics_hourly', 'stat_hour', _epoch_bucket(3600), 'stat_hour'),
+    Resolution('1d', 86400, 'metrics_daily', 'stat_date',
+               "(({0}) AT TIME ZONE 'UTC')::date", "(stat_date::timestamp AT TIME ZONE 'UTC')"),
+)
+
+RESOLUTIONS_BY_NAME = {r.name: r for r in RESOLUTIONS}
+
+# Raw rows read before the first bucket so its first sample has a counter
+# delta; should cover the longest poll interval
+COUNTER_LOOKBACK_SECONDS = int(os.environ.get('METRIC_ROLLUP_LOOKBACK_SECONDS', 900))
+
+
+def floor_time(moment: datetime, seconds: int) -> datetime:
+    """Start of the UTC bucket of the given width containing moment."""
+    epoch = moment.timestamp()
+    return datetime.fromtimestamp(math.floor(epoch / seconds) * seconds, timezone.utc)
+
+
+def choose_resolution(span_seconds: float, max_points: int) -> Resolution:
+    """The finest tier with at most max_points buckets over the span (else the coarsest)."""
+    for resolution in RESOLUTIONS:
+        if math.ceil(span_seconds / resolution.seconds) <= max_points:
+            return resolution
+    return RESOLUTIONS[-1]
+
+
+_AGGREGATE_UPDATE = """
+    ON CONFLICT ({keys}) DO UPDATE SET
+        site_id = EXCLUDED.site_id,
+        sample_count = EXCLUDED.sample_count,
+        val_min = EXCLUDED.val_min,
+        val_max = EXCLUDED.val_max,
+        val_avg = EXCLUDED.val_avg,
+        val_sum = EXCLUDED.val_sum,
+        val_p95 = EXCLUDED.val_p95,
+        val_delta = EXCLUDED.val_delta
+"""
+
+
+def _conflict_keys(resolution: Resolution) -> str:
+    return f"device_ip, interface_name, metric_name, {resolution.time_column}"
+
+
+def raw_rollup_sql(source: RollupSource) -> str:
+    """Recompute the finest tier's buckets in [since, until) from raw rows."""
+    finest = RESOLUTIONS[0]
+    interface = f"COALESCE({source.interface_column}, '')" if source.interface_column else "''"
+    values = ',\n                '.join(
+        f"('{name}', ({expr})::numeric, {'TRUE' if counter else 'FALSE'})"
+        for name, expr, counter in source.metrics
+    )
+    return f"""
+        INSERT INTO {finest.table} (
+            device_ip, site_id, interface_name, metric_name, {finest.time_column},
+            sample_count, val_min, val_max, val_avg, val_sum, val_p95, val_delta
+        )
+        SELECT device_ip, MAX(site_id), interface_name, metric_name, bucket,
+               COUNT(*), MIN(value), MAX(value), AVG(value), SUM(value),
+               percentile_cont(0.95) WITHIN GROUP (ORDER BY value),
+               SUM(delta)
+        FROM (
+            SELECT s.device_ip, s.site_id, s.series_interface AS interface_name, m.metric_name, s.recorded_at, m.value,
+                   {finest.bucket_sql.format('s.recorded_at')} AS bucket,
+                   CASE WHEN m.is_counter AND m.value >= lag(m.value) OVER series
+                        THEN m.value - lag(m.value) OVER series END AS delta
+            FROM (
+                SELECT {interface} AS series_interface, raw.*
+                FROM {source.table} raw
+                WHERE recorded_at >= %(scan_from)s AND recorded_at < %(until)s
+                  AND (%(devices)s::inet[] IS NULL OR device_ip = ANY(%(devices)s::inet[]))
+            ) s
+            CROSS JOIN LATERAL (VALUES
+                {values}
+            ) AS m(metric_name, value, is_counter)
+            WHERE m.value IS NOT NULL
+            WINDOW series AS (PARTITION BY s.device_ip, s.series_interface, m.metric_name ORDER BY s.recorded_at)
+        ) samples
+        WHERE recorded_at >= %(since)s
+        GROUP BY device_ip, interface_name, metric_name, bucket
+    """ + _AGGREGATE_UPDATE.format(keys=_conflict_keys(finest))
+
+
+def tier_rollup_sql(parent: Resolution, child: Resolution) -> str:
+    """Recompute child buckets in [since, until) from the parent tier."""
+    return f"""
+        INSERT INTO {child.table} (
+            device_ip, site_id, interface_name, metric_name, {child.time_column},
+            sample_count, val_min, val_max, val_avg, val_sum, val_p95, val_delta
+        )
+        SELECT device_ip, MAX(site_id), interface_name, metric_name,
+               {child.bucket_sql.format(parent.time_sql)},
+               SUM(sample_count), MIN(val_min), MAX(val_max),
+               SUM(val_sum) / NULLIF(SUM(sample_count), 0), SUM(val_sum),
+               percentile_cont(0.95) WITHIN GROUP (ORDER BY val_p95),
+               SUM(val_delta)
+        FROM {parent.table}
+        WHERE {parent.time_column} >= {parent.bucket_sql.format('%(since)s::timestamptz')}
+          AND {parent.time_column} < {parent.bucket_sql.format('%(until)s::timestamptz')}
+          AND metric_name = ANY(%(metrics)s)
+          AND (%(devices)s::inet[] IS NULL OR device_ip = ANY(%(devices)s::inet[]))
+        GROUP BY device_ip, interface_name, metric_name, {child.bucket_sql.format(parent.time_sql)}
+    """ + _AGGREGATE_UPDATE.format(keys=_conflict_keys(child))
+
+
+def update_rollups(
+    cursor,
+    source_table: str,
+    since: datetime,
+    until: Optional[datetime] = None,
+    device_ips: Optional[Iterable[str]] = None,
+) -> Dict[str, int]:
+    """
+    Recompute every tier's buckets covering raw rows recorded in [since, until].
+
+    Args:
+        cursor: Database cursor (autocommit; each tier is one statement)
+        source_table: Key of ROLLUP_SOURCES
+        since: Oldest recorded_at written
+        until: Newest recorded_at written (defaults to since)
+        device_ips: Limit to these devices (None recomputes every device)
+
+    Returns:
+        Rows upserted per tier name
+    """
+    source = ROLLUP_SOURCES[source_table]
+    until = until or since
+    devices = sorted(device_ips) if device_ips is not None else None
+    upserted = {}
+
+    finest = RESOLUTIONS[0]
+    lower = floor_time(since, finest.seconds)
+    upper = floor_time(until, finest.seconds) + timedelta(seconds=finest.seconds)
+    cursor.execute(raw_rollup_sql(source), {
+        'scan_from': lower - timedelta(seconds=COUNTER_LOOKBACK_SECONDS),
+        'since': lower,
+        'until': upper,
+        'devices': devices,
+    })
+    upserted[finest.name] = cursor.rowcount
+
+    for parent, child in zip(RESOLUTIONS, RESOLUTIONS[1:]):
+        lower = floor_time(lower, child.seconds)
+        upper = floor_time(upper - timedelta(microseconds=1), child.seconds) + timedelta(seconds=child.seconds)
+        cursor.execute(tier_rollup_sql(parent, child), {
+            'since': lower,
+            'until': upper,
+            'metrics': source.metric_names,
+            'devices': devices,
+        })
+        upserted[child.name] = cursor.rowcount
+    return upserted
+
+
+def query_rollups(
+    cursor,
+    source_table: str,
+    start: datetime,
+    end: datetime,
+    device_ip: Optional[str] = None,
+    max_points: Optional[int] = None,
+    resolution: Optional[str] = None,
+    interface_name: Optional[str] = None,
+    site_id: Optional[int] = None,
+    metrics: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Rolled-up series for [start, end].
+
+    Args:
+        resolution: '5m', '1h' or '1d'; chosen from max_points when omitted
+        max_points: Upper bound on buckets per series (default 500)
+        metrics: Metric names (defaults to all of the source's metrics)
+
+    Returns:
+        Dict with resolution, bucket_seconds and one row per series bucket
+        (bucket, interface_name, metric_name, count, min, max, avg, p95, delta)
+    """
+    source = ROLLUP_SOURCES[source_table]
+    if resolution:
+        if resolution not in RESOLUTIONS_BY_NAME:
+            raise ValueError(f"Unknown resolution '{resolution}'; use one of {', '.join(RESOLUTIONS_BY_NAME)}")
+        tier = RESOLUTIONS_BY_NAME[resolution]
+    else:
+        tier = choose_resolution((end - start).total_seconds(), max_points or 500)
+
+    sql = f"""
+        SELECT {tier.time_sql} AS bucket, host(device_ip) AS device_ip, interface_name, metric_name,
+               sample_count AS count, val_min AS min, val_max AS max, val_avg AS avg,
+               val_p95 AS p95, val_delta AS delta
+        FROM {tier.table}
+        WHERE {tier.time_column} >= {tier.bucket_sql.format('%(start)s::timestamptz')}
+          AND {tier.time_column} <= {tier.bucket_sql.format('%(end)s::timestamptz')}
+          AND metric_name = ANY(%(metrics)s)
+    """
+    params = {'start': start, 'end': end, 'metrics': metrics or source.metric_names}
+    if device_ip:
+        sql += " AND device_ip = %(device_ip)s::inet"
+        params['device_ip'] = device_ip
+    if interface_name is not None:
+        sql += " AND interface_name = %(interface_name)s"
+        params['interface_name'] = interface_name
+    if site_id:
+        sql += " AND site_id = %(site_id)s"
+        params['site_id'] = site_id
+    sql += f" ORDER BY device_ip, interface_name, metric_name, {tier.time_column}"
+
+    cursor.execute(sql, params)
+    rows = [dict(row) for row in cursor.fetchall()]
+    return {
+        'resolution': tier.name,
+        'bucket_seconds': tier.seconds,
+        'metrics': rows,
+        'count': len(rows),
+    }
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description='Maintain metric rollups')
+    parser.add_argument('command', choices=['rebuild'])
+    parser.add_argument('--table', action='append', choices=sorted(ROLLUP_SOURCES),
+                        help="Raw table to roll up (repeatable; default all)")
+    parser.add_argument('--hours', type=int, default=24, help="How far back to rebuild")
+    args = parser.parse_args()
+
+    from backend.database import get_db
+
+    until = datetime.now(timezone.utc)
+    with get_db().cursor() as cursor:
+        for table in args.table or sorted(ROLLUP_SOURCES):
+            # An hour at a time keeps each statement's raw scan small
+            since = floor_time(until - timedelta(hours=args.hours), 3600)
+            while since < until:
+                step_end = min(since + timedelta(hours=1), until)
+                update_rollups(cursor, table, since, step_end - timedelta(microseconds=1))
+                since = step_end
+            logger.info(f"Rebuilt rollups of {table} for the last {args.hours}h")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,10 +7,11 @@ Handles optical, interface, path, and availability metrics.
 
 import logging
 from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
-import psycopg2
-from psycopg2.extras import execute_values, RealDictCursor
+from psycopg2.extras import execute_values
+
+from backend.database import get_db, TimedRealDictCursor
 
 logger = logging.getLogger(__name__)
 
@@ -25,30 +26,18 @@ class MetricsService:
     - Aggregating metrics for reporting
     """
     
-    def __init__(self, db_config: Dict[str, Any] = None):
+    def __init__(self, db=None):
         """
         Initialize the metrics service.
         
         Args:
-            db_config: Database configuration dict with host, port, database, user, password
+            db: DatabaseConnection (defaults to the shared pool)
         """
-        self.db_config = db_config or self._get_default_config()
-    
-    def _get_default_config(self) -> Dict[str, Any]:
-        """Get default database configuration from environment."""
-        import os
-        return {
-            'host': os.getenv('PG_HOST', 'localhost'),
-            'port': int(os.getenv('PG_PORT', 5432)),
-            'database': os.getenv('PG_DATABASE', 'network_scan'),
-            'user': os.getenv('PG_USER', 'postgres'),
-            'password': os.getenv('PG_PASSWORD', 'postgres'),
-        }
+        self.db = db or get_db()
     
     def _get_connection(self):
-        """Get a database connection."""
-        return psycopg2.connect(**self.db_config)
-    
+        """Transaction on a pooled connection (tuple rows unless a cursor_factory is given)."""
+        return self.db.transaction(dict_rows=False)
     # =========================================================================
     # OPTICAL METRICS
     # =========================================================================
@@ -163,6 +152,8 @@ class MetricsService:
         start_time: datetime = None,
         end_time: datetime = None,
         limit: int = 100,
+        max_points: int = None,
+        resolution: str = None,
     ) -> List[Dict[str, Any]]:
         """
         Get optical metrics for a device.
@@ -173,10 +164,20 @@ class MetricsService:
             start_time: Optional start time filter
             end_time: Optional end time filter
             limit: Maximum records to return
+            max_points: Return rollup buckets instead of raw rows, at the
+                finest resolution with at most this many points per series
+            resolution: Rollup resolution ('5m', '1h', '1d') instead of max_points
         
         Returns:
-            List of metric records
+            List of metric records (rollup buckets when max_points or
+            resolution is given)
         """
+        if max_points or resolution:
+            return self._get_rollups(
+                'optical_metrics', start_time, end_time, max_points, resolution,
+                device_ip=device_ip, interface_name=interface_name,
+            )
+        
         sql = """
             SELECT * FROM optical_metrics
             WHERE device_ip = %s::inet
@@ -199,7 +200,7 @@ class MetricsService:
         params.append(limit)
         
         with self._get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
                 cur.execute(sql, params)
                 return [dict(row) for row in cur.fetchall()]
     
@@ -214,8 +215,16 @@ class MetricsService:
         start_time: datetime = None,
         end_time: datetime = None,
         limit: int = 100,
+        max_points: int = None,
+        resolution: str = None,
     ) -> List[Dict[str, Any]]:
-        """Get interface metrics."""
+        """Get interface metrics (rollup buckets when max_points or resolution is given)."""
+        if max_points or resolution:
+            return self._get_rollups(
+                'interface_metrics', start_time, end_time, max_points, resolution,
+                device_ip=device_ip, interface_name=interface_name,
+            )
+        
         sql = "SELECT * FROM interface_metrics WHERE 1=1"
         params = []
         
@@ -239,7 +248,7 @@ class MetricsService:
         params.append(limit)
         
         with self._get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
                 cur.execute(sql, params)
                 return [dict(row) for row in cur.fetchall()]
     
@@ -418,8 +427,16 @@ class MetricsService:
         start_time: datetime = None,
         end_time: datetime = None,
         limit: int = 100,
+        max_points: int = None,
+        resolution: str = None,
     ) -> List[Dict[str, Any]]:
-        """Get availability metrics."""
+        """Get availability metrics (rollup buckets when max_points or resolution is given)."""
+        if max_points or resolution:
+            return self._get_rollups(
+                'availability_metrics', start_time, end_time, max_points, resolution,
+                device_ip=device_ip, site_id=site_id,
+            )
+        
         sql = "SELECT * FROM availability_metrics WHERE 1=1"
         params = []
         
@@ -443,10 +460,37 @@ class MetricsService:
         params.append(limit)
         
         with self._get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
                 cur.execute(sql, params)
                 return [dict(row) for row in cur.fetchall()]
     
+    # =========================================================================
+    # ROLLUPS
+    # =========================================================================
+    
+    def _get_rollups(
+        self,
+        table: str,
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+        max_points: Optional[int],
+        resolution: Optional[str],
+        **filters,
+    ) -> List[Dict[str, Any]]:
+        """Rollup buckets of a raw metrics table (see metric_rollups.query_rollups)."""
+        from backend.services.metric_rollups import query_rollups
+        
+        if end_time is None:
+            # Match the caller's naive-UTC or aware timestamps
+            end_time = datetime.utcnow() if start_time and start_time.tzinfo is None else datetime.now(timezone.utc)
+        start_time = start_time or end_time - timedelta(hours=24)
+        with self._get_connection() as conn:
+            with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
+                return query_rollups(
+                    cur, table, start_time, end_time,
+                    max_points=max_points, resolution=resolution, **filters,
+                )['metrics']
+    
     # =========================================================================
     # POLL HISTORY
     # =========================================================================
@@ -526,7 +570,7 @@ class MetricsService:
         """
         
         with self._get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
                 cur.execute(sql, (device_ip, start_time))
                 row = cur.fetchone()
                 return dict(row) if row else {}
@@ -551,7 +595,7 @@ class MetricsService:
         """
         
         with self._get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            with conn.cursor(cursor_factory=TimedRealDictCursor) as cur:
                 cur.execute(sql, (site_id, start_time))
                 row = cur.fetchone()
                 return dict(row) if row else {}
@@ -3,233 +3,196 @@ NetBox Device Cache Service
 
 Syncs device inventory from NetBox to local cache table for fast lookups
 and to enable metrics correlation without constant API calls.
+
+Devices are read with NetBoxService.get_all (concurrent 1000-row pages,
+only the fields the cache keeps) and written with one bulk upsert that
+leaves unchanged rows alone. Incremental syncs ask NetBox only for devices
+changed since the newest netbox_last_updated already cached.
 """
 
 import os
+import ipaddress
 import logging
 import requests
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
+from backend.services.device_directory import get_device_directory
+from backend.services.netbox_service import NetBoxError, NetBoxService
 
 logger = logging.getLogger(__name__)
 
+# Fields the cache reads from dcim/devices/
+DEVICE_FIELDS = (
+    'id', 'name', 'primary_ip', 'device_type', 'site', 'role', 'last_updated',
+)
+
+_CACHE_COLUMNS = (
+    'netbox_device_id', 'device_ip', 'device_name', 'device_type', 'manufacturer',
+    'site_id', 'site_name', 'role_name', 'netbox_last_updated',
+)
+
+# Columns compared to decide whether a cached row changed
+_COMPARED = _CACHE_COLUMNS[1:]
+
+_UPSERT_SQL = f"""
+    INSERT INTO netbox_device_cache ({', '.join(_CACHE_COLUMNS)}, cached_at)
+    VALUES %s
+    ON CONFLICT (netbox_device_id) DO UPDATE SET
+        {', '.join(f'{c} = EXCLUDED.{c}' for c in _COMPARED)},
+        cached_at = NOW()
+    WHERE ({', '.join(f'netbox_device_cache.{c}' for c in _COMPARED)})
+        IS DISTINCT FROM ({', '.join(f'EXCLUDED.{c}' for c in _COMPARED)})
+    RETURNING (xmax = 0) AS inserted
+"""
+
+_UPSERT_TEMPLATE = f"({', '.join(['%s'] * len(_CACHE_COLUMNS))}, NOW())"
+
+
+def device_cache_row(device: Dict[str, Any]) -> Tuple:
+    """netbox_device_cache values (in _CACHE_COLUMNS order) for a NetBox device."""
+    primary_ip = None
+    if device.get('primary_ip'):
+        primary_ip = device['primary_ip'].get('address', '').split('/')[0] or None
+        if primary_ip:
+            # Raises ValueError, so one bad address can't fail the whole upsert
+            ipaddress.ip_address(primary_ip)
+    
+    device_type = device.get('device_type') or {}
+    manufacturer = device_type.get('manufacturer') or {}
+    site = device.get('site') or {}
+    role = device.get('role') or {}
+    
+    return (
+        device['id'],
+        primary_ip,
+        device.get('name') or '',
+        device_type.get('model'),
+        manufacturer.get('name'),
+        site.get('id'),
+        site.get('name'),
+        role.get('name'),
+        device.get('last_updated'),
+    )
+
 
 class NetBoxCacheService:
     """Service to sync and manage NetBox device cache."""
     
-    def __init__(self, db_pool=None):
+    def __init__(self, db_pool=None, netbox: NetBoxService = None):
         self.db_pool = db_pool
         self.netbox_url = os.environ.get('NETBOX_URL', 'http://192.168.10.51:8000')
         self.netbox_token = os.environ.get('NETBOX_TOKEN', '')
-        
-    def _get_headers(self) -> Dict[str, str]:
-        """Get headers for NetBox API requests."""
-        return {
-            'Authorization': f'Token {self.netbox_token}',
-            'Content-Type': 'application/json',
-            'Accept': 'application/json'
-        }
+        self.netbox = netbox or NetBoxService(url=self.netbox_url, token=self.netbox_token)
     
-    def fetch_all_devices(self) -> List[Dict[str, Any]]:
-        """Fetch all devices from NetBox API."""
-        devices = []
-        url = f"{self.netbox_url}/api/dcim/devices/"
-        params = {'limit': 100, 'offset': 0}
+    def fetch_all_devices(self, updated_since: datetime = None) -> List[Dict[str, Any]]:
+        """
+        Fetch devices from NetBox API.
         
-        while True:
-            try:
-                response = requests.get(
-                    url, 
-                    headers=self._get_headers(), 
-                    params=params,
-                    timeout=30
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                devices.extend(data.get('results', []))
-                
-                if not data.get('next'):
-                    break
-                    
-                params['offset'] += params['limit']
-                
-            except requests.RequestException as e:
-                logger.error(f"Error fetching devices from NetBox: {e}")
-                break
-                
-        logger.info(f"Fetched {len(devices)} devices from NetBox")
+        Args:
+            updated_since: Only devices changed at or after this time
+        """
+        try:
+            devices = self.netbox.get_all(
+                'dcim/devices/', fields=DEVICE_FIELDS, updated_since=updated_since,
+            )
+        except (NetBoxError, requests.RequestException) as e:
+            logger.error(f"Error fetching devices from NetBox: {e}")
+            return []
+        
+        logger.info(f"Fetched {len(devices)} devices from NetBox"
+                    + (f" changed since {updated_since.isoformat()}" if updated_since else ""))
         return devices
     
-    def sync_devices_to_cache(self) -> Dict[str, int]:
-        """Sync all NetBox devices to local cache table."""
+    def get_sync_watermark(self) -> Optional[datetime]:
+        """Newest NetBox last_updated in the cache (None if never synced with it)."""
+        conn = self.db_pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT MAX(netbox_last_updated) FROM netbox_device_cache")
+                row = cur.fetchone()
+                return row[0] if row else None
+        finally:
+            self.db_pool.putconn(conn)
+    
+    def sync_devices_to_cache(self, incremental: bool = False) -> Dict[str, int]:
+        """
+        Sync NetBox devices to local cache table.
+        
+        Args:
+            incremental: Only fetch devices changed since the last sync
+                (falls back to a full sync when the cache has no watermark).
+                Deleted devices and renamed sites are only picked up by a
+                full sync.
+        
+        Returns:
+            Counts of inserted, updated, unchanged and skipped (errors)
+            devices, and the total fetched
+        """
         if not self.db_pool:
             raise ValueError("Database pool not configured")
-            
-        devices = self.fetch_all_devices()
         
-        inserted = 0
-        updated = 0
+        updated_since = self.get_sync_watermark() if incremental else None
+        devices = self.fetch_all_devices(updated_since=updated_since)
+        
+        # Keyed by id: one upsert statement can't touch a row twice
+        rows = {}
         errors = 0
+        for device in devices:
+            try:
+                row = device_cache_row(device)
+            except (KeyError, ValueError, AttributeError) as e:
+                logger.error(f"Error caching device {device.get('name')}: {e}")
+                errors += 1
+                continue
+            rows[row[0]] = row
         
-        conn = self.db_pool.getconn()
-        try:
-            with conn.cursor() as cur:
-                for device in devices:
-                    try:
-                        # Extract device data
-                        netbox_id = device.get('id')
-                        name = device.get('name', '')
-                        
-                        # Get primary IP
-                        primary_ip = None
-                        if device.get('primary_ip'):
-                            primary_ip = device['primary_ip'].get('address', '').split('/')[0]
-                        
-                        # Get device type
-                        device_type = None
-                        if device.get('device_type'):
-                            device_type = device['device_type'].get('model', '')
-                        
-                        # Get manufacturer
-                        manufacturer = None
-                        if device.get('device_type', {}).get('manufacturer'):
-                            manufacturer = device['device_type']['manufacturer'].get('name', '')
-                        
-                        # Get site info
-                        site_id = None
-                        site_name = None
-                        if device.get('site'):
-                            site_id = device['site'].get('id')
-                            site_name = device['site'].get('name', '')
-                        
-                        # Get role
-                        role_name = None
-                        if device.get('role'):
-                            role_name = device['role'].get('name', '')
-                        
-                        # Get platform
-                        platform = None
-                        if device.get('platform'):
-                            platform = device['platform'].get('name', '')
-                        
-                        # Get status
-                        status = device.get('status', {}).get('value', 'unknown')
-                        
-                        # Upsert into cache
-                        cur.execute("""
-                            INSERT INTO netbox_device_cache 
-                            (netbox_device_id, device_ip, device_name, device_type, manufacturer,
-                             site_id, site_name, role_name, cached_at)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                            ON CONFLICT (netbox_device_id) DO UPDATE SET
-                                device_ip = EXCLUDED.device_ip,
-                                device_name = EXCLUDED.device_name,
-                                device_type = EXCLUDED.device_type,
-                                manufacturer = EXCLUDED.manufacturer,
-                                site_id = EXCLUDED.site_id,
-                                site_name = EXCLUDED.site_name,
-                                role_name = EXCLUDED.role_name,
-                                cached_at = NOW()
-                            RETURNING (xmax = 0) as inserted
-                        """, (
-                            netbox_id,
-                            primary_ip,
-                            name,
-                            device_type,
-                            manufacturer,
-                            site_id,
-                            site_name,
-                            role_name
-                        ))
-                        
-                        result = cur.fetchone()
-                        if result and result[0]:
-                            inserted += 1
-                        else:
-                            updated += 1
-                            
-                    except Exception as e:
-                        logger.error(f"Error caching device {device.get('name')}: {e}")
-                        errors += 1
-                        
+        inserted = 0
+        updated = 0
+        if rows:
+            conn = self.db_pool.getconn()
+            try:
+                with conn.cursor() as cur:
+                    results = execute_values(
+                        cur, _UPSERT_SQL, list(rows.values()),
+                        template=_UPSERT_TEMPLATE, page_size=len(rows), fetch=True,
+                    )
                 conn.commit()
-                
-        finally:
-            self.db_pool.putconn(conn)
-            
-        logger.info(f"NetBox cache sync complete: {inserted} inserted, {updated} updated, {errors} errors")
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self.db_pool.putconn(conn)
+            inserted = sum(1 for result in results if result[0])
+            updated = len(results) - inserted
+        
+        if inserted or updated:
+            # Other processes pick the change up through NOTIFY
+            get_device_directory().invalidate()
+        
+        unchanged = len(rows) - inserted - updated
+        logger.info(f"NetBox cache sync complete ({'incremental' if updated_since else 'full'}): "
+                    f"{inserted} inserted, {updated} updated, {unchanged} unchanged, {errors} errors")
         return {
             'inserted': inserted,
             'updated': updated,
+            'unchanged': unchanged,
             'errors': errors,
             'total': len(devices)
         }
     
     def get_device_by_ip(self, ip_address: str) -> Optional[Dict[str, Any]]:
-        """Get cached device info by IP address."""
-        if not self.db_pool:
-            return None
-            
-        conn = self.db_pool.getconn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT netbox_device_id, device_ip, device_name, device_type, manufacturer,
-                           site_id, site_name, role_name, cached_at
-                    FROM netbox_device_cache
-                    WHERE device_ip = %s
-                """, (ip_address,))
-                
-                row = cur.fetchone()
-                if row:
-                    return {
-                        'netbox_device_id': row[0],
-                        'device_ip': str(row[1]) if row[1] else None,
-                        'device_name': row[2],
-                        'device_type': row[3],
-                        'manufacturer': row[4],
-                        'site_id': row[5],
-                        'site_name': row[6],
-                        'role_name': row[7],
-                        'cached_at': row[8].isoformat() if row[8] else None
-                    }
-                return None
-        finally:
-            self.db_pool.putconn(conn)
+        """Get cached device info by IP address (from the device directory)."""
+        device = get_device_directory().get_by_ip(ip_address)
+        return device.to_dict() if device else None
     
     def get_devices_by_site(self, site_name: str) -> List[Dict[str, Any]]:
-        """Get all cached devices for a site."""
-        if not self.db_pool:
-            return []
-            
-        conn = self.db_pool.getconn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    SELECT netbox_device_id, device_ip, device_name, device_type, manufacturer,
-                           site_id, site_name, role_name, cached_at
-                    FROM netbox_device_cache
-                    WHERE site_name = %s
-                    ORDER BY device_name
-                """, (site_name,))
-                
-                devices = []
-                for row in cur.fetchall():
-                    devices.append({
-                        'netbox_device_id': row[0],
-                        'device_ip': str(row[1]) if row[1] else None,
-                        'device_name': row[2],
-                        'device_type': row[3],
-                        'manufacturer': row[4],
-                        'site_id': row[5],
-                        'site_name': row[6],
-                        'role_name': row[7],
-                        'cached_at': row[8].isoformat() if row[8] else None
-                    })
-                return devices
-        finally:
-            self.db_pool.putconn(conn)
+        """Get all cached devices for a site (from the device directory)."""
+        devices = [d for d in get_device_directory().devices() if d.site_name == site_name]
+        devices.sort(key=lambda d: d.device_name or '')
+        return [d.to_dict() for d in devices]
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get statistics about the device cache."""
@@ -7,12 +7,20 @@ NetBox serves as the source of truth for device inventory.
 
 import os
 import logging
-from typing import Dict, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Any, Union
 from urllib.parse import urljoin
 import requests
 
 logger = logging.getLogger(__name__)
 
+# Bulk reads: rows per page (NetBox caps this at its MAX_PAGE_SIZE, 1000
+# by default) and pages fetched at once over the pooled session
+PAGE_SIZE = int(os.getenv('NETBOX_PAGE_SIZE', '1000'))
+FETCH_CONCURRENCY = int(os.getenv('NETBOX_FETCH_CONCURRENCY', '8'))
+REQUEST_TIMEOUT = 30
+
 
 class NetBoxService:
     """Service for interacting with NetBox API."""
@@ -137,6 +145,68 @@ class NetBoxService:
                 'error': str(e),
             }
     
+    def get_all(
+        self,
+        endpoint: str,
+        params: Dict = None,
+        fields: Union[str, Iterable[str]] = None,
+        updated_since: Union[datetime, str] = None,
+        page_size: int = None,
+        max_workers: int = None,
+    ) -> List[Dict]:
+        """
+        Read every object from a list endpoint.
+        
+        The first page gives the total count; the remaining pages are
+        fetched concurrently over the pooled session. Results are ordered
+        by id so offsets stay stable while pages are in flight.
+        
+        Args:
+            endpoint: API list endpoint (e.g., 'dcim/devices/')
+            params: Filters passed through to NetBox
+            fields: Only return these fields (NetBox 4 ?fields=; nested
+                objects come back in brief form). Ignored by older NetBox.
+            updated_since: Only objects changed at or after this time
+                (last_updated__gte)
+            page_size: Rows per page (default NETBOX_PAGE_SIZE)
+            max_workers: Pages fetched at once (default NETBOX_FETCH_CONCURRENCY)
+        
+        Returns:
+            All matching objects
+        
+        Raises:
+            NetBoxError: If any page fails
+        """
+        params = dict(params or {})
+        params.setdefault('ordering', 'id')
+        if fields:
+            params['fields'] = fields if isinstance(fields, str) else ','.join(fields)
+        if updated_since:
+            params['last_updated__gte'] = (
+                updated_since.isoformat() if isinstance(updated_since, datetime) else updated_since
+            )
+        limit = page_size or PAGE_SIZE
+        
+        def fetch(offset: int) -> Dict:
+            return self._request(
+                'GET', endpoint, params={**params, 'limit': limit, 'offset': offset},
+                timeout=REQUEST_TIMEOUT,
+            )
+        
+        first = fetch(0)
+        results = list(first.get('results', []))
+        # NetBox may serve fewer rows than asked for (MAX_PAGE_SIZE)
+        step = len(results)
+        if not first.get('next') or not step:
+            return results
+        
+        offsets = range(step, first.get('count', 0), step)
+        workers = max(1, min(max_workers or FETCH_CONCURRENCY, len(offsets)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for page in pool.map(fetch, offsets):
+                results.extend(page.get('results', []))
+        return results
+    
     # ==================== DEVICES ====================
     
     def get_devices(
@@ -147,7 +147,7 @@ class TemplatedNotificationExecutor:
                         context.get('execution_id', ''),
                         'sent' if success else 'failed'
                     ))
-                    db.get_connection().commit()
+                    db.commit()
                 
                 results.append({
                     'channel': channel['name'],
@@ -83,37 +83,29 @@ class SSHCommandExecutor:
         """Execute SSH command using paramiko."""
         try:
             import paramiko
+            from ..ssh_pool import get_ssh_pool
             
-            client = paramiko.SSHClient()
-            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            
-            try:
-                client.connect(
-                    hostname=target,
-                    port=port,
-                    username=username,
-                    password=password,
-                    timeout=timeout,
-                    allow_agent=False,
-                    look_for_keys=False,
-                )
-                
+            def run(client):
                 stdin, stdout, stderr = client.exec_command(command, timeout=timeout)
                 
                 output = stdout.read().decode('utf-8', errors='replace')
                 error_output = stderr.read().decode('utf-8', errors='replace')
                 exit_code = stdout.channel.recv_exit_status()
-                
-                return {
-                    'target': target,
-                    'command': command,
-                    'output': output,
-                    'stderr': error_output,
-                    'exit_code': exit_code,
-                    'success': exit_code == 0,
-                }
-            finally:
-                client.close()
+                return output, error_output, exit_code
+            
+            # Shared session pool: repeated nodes against a host reuse its transport
+            output, error_output, exit_code = get_ssh_pool().run(
+                run, target, username, password, port, timeout,
+            )
+            
+            return {
+                'target': target,
+                'command': command,
+                'output': output,
+                'stderr': error_output,
+                'exit_code': exit_code,
+                'success': exit_code == 0,
+            }
                 
         except paramiko.AuthenticationException:
             return {
@@ -0,0 +1,358 @@
+"""
+Partition Manager
+
+Keeps the time-partitioned history tables healthy:
+- Pre-creates partitions PARTITION_PREMAKE periods ahead of now, chained
+  from the newest existing partition so ranges never overlap or leave gaps
+- Enforces retention by detaching (and by default dropping) partitions
+  whose whole range is older than the table's retention, instead of
+  row-level DELETEs
+- trap_events partitions still holding an open alarm are kept
+- A DETACH ... CONCURRENTLY interrupted by a restart or timeout leaves the
+  partition pending detach; the next run finalizes (and drops) it first
+
+Runs hourly from Celery beat (maintenance.partitions) and from the CLI:
+    python -m backend.services.partition_manager status
+    python -m backend.services.partition_manager run [--dry-run]
+
+Retention per table can be overridden with PARTITION_RETENTION_<TABLE>
+(days, 0 keeps everything). PARTITION_RETENTION_MODE=detach leaves expired
+partitions as standalone tables for archiving instead of dropping them.
+"""
+
+import logging
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from psycopg2 import sql
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionPolicy(NamedTuple):
+    """How one RANGE-partitioned table is split and aged out."""
+    table: str
+    column: str
+    # 'day' or 'month'
+    unit: str
+    # Days of history to keep; 0 keeps everything
+    retention_days: int
+    # Periods to create ahead of the current one
+    premake: int
+    # Query over one partition ({partition}); the partition is kept while it
+    # returns a row
+    guard: Optional[str] = None
+
+
+_OPEN_ALARMS_GUARD = """
+    SELECT 1 FROM {partition} e
+    WHERE e.is_clear = FALSE AND e.alarm_id IS NOT NULL
+      AND NOT EXISTS (
+          SELECT 1 FROM trap_events c
+          WHERE c.alarm_id = e.alarm_id AND c.is_clear = TRUE AND c.created_at > e.created_at
+      )
+    LIMIT 1
+"""
+
+# Retention follows docs/DATABASE_REFACTOR_DESIGN.md (Data Retention Policy)
+DEFAULT_POLICIES = (
+    PartitionPolicy('optical_metrics', 'recorded_at', 'month', 90, 3),
+    PartitionPolicy('interface_metrics', 'recorded_at', 'month', 30, 3),
+    PartitionPolicy('path_metrics', 'recorded_at', 'month', 30, 3),
+    PartitionPolicy('availability_metrics', 'recorded_at', 'month', 90, 3),
+    PartitionPolicy('health_scores', 'calculated_at', 'month', 90, 3),
+    PartitionPolicy('metrics_5min', 'stat_time', 'day', 30, 14),
+    PartitionPolicy('metrics_hourly', 'stat_hour', 'month', 365, 3),
+    PartitionPolicy('polling_data', 'collected_at', 'day', 30, 14),
+    PartitionPolicy('trap_log', 'received_at', 'day', 30, 14),
+    PartitionPolicy('trap_events', 'created_at', 'month', 365, 3, guard=_OPEN_ALARMS_GUARD),
+    PartitionPolicy('system_logs', 'timestamp', 'day', 30, 14),
+)
+
+
+class Partition(NamedTuple):
+    """One attached partition and its range (None for MINVALUE/MAXVALUE)."""
+    name: str
+    lower: Optional[datetime]
+    upper: Optional[datetime]
+    is_default: bool = False
+    # Left half-detached by an interrupted DETACH ... CONCURRENTLY
+    detach_pending: bool = False
+
+
+_BOUND = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def _parse_bound_value(value: str) -> Optional[datetime]:
+    value = value.strip()
+    if value in ('MINVALUE', 'MAXVALUE'):
+        return None
+    text = value.strip("'")
+    # '2026-01-01 00:00:00+00' -> fromisoformat wants +00:00
+    if re.search(r'[+-]\d\d$', text):
+        text += ':00'
+    parsed = datetime.fromisoformat(text)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def parse_partition_bound(name: str, bound: str) -> Partition:
+    """Partition from pg_get_expr(relpartbound) text."""
+    if bound.strip() == 'DEFAULT':
+        return Partition(name, None, None, is_default=True)
+    match = _BOUND.search(bound)
+    if not match:
+        raise ValueError(f"Unsupported partition bound for {name}: {bound}")
+    return Partition(name, _parse_bound_value(match.group(1)), _parse_bound_value(match.group(2)))
+
+
+def truncate_period(moment: datetime, unit: str) -> datetime:
+    """Start of the UTC day or month containing moment."""
+    moment = moment.astimezone(timezone.utc)
+    if unit == 'day':
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if unit == 'month':
+        return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unsupported partition unit: {unit}")
+
+
+def next_period(start: datetime, unit: str) -> datetime:
+    """Start of the period after the one containing start."""
+    start = truncate_period(start, unit)
+    if unit == 'day':
+        return start + timedelta(days=1)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def partition_name(table: str, lower: datetime, unit: str) -> str:
+    """<table>_YYYY_MM or <table>_YYYY_MM_DD; off-boundary starts get the time too."""
+    if lower != truncate_period(lower, unit):
+        return f"{table}_{lower:%Y_%m_%d_%H%M}"
+    if unit == 'day':
+        return f"{table}_{lower:%Y_%m_%d}"
+    return f"{table}_{lower:%Y_%m}"
+
+
+class PartitionManager:
+    """
+    Creates upcoming partitions and retires expired ones.
+
+    Args:
+        db: DatabaseConnection (autocommit, cursor() context manager);
+            defaults to the backend singleton
+        policies: Tables to manage (DEFAULT_POLICIES with env overrides)
+        mode: 'drop' or 'detach' expired partitions
+    """
+
+    def __init__(self, db=None, policies=None, mode: Optional[str] = None):
+        if db is None:
+            from backend.database import get_db
+            db = get_db()
+        self.db = db
+        self.policies = list(policies) if policies is not None else self._policies_from_env()
+        self.mode = mode or os.environ.get('PARTITION_RETENTION_MODE', 'drop')
+        if self.mode not in ('drop', 'detach'):
+            raise ValueError(f"PARTITION_RETENTION_MODE must be 'drop' or 'detach', not {self.mode!r}")
+
+    @staticmethod
+    def _policies_from_env() -> List[PartitionPolicy]:
+        policies = []
+        for policy in DEFAULT_POLICIES:
+            override = os.environ.get(f'PARTITION_RETENTION_{policy.table.upper()}')
+            if override is not None:
+                policy = policy._replace(retention_days=int(override))
+            policies.append(policy)
+        return policies
+
+    def partitions(self, cursor, table: str) -> Optional[List[Partition]]:
+        """Attached partitions of table by lower bound, None if it is not partitioned."""
+        cursor.execute("""
+            SELECT c.relkind FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relname = %s AND n.nspname = current_schema()
+        """, (table,))
+        row = cursor.fetchone()
+        if row is None or row['relkind'] != 'p':
+            return None
+        cursor.execute("""
+            SELECT c.relname AS name, pg_get_expr(c.relpartbound, c.oid) AS bound,
+                   i.inhdetachpending AS detach_pending
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+        """, (table,))
+        parts = [
+            parse_partition_bound(r['name'], r['bound'])._replace(detach_pending=r['detach_pending'])
+            for r in cursor.fetchall()
+        ]
+        floor = datetime.min.replace(tzinfo=timezone.utc)
+        return sorted(parts, key=lambda p: p.lower or floor)
+
+    def plan_creates(self, policy: PartitionPolicy, parts: List[Partition],
+                     now: datetime) -> List[Partition]:
+        """Partitions to add so the table covers now + premake periods."""
+        horizon = truncate_period(now, policy.unit)
+        for _ in range(policy.premake + 1):
+            horizon = next_period(horizon, policy.unit)
+
+        uppers = [p.upper for p in parts if not p.is_default]
+        if any(p.lower is not None and p.upper is None for p in parts):
+            return []  # a MAXVALUE partition already covers the future
+        cursor = max((u for u in uppers if u is not None), default=None)
+        if cursor is None:
+            cursor = truncate_period(now, policy.unit)
+
+        planned = []
+        while cursor < horizon:
+            upper = next_period(cursor, policy.unit)
+            planned.append(Partition(partition_name(policy.table, cursor, policy.unit), cursor, upper))
+            cursor = upper
+        return planned
+
+    def plan_expiry(self, policy: PartitionPolicy, parts: List[Partition],
+                    now: datetime) -> List[Partition]:
+        """Partitions whose whole range is older than the retention."""
+        if policy.retention_days <= 0:
+            return []
+        cutoff = now - timedelta(days=policy.retention_days)
+        return [p for p in parts if not p.is_default and not p.detach_pending
+                and p.upper is not None and p.upper <= cutoff]
+
+    def _create(self, cursor, policy: PartitionPolicy, part: Partition):
+        cursor.execute(
+            sql.SQL("CREATE TABLE IF NOT EXISTS {} PARTITION OF {} FOR VALUES FROM ({}) TO ({})").format(
+                sql.Identifier(part.name), sql.Identifier(policy.table),
+                sql.Literal(part.lower.isoformat()), sql.Literal(part.upper.isoformat()),
+            )
+        )
+
+    def _guarded(self, cursor, policy: PartitionPolicy, part: Partition) -> bool:
+        if not policy.guard:
+            return False
+        cursor.execute(sql.SQL(policy.guard).format(partition=sql.Identifier(part.name)))
+        return cursor.fetchone() is not None
+
+    def _expire(self, cursor, policy: PartitionPolicy, part: Partition):
+        # CONCURRENTLY keeps inserts into the parent flowing (autocommit only);
+        # an interrupted one can only be completed with FINALIZE
+        detach = "ALTER TABLE {} DETACH PARTITION {} " + ("FINALIZE" if part.detach_pending else "CONCURRENTLY")
+        cursor.execute(sql.SQL(detach).format(
+            sql.Identifier(policy.table), sql.Identifier(part.name),
+        ))
+        if self.mode == 'drop':
+            cursor.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(part.name)))
+
+    def run(self, dry_run: bool = False, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Create upcoming partitions and retire expired ones for every policy.
+
+        A failure on one table is logged and reported; the others still run.
+        """
+        now = now or datetime.now(timezone.utc)
+        report: Dict[str, Any] = {'dry_run': dry_run, 'mode': self.mode, 'tables': {}}
+
+        for policy in self.policies:
+            result = report['tables'][policy.table] = {
+                'created': [], 'expired': [], 'kept': [], 'error': None,
+            }
+            try:
+                with self.db.cursor() as cursor:
+                    parts = self.partitions(cursor, policy.table)
+                    if parts is None:
+                        result['error'] = 'not partitioned'
+                        continue
+
+                    for part in self.plan_creates(policy, parts, now):
+                        if not dry_run:
+                            self._create(cursor, policy, part)
+                        result['created'].append(part.name)
+
+                    # A pending detach blocks further detaches; finish it first
+                    for part in (p for p in parts if p.detach_pending):
+                        if not dry_run:
+                            self._expire(cursor, policy, part)
+                        result['expired'].append(part.name)
+
+                    for part in self.plan_expiry(policy, parts, now):
+                        if self._guarded(cursor, policy, part):
+                            result['kept'].append(part.name)
+                            continue
+                        if not dry_run:
+                            self._expire(cursor, policy, part)
+                        result['expired'].append(part.name)
+            except Exception as e:
+                logger.error(f"Partition maintenance failed for {policy.table}: {e}")
+                result['error'] = str(e)
+                continue
+
+            if result['created'] or result['expired']:
+                logger.info(
+                    f"{policy.table}: created {len(result['created'])}, "
+                    f"{'would ' if dry_run else ''}{self.mode} {len(result['expired'])} partitions"
+                )
+        return report
+
+    def status(self) -> Dict[str, Any]:
+        """Partitions, ranges and sizes for every managed table."""
+        tables = {}
+        with self.db.cursor() as cursor:
+            for policy in self.policies:
+                parts = self.partitions(cursor, policy.table)
+                if parts is None:
+                    tables[policy.table] = None
+                    continue
+                rows = []
+                for part in parts:
+                    cursor.execute("SELECT pg_total_relation_size(%s::regclass) AS size", (part.name,))
+                    rows.append({
+                        'name': part.name,
+                        'from': part.lower.isoformat() if part.lower else ('DEFAULT' if part.is_default else 'MINVALUE'),
+                        'to': part.upper.isoformat() if part.upper else ('DEFAULT' if part.is_default else 'MAXVALUE'),
+                        'bytes': cursor.fetchone()['size'],
+                    })
+                tables[policy.table] = {
+                    'unit': policy.unit,
+                    'retention_days': policy.retention_days,
+                    'partitions': rows,
+                }
+        return tables
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+    import json
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description='Manage time partitions of history tables')
+    parser.add_argument('command', choices=['status', 'run'])
+    parser.add_argument('--dry-run', action='store_true', help="Report what run would change")
+    parser.add_argument('--table', action='append', help="Only this table (repeatable)")
+    args = parser.parse_args()
+
+    manager = PartitionManager()
+    if args.table:
+        manager.policies = [p for p in manager.policies if p.table in args.table]
+
+    if args.command == 'status':
+        for table, info in manager.status().items():
+            if info is None:
+                print(f"{table}: not partitioned")
+                continue
+            print(f"{table} ({info['unit']}, keep {info['retention_days'] or 'all'} days)")
+            for part in info['partitions']:
+                print(f"  {part['name']:40} {part['from']:>26} -> {part['to']:<26} {part['bytes'] / 1048576:10.1f} MB")
+    else:
+        print(json.dumps(manager.run(dry_run=args.dry_run), indent=2))
+
+
+if __name__ == '__main__':
+    main()
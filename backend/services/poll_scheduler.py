@@ -0,0 +1,299 @@
+"""
+Time-Wheel Poll Scheduler
+
+Spreads polling.generic dispatches over time instead of firing every due
+config on the same scheduler tick:
+- Each polling config is split into device shards (POLL_SHARD_SIZE devices)
+- Every (config, shard) slot has a deterministic phase offset within the
+  config's interval, so shards and configs land at different points
+- Due slots are claimed with FOR UPDATE SKIP LOCKED and advanced in the
+  same transaction, so several beat/worker processes never double dispatch
+- A fleet-wide devices-per-second cap paces dispatch ETAs through one
+  shared horizon row (polling_scheduler_state)
+"""
+
+import logging
+import math
+import os
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def phase_offset(config_id: int, shard_index: int, shard_count: int, interval: float) -> float:
+    """
+    Seconds into each interval at which a slot runs.
+
+    A config's base phase comes from a hash of its id; its shards are then
+    spaced evenly around the interval from there.
+    """
+    base = zlib.crc32(str(config_id).encode()) / 2 ** 32
+    return ((base + shard_index / shard_count) % 1.0) * interval
+
+
+def next_slot_time(now: datetime, phase: float, interval: float) -> datetime:
+    """First time >= now that sits on the slot's phase grid (epoch aligned)."""
+    epoch = now.timestamp()
+    cycles = math.ceil((epoch - phase) / interval)
+    return datetime.fromtimestamp(cycles * interval + phase, tz=timezone.utc)
+
+
+class PollScheduler:
+    """
+    Claims due time-wheel slots and dispatches them with paced ETAs.
+
+    Args:
+        db: DatabaseConnection
+        max_devices_per_sec: Fleet-wide dispatch cap (0 disables pacing)
+        shard_size: Target devices per slot
+        window_seconds: How far ahead a tick claims (one tick interval)
+        sync_seconds: How often slots are re-synced from polling_configs
+        max_slots: Upper bound on slots claimed per tick
+    """
+
+    def __init__(
+        self,
+        db,
+        max_devices_per_sec: float = 500.0,
+        shard_size: int = 250,
+        window_seconds: float = 10.0,
+        sync_seconds: float = 300.0,
+        max_slots: int = 500,
+    ):
+        self.db = db
+        self.max_devices_per_sec = max_devices_per_sec
+        self.shard_size = shard_size
+        self.window_seconds = window_seconds
+        self.sync_seconds = sync_seconds
+        self.max_slots = max_slots
+
+    # ------------------------------------------------------------------
+    # Transactions
+    # ------------------------------------------------------------------
+
+    def _begin(self, cursor):
+        if self.db.get_connection().autocommit:
+            cursor.execute("BEGIN")
+
+    def _commit(self, cursor):
+        conn = self.db.get_connection()
+        if conn.autocommit:
+            cursor.execute("COMMIT")
+        else:
+            conn.commit()
+
+    def _rollback(self, cursor):
+        conn = self.db.get_connection()
+        if conn.autocommit:
+            cursor.execute("ROLLBACK")
+        else:
+            conn.rollback()
+
+    # ------------------------------------------------------------------
+    # Slot sync
+    # ------------------------------------------------------------------
+
+    def sync_slots(self, cursor, now: datetime, force: bool = False) -> bool:
+        """
+        Rebuild slots from polling_configs when the last sync is stale.
+
+        Must run inside the transaction holding the polling_scheduler_state
+        row lock. A config keeps its slots (and their place on the wheel)
+        unless its interval or shard count changed.
+        """
+        from backend.tasks.generic_polling_task import (
+            MibMappingLoader, build_device_filter, count_poll_targets, load_polling_configs,
+        )
+
+        cursor.execute("SELECT synced_at FROM polling_scheduler_state WHERE id = 1")
+        row = cursor.fetchone()
+        synced_at = row['synced_at'] if row else None
+        if not force and synced_at is not None and (now - synced_at).total_seconds() < self.sync_seconds:
+            return False
+
+        cursor.execute("""
+            SELECT config_id, MAX(shard_count) AS shard_count, MAX(interval_seconds) AS interval_seconds
+            FROM polling_schedule_slots GROUP BY config_id
+        """)
+        existing = {r['config_id']: r for r in cursor.fetchall()}
+
+        loader = MibMappingLoader(self.db)
+        vendors: Dict[str, Any] = {}
+        active = []
+        for config in load_polling_configs(self.db, due_only=False):
+            poll_type_name = config.get('poll_type_name') or config['poll_type']
+            if poll_type_name not in vendors:
+                # False marks a missing or disabled poll type
+                poll_type = loader.get_poll_type(poll_type_name)
+                vendors[poll_type_name] = poll_type['vendor'] if poll_type else False
+            if vendors[poll_type_name] is False:
+                continue
+
+            interval = int(config['interval_seconds'] or 300)
+            devices = count_poll_targets(self.db, vendors[poll_type_name], build_device_filter(config))
+            shard_count = max(1, math.ceil(devices / self.shard_size))
+            per_shard = math.ceil(devices / shard_count)
+            active.append(config['id'])
+
+            current = existing.get(config['id'])
+            if current and current['shard_count'] == shard_count and current['interval_seconds'] == interval:
+                cursor.execute(
+                    "UPDATE polling_schedule_slots SET device_count = %s WHERE config_id = %s",
+                    (per_shard, config['id']),
+                )
+                continue
+
+            cursor.execute("DELETE FROM polling_schedule_slots WHERE config_id = %s", (config['id'],))
+            for shard_index in range(shard_count):
+                phase = phase_offset(config['id'], shard_index, shard_count, interval)
+                cursor.execute("""
+                    INSERT INTO polling_schedule_slots (
+                        config_id, shard_index, shard_count, interval_seconds,
+                        phase_seconds, device_count, next_run_at
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, (
+                    config['id'], shard_index, shard_count, interval,
+                    phase, per_shard, next_slot_time(now, phase, interval),
+                ))
+            logger.info(f"Placed config '{config['name']}' on the wheel: "
+                        f"{shard_count} shards x ~{per_shard} devices every {interval}s")
+
+        cursor.execute(
+            "DELETE FROM polling_schedule_slots WHERE NOT (config_id = ANY(%s))",
+            (active,),
+        )
+        cursor.execute("UPDATE polling_scheduler_state SET synced_at = %s WHERE id = 1", (now,))
+        return True
+
+    # ------------------------------------------------------------------
+    # Claim + dispatch
+    # ------------------------------------------------------------------
+
+    def claim(self, now: Optional[datetime] = None) -> Dict:
+        """
+        Claim slots due within the window and give each a paced ETA.
+
+        Slots whose ETA would fall beyond the window stay due and are
+        claimed by a later tick. Returns claimed slot rows (with 'eta')
+        plus the number left waiting on the cap.
+        """
+        now = now or datetime.now(timezone.utc)
+        horizon = now + timedelta(seconds=self.window_seconds)
+        claimed: List[Dict] = []
+        waiting = 0
+
+        with self.db.cursor() as cursor:
+            self._begin(cursor)
+            try:
+                # Serializes schedulers on the shared pacing horizon
+                cursor.execute("SELECT paced_until FROM polling_scheduler_state WHERE id = 1 FOR UPDATE")
+                state = cursor.fetchone()
+                paced_until = max(state['paced_until'], now) if state else now
+
+                self.sync_slots(cursor, now)
+
+                cursor.execute("""
+                    SELECT s.id, s.config_id, s.shard_index, s.shard_count, s.interval_seconds,
+                           s.device_count, s.next_run_at,
+                           pc.name, pc.poll_type, pc.target_manufacturer, pc.target_role,
+                           pc.target_site_name, pt.name AS poll_type_name
+                    FROM polling_schedule_slots s
+                    JOIN polling_configs pc ON pc.id = s.config_id AND pc.enabled = true
+                    LEFT JOIN snmp_poll_types pt ON pt.name = pc.poll_type
+                    WHERE s.next_run_at <= %s
+                    ORDER BY s.next_run_at
+                    LIMIT %s
+                    FOR UPDATE OF s SKIP LOCKED
+                """, (horizon, self.max_slots))
+                due = cursor.fetchall()
+
+                for slot in due:
+                    eta = max(slot['next_run_at'], paced_until)
+                    if eta > horizon:
+                        waiting += 1
+                        continue
+                    if self.max_devices_per_sec > 0:
+                        paced_until = eta + timedelta(
+                            seconds=slot['device_count'] / self.max_devices_per_sec
+                        )
+                    claimed.append({**slot, 'eta': eta})
+
+                if claimed:
+                    # Advance to the next grid point after the later of
+                    # now and the slot time; missed slots are skipped
+                    cursor.execute("""
+                        UPDATE polling_schedule_slots
+                        SET next_run_at = next_run_at + make_interval(secs => interval_seconds * (
+                                floor(GREATEST(0, EXTRACT(EPOCH FROM (%s - next_run_at))) / interval_seconds) + 1
+                            )),
+                            last_dispatched_at = %s
+                        WHERE id = ANY(%s)
+                    """, (now, now, [slot['id'] for slot in claimed]))
+                cursor.execute(
+                    "UPDATE polling_scheduler_state SET paced_until = %s WHERE id = 1",
+                    (paced_until,),
+                )
+                self._commit(cursor)
+            except Exception:
+                self._rollback(cursor)
+                raise
+
+        return {'slots': claimed, 'waiting': waiting, 'paced_until': paced_until}
+
+    def tick(self, send_task, now: Optional[datetime] = None) -> Dict:
+        """
+        Claim due slots and send one polling.generic task per slot.
+
+        Args:
+            send_task: celery_app.send_task (or compatible)
+        """
+        from backend.tasks.generic_polling_task import build_device_filter
+
+        now = now or datetime.now(timezone.utc)
+        result = self.claim(now)
+        dispatched = 0
+        devices = 0
+        for slot in result['slots']:
+            poll_type_name = slot.get('poll_type_name') or slot['poll_type']
+            device_filter = build_device_filter(slot) or {}
+            if slot['shard_count'] > 1:
+                device_filter['shard'] = [slot['shard_index'], slot['shard_count']]
+            try:
+                send_task(
+                    'polling.generic',
+                    kwargs={
+                        'poll_type_name': poll_type_name,
+                        'device_filter': device_filter or None,
+                        'config_id': slot['config_id'],
+                    },
+                    queue='polling',
+                    eta=slot['eta'],
+                )
+                dispatched += 1
+                devices += slot['device_count']
+            except Exception as e:
+                # The slot already advanced; it runs again next interval
+                logger.error(f"Failed to dispatch slot {slot['id']} of config {slot['config_id']}: {e}")
+
+        if dispatched:
+            logger.info(f"Dispatched {dispatched} poll slots (~{devices} devices), "
+                        f"{result['waiting']} waiting on the {self.max_devices_per_sec:g} devices/s cap")
+        return {
+            'dispatched': dispatched,
+            'devices': devices,
+            'waiting': result['waiting'],
+            'paced_seconds': round(max(0.0, (result['paced_until'] - now).total_seconds()), 1),
+        }
+
+
+def get_poll_scheduler(db) -> PollScheduler:
+    """PollScheduler configured from the environment."""
+    return PollScheduler(
+        db,
+        max_devices_per_sec=float(os.environ.get('POLL_MAX_DEVICES_PER_SEC', 500)),
+        shard_size=int(os.environ.get('POLL_SHARD_SIZE', 250)),
+        window_seconds=float(os.environ.get('POLL_SCHEDULER_WINDOW', 10)),
+        sync_seconds=float(os.environ.get('POLL_SLOT_SYNC_SECONDS', 300)),
+    )
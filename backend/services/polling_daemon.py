@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Resident Polling Daemon
+
+Optional long-lived alternative to dispatching polling.generic Celery tasks
+from the scheduler tick. One process keeps everything a poll cycle needs warm:
+- One event loop and one shared SNMP UDP transport for every cycle
+- Poll plans (poll type + compiled OID mappings) and device targets cached
+- Latency tracker and counter state resident between cycles
+- All DB work serialized on one background thread, off the event loop
+
+It reads the same polling_configs rows as polling_scheduler_tick_v2 and
+runs each config on its own interval, timed by the loop rather than a
+30-second beat tick. Set POLLING_MODE=daemon for the Celery ticks as well
+so they stop dispatching.
+
+Run with: python -m backend.services.polling_daemon
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import signal
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.services.latency_sketch import LatencySketch
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScheduledConfig:
+    """Schedule state for one polling_configs row."""
+    config: Dict
+    interval: float
+    next_due: float
+    task: Optional[asyncio.Task] = None
+    runs: int = 0
+    overruns: int = 0
+    last_status: Optional[str] = None
+    last_duration: float = 0.0
+    last_devices: int = 0
+
+    @property
+    def poll_type_name(self) -> str:
+        return self.config.get('poll_type_name') or self.config['poll_type']
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+
+class PollingDaemon:
+    """
+    Runs the polling_configs schedule in one resident event loop.
+
+    Args:
+        config_refresh: Seconds between polling_configs reloads
+        cache_ttl: Seconds a poll plan or target list is reused
+        cycle_timeout: Seconds before a cycle is stopped and stored as partial
+        max_concurrent: Default concurrent SNMP requests per cycle
+        status_interval: Seconds between status publications
+        db: DatabaseConnection (created on start when None)
+    """
+
+    STATUS_KEY = 'opsconductor:polling_daemon'
+
+    def __init__(
+        self,
+        config_refresh: float = 30.0,
+        cache_ttl: float = 300.0,
+        cycle_timeout: float = 300.0,
+        max_concurrent: int = 200,
+        status_interval: float = 10.0,
+        db=None,
+    ):
+        self.config_refresh = config_refresh
+        self.cache_ttl = cache_ttl
+        self.cycle_timeout = cycle_timeout
+        self.max_concurrent = max_concurrent
+        self.status_interval = status_interval
+        self.db = db
+
+        self.schedule: Dict[int, ScheduledConfig] = {}
+        self.transport = None
+        self.latency_tracker = None
+        self._db_executor: Optional[ThreadPoolExecutor] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._plans: Dict[str, Tuple[Any, float]] = {}
+        self._targets: Dict[Tuple, Tuple[List, float]] = {}
+        self._redis = None
+
+        # Statistics
+        self.started_at = time.time()
+        self.cycles_started = 0
+        self.cycles_completed = 0
+        self.cycles_failed = 0
+        self.cycles_timed_out = 0
+        self.overruns = 0
+        self.missed_slots = 0
+        self.devices_polled = 0
+        self.records_stored = 0
+        self.plan_hits = 0
+        self.plan_misses = 0
+        self.target_hits = 0
+        self.target_misses = 0
+        self.schedule_lag = LatencySketch()
+        self.setup_time = LatencySketch()
+        self.cycle_time = LatencySketch()
+        self._recent: deque = deque()  # (completed monotonic time, devices, records)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def run(self):
+        """Run the schedule until stop() is called."""
+        from backend.services.device_latency import get_latency_tracker
+        from backend.services.snmp_transport import SNMPDatagramTransport
+
+        self._stop = asyncio.Event()
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='polling_daemon_db')
+        if self.db is None:
+            from backend.database import DatabaseConnection
+            self.db = DatabaseConnection()
+
+        self.transport = SNMPDatagramTransport()
+        await self.transport.open()
+        self.latency_tracker = get_latency_tracker()
+        await self._db(self.latency_tracker.load)
+        self.started_at = time.time()
+        logger.info("Polling daemon started")
+
+        # Schedule times are time.monotonic(), the clock the loop runs on
+        next_refresh = time.monotonic()
+        next_status = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                if now >= next_refresh:
+                    await self.refresh_configs()
+                    next_refresh = now + self.config_refresh
+
+                for entry in self.due(time.monotonic()):
+                    self.cycles_started += 1
+                    entry.task = asyncio.ensure_future(self._run_cycle(entry))
+
+                if now >= next_status:
+                    await self._db(self.publish_status, self.get_stats())
+                    next_status = now + self.status_interval
+
+                # Sleep until the next cycle is due (or the next housekeeping)
+                wake = min([next_refresh, next_status] + [e.next_due for e in self.schedule.values()])
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=max(0.0, wake - time.monotonic()))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self._shutdown()
+
+    def stop(self):
+        """Ask the run loop to exit after the current iteration."""
+        logger.info("Stopping polling daemon...")
+        if self._stop is not None:
+            self._stop.set()
+
+    async def _shutdown(self):
+        running = [e.task for e in self.schedule.values() if e.running]
+        if running:
+            logger.info(f"Waiting for {len(running)} running poll cycles")
+            _, pending = await asyncio.wait(running, timeout=30)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+
+        await self._db(self.latency_tracker.save)
+        self.transport.close()
+        await self._db(self.publish_status, self.get_stats(), False)
+        self._db_executor.shutdown(wait=True)
+        logger.info("Polling daemon stopped")
+
+    async def _db(self, fn, *args):
+        """Run blocking DB/Redis work on the daemon's DB thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._db_executor, fn, *args)
+
+    # ------------------------------------------------------------------
+    # Schedule
+    # ------------------------------------------------------------------
+
+    async def refresh_configs(self):
+        """Reload enabled polling_configs and merge them into the schedule."""
+        from backend.tasks.generic_polling_task import load_polling_configs
+
+        try:
+            rows = await self._db(load_polling_configs, self.db, False)
+        except Exception as e:
+            logger.error(f"Loading polling configs failed: {e}")
+            return
+        self.apply_configs(rows, time.monotonic())
+
+    def apply_configs(self, rows: List[Dict], now: float):
+        """
+        Merge polling_configs rows into the schedule.
+
+        New configs start when last_run_at + interval is reached (at once if
+        that already passed); configs whose interval changed keep their
+        phase; configs no longer enabled are dropped after any running cycle.
+        """
+        seen = set()
+        for row in rows:
+            config_id = row['id']
+            interval = float(row.get('interval_seconds') or 60)
+            seen.add(config_id)
+            entry = self.schedule.get(config_id)
+            if entry is None:
+                self.schedule[config_id] = ScheduledConfig(
+                    config=dict(row),
+                    interval=interval,
+                    next_due=now + self._initial_delay(row.get('last_run_at'), interval),
+                )
+                logger.info(f"Scheduled '{row['name']}' (id={config_id}) every {interval:g}s")
+                continue
+            entry.config = dict(row)
+            if interval != entry.interval:
+                entry.next_due = entry.next_due - entry.interval + interval
+                entry.interval = interval
+
+        for config_id in [c for c in self.schedule if c not in seen]:
+            logger.info(f"Unscheduled polling config id={config_id}")
+            del self.schedule[config_id]
+
+    @staticmethod
+    def _initial_delay(last_run_at, interval: float) -> float:
+        if last_run_at is None:
+            return 0.0
+        if last_run_at.tzinfo is None:
+            # Written from datetime.utcnow() by _record_execution
+            elapsed = (datetime.utcnow() - last_run_at).total_seconds()
+        else:
+            elapsed = (datetime.now(timezone.utc) - last_run_at).total_seconds()
+        return min(interval, max(0.0, interval - elapsed))
+
+    def due(self, now: float) -> List[ScheduledConfig]:
+        """
+        Configs to start now; advances each due entry to its next slot.
+
+        Slots keep their phase: a late start does not push later ones back,
+        and slots missed entirely are skipped rather than run back to back.
+        A config still running when its slot comes up is counted as an
+        overrun and skipped for that slot.
+        """
+        ready = []
+        for entry in self.schedule.values():
+            if entry.next_due > now:
+                continue
+            late = now - entry.next_due
+            missed = math.floor(late / entry.interval)
+            entry.next_due += entry.interval * (missed + 1)
+            # Timing accuracy is measured against the slot actually run
+            lag = late - missed * entry.interval
+            if missed:
+                self.missed_slots += missed
+            if entry.running:
+                entry.overruns += 1
+                self.overruns += 1
+                logger.warning(f"Poll '{entry.poll_type_name}' still running at its next slot; skipping")
+                continue
+            self.schedule_lag.add(lag)
+            ready.append(entry)
+        return ready
+
+    # ------------------------------------------------------------------
+    # Cycles
+    # ------------------------------------------------------------------
+
+    async def _get_plan(self, poll_type_name: str):
+        from backend.tasks.generic_polling_task import load_poll_plan
+
+        cached = self._plans.get(poll_type_name)
+        if cached is not None and time.monotonic() - cached[1] < self.cache_ttl:
+            self.plan_hits += 1
+            return cached[0]
+        self.plan_misses += 1
+        plan = await self._db(load_poll_plan, self.db, poll_type_name)
+        self._plans[poll_type_name] = (plan, time.monotonic())
+        return plan
+
+    async def _get_targets(self, plan, device_filter: Optional[Dict]) -> List:
+        from backend.tasks.generic_polling_task import load_poll_targets
+
+        vendor = plan.poll_type['vendor']
+        key = (vendor, tuple(sorted((device_filter or {}).items())))
+        cached = self._targets.get(key)
+        if cached is not None and time.monotonic() - cached[1] < self.cache_ttl:
+            self.target_hits += 1
+            return cached[0]
+        self.target_misses += 1
+        targets = await self._db(load_poll_targets, self.db, vendor, device_filter)
+        self._targets[key] = (targets, time.monotonic())
+        return targets
+
+    def _mark_dispatched(self, config_id: int):
+        # Same guard the Celery ticks use against duplicate dispatches
+        with self.db.cursor() as cursor:
+            cursor.execute("UPDATE polling_configs SET last_run_at = NOW() WHERE id = %s", (config_id,))
+            self.db.commit()
+
+    async def _run_cycle(self, entry: ScheduledConfig):
+        from backend.services.async_snmp_poller import AsyncSNMPPoller
+        from backend.services.latency_sketch import record_worker_stats
+        from backend.tasks.generic_polling_task import (
+            _record_execution, build_device_filter, run_poll_cycle,
+        )
+
+        config = entry.config
+        poll_type_name = entry.poll_type_name
+        started = time.monotonic()
+        entry.runs += 1
+        poller = None
+        try:
+            await self._db(self._mark_dispatched, config['id'])
+            device_filter = build_device_filter(config)
+            plan = await self._get_plan(poll_type_name)
+            targets = None
+            if not isinstance(plan, str):
+                targets = await self._get_targets(plan, device_filter)
+
+            poller = AsyncSNMPPoller(
+                max_concurrent=config.get('max_concurrent') or self.max_concurrent,
+                batch_size=config.get('batch_size') or 50,
+                default_timeout=5,
+                transport='native',
+                latency_tracker=self.latency_tracker,
+                snmp_transport=self.transport,
+            )
+            pipeline_ref = {}
+            try:
+                result = await asyncio.wait_for(
+                    run_poll_cycle(
+                        self.db, poll_type_name, poller,
+                        device_filter=device_filter,
+                        config_id=config['id'],
+                        task_id='polling-daemon',
+                        plan=plan,
+                        targets=targets,
+                        db_executor=self._db_executor,
+                        pipeline_ref=pipeline_ref,
+                    ),
+                    timeout=self.cycle_timeout,
+                )
+            except asyncio.TimeoutError:
+                pipeline = pipeline_ref.get('pipeline')
+                if pipeline is None:
+                    raise
+                self.cycles_timed_out += 1
+                logger.warning(f"Poll '{poll_type_name}' exceeded {self.cycle_timeout:g}s after "
+                               f"{pipeline.devices_done}/{pipeline.total_devices} devices")
+                # finish() drains the queue on the db executor, after any
+                # flush the cycle left queued there
+                result = await self._db(pipeline.finish, True)
+
+            await self._db(_record_execution, poll_type_name, result, config['id'], 'polling-daemon')
+        except asyncio.CancelledError:
+            entry.last_status = 'cancelled'
+            raise
+        except Exception as e:
+            self.cycles_failed += 1
+            entry.last_status = 'error'
+            logger.error(f"Poll '{poll_type_name}' (config {config['id']}) failed: {e}", exc_info=True)
+            return
+        finally:
+            if poller is not None:
+                poller.close()
+                await self._db(self.latency_tracker.save)
+                await self._db(record_worker_stats, poller.stats)
+
+        duration = time.monotonic() - started
+        devices = result.get('devices_polled', 0)
+        records = result.get('records_stored', 0)
+        self.cycles_completed += 1
+        self.devices_polled += devices
+        self.records_stored += records
+        self.cycle_time.add(duration)
+        if 'setup_ms' in result:
+            self.setup_time.add(result['setup_ms'] / 1000)
+        self._recent.append((time.monotonic(), devices, records))
+        entry.last_status = 'error' if result.get('error') else 'success'
+        entry.last_duration = duration
+        entry.last_devices = devices
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def get_stats(self, window: float = 60.0) -> Dict[str, Any]:
+        """Return throughput, timing accuracy, cache and per-config figures."""
+        now = time.monotonic()
+        while self._recent and now - self._recent[0][0] > window:
+            self._recent.popleft()
+        uptime = max(time.time() - self.started_at, 1e-9)
+        return {
+            'uptime_seconds': round(uptime, 1),
+            'configs': len(self.schedule),
+            'running_cycles': sum(1 for e in self.schedule.values() if e.running),
+            'cycles_started': self.cycles_started,
+            'cycles_completed': self.cycles_completed,
+            'cycles_failed': self.cycles_failed,
+            'cycles_timed_out': self.cycles_timed_out,
+            'overruns': self.overruns,
+            'missed_slots': self.missed_slots,
+            'devices_polled': self.devices_polled,
+            'records_stored': self.records_stored,
+            'devices_per_second': round(self.devices_polled / uptime, 2),
+            'records_per_second': round(self.records_stored / uptime, 2),
+            'devices_per_second_recent': round(sum(r[1] for r in self._recent) / window, 2),
+            'records_per_second_recent': round(sum(r[2] for r in self._recent) / window, 2),
+            'schedule_lag': self.schedule_lag.summary(),
+            'cycle_setup': self.setup_time.summary(),
+            'cycle_duration': self.cycle_time.summary(),
+            'cache': {
+                'plan_hits': self.plan_hits,
+                'plan_misses': self.plan_misses,
+                'target_hits': self.target_hits,
+                'target_misses': self.target_misses,
+            },
+            'snmp_in_flight': self.transport.in_flight if self.transport else 0,
+            'schedule': [
+                {
+                    'config_id': config_id,
+                    'name': entry.config.get('name'),
+                    'poll_type': entry.poll_type_name,
+                    'interval_seconds': entry.interval,
+                    'next_due_in': round(entry.next_due - now, 3),
+                    'running': entry.running,
+                    'runs': entry.runs,
+                    'overruns': entry.overruns,
+                    'last_status': entry.last_status,
+                    'last_duration_seconds': round(entry.last_duration, 3),
+                    'last_devices': entry.last_devices,
+                }
+                for config_id, entry in self.schedule.items()
+            ],
+        }
+
+    def publish_status(self, status: Dict[str, Any], is_running: bool = True):
+        """Publish a get_stats() snapshot to Redis for the monitoring API."""
+        if self._redis is None:
+            try:
+                import redis
+                from backend.config import get_settings
+                self._redis = redis.Redis.from_url(get_settings().redis_url, socket_timeout=2)
+            except ImportError:
+                return
+        status['is_running'] = is_running
+        status['updated_at'] = time.time()
+        try:
+            self._redis.set(self.STATUS_KEY, json.dumps(status), ex=int(self.status_interval * 6))
+        except Exception as e:
+            logger.warning(f"Publishing polling daemon status failed: {e}")
+
+
+def load_daemon_status() -> Optional[Dict]:
+    """Last status published by a running polling daemon, if any."""
+    try:
+        import redis
+    except ImportError:
+        return None
+    from backend.config import get_settings
+    client = redis.Redis.from_url(get_settings().redis_url, socket_timeout=2)
+    raw = client.get(PollingDaemon.STATUS_KEY)
+    return json.loads(raw) if raw else None
+
+
+def main():
+    """Main entry point."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    daemon = PollingDaemon(
+        config_refresh=float(os.environ.get('POLLING_DAEMON_CONFIG_REFRESH', 30)),
+        cache_ttl=float(os.environ.get('POLLING_DAEMON_CACHE_TTL', 300)),
+        cycle_timeout=float(os.environ.get('POLLING_DAEMON_CYCLE_TIMEOUT', 300)),
+        max_concurrent=int(os.environ.get('POLLING_DAEMON_MAX_CONCURRENT', 200)),
+    )
+
+    async def _main():
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, daemon.stop)
+        await daemon.run()
+
+    asyncio.run(_main())
+
+
+if __name__ == '__main__':
+    main()
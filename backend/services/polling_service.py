@@ -16,7 +16,7 @@ import time
 import logging
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from concurrent.futures import ThreadPoolExecutor
 
 from .async_snmp_poller import (
@@ -117,6 +117,7 @@ class PollingService:
             PollResult with statistics
         """
         started_at = datetime.utcnow()
+        rollup_since = datetime.now(timezone.utc)
         
         # Get devices from NetBox
         devices = await self._get_devices(device_filter)
@@ -160,6 +161,11 @@ class PollingService:
                     "error": result.error or "Unknown error",
                 })
         
+        if store_results:
+            await self._update_rollups(
+                'availability_metrics', rollup_since, [r.target.ip for r in results if r.success]
+            )
+        
         completed_at = datetime.utcnow()
         duration = (completed_at - started_at).total_seconds()
         
@@ -215,6 +221,7 @@ class PollingService:
         targets = await self._build_targets(devices, "public")
         
         started_at = datetime.utcnow()
+        rollup_since = datetime.now(timezone.utc)
         results = []
         errors = []
         
@@ -237,6 +244,10 @@ class PollingService:
             except Exception as e:
                 errors.append({"device": target.ip, "error": str(e)})
         
+        await self._update_rollups(
+            'interface_metrics', rollup_since, [r.target.ip for r in results if r.success]
+        )
+        
         completed_at = datetime.utcnow()
         successful = sum(1 for r in results if r.success)
         
@@ -268,6 +279,7 @@ class PollingService:
         targets = await self._build_targets(devices, "public")
         
         started_at = datetime.utcnow()
+        rollup_since = datetime.now(timezone.utc)
         results = []
         errors = []
         
@@ -301,6 +313,10 @@ class PollingService:
             except Exception as e:
                 errors.append({"device": target.ip, "error": str(e)})
         
+        await self._update_rollups(
+            'optical_metrics', rollup_since, [r.target.ip for r in results]
+        )
+        
         completed_at = datetime.utcnow()
         successful = len(results)
         
@@ -414,6 +430,34 @@ class PollingService:
         finally:
             self.db.putconn(conn)
     
+    async def _update_rollups(self, table: str, since: datetime, device_ips: List[str]):
+        """Refresh the metric rollup buckets written since `since`."""
+        if self.db is None or not device_ips:
+            return
+        try:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(
+                self._executor,
+                self._update_rollups_sync,
+                table,
+                since,
+                device_ips,
+            )
+        except Exception as e:
+            logger.error(f"Failed to update {table} rollups: {e}")
+    
+    def _update_rollups_sync(self, table: str, since: datetime, device_ips: List[str]):
+        """Synchronous helper to update metric rollups."""
+        from backend.services.metric_rollups import update_rollups
+        
+        conn = self.db.getconn()
+        try:
+            with conn.cursor() as cur:
+                update_rollups(cur, table, since, datetime.now(timezone.utc), device_ips)
+                conn.commit()
+        finally:
+            self.db.putconn(conn)
+    
     async def _store_interface_metrics(
         self,
         device_ip: str,
@@ -605,6 +649,7 @@ def run_poll_job(job_type: str, device_filter: Optional[Dict] = None):
             'queries_per_second': result.stats.queries_per_second,
             'avg_latency_ms': result.stats.avg_duration * 1000,
             'p95_latency_ms': result.stats.p95_duration * 1000,
+            'p99_latency_ms': result.stats.p99_duration * 1000,
             'error_count': len(result.errors),
         }
     
@@ -0,0 +1,604 @@
+"""
+Native SNMP Transport
+
+Pure-asyncio SNMPv1/v2c transport used by NativeSNMPEngine:
+- Minimal BER codec for GET / GETNEXT / GETBULK requests and responses
+- One UDP datagram endpoint shared by every outstanding request
+- Responses matched back to callers by request-id
+- Per-request timeout and retransmit timers on the event loop
+
+No subprocesses and no worker threads: a single socket and the event loop
+carry the whole poll cycle.
+"""
+
+import asyncio
+import itertools
+import logging
+import random
+import socket
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# BER universal tags
+TAG_INTEGER = 0x02
+TAG_OCTET_STRING = 0x04
+TAG_NULL = 0x05
+TAG_OID = 0x06
+TAG_SEQUENCE = 0x30
+
+# SNMP application tags (RFC 2578)
+TAG_IP_ADDRESS = 0x40
+TAG_COUNTER32 = 0x41
+TAG_GAUGE32 = 0x42
+TAG_TIMETICKS = 0x43
+TAG_OPAQUE = 0x44
+TAG_COUNTER64 = 0x46
+
+# SNMPv2 varbind exceptions (RFC 3416)
+TAG_NO_SUCH_OBJECT = 0x80
+TAG_NO_SUCH_INSTANCE = 0x81
+TAG_END_OF_MIB_VIEW = 0x82
+
+EXCEPTION_TAGS = frozenset((TAG_NO_SUCH_OBJECT, TAG_NO_SUCH_INSTANCE, TAG_END_OF_MIB_VIEW))
+UNSIGNED_TAGS = frozenset((TAG_COUNTER32, TAG_GAUGE32, TAG_TIMETICKS, TAG_COUNTER64))
+
+# PDU tags
+PDU_GET = 0xA0
+PDU_GETNEXT = 0xA1
+PDU_RESPONSE = 0xA2
+PDU_SET = 0xA3
+PDU_TRAP_V1 = 0xA4
+PDU_GETBULK = 0xA5
+PDU_INFORM = 0xA6
+PDU_TRAP_V2 = 0xA7
+PDU_REPORT = 0xA8
+
+SNMP_VERSION_1 = 0
+SNMP_VERSION_2C = 1
+
+ERROR_STATUS_NAMES = {
+    0: 'noError',
+    1: 'tooBig',
+    2: 'noSuchName',
+    3: 'badValue',
+    4: 'readOnly',
+    5: 'genErr',
+    6: 'noAccess',
+    7: 'wrongType',
+    8: 'wrongLength',
+    9: 'wrongEncoding',
+    10: 'wrongValue',
+    11: 'noCreation',
+    12: 'inconsistentValue',
+    13: 'resourceUnavailable',
+    14: 'commitFailed',
+    15: 'undoFailed',
+    16: 'authorizationError',
+    17: 'notWritable',
+    18: 'inconsistentName',
+}
+
+
+class SNMPDecodeError(ValueError):
+    """Raised when a datagram is not a well-formed SNMP message."""
+
+
+class SNMPTimeoutError(asyncio.TimeoutError):
+    """Raised when a request exhausts its retries without a response."""
+
+
+class SNMPMessage:
+    """Decoded SNMPv1/v2c message."""
+
+    __slots__ = (
+        'version', 'community', 'pdu_type', 'request_id',
+        'error_status', 'error_index', 'varbinds', 'rtt', 'retries_used',
+    )
+
+    def __init__(self, version, community, pdu_type, request_id,
+                 error_status, error_index, varbinds):
+        self.version = version
+        self.community = community
+        self.pdu_type = pdu_type
+        self.request_id = request_id
+        self.error_status = error_status
+        self.error_index = error_index
+        # List of (oid, tag, value) tuples, oid without leading dot
+        self.varbinds: List[Tuple[str, int, Any]] = varbinds
+        self.rtt = 0.0
+        self.retries_used = 0
+
+
+# ---------------------------------------------------------------------------
+# Encoding
+# ---------------------------------------------------------------------------
+
+def _encode_length(length: int) -> bytes:
+    if length < 0x80:
+        return bytes((length,))
+    raw = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return bytes((0x80 | len(raw),)) + raw
+
+
+def _tlv(tag: int, payload: bytes) -> bytes:
+    return bytes((tag,)) + _encode_length(len(payload)) + payload
+
+
+def _encode_integer(value: int) -> bytes:
+    return _tlv(TAG_INTEGER, value.to_bytes(max(1, (value.bit_length() + 8) // 8), 'big', signed=True))
+
+
+def _encode_unsigned(tag: int, value: int) -> bytes:
+    return _tlv(tag, value.to_bytes(max(1, (value.bit_length() + 8) // 8), 'big'))
+
+
+def _base128(value: int) -> bytes:
+    if value < 0x80:
+        return bytes((value,))
+    parts = [value & 0x7F]
+    value >>= 7
+    while value:
+        parts.append(0x80 | (value & 0x7F))
+        value >>= 7
+    return bytes(reversed(parts))
+
+
+@lru_cache(maxsize=16384)
+def encode_oid(oid: str) -> bytes:
+    """Encode a dotted OID string (leading dot optional) as a BER TLV."""
+    arcs = [int(arc) for arc in oid.strip('.').split('.')]
+    if len(arcs) < 2:
+        raise ValueError(f"OID too short: {oid}")
+    body = _base128(arcs[0] * 40 + arcs[1]) + b''.join(_base128(arc) for arc in arcs[2:])
+    return _tlv(TAG_OID, body)
+
+
+_NULL = b'\x05\x00'
+
+
+def encode_value(tag: int, value: Any) -> bytes:
+    """Encode a single varbind value."""
+    if tag == TAG_NULL or tag in EXCEPTION_TAGS:
+        return bytes((tag, 0))
+    if tag == TAG_INTEGER:
+        return _encode_integer(int(value))
+    if tag in UNSIGNED_TAGS:
+        return _encode_unsigned(tag, int(value))
+    if tag == TAG_OID:
+        return encode_oid(value)
+    if tag == TAG_IP_ADDRESS:
+        return _tlv(tag, socket.inet_aton(value))
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    return _tlv(tag, bytes(value))
+
+
+def encode_message(
+    version: int,
+    community: str,
+    pdu_type: int,
+    request_id: int,
+    varbinds: List[Tuple[str, int, Any]],
+    error_status: int = 0,
+    error_index: int = 0,
+) -> bytes:
+    """
+    Encode a complete SNMPv1/v2c message.
+
+    For GETBULK, error_status/error_index carry non-repeaters and
+    max-repetitions as defined by RFC 3416.
+    """
+    vb_list = b''.join(
+        _tlv(TAG_SEQUENCE, encode_oid(oid) + encode_value(tag, value))
+        for oid, tag, value in varbinds
+    )
+    pdu = _tlv(
+        pdu_type,
+        _encode_integer(request_id)
+        + _encode_integer(error_status)
+        + _encode_integer(error_index)
+        + _tlv(TAG_SEQUENCE, vb_list),
+    )
+    return _tlv(
+        TAG_SEQUENCE,
+        _encode_integer(version) + _tlv(TAG_OCTET_STRING, community.encode('utf-8')) + pdu,
+    )
+
+
+def encode_request(
+    version: int,
+    community: str,
+    pdu_type: int,
+    request_id: int,
+    oids: List[str],
+    non_repeaters: int = 0,
+    max_repetitions: int = 0,
+) -> bytes:
+    """Encode a GET/GETNEXT/GETBULK request with NULL-valued varbinds."""
+    vb_list = b''.join(_tlv(TAG_SEQUENCE, encode_oid(oid) + _NULL) for oid in oids)
+    if pdu_type != PDU_GETBULK:
+        non_repeaters = max_repetitions = 0
+    pdu = _tlv(
+        pdu_type,
+        _encode_integer(request_id)
+        + _encode_integer(non_repeaters)
+        + _encode_integer(max_repetitions)
+        + _tlv(TAG_SEQUENCE, vb_list),
+    )
+    return _tlv(
+        TAG_SEQUENCE,
+        _encode_integer(version) + _tlv(TAG_OCTET_STRING, community.encode('utf-8')) + pdu,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Decoding
+# ---------------------------------------------------------------------------
+
+def _read_tlv(data: bytes, pos: int) -> Tuple[int, int, int]:
+    """Return (tag, value_start, value_end) for the TLV at pos."""
+    try:
+        tag = data[pos]
+        length = data[pos + 1]
+    except IndexError:
+        raise SNMPDecodeError("Truncated TLV header")
+    pos += 2
+    if length & 0x80:
+        num_bytes = length & 0x7F
+        if num_bytes == 0 or num_bytes > 4:
+            raise SNMPDecodeError("Unsupported BER length")
+        length = int.from_bytes(data[pos:pos + num_bytes], 'big')
+        pos += num_bytes
+    end = pos + length
+    if end > len(data):
+        raise SNMPDecodeError("Truncated TLV value")
+    return tag, pos, end
+
+
+def decode_oid(data: bytes, start: int, end: int) -> str:
+    """Decode BER OID contents to a dotted string without leading dot."""
+    if start >= end:
+        raise SNMPDecodeError("Empty OID")
+    return _decode_oid_body(bytes(data[start:end]))
+
+
+@lru_cache(maxsize=65536)
+def _decode_oid_body(body: bytes) -> str:
+    # Table OIDs repeat across every device in a poll cycle, so cache them
+    arcs = []
+    value = 0
+    for byte in body:
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            arcs.append(value)
+            value = 0
+    if body[-1] & 0x80:
+        raise SNMPDecodeError("Truncated OID subidentifier")
+    first = arcs[0]
+    if first < 40:
+        head = [0, first]
+    elif first < 80:
+        head = [1, first - 40]
+    else:
+        head = [2, first - 80]
+    return '.'.join(map(str, head + arcs[1:]))
+
+
+def _decode_value(data: bytes, tag: int, start: int, end: int) -> Any:
+    if tag == TAG_INTEGER:
+        return int.from_bytes(data[start:end], 'big', signed=True)
+    if tag in UNSIGNED_TAGS:
+        return int.from_bytes(data[start:end], 'big')
+    if tag == TAG_OID:
+        return decode_oid(data, start, end)
+    if tag == TAG_IP_ADDRESS:
+        return '.'.join(str(b) for b in data[start:end])
+    if tag == TAG_NULL or tag in EXCEPTION_TAGS:
+        return None
+    return bytes(data[start:end])
+
+
+def decode_varbinds(data: bytes, start: int, end: int) -> List[Tuple[str, int, Any]]:
+    """Decode a VarBindList body into (oid, tag, value) tuples."""
+    varbinds = []
+    pos = start
+    while pos < end:
+        tag, vb_start, vb_end = _read_tlv(data, pos)
+        if tag != TAG_SEQUENCE:
+            raise SNMPDecodeError("VarBind is not a SEQUENCE")
+        oid_tag, oid_start, oid_end = _read_tlv(data, vb_start)
+        if oid_tag != TAG_OID:
+            raise SNMPDecodeError("VarBind name is not an OID")
+        val_tag, val_start, val_end = _read_tlv(data, oid_end)
+        varbinds.append((
+            decode_oid(data, oid_start, oid_end),
+            val_tag,
+            _decode_value(data, val_tag, val_start, val_end),
+        ))
+        pos = vb_end
+    return varbinds
+
+
+def decode_message(data: bytes) -> SNMPMessage:
+    """
+    Decode an SNMPv1/v2c message carrying a request, response or v2 trap PDU.
+
+    Raises:
+        SNMPDecodeError: If the datagram is malformed or uses another PDU layout
+    """
+    tag, pos, end = _read_tlv(data, 0)
+    if tag != TAG_SEQUENCE:
+        raise SNMPDecodeError("Message is not a SEQUENCE")
+
+    tag, start, stop = _read_tlv(data, pos)
+    if tag != TAG_INTEGER:
+        raise SNMPDecodeError("Missing version")
+    version = int.from_bytes(data[start:stop], 'big', signed=True)
+
+    tag, start, stop = _read_tlv(data, stop)
+    if tag != TAG_OCTET_STRING:
+        raise SNMPDecodeError("Missing community")
+    community = data[start:stop].decode('utf-8', errors='replace')
+
+    pdu_type, pdu_start, pdu_end = _read_tlv(data, stop)
+    if pdu_type == PDU_TRAP_V1 or not 0xA0 <= pdu_type <= 0xA8:
+        raise SNMPDecodeError(f"Unsupported PDU type 0x{pdu_type:02X}")
+
+    fields = []
+    pos = pdu_start
+    for _ in range(3):
+        tag, start, stop = _read_tlv(data, pos)
+        if tag != TAG_INTEGER:
+            raise SNMPDecodeError("Malformed PDU header")
+        fields.append(int.from_bytes(data[start:stop], 'big', signed=True))
+        pos = stop
+
+    tag, vbl_start, vbl_end = _read_tlv(data, pos)
+    if tag != TAG_SEQUENCE:
+        raise SNMPDecodeError("Missing VarBindList")
+
+    return SNMPMessage(
+        version=version,
+        community=community,
+        pdu_type=pdu_type,
+        request_id=fields[0],
+        error_status=fields[1],
+        error_index=fields[2],
+        varbinds=decode_varbinds(data, vbl_start, vbl_end),
+    )
+
+
+def render_value(tag: int, value: Any) -> str:
+    """
+    Render a decoded value the way `snmpget -OQn` prints it.
+
+    Printable octet strings become text, binary ones become space-separated
+    hex, OIDs get a leading dot, and numeric types become decimal strings.
+    """
+    if isinstance(value, bytes):
+        try:
+            text = value.decode('utf-8')
+            if text.isprintable() or all(c.isprintable() or c in '\r\n\t' for c in text):
+                return text
+        except UnicodeDecodeError:
+            pass
+        return ' '.join(f'{b:02X}' for b in value)
+    if tag == TAG_OID:
+        return '.' + value
+    if value is None:
+        return ''
+    return str(value)
+
+
+# ---------------------------------------------------------------------------
+# Transport
+# ---------------------------------------------------------------------------
+
+class _PendingRequest:
+    """Book-keeping for one outstanding request."""
+
+    __slots__ = ('future', 'payload', 'addr', 'retries_left', 'retries_used',
+                 'timeout', 'timer', 'sent_at')
+
+    def __init__(self, future, payload, addr, retries, timeout):
+        self.future = future
+        self.payload = payload
+        self.addr = addr
+        self.retries_left = retries
+        self.retries_used = 0
+        self.timeout = timeout
+        self.timer = None
+        self.sent_at = 0.0
+
+
+class _SNMPProtocol(asyncio.DatagramProtocol):
+    """Datagram protocol that forwards every datagram to the transport owner."""
+
+    def __init__(self, owner: 'SNMPDatagramTransport'):
+        self._owner = owner
+
+    def datagram_received(self, data: bytes, addr):
+        self._owner._datagram_received(data, addr)
+
+    def error_received(self, exc: Exception):
+        logger.debug(f"SNMP transport error: {exc}")
+
+
+class SNMPDatagramTransport:
+    """
+    Single UDP endpoint multiplexing many in-flight SNMP requests.
+
+    Each request gets a unique request-id; responses are matched back to
+    their waiting future by that id and the sender address. Timeouts and
+    retransmits are driven by loop timers, so thousands of outstanding
+    requests cost one socket and a dict entry each.
+    """
+
+    def __init__(
+        self,
+        local_addr: Tuple[str, int] = ('0.0.0.0', 0),
+        recv_buffer_bytes: int = 4 * 1024 * 1024,
+    ):
+        self.local_addr = local_addr
+        self.recv_buffer_bytes = recv_buffer_bytes
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[int, _PendingRequest] = {}
+        self._request_ids = itertools.count(random.randint(1, 0x3FFFFFFF))
+        self._open_lock: Optional[asyncio.Lock] = None
+
+        # Counters
+        self.requests_sent = 0
+        self.retransmits = 0
+        self.timeouts = 0
+        self.responses_received = 0
+        self.unmatched_responses = 0
+        self.malformed_responses = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self._transport is not None and not self._transport.is_closing()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    async def open(self):
+        """Open the datagram endpoint on the running loop (idempotent)."""
+        if self.is_open:
+            return
+        if self._open_lock is None:
+            self._open_lock = asyncio.Lock()
+        async with self._open_lock:
+            if self.is_open:
+                return
+            loop = asyncio.get_running_loop()
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: _SNMPProtocol(self),
+                local_addr=self.local_addr,
+                family=socket.AF_INET,
+            )
+            sock = transport.get_extra_info('socket')
+            if sock is not None and self.recv_buffer_bytes:
+                try:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.recv_buffer_bytes)
+                except OSError as e:
+                    logger.debug(f"Could not raise SO_RCVBUF: {e}")
+            self._transport = transport
+            self._loop = loop
+
+    def close(self):
+        """Close the endpoint and fail any outstanding requests."""
+        for pending in list(self._pending.values()):
+            if pending.timer:
+                pending.timer.cancel()
+            if not pending.future.done():
+                pending.future.set_exception(SNMPTimeoutError("SNMP transport closed"))
+        self._pending.clear()
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def _next_request_id(self) -> int:
+        while True:
+            request_id = next(self._request_ids) & 0x7FFFFFFF
+            if request_id and request_id not in self._pending:
+                return request_id
+
+    async def request(
+        self,
+        host: str,
+        port: int,
+        build_payload: Callable[[int], bytes],
+        timeout: float,
+        retries: int = 0,
+    ) -> SNMPMessage:
+        """
+        Send one request and wait for its response.
+
+        Args:
+            host: Agent IP address
+            port: Agent UDP port
+            build_payload: Callable(request_id) -> encoded message
+            timeout: Seconds to wait per attempt
+            retries: Retransmits after the first attempt
+
+        Returns:
+            Decoded response message (with rtt and retries_used set)
+
+        Raises:
+            SNMPTimeoutError: No response after all attempts
+        """
+        if not self.is_open:
+            await self.open()
+
+        request_id = self._next_request_id()
+        pending = _PendingRequest(
+            future=self._loop.create_future(),
+            payload=build_payload(request_id),
+            addr=(host, port),
+            retries=max(0, retries),
+            timeout=timeout,
+        )
+        self._pending[request_id] = pending
+        self._send(request_id, pending)
+        try:
+            return await pending.future
+        finally:
+            if pending.timer:
+                pending.timer.cancel()
+            self._pending.pop(request_id, None)
+
+    def _send(self, request_id: int, pending: _PendingRequest):
+        pending.sent_at = self._loop.time()
+        self._transport.sendto(pending.payload, pending.addr)
+        self.requests_sent += 1
+        pending.timer = self._loop.call_later(pending.timeout, self._on_timeout, request_id)
+
+    def _on_timeout(self, request_id: int):
+        pending = self._pending.get(request_id)
+        if pending is None or pending.future.done():
+            return
+        if pending.retries_left > 0 and self.is_open:
+            pending.retries_left -= 1
+            pending.retries_used += 1
+            self.retransmits += 1
+            self._send(request_id, pending)
+            return
+        self.timeouts += 1
+        pending.future.set_exception(
+            SNMPTimeoutError("No SNMP response received before timeout")
+        )
+
+    def _datagram_received(self, data: bytes, addr):
+        try:
+            message = decode_message(data)
+        except SNMPDecodeError:
+            self.malformed_responses += 1
+            return
+
+        pending = self._pending.get(message.request_id)
+        if pending is None or pending.future.done() or addr[0] != pending.addr[0]:
+            self.unmatched_responses += 1
+            return
+
+        self.responses_received += 1
+        pending.timer.cancel()
+        message.rtt = self._loop.time() - pending.sent_at
+        message.retries_used = pending.retries_used
+        pending.future.set_result(message)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return transport counters."""
+        return {
+            'requests_sent': self.requests_sent,
+            'retransmits': self.retransmits,
+            'timeouts': self.timeouts,
+            'responses_received': self.responses_received,
+            'unmatched_responses': self.unmatched_responses,
+            'malformed_responses': self.malformed_responses,
+            'in_flight': self.in_flight,
+        }
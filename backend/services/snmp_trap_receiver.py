@@ -4,21 +4,40 @@ Universal SNMP Trap Receiver for OpsConductor Monitor.
 
 Handles SNMP traps from all network devices (Ciena, Cisco, Juniper, Linux, etc.)
 with async processing, vendor-specific handlers, and alarm correlation.
+
+Traps are persisted in micro-batches (SNMP_TRAP_BATCH_SIZE traps or
+SNMP_TRAP_BATCH_MS after the first one) on a dedicated writer thread, so
+database round-trips never block the receive loop.
+
+With SNMP_TRAP_PROCESSES > 1, main() supervises that many receiver
+processes sharing the port through SO_REUSEPORT. A classic BPF program on
+the socket group steers each source IP to one process, so a device's
+raise/clear pairs are correlated by the same alarm index. Each process
+reports into trap_receiver_workers and trap_receiver_status holds the totals.
 """
 
 import asyncio
+import ctypes
 import logging
 import os
+import re
 import signal
+import socket
+import struct
 import sys
-import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from dataclasses import dataclass, field
 from typing import Dict, Any, Optional, List, Callable
-from collections import defaultdict
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+
+from backend.services.metric_ingest import MetricIngestBuffer
+from backend.services.device_directory import get_device_directory
+from backend.services.trap_alarm_index import ActiveAlarmIndex
+from backend.services.trap_routing import OidPrefixTable, TrapDispatchTable, VarbindExtractor
 
 # pysnmp imports
 from pysnmp.carrier.asyncio.dgram import udp
@@ -92,20 +111,69 @@ class TrapRouter:
         '1.3.6.1.6.3.1.1.5.6': 'egpNeighborLoss',
     }
     
+    def __init__(self, handlers: Optional[Dict[str, Any]] = None):
+        self.table = TrapDispatchTable(
+            self.VENDOR_OIDS, self.STANDARD_TRAPS,
+            handlers or {'generic': GenericTrapHandler()},
+        )
+    
     def route(self, trap: DecodedTrap) -> str:
         """Determine which handler should process this trap."""
-        # Check enterprise OID for vendor
-        for prefix, vendor in self.VENDOR_OIDS.items():
-            if trap.enterprise_oid and trap.enterprise_oid.startswith(prefix):
-                return vendor
-            if trap.trap_oid and trap.trap_oid.startswith(prefix):
-                return vendor
-        
-        # Check trap OID for standard traps
-        if trap.trap_oid in self.STANDARD_TRAPS:
-            return 'standard'
+        return self.dispatch(trap)[0]
+    
+    def dispatch(self, trap: DecodedTrap) -> tuple:
+        """(vendor, handler, decoded trap type) for a trap."""
+        return self.table.dispatch(trap.enterprise_oid, trap.trap_oid)
+    
+    def load_profiles(self, cur) -> int:
+        """
+        Route enterprise prefixes from snmp_profiles as well.
         
-        return 'generic'
+        Built-in prefixes keep their vendor. Returns the number added.
+        """
+        cur.execute("""
+            SELECT enterprise_oid, LOWER(vendor) AS vendor
+            FROM snmp_profiles
+            WHERE enterprise_oid IS NOT NULL AND enterprise_oid <> ''
+        """)
+        added = 0
+        for row in cur.fetchall():
+            prefix = row['enterprise_oid'].strip('.')
+            if prefix not in self.VENDOR_OIDS:
+                self.table.add_vendor(prefix, row['vendor'])
+                added += 1
+        return added
+
+
+def _alarm_field_by_suffix(oid: str) -> Optional[str]:
+    """Alarm varbinds outside the WWP-LEOS-ALARM-MIB table, by last arc."""
+    if oid.endswith('.1'):
+        return 'alarm_object'
+    if oid.endswith('.2'):
+        return 'alarm_severity'
+    if oid.endswith('.3'):
+        return 'alarm_description'
+    return None
+
+
+def _link_field_by_column(oid: str) -> Optional[str]:
+    """Interface varbinds from tables that reuse the IF-MIB column layout."""
+    if '.2.2.1.1.' in oid:
+        return 'if_index'
+    if '.2.2.1.2.' in oid:
+        return 'if_descr'
+    if '.31.1.1.1.1.' in oid:
+        return 'if_name'
+    return None
+
+
+def _raps_field(oid: str) -> Optional[str]:
+    """RAPS ring varbinds (WWP-LEOS-RAPS-MIB)."""
+    if '.47.' in oid:
+        return 'ring_id'
+    if 'state' in oid.lower():
+        return 'ring_state'
+    return None
 
 
 class CienaTrapHandler:
@@ -149,58 +217,61 @@ class CienaTrapHandler:
         '1.3.6.1.4.1.6141.2.60.5.1.1.5': 'alarm_id',
     }
     
-    def handle(self, trap: DecodedTrap) -> Optional[TrapEvent]:
-        """Process Ciena trap and return normalized event."""
-        trap_type = self._get_trap_type(trap.trap_oid)
+    # Compiled once: trap OID -> trap type, varbind OID -> field
+    _trap_types = OidPrefixTable(TRAP_TYPES)
+    ALARM_FIELDS = VarbindExtractor(ALARM_VARBINDS, fallback=_alarm_field_by_suffix)
+    LINK_FIELDS = VarbindExtractor({
+        '1.3.6.1.2.1.2.2.1.1': 'if_index',      # ifIndex
+        '1.3.6.1.2.1.2.2.1.2': 'if_descr',      # ifDescr
+        '1.3.6.1.2.1.31.1.1.1.1': 'if_name',    # ifName
+    }, fallback=_link_field_by_column)
+    RAPS_FIELDS = VarbindExtractor(fallback=_raps_field)
+    
+    PORT_NUMBER = re.compile(r'(\d+)')
+    
+    def resolve(self, trap_oid: str) -> tuple:
+        """Decode a trap OID to (trap type, handler method); cached by TrapRouter."""
+        trap_type = self._get_trap_type(trap_oid)
         
         if trap_type in ('alarmRaised', 'alarmCleared'):
-            return self._handle_alarm(trap, trap_type)
+            return trap_type, self._handle_alarm
         elif trap_type in ('portLinkUp', 'portLinkDown', 'linkUp', 'linkDown'):
-            return self._handle_link_event(trap, trap_type)
+            return trap_type, self._handle_link_event
         elif trap_type.startswith('raps'):
-            return self._handle_raps_event(trap, trap_type)
+            return trap_type, self._handle_raps_event
         elif trap_type.startswith('cfm'):
-            return self._handle_cfm_event(trap, trap_type)
+            return trap_type, self._handle_cfm_event
         else:
-            return self._handle_generic(trap)
+            return trap_type, self._handle_generic
+    
+    def handle(self, trap: DecodedTrap, decoded: Optional[tuple] = None) -> Optional[TrapEvent]:
+        """Process Ciena trap and return normalized event."""
+        trap_type, handler = decoded or self.resolve(trap.trap_oid)
+        return handler(trap, trap_type)
     
     def _get_trap_type(self, trap_oid: str) -> str:
-        """Get trap type name from OID."""
-        # Check exact match first
-        if trap_oid in self.TRAP_TYPES:
-            return self.TRAP_TYPES[trap_oid]
-        
-        # Check prefix match for enterprise traps
-        for oid, name in self.TRAP_TYPES.items():
-            if trap_oid.startswith(oid):
-                return name
-        
-        return 'unknown'
+        """Get trap type name from OID (longest matching entry)."""
+        return self._trap_types.get(trap_oid, 'unknown')
     
     def _handle_alarm(self, trap: DecodedTrap, trap_type: str) -> TrapEvent:
         """Handle Ciena alarm raised/cleared traps."""
         is_clear = trap_type == 'alarmCleared'
         
         # Extract alarm details from varbinds
-        alarm_object = None
+        fields = self.ALARM_FIELDS.extract(trap.varbinds)
+        alarm_object = fields.get('alarm_object')
+        if alarm_object is not None:
+            alarm_object = str(alarm_object)
         alarm_severity = 'warning'
-        alarm_description = 'Unknown alarm'
-        alarm_id = None
-        
-        for oid, value in trap.varbinds.items():
-            # Match by OID suffix
-            if '6141.2.60.5.1.1.1' in oid or oid.endswith('.1'):
-                alarm_object = str(value)
-            elif '6141.2.60.5.1.1.2' in oid or oid.endswith('.2'):
-                try:
-                    sev_val = int(value)
-                    alarm_severity = self.SEVERITY_MAP.get(sev_val, 'warning')
-                except (ValueError, TypeError):
-                    pass
-            elif '6141.2.60.5.1.1.3' in oid or oid.endswith('.3'):
-                alarm_description = str(value)
-            elif '6141.2.60.5.1.1.5' in oid:
-                alarm_id = str(value)
+        if 'alarm_severity' in fields:
+            try:
+                alarm_severity = self.SEVERITY_MAP.get(int(fields['alarm_severity']), 'warning')
+            except (ValueError, TypeError):
+                pass
+        alarm_description = str(fields.get('alarm_description', 'Unknown alarm'))
+        alarm_id = fields.get('alarm_id')
+        if alarm_id is not None:
+            alarm_id = str(alarm_id)
         
         # Generate alarm_id if not provided (for correlation)
         if not alarm_id:
@@ -214,8 +285,7 @@ class CienaTrapHandler:
             if 'Port' in alarm_object or 'port' in alarm_object:
                 object_type = 'port'
                 # Extract port number
-                import re
-                match = re.search(r'(\d+)', alarm_object)
+                match = self.PORT_NUMBER.search(alarm_object)
                 if match:
                     object_id = match.group(1)
             elif 'Ring' in alarm_object or 'RAPS' in alarm_object:
@@ -245,17 +315,16 @@ class CienaTrapHandler:
         is_up = 'Up' in trap_type or 'up' in trap_type
         
         # Extract interface info from varbinds
-        if_index = None
-        if_name = None
-        if_descr = None
-        
-        for oid, value in trap.varbinds.items():
-            if '.2.2.1.1.' in oid:  # ifIndex
-                if_index = str(value)
-            elif '.2.2.1.2.' in oid:  # ifDescr
-                if_descr = str(value)
-            elif '.31.1.1.1.1.' in oid:  # ifName
-                if_name = str(value)
+        fields = self.LINK_FIELDS.extract(trap.varbinds)
+        if_index = fields.get('if_index')
+        if_name = fields.get('if_name')
+        if_descr = fields.get('if_descr')
+        if if_index is not None:
+            if_index = str(if_index)
+        if if_name is not None:
+            if_name = str(if_name)
+        if if_descr is not None:
+            if_descr = str(if_descr)
         
         port_id = if_name or if_descr or if_index or 'unknown'
         
@@ -279,14 +348,13 @@ class CienaTrapHandler:
     
     def _handle_raps_event(self, trap: DecodedTrap, trap_type: str) -> TrapEvent:
         """Handle G.8032 RAPS ring events."""
-        ring_id = None
-        ring_state = None
-        
-        for oid, value in trap.varbinds.items():
-            if 'ringId' in oid.lower() or '.47.' in oid:
-                ring_id = str(value)
-            if 'state' in oid.lower():
-                ring_state = str(value)
+        fields = self.RAPS_FIELDS.extract(trap.varbinds)
+        ring_id = fields.get('ring_id')
+        ring_state = fields.get('ring_state')
+        if ring_id is not None:
+            ring_id = str(ring_id)
+        if ring_state is not None:
+            ring_state = str(ring_state)
         
         return TrapEvent(
             event_type='raps',
@@ -326,7 +394,7 @@ class CienaTrapHandler:
             is_clear=is_clear,
         )
     
-    def _handle_generic(self, trap: DecodedTrap) -> TrapEvent:
+    def _handle_generic(self, trap: DecodedTrap, trap_type: Optional[str] = None) -> TrapEvent:
         """Handle unknown Ciena traps."""
         return TrapEvent(
             event_type='unknown',
@@ -357,10 +425,16 @@ class GenericTrapHandler:
         '1.3.6.1.6.3.1.1.5.5': ('authFailure', 'warning', 'SNMP authentication failure'),
     }
     
-    def handle(self, trap: DecodedTrap) -> TrapEvent:
+    def resolve(self, trap_oid: str) -> Optional[tuple]:
+        """Decode a trap OID to (name, severity, description), None if not standard."""
+        return self.STANDARD_TRAPS.get(trap_oid)
+    
+    def handle(self, trap: DecodedTrap, decoded: Optional[tuple] = None) -> TrapEvent:
         """Process generic trap and return normalized event."""
-        if trap.trap_oid in self.STANDARD_TRAPS:
-            trap_name, severity, description = self.STANDARD_TRAPS[trap.trap_oid]
+        if decoded is None:
+            decoded = self.resolve(trap.trap_oid)
+        if decoded is not None:
+            trap_name, severity, description = decoded
             is_clear = trap_name == 'linkUp'
             
             return TrapEvent(
@@ -394,12 +468,288 @@ class GenericTrapHandler:
         )
 
 
+class TrapBatchWriter:
+    """
+    Persists routed traps in batches.
+    
+    One call to write() handles a whole batch with a fixed number of round
+    trips, whatever its size:
+    - Device names come from the in-process DeviceDirectory snapshot
+    - Duplicate raises and clears are correlated against the in-memory
+      ActiveAlarmIndex instead of probing trap_events per trap; a repeat
+      raise bumps the open alarm's occurrence_count and last_seen_at
+    - Row ids come from the table sequences up front, so trap_log rows carry
+      their event_id and no follow-up UPDATE is needed
+    - trap_log then trap_events are written in one transaction through
+      MetricIngestBuffer (COPY by default)
+    
+    Not thread-safe: the receiver drives it from a single writer thread.
+    
+    Args:
+        connect: Callable returning a new autocommit RealDictCursor connection
+        method: MetricIngestBuffer method ('copy', 'values' or 'row')
+        directory: DeviceDirectory for device names (process-wide by default)
+        shared_alarms: Other receiver processes write the same tables; every
+            alarm id in a batch is re-read from the database before
+            correlating
+    """
+    
+    def __init__(self, connect: Callable, method: str = 'copy', directory=None,
+                 shared_alarms: bool = False):
+        self._connect = connect
+        self.conn = None
+        self.ingest = MetricIngestBuffer(method=method)
+        self.directory = directory or get_device_directory()
+        self.alarms = ActiveAlarmIndex()
+        self.shared_alarms = shared_alarms
+        
+        # Statistics
+        self.batches = 0
+        self.traps_written = 0
+        self.events_written = 0
+        self.repeats = 0
+        self.failed_batches = 0
+        self.write_seconds = 0.0
+        self.last_batch_size = 0
+        self.last_write_seconds = 0.0
+    
+    def _get_connection(self):
+        if self.conn is None or self.conn.closed:
+            self.conn = self._connect()
+            self.alarms.invalidate()
+        return self.conn
+    
+    @staticmethod
+    def _allocate_ids(cur, table: str, count: int) -> List[int]:
+        if count == 0:
+            return []
+        cur.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) AS id FROM generate_series(1, %s)",
+            (table, count),
+        )
+        return [row['id'] for row in cur.fetchall()]
+    
+    def write(self, items: List[tuple]) -> int:
+        """
+        Persist one batch in a single transaction.
+        
+        Args:
+            items: (DecodedTrap, vendor, TrapEvent or None) in arrival order
+        
+        Returns:
+            Number of traps written
+        
+        Raises:
+            Exception: The database error; nothing from the batch is kept and
+                the alarm index is reloaded before the next batch
+        """
+        if not items:
+            return 0
+        started = time.perf_counter()
+        try:
+            conn = self._get_connection()
+            with conn.cursor() as cur:
+                if not self.alarms.loaded:
+                    self.alarms.load(cur)
+                elif self.shared_alarms:
+                    self.alarms.refresh(cur, {item[2].alarm_id for item in items
+                                              if item[2] and item[2].alarm_id})
+                # Ids for every possible event; repeats leave sequence gaps
+                event_ids = iter(self._allocate_ids(cur, 'trap_events', sum(1 for item in items if item[2])))
+                log_ids = self._allocate_ids(cur, 'trap_log', len(items))
+            
+            # Alarm changes are applied to the index only once the batch commits
+            alarms = self.alarms.batch()
+            processed_at = datetime.now(timezone.utc)
+            events: Dict[int, Dict[str, Any]] = {}
+            for log_id, (trap, vendor, event) in zip(log_ids, items):
+                event_id = None
+                if event:
+                    active = alarms.get(event.alarm_id) if event.alarm_id else None
+                    if active and not event.is_clear:
+                        # Repeat of an open alarm: count it on the raising event
+                        active = alarms.repeat(active, trap.received_at)
+                        event_id = active.event_id
+                        if event_id in events:
+                            events[event_id]['occurrence_count'] = active.count
+                            events[event_id]['last_seen_at'] = active.last_seen
+                    else:
+                        event_id = next(event_ids)
+                        if event.alarm_id and event.is_clear:
+                            alarms.clear(event.alarm_id)
+                        elif event.alarm_id:
+                            alarms.raise_alarm(event.alarm_id, event_id, event.severity, trap.received_at)
+                        events[event_id] = {
+                            'id': event_id,
+                            'created_at': trap.received_at,
+                            'source_ip': event.source_ip,
+                            'device_name': self.directory.device_name(event.source_ip) or event.device_name,
+                            'event_type': event.event_type,
+                            'severity': event.severity,
+                            'object_type': event.object_type,
+                            'object_id': event.object_id,
+                            'description': event.description,
+                            'details': event.details,
+                            'trap_log_id': log_id,
+                            'alarm_id': event.alarm_id,
+                            'is_clear': event.is_clear,
+                            'cleared_event_id': active.event_id if active else None,
+                            'occurrence_count': 1,
+                            'last_seen_at': trap.received_at,
+                        }
+                self.ingest.add('trap_log', {
+                    'id': log_id,
+                    'received_at': trap.received_at,
+                    'source_ip': trap.source_ip,
+                    'source_port': trap.source_port,
+                    'snmp_version': trap.snmp_version,
+                    'community': trap.community,
+                    'enterprise_oid': trap.enterprise_oid,
+                    'trap_oid': trap.trap_oid,
+                    'vendor': vendor,
+                    'uptime': trap.uptime,
+                    'varbinds': trap.varbinds,
+                    'processed': True,
+                    'processed_at': processed_at if event_id else None,
+                    'event_id': event_id,
+                })
+            # trap_events.trap_log_id points at trap_log (no FK since trap_log is
+            # partitioned), so log rows still go first
+            for row in events.values():
+                self.ingest.add('trap_events', row)
+            # Repeats of alarms raised in earlier batches update their event
+            repeats = [
+                (event_id, added, last_seen)
+                for event_id, (added, last_seen) in alarms.repeats.items()
+                if event_id not in events
+            ]
+            self.ingest.flush(conn, before_commit=lambda cursor: self._bump_occurrences(cursor, repeats))
+        except Exception:
+            self.ingest.discard()
+            self.failed_batches += 1
+            self.alarms.invalidate()
+            raise
+        
+        alarms.commit()
+        
+        elapsed = time.perf_counter() - started
+        self.batches += 1
+        self.traps_written += len(items)
+        self.events_written += len(events)
+        self.repeats += sum(added for added, _ in alarms.repeats.values())
+        self.write_seconds += elapsed
+        self.last_batch_size = len(items)
+        self.last_write_seconds = elapsed
+        return len(items)
+    
+    @staticmethod
+    def _bump_occurrences(cur, repeats: List[tuple]):
+        """Add repeat counts to already-stored raising events."""
+        if not repeats:
+            return
+        execute_values(cur, """
+            UPDATE trap_events e SET
+                occurrence_count = e.occurrence_count + v.added,
+                last_seen_at = GREATEST(COALESCE(e.last_seen_at, e.created_at), v.last_seen)
+            FROM (VALUES %s) AS v(id, added, last_seen)
+            WHERE e.id = v.id
+        """, repeats, template="(%s::bigint, %s::integer, %s::timestamptz)")
+    
+    def close(self):
+        if self.conn is not None and not self.conn.closed:
+            self.conn.close()
+        self.conn = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return batch write statistics."""
+        return {
+            'batches': self.batches,
+            'traps_written': self.traps_written,
+            'events_written': self.events_written,
+            'repeats': self.repeats,
+            'failed_batches': self.failed_batches,
+            'active_alarms': len(self.alarms),
+            'avg_batch_size': round(self.traps_written / self.batches, 1) if self.batches else 0,
+            'last_batch_size': self.last_batch_size,
+            'last_write_ms': round(self.last_write_seconds * 1000, 1),
+            'traps_per_second': round(self.traps_written / self.write_seconds, 1) if self.write_seconds else 0.0,
+        }
+
+
+# Linux value; the socket module does not export it
+SO_ATTACH_REUSEPORT_CBPF = getattr(socket, 'SO_ATTACH_REUSEPORT_CBPF', 51)
+SKF_NET_OFF = -0x100000
+
+
+class _SockFprog(ctypes.Structure):
+    _fields_ = [('len', ctypes.c_ushort), ('filter', ctypes.c_void_p)]
+
+
+def attach_source_steering(sock: socket.socket, processes: int):
+    """
+    Steer datagrams in a SO_REUSEPORT group by source address.
+    
+    The classic BPF program returns (IPv4 source address % processes) as the
+    socket index, so every trap from one device lands in the same process.
+    The program belongs to the whole group; attaching it again is harmless.
+    """
+    program = [
+        (0x20, 0, 0, (SKF_NET_OFF + 12) & 0xffffffff),  # ld [net + 12]: source address
+        (0x94, 0, 0, processes),                         # mod #processes
+        (0x16, 0, 0, 0),                                 # ret a
+    ]
+    instructions = ctypes.create_string_buffer(
+        b''.join(struct.pack('HBBI', *instruction) for instruction in program)
+    )
+    fprog = _SockFprog(len(program), ctypes.addressof(instructions))
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_REUSEPORT_CBPF, bytes(fprog))
+
+
+def open_trap_socket(host: str, port: int, processes: int = 1, rcvbuf: int = 0) -> socket.socket:
+    """
+    Bind the trap UDP socket.
+    
+    With processes > 1 the socket joins a SO_REUSEPORT group and gets the
+    source steering program; if the kernel refuses the program, the group
+    falls back to the kernel's 4-tuple hash (alarm ids the local index has
+    not seen are then looked up in the database).
+    """
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_DGRAM)
+    try:
+        if processes > 1:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        if rcvbuf:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        sock.bind((host, port))
+    except OSError:
+        sock.close()
+        raise
+    if processes > 1:
+        try:
+            attach_source_steering(sock, processes)
+        except OSError as e:
+            logger.warning(f"Source steering unavailable ({e}); using the kernel's reuseport hash")
+    return sock
+
+
 class SNMPTrapReceiver:
-    """Main SNMP trap receiver service."""
+    """
+    Main SNMP trap receiver service.
     
-    def __init__(self, host: str = '0.0.0.0', port: int = 162):
+    Args:
+        host: Address to bind
+        port: UDP port to bind
+        worker_index: This process's slot when several receivers share the port
+        processes: Number of receiver processes sharing the port
+    """
+    
+    def __init__(self, host: str = '0.0.0.0', port: int = 162, worker_index: int = 0, processes: int = 1):
         self.host = host
         self.port = port
+        self.worker_index = worker_index
+        self.processes = processes
+        self.hostname = socket.gethostname()
         self.queue: asyncio.Queue = None
         self.running = False
         self.snmp_engine = None
@@ -412,7 +762,6 @@ class SNMPTrapReceiver:
         self.last_trap_at = None
         
         # Handlers
-        self.router = TrapRouter()
         self.handlers = {
             'ciena': CienaTrapHandler(),
             'generic': GenericTrapHandler(),
@@ -423,28 +772,45 @@ class SNMPTrapReceiver:
             'hp': GenericTrapHandler(),
             'dell': GenericTrapHandler(),
         }
+        self.router = TrapRouter(self.handlers)
         
         # Database connection
         self.db_conn = None
         
         # Configuration
         self.queue_size = int(os.environ.get('SNMP_TRAP_QUEUE_SIZE', 10000))
-        self.num_workers = int(os.environ.get('SNMP_TRAP_WORKERS', 4))
+        self.batch_size = int(os.environ.get('SNMP_TRAP_BATCH_SIZE', 1000))
+        self.batch_ms = float(os.environ.get('SNMP_TRAP_BATCH_MS', 50))
         self.communities = os.environ.get('SNMP_TRAP_COMMUNITIES', 'public,0psc0nduct0r').split(',')
         self.validate_community = os.environ.get('SNMP_TRAP_VALIDATE_COMMUNITY', 'false').lower() == 'true'
+        self.rcvbuf = int(os.environ.get('SNMP_TRAP_RCVBUF', 0))
+        
+        # Batched persistence on its own connection and thread
+        self.writer = TrapBatchWriter(
+            self._connect,
+            method=os.environ.get('SNMP_TRAP_INGEST_METHOD', 'copy'),
+            shared_alarms=processes > 1,
+        )
+        self.write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='trap-writer')
+    
+    @staticmethod
+    def _connect():
+        """Open a new autocommit database connection."""
+        conn = psycopg2.connect(
+            host=os.environ.get('PG_HOST', 'localhost'),
+            port=os.environ.get('PG_PORT', '5432'),
+            database=os.environ.get('PG_DATABASE', 'network_scan'),
+            user=os.environ.get('PG_USER', 'postgres'),
+            password=os.environ.get('PG_PASSWORD', 'postgres'),
+            cursor_factory=RealDictCursor
+        )
+        conn.autocommit = True
+        return conn
     
     def _get_db_connection(self):
-        """Get database connection."""
+        """Get the status connection (the batch writer has its own)."""
         if self.db_conn is None or self.db_conn.closed:
-            self.db_conn = psycopg2.connect(
-                host=os.environ.get('PG_HOST', 'localhost'),
-                port=os.environ.get('PG_PORT', '5432'),
-                database=os.environ.get('PG_DATABASE', 'network_scan'),
-                user=os.environ.get('PG_USER', 'postgres'),
-                password=os.environ.get('PG_PASSWORD', 'postgres'),
-                cursor_factory=RealDictCursor
-            )
-            self.db_conn.autocommit = True
+            self.db_conn = self._connect()
         return self.db_conn
     
     def _trap_callback(self, snmp_engine, state_reference, context_engine_id, context_name,
@@ -510,11 +876,10 @@ class SNMPTrapReceiver:
             self.traps_received += 1
             self.last_trap_at = datetime.now(timezone.utc)
             
-            if self.queue and not self.queue.full():
-                asyncio.get_event_loop().call_soon_threadsafe(
-                    self.queue.put_nowait, decoded
-                )
-            else:
+            # pysnmp calls back on the loop that owns the queue
+            try:
+                self.queue.put_nowait(decoded)
+            except (AttributeError, asyncio.QueueFull):
                 logger.warning(f"Trap queue full, dropping trap from {source_ip}")
                 self.traps_errors += 1
                 
@@ -522,163 +887,133 @@ class SNMPTrapReceiver:
             logger.error(f"Error in trap callback: {e}", exc_info=True)
             self.traps_errors += 1
     
-    async def _process_trap(self, trap: DecodedTrap):
-        """Process a single trap."""
+    def _route_trap(self, trap: DecodedTrap) -> Optional[tuple]:
+        """Route and decode one trap into a (trap, vendor, event) write item."""
         try:
-            # Route to handler
-            vendor = self.router.route(trap)
-            handler = self.handlers.get(vendor, self.handlers['generic'])
-            
-            # Handle trap
-            event = handler.handle(trap)
-            
-            # Store trap log
-            trap_log_id = await self._store_trap_log(trap, vendor)
-            
-            # Store event if generated
-            event_id = None
-            if event:
-                event_id = await self._store_event(event, trap_log_id)
-                
-                # Update trap log with event reference
-                if event_id:
-                    await self._update_trap_log(trap_log_id, event_id)
-            
-            self.traps_processed += 1
-            logger.info(f"Processed trap from {trap.source_ip}: {trap.trap_oid} -> {vendor}/{event.event_type if event else 'no-event'}")
-            
+            vendor, handler, decoded = self.router.dispatch(trap)
+            event = handler.handle(trap, decoded)
+            logger.debug(f"Routed trap from {trap.source_ip}: {trap.trap_oid} -> {vendor}/{event.event_type if event else 'no-event'}")
+            return trap, vendor, event
         except Exception as e:
             logger.error(f"Error processing trap: {e}", exc_info=True)
             self.traps_errors += 1
-    
-    async def _store_trap_log(self, trap: DecodedTrap, vendor: str) -> int:
-        """Store raw trap in trap_log table."""
-        try:
-            conn = self._get_db_connection()
-            with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO trap_log 
-                    (received_at, source_ip, source_port, snmp_version, community,
-                     enterprise_oid, trap_oid, vendor, uptime, varbinds, processed)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, TRUE)
-                    RETURNING id
-                """, (
-                    trap.received_at,
-                    trap.source_ip,
-                    trap.source_port,
-                    trap.snmp_version,
-                    trap.community,
-                    trap.enterprise_oid,
-                    trap.trap_oid,
-                    vendor,
-                    trap.uptime,
-                    json.dumps(trap.varbinds),
-                ))
-                result = cur.fetchone()
-                return result['id'] if result else None
-        except Exception as e:
-            logger.error(f"Error storing trap log: {e}")
-            return None
-    
-    async def _store_event(self, event: TrapEvent, trap_log_id: int) -> int:
-        """Store normalized event in trap_events table."""
-        try:
-            conn = self._get_db_connection()
-            with conn.cursor() as cur:
-                # Check for duplicate alarm (same alarm_id, not cleared)
-                if event.alarm_id and not event.is_clear:
-                    cur.execute("""
-                        SELECT id FROM trap_events 
-                        WHERE alarm_id = %s AND is_clear = FALSE
-                        ORDER BY created_at DESC LIMIT 1
-                    """, (event.alarm_id,))
-                    existing = cur.fetchone()
-                    if existing:
-                        logger.debug(f"Duplicate alarm {event.alarm_id}, skipping")
-                        return existing['id']
-                
-                # If this is a clear event, find the alarm to clear
-                cleared_event_id = None
-                if event.is_clear and event.alarm_id:
-                    cur.execute("""
-                        SELECT id FROM trap_events 
-                        WHERE alarm_id = %s AND is_clear = FALSE
-                        ORDER BY created_at DESC LIMIT 1
-                    """, (event.alarm_id,))
-                    alarm_to_clear = cur.fetchone()
-                    if alarm_to_clear:
-                        cleared_event_id = alarm_to_clear['id']
-                
-                # Resolve device name from source IP
-                device_name = await self._resolve_device_name(event.source_ip)
-                
-                cur.execute("""
-                    INSERT INTO trap_events 
-                    (source_ip, device_name, event_type, severity, object_type, object_id,
-                     description, details, trap_log_id, alarm_id, is_clear, cleared_event_id)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    RETURNING id
-                """, (
-                    event.source_ip,
-                    device_name or event.device_name,
-                    event.event_type,
-                    event.severity,
-                    event.object_type,
-                    event.object_id,
-                    event.description,
-                    json.dumps(event.details),
-                    trap_log_id,
-                    event.alarm_id,
-                    event.is_clear,
-                    cleared_event_id,
-                ))
-                result = cur.fetchone()
-                return result['id'] if result else None
-        except Exception as e:
-            logger.error(f"Error storing event: {e}")
             return None
     
-    async def _update_trap_log(self, trap_log_id: int, event_id: int):
-        """Update trap log with event reference."""
+    async def _next_batch(self) -> List[DecodedTrap]:
+        """
+        Collect up to batch_size traps, waiting at most batch_ms after the
+        first one arrives. Returns an empty list after 1s of silence.
+        """
         try:
-            conn = self._get_db_connection()
-            with conn.cursor() as cur:
-                cur.execute("""
-                    UPDATE trap_log SET event_id = %s, processed_at = NOW()
-                    WHERE id = %s
-                """, (event_id, trap_log_id))
-        except Exception as e:
-            logger.error(f"Error updating trap log: {e}")
+            batch = [await asyncio.wait_for(self.queue.get(), timeout=1.0)]
+        except asyncio.TimeoutError:
+            return []
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_ms / 1000
+        while len(batch) < self.batch_size:
+            # Drain what is already queued before waiting for more
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            remaining = deadline - loop.time()
+            if len(batch) >= self.batch_size or remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
     
-    async def _resolve_device_name(self, ip: str) -> Optional[str]:
-        """Resolve device name from IP address."""
+    async def _write_batch(self, items: List[tuple]):
+        """Write one batch on the writer thread and account for it."""
+        loop = asyncio.get_running_loop()
         try:
-            conn = self._get_db_connection()
-            with conn.cursor() as cur:
-                # Check devices table
-                cur.execute("""
-                    SELECT hostname FROM devices WHERE ip_address = %s LIMIT 1
-                """, (ip,))
-                result = cur.fetchone()
-                if result:
-                    return result['hostname']
+            written = await loop.run_in_executor(self.write_executor, self.writer.write, items)
+            self.traps_processed += written
+            logger.debug(f"Persisted {written} traps in {self.writer.last_write_seconds * 1000:.1f}ms")
         except Exception as e:
-            logger.debug(f"Could not resolve device name for {ip}: {e}")
-        return None
+            logger.error(f"Error persisting batch of {len(items)} traps: {e}")
+            self.traps_errors += len(items)
     
-    async def _worker(self, worker_id: int):
-        """Worker coroutine to process traps from queue."""
-        logger.info(f"Worker {worker_id} started")
+    async def _batch_writer(self):
+        """
+        Drain the queue in batches and persist them.
+        
+        Routing runs on the event loop; the database write runs on a single
+        writer thread, so the loop keeps receiving and the next batch fills
+        while the previous one is being written.
+        """
+        logger.info(f"Batch writer started (batch size {self.batch_size}, {self.batch_ms:g}ms deadline)")
+        in_flight = None
         while self.running:
             try:
-                trap = await asyncio.wait_for(self.queue.get(), timeout=1.0)
-                await self._process_trap(trap)
-                self.queue.task_done()
-            except asyncio.TimeoutError:
-                continue
+                batch = await self._next_batch()
+                items = [item for item in map(self._route_trap, batch) if item]
+                if not items:
+                    continue
+                if in_flight:
+                    await in_flight
+                in_flight = asyncio.ensure_future(self._write_batch(items))
             except Exception as e:
-                logger.error(f"Worker {worker_id} error: {e}", exc_info=True)
-        logger.info(f"Worker {worker_id} stopped")
+                logger.error(f"Batch writer error: {e}", exc_info=True)
+        if in_flight:
+            await in_flight
+        logger.info("Batch writer stopped")
+    
+    def _publish_status(self, cur):
+        """Upsert this process's counters and recompute the totals."""
+        cur.execute("""
+            INSERT INTO trap_receiver_workers (
+                hostname, worker_index, pid, started_at, last_trap_at,
+                traps_received, traps_processed, traps_errors, queue_depth,
+                batches, is_running, updated_at
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+            ON CONFLICT (hostname, worker_index) DO UPDATE SET
+                pid = EXCLUDED.pid,
+                started_at = EXCLUDED.started_at,
+                last_trap_at = EXCLUDED.last_trap_at,
+                traps_received = EXCLUDED.traps_received,
+                traps_processed = EXCLUDED.traps_processed,
+                traps_errors = EXCLUDED.traps_errors,
+                queue_depth = EXCLUDED.queue_depth,
+                batches = EXCLUDED.batches,
+                is_running = EXCLUDED.is_running,
+                updated_at = NOW()
+        """, (
+            self.hostname,
+            self.worker_index,
+            os.getpid(),
+            self.started_at,
+            self.last_trap_at,
+            self.traps_received,
+            self.traps_processed,
+            self.traps_errors,
+            self.queue.qsize() if self.queue else 0,
+            self.writer.batches,
+            self.running,
+        ))
+        # Workers that stopped reporting (killed) no longer count as running
+        cur.execute("""
+            UPDATE trap_receiver_status s SET
+                traps_received = w.traps_received,
+                traps_processed = w.traps_processed,
+                traps_errors = w.traps_errors,
+                queue_depth = w.queue_depth,
+                is_running = w.is_running,
+                last_trap_at = w.last_trap_at,
+                updated_at = NOW()
+            FROM (
+                SELECT
+                    COALESCE(SUM(traps_received), 0) AS traps_received,
+                    COALESCE(SUM(traps_processed), 0) AS traps_processed,
+                    COALESCE(SUM(traps_errors), 0) AS traps_errors,
+                    COALESCE(SUM(queue_depth) FILTER (WHERE is_running), 0) AS queue_depth,
+                    COALESCE(BOOL_OR(is_running AND updated_at > NOW() - INTERVAL '60 seconds'), FALSE) AS is_running,
+                    MAX(last_trap_at) AS last_trap_at
+                FROM trap_receiver_workers
+            ) w
+            WHERE s.id = 1
+        """)
     
     async def _update_status(self):
         """Periodically update status in database."""
@@ -686,29 +1021,29 @@ class SNMPTrapReceiver:
             try:
                 conn = self._get_db_connection()
                 with conn.cursor() as cur:
-                    cur.execute("""
-                        UPDATE trap_receiver_status SET
-                            traps_received = %s,
-                            traps_processed = %s,
-                            traps_errors = %s,
-                            queue_depth = %s,
-                            is_running = %s,
-                            last_trap_at = %s,
-                            updated_at = NOW()
-                        WHERE id = 1
-                    """, (
-                        self.traps_received,
-                        self.traps_processed,
-                        self.traps_errors,
-                        self.queue.qsize() if self.queue else 0,
-                        self.running,
-                        self.last_trap_at,
-                    ))
+                    self._publish_status(cur)
             except Exception as e:
                 logger.error(f"Error updating status: {e}")
             
             await asyncio.sleep(10)
     
+    def _resume_counters(self, cur):
+        """
+        Continue a restarted worker's counters from its last report, so the
+        totals do not drop when the supervisor replaces a process.
+        """
+        cur.execute("""
+            SELECT traps_received, traps_processed, traps_errors, last_trap_at
+            FROM trap_receiver_workers
+            WHERE hostname = %s AND worker_index = %s
+        """, (self.hostname, self.worker_index))
+        row = cur.fetchone()
+        if row:
+            self.traps_received = row['traps_received'] or 0
+            self.traps_processed = row['traps_processed'] or 0
+            self.traps_errors = row['traps_errors'] or 0
+            self.last_trap_at = row['last_trap_at']
+    
     def start(self):
         """Start the trap receiver (synchronous - pysnmp manages the event loop)."""
         logger.info(f"Starting SNMP Trap Receiver on {self.host}:{self.port}")
@@ -719,11 +1054,13 @@ class SNMPTrapReceiver:
         # Create SNMP engine
         self.snmp_engine = engine.SnmpEngine()
         
-        # Configure transport (pysnmp 7.x API)
+        # Configure transport (pysnmp 7.x API) on our own socket so it can
+        # join a SO_REUSEPORT group
+        sock = open_trap_socket(self.host, self.port, self.processes, self.rcvbuf)
         config.add_transport(
             self.snmp_engine,
             udp.DOMAIN_NAME,
-            udp.UdpTransport().open_server_mode((self.host, self.port))
+            udp.UdpTransport().open_server_mode(sock=sock)
         )
         
         # Configure community strings (pysnmp 7.x API)
@@ -739,29 +1076,37 @@ class SNMPTrapReceiver:
         # Create queue on this loop
         self.queue = asyncio.Queue(maxsize=self.queue_size)
         
-        # Schedule workers and status updater on pysnmp's event loop
-        for i in range(self.num_workers):
-            loop.create_task(self._worker(i))
+        # Vendor prefixes from the MIB profiles join the built-in ones
+        try:
+            with self._get_db_connection().cursor() as cur:
+                added = self.router.load_profiles(cur)
+            if added:
+                logger.info(f"Routing {added} enterprise prefixes from snmp_profiles")
+        except Exception as e:
+            logger.warning(f"Could not load snmp_profiles vendor prefixes: {e}")
+        
+        # Keep device names current as the NetBox cache changes
+        if os.environ.get('DEVICE_DIRECTORY_LISTEN', 'true').lower() == 'true':
+            self.writer.directory.start_listener()
+        
+        # Schedule the batch writer and status updater on pysnmp's event loop
+        loop.create_task(self._batch_writer())
         loop.create_task(self._update_status())
         
-        # Update initial status
+        # Update initial status (a supervised worker leaves the fleet reset
+        # to the supervisor)
         try:
             conn = self._get_db_connection()
             with conn.cursor() as cur:
-                cur.execute("""
-                    UPDATE trap_receiver_status SET
-                        started_at = %s,
-                        is_running = TRUE,
-                        traps_received = 0,
-                        traps_processed = 0,
-                        traps_errors = 0,
-                        updated_at = NOW()
-                    WHERE id = 1
-                """, (self.started_at,))
+                if self.processes > 1:
+                    self._resume_counters(cur)
+                else:
+                    reset_receiver_status(cur, self.hostname, self.started_at)
+                self._publish_status(cur)
         except Exception as e:
             logger.error(f"Error updating initial status: {e}")
         
-        logger.info(f"SNMP Trap Receiver started with {self.num_workers} workers")
+        logger.info(f"SNMP Trap Receiver started (worker {self.worker_index + 1}/{self.processes})")
         
         # Run SNMP engine (pysnmp 7.x API) - this blocks
         try:
@@ -772,16 +1117,15 @@ class SNMPTrapReceiver:
         finally:
             self.running = False
             
+            # Let an in-flight batch finish before closing its connection
+            self.write_executor.shutdown(wait=True)
+            self.writer.close()
+            
             # Update final status
             try:
                 conn = self._get_db_connection()
                 with conn.cursor() as cur:
-                    cur.execute("""
-                        UPDATE trap_receiver_status SET
-                            is_running = FALSE,
-                            updated_at = NOW()
-                        WHERE id = 1
-                    """)
+                    self._publish_status(cur)
             except Exception as e:
                 logger.error(f"Error updating final status: {e}")
             
@@ -796,10 +1140,106 @@ class SNMPTrapReceiver:
             self.snmp_engine.close_dispatcher()
 
 
+def reset_receiver_status(cur, hostname: str, started_at: datetime):
+    """Start a new run: drop this host's worker rows and zero the totals."""
+    cur.execute("DELETE FROM trap_receiver_workers WHERE hostname = %s", (hostname,))
+    cur.execute("""
+        UPDATE trap_receiver_status SET
+            started_at = %s,
+            is_running = TRUE,
+            traps_received = 0,
+            traps_processed = 0,
+            traps_errors = 0,
+            updated_at = NOW()
+        WHERE id = 1
+    """, (started_at,))
+
+
+def _run_worker(host: str, port: int, worker_index: int, processes: int):
+    """Entry point of one supervised receiver process."""
+    receiver = SNMPTrapReceiver(host, port, worker_index, processes)
+    
+    def signal_handler(sig, frame):
+        receiver.stop()
+    
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    receiver.start()
+
+
+def run_worker_processes(host: str, port: int, processes: int):
+    """
+    Run `processes` receivers on one port and keep them running.
+    
+    Workers are spawned (not forked) so each gets a clean pysnmp engine and
+    its own connections. A worker that exits is restarted, at most once
+    every 5 seconds per slot; SIGTERM/SIGINT stop them all.
+    """
+    import multiprocessing
+    
+    ctx = multiprocessing.get_context('spawn')
+    hostname = socket.gethostname()
+    workers: Dict[int, Any] = {}
+    started_at: Dict[int, float] = {}
+    stopping = False
+    
+    try:
+        conn = SNMPTrapReceiver._connect()
+        with conn.cursor() as cur:
+            reset_receiver_status(cur, hostname, datetime.now(timezone.utc))
+        conn.close()
+    except Exception as e:
+        logger.error(f"Error resetting receiver status: {e}")
+    
+    def spawn(index: int):
+        proc = ctx.Process(
+            target=_run_worker, args=(host, port, index, processes),
+            name=f'snmp-trap-receiver-{index}',
+        )
+        proc.start()
+        workers[index] = proc
+        started_at[index] = time.monotonic()
+        logger.info(f"Started trap receiver worker {index} (pid {proc.pid})")
+    
+    def signal_handler(sig, frame):
+        nonlocal stopping
+        logger.info(f"Received signal {sig}, stopping {processes} workers")
+        stopping = True
+        for proc in workers.values():
+            if proc.is_alive():
+                proc.terminate()
+    
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    
+    for index in range(processes):
+        spawn(index)
+    
+    while not stopping:
+        time.sleep(1)
+        for index, proc in list(workers.items()):
+            if stopping or proc.is_alive():
+                continue
+            if time.monotonic() - started_at[index] < 5:
+                continue
+            logger.warning(f"Trap receiver worker {index} exited with code {proc.exitcode}; restarting")
+            spawn(index)
+    
+    for proc in workers.values():
+        proc.join(timeout=15)
+        if proc.is_alive():
+            proc.kill()
+
+
 def main():
     """Main entry point."""
     host = os.environ.get('SNMP_TRAP_HOST', '0.0.0.0')
     port = int(os.environ.get('SNMP_TRAP_PORT', 162))
+    processes = int(os.environ.get('SNMP_TRAP_PROCESSES', 1))
+    
+    if processes > 1:
+        run_worker_processes(host, port, processes)
+        return
     
     receiver = SNMPTrapReceiver(host, port)
     
@@ -0,0 +1,194 @@
+"""
+SSH Expect Engine
+
+Prompt-driven command runner for interactive device shells (Ciena SAOS):
+- Reads until a compiled prompt regex matches the end of the output, or
+  a deadline passes; the channel read blocks, nothing sleeps
+- Learns the device prompt from the login banner so output lines ending
+  in '>' are not mistaken for it
+- Answers leftover --More-- pagers (paging is normally disabled up front)
+- Optional batch mode: every command is sent in one write, each followed
+  by a sentinel comment line, and the combined output is split on the
+  sentinels
+
+Usage:
+    shell = ExpectShell(client.invoke_shell(width=200, height=1000), timeout=10)
+    shell.start(setup=['system shell set more off'])
+    output = shell.run('port show')
+    outputs = shell.run_batch(['port show', 'alarm show'])
+"""
+
+import codecs
+import re
+import socket
+import time
+import uuid
+from typing import Dict, List, Optional, Pattern
+
+# Any CLI prompt at the end of the output: "5160-1> ", "5160-1*> ", "host# "
+DEFAULT_PROMPT = re.compile(r'[^\r\n]*[>#$]\s*$')
+
+MORE_PROMPT = re.compile(r'--More--\s*$')
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;?]*[a-zA-Z]')
+MORE_ARTIFACT = re.compile(r'--More--\s*(\x08+\s*\x08+)?')
+
+# Prompts and sentinels are at the end of the output; only the tail is searched
+SEARCH_WINDOW = 4096
+
+
+class ExpectTimeout(Exception):
+    """Raised when the prompt is not seen before the deadline."""
+
+    def __init__(self, message: str, output: str = ''):
+        self.output = output
+        super().__init__(message)
+
+
+def clean_output(text: str) -> str:
+    """Strip ANSI escapes, pager artifacts and carriage returns."""
+    text = ANSI_ESCAPE.sub('', text)
+    text = MORE_ARTIFACT.sub('', text)
+    return text.replace('\r', '')
+
+
+def prompt_pattern_for(prompt_line: str) -> Pattern:
+    """
+    Compile a pattern matching this device's prompt.
+
+    The SAOS prompt is the hostname followed by '>', with a '*' when the
+    running config is unsaved ("5160-1> ", "5160-1*> "); the '*' is
+    optional in the pattern so saving config does not break matching.
+    """
+    prompt = prompt_line.strip()
+    match = re.match(r'^(.*?)(\*?)([>#$])$', prompt)
+    if not match or not match.group(1):
+        return DEFAULT_PROMPT
+    return re.compile(r'(?:^|\n)' + re.escape(match.group(1)) + r'\*?' + re.escape(match.group(3)) + r'\s*$')
+
+
+class ExpectShell:
+    """
+    Interactive shell channel driven by prompt matching.
+
+    Args:
+        channel: paramiko Channel from invoke_shell()
+        timeout: Default seconds allowed per command
+        prompt: Prompt pattern (learned from the banner by start() if None)
+    """
+
+    MARKER_COMMAND = '! {marker}'
+
+    def __init__(self, channel, timeout: float = 10, prompt: Optional[Pattern] = None):
+        self.channel = channel
+        self.timeout = timeout
+        self.prompt = prompt
+        self.prompt_line = ''
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+        self._buffer = ''
+        self.bytes_read = 0
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _recv(self, deadline: float) -> str:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise socket.timeout()
+        self.channel.settimeout(remaining)
+        data = self.channel.recv(65535)
+        if not data:
+            raise EOFError("Shell channel closed")
+        self.bytes_read += len(data)
+        return self._decoder.decode(data)
+
+    def read_until(self, pattern: Pattern, timeout: float = None) -> str:
+        """
+        Read until pattern matches the end of the output, answering pagers.
+
+        Returns everything read (including the match); text received after
+        the match stays buffered for the next read.
+        """
+        deadline = time.monotonic() + (timeout or self.timeout)
+        output = self._buffer
+        self._buffer = ''
+        while True:
+            tail = max(0, len(output) - SEARCH_WINDOW)
+            match = pattern.search(output, tail)
+            if match:
+                self._buffer = output[match.end():]
+                return output[:match.end()]
+            if MORE_PROMPT.search(output, tail):
+                # Left in the output; clean_output() removes the pager artifacts
+                self.channel.sendall(' ')
+            try:
+                output += self._recv(deadline)
+            except socket.timeout:
+                raise ExpectTimeout(
+                    f"Prompt not seen within {timeout or self.timeout}s", output=clean_output(output)
+                )
+
+    def start(self, setup: List[str] = None, timeout: float = None):
+        """Wait for the first prompt, learn it, and run setup commands (e.g. disable paging)."""
+        banner = self.read_until(self.prompt or DEFAULT_PROMPT, timeout)
+        self.prompt_line = clean_output(banner).rsplit('\n', 1)[-1]
+        if self.prompt is None:
+            self.prompt = prompt_pattern_for(self.prompt_line)
+        for command in setup or []:
+            self.run(command, timeout)
+
+    # ------------------------------------------------------------------
+    # Commands
+    # ------------------------------------------------------------------
+
+    def _strip_echo_and_prompt(self, command: str, text: str) -> str:
+        """Drop everything up to the echoed command line and the trailing prompt."""
+        text = clean_output(text)
+        lines = text.split('\n')
+        for i, line in enumerate(lines):
+            if line.rstrip().endswith(command):
+                lines = lines[i + 1:]
+                break
+        if lines and self.prompt.search(lines[-1]):
+            lines = lines[:-1]
+        return '\n'.join(lines).strip('\n')
+
+    def run(self, command: str, timeout: float = None) -> str:
+        """Send one command and return its output once the prompt returns."""
+        self.channel.sendall(command + '\n')
+        return self._strip_echo_and_prompt(command, self.read_until(self.prompt, timeout))
+
+    def run_batch(self, commands: List[str], timeout: float = None) -> Dict[str, str]:
+        """
+        Send all commands in one write and split the outputs on sentinels.
+
+        Each command is followed by a comment line carrying a unique marker;
+        the shell echoes it after the command's output. timeout applies to
+        the whole batch (default: the per-command timeout times the number
+        of commands).
+        """
+        token = uuid.uuid4().hex[:12]
+        markers = [f'OCMARK-{token}-{i}' for i in range(len(commands))]
+        payload = ''.join(
+            f"{command}\n{self.MARKER_COMMAND.format(marker=marker)}\n"
+            for command, marker in zip(commands, markers)
+        )
+        self.channel.sendall(payload)
+
+        last_marker = re.compile(re.escape(markers[-1]) + r'[\s\S]*?' + self.prompt.pattern)
+        text = self.read_until(last_marker, timeout or self.timeout * max(1, len(commands)))
+
+        results = {}
+        position = 0
+        for command, marker in zip(commands, markers):
+            # The marker's echo line ends the command's output
+            match = re.compile(r'[^\n]*' + re.escape(marker) + r'[^\n]*\n?').search(text, position)
+            if not match:
+                results[command] = ''
+                continue
+            results[command] = self._strip_echo_and_prompt(command, text[position:match.start()])
+            position = match.end()
+        return results
+
+    def close(self):
+        self.channel.close()
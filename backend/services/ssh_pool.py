@@ -0,0 +1,423 @@
+"""
+SSH Session Pool
+
+Authenticated paramiko transports kept open between polls and commands:
+- Sessions keyed by host, port, username and credential
+- Exclusive checkout; each caller opens its own channels on the transport
+- At most SSH_POOL_MAX_PER_HOST sessions per host, further callers wait
+- Idle sessions closed after SSH_POOL_IDLE_TTL seconds
+- Transport keepalives, and a liveness check before a session is reused
+- A reused session that fails is replaced and the call retried once
+
+Opening a session costs a TCP connect, key exchange and authentication,
+often 1-3 s on SAOS switches; a reused session costs nothing. get_stats()
+reports the handshake time reuse has saved.
+
+Usage:
+    pool = get_ssh_pool()
+    output = pool.run(lambda client: ..., host, username, password, timeout=30)
+
+    with pool.session(host, username, password) as client:
+        stdin, stdout, stderr = client.exec_command('show version')
+"""
+
+import hashlib
+import io
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import paramiko
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IDLE_TTL = float(os.environ.get('SSH_POOL_IDLE_TTL', '300'))
+DEFAULT_KEEPALIVE = int(os.environ.get('SSH_POOL_KEEPALIVE', '30'))
+DEFAULT_MAX_PER_HOST = int(os.environ.get('SSH_POOL_MAX_PER_HOST', '2'))
+
+# Errors that mean the transport is gone, not that the command failed
+BROKEN_SESSION_ERRORS = (paramiko.SSHException, EOFError, socket.error)
+
+
+class SSHPoolTimeout(Exception):
+    """Raised when no session for a host frees up within the timeout."""
+
+    def __init__(self, host: str, timeout: float):
+        self.host = host
+        super().__init__(f"No SSH session available for {host} within {timeout}s")
+
+
+SessionKey = Tuple[str, int, str, str]
+
+
+def session_key(host: str, port: int, username: str, password: str = None,
+                private_key: str = None) -> SessionKey:
+    """Pool key for a host and credential (secrets are hashed, not kept in the key)."""
+    secret = hashlib.sha256(f"{password or ''}\0{private_key or ''}".encode()).hexdigest()
+    return (host, int(port), username or '', secret)
+
+
+def _load_private_key(private_key: str, passphrase: str = None) -> paramiko.PKey:
+    """Parse a PEM/OpenSSH private key of any type paramiko supports."""
+    for key_class in (paramiko.Ed25519Key, paramiko.ECDSAKey, paramiko.RSAKey):
+        try:
+            return key_class.from_private_key(io.StringIO(private_key), password=passphrase)
+        except paramiko.SSHException:
+            continue
+    raise paramiko.SSHException("Unsupported or invalid private key")
+
+
+class PooledSSHSession:
+    """An authenticated SSHClient with its pool bookkeeping."""
+
+    __slots__ = ('key', 'client', 'created_at', 'last_used', 'uses', 'handshake_ms', 'channels_opened')
+
+    def __init__(self, key: SessionKey, client: paramiko.SSHClient, handshake_ms: float):
+        self.key = key
+        self.client = client
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+        self.handshake_ms = handshake_ms
+        self.channels_opened = 0
+        self._count_channels()
+
+    def _count_channels(self):
+        """Count channels the device accepted (exec_command, invoke_shell and SFTP all open one)."""
+        transport = self.client.get_transport()
+        if transport is None:
+            return
+        open_channel = transport.open_channel
+
+        def counted_open_channel(*args, **kwargs):
+            channel = open_channel(*args, **kwargs)
+            self.channels_opened += 1
+            return channel
+
+        transport.open_channel = counted_open_channel
+
+    @property
+    def host(self) -> str:
+        return self.key[0]
+
+    def is_alive(self) -> bool:
+        transport = self.client.get_transport()
+        return bool(transport and transport.is_active() and transport.is_authenticated())
+
+    def close(self):
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+
+class SSHSessionPool:
+    """
+    Thread-safe pool of authenticated SSH sessions.
+
+    A session is checked out by one caller at a time. Sessions are opened
+    on demand and never more than max_per_host to a host; when a host is
+    at its limit an idle session for another credential is closed to make
+    room, otherwise the caller waits for a session to be returned.
+    """
+
+    def __init__(
+        self,
+        idle_ttl: float = None,
+        keepalive: int = None,
+        max_per_host: int = None,
+    ):
+        self.idle_ttl = idle_ttl if idle_ttl is not None else DEFAULT_IDLE_TTL
+        self.keepalive = keepalive if keepalive is not None else DEFAULT_KEEPALIVE
+        self.max_per_host = max_per_host or DEFAULT_MAX_PER_HOST
+        self._lock = threading.Condition()
+        self._idle: Dict[SessionKey, List[PooledSSHSession]] = {}
+        self._open_per_host: Dict[str, int] = {}
+        self._in_use = 0
+        self._closed = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+        self._stats = {
+            'connects': 0, 'connect_errors': 0, 'reuses': 0, 'reconnects': 0,
+            'retries': 0, 'discarded': 0, 'expired': 0, 'waits': 0, 'timeouts': 0,
+            'handshake_ms_total': 0.0, 'handshake_ms_saved': 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Connecting
+    # ------------------------------------------------------------------
+
+    def _connect(self, host: str, port: int, username: str, password: str,
+                 timeout: float, private_key: str = None, passphrase: str = None,
+                 look_for_keys: bool = False, allow_agent: bool = False) -> paramiko.SSHClient:
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            client.connect(
+                hostname=host,
+                port=port,
+                username=username,
+                password=password or None,
+                pkey=_load_private_key(private_key, passphrase) if private_key else None,
+                timeout=timeout,
+                banner_timeout=timeout,
+                auth_timeout=timeout,
+                look_for_keys=look_for_keys,
+                allow_agent=allow_agent,
+            )
+        except Exception:
+            client.close()
+            raise
+        if self.keepalive:
+            client.get_transport().set_keepalive(self.keepalive)
+        return client
+
+    # ------------------------------------------------------------------
+    # Checkout / return
+    # ------------------------------------------------------------------
+
+    def _take_idle(self, key: SessionKey) -> Optional[PooledSSHSession]:
+        """Pop a live idle session for key (caller holds the lock)."""
+        sessions = self._idle.get(key)
+        while sessions:
+            session = sessions.pop()
+            if session.is_alive():
+                return session
+            # Dropped by the device or the network while idle
+            self._forget(session)
+            self._stats['reconnects'] += 1
+        return None
+
+    def _evict_idle_for_host(self, host: str) -> bool:
+        """Close the least recently used idle session to host (caller holds the lock)."""
+        candidates = [s for (h, *_), sessions in self._idle.items() if h == host for s in sessions]
+        if not candidates:
+            return False
+        oldest = min(candidates, key=lambda s: s.last_used)
+        self._idle[oldest.key].remove(oldest)
+        self._forget(oldest)
+        return True
+
+    def _forget(self, session: PooledSSHSession):
+        """Drop a session from the host count and close it (caller holds the lock)."""
+        self._open_per_host[session.host] -= 1
+        if not self._open_per_host[session.host]:
+            del self._open_per_host[session.host]
+        if not self._idle.get(session.key):
+            self._idle.pop(session.key, None)
+        session.close()
+        self._lock.notify_all()
+
+    def acquire(self, host: str, username: str, password: str = None, port: int = 22,
+                timeout: float = 30, **connect_kwargs) -> PooledSSHSession:
+        """Check out a session for host and credential, connecting if needed."""
+        key = session_key(host, port, username, password, connect_kwargs.get('private_key'))
+        deadline = time.monotonic() + timeout
+        waited = False
+        with self._lock:
+            while True:
+                session = self._take_idle(key)
+                if session is not None:
+                    session.uses += 1
+                    self._in_use += 1
+                    self._stats['reuses'] += 1
+                    self._stats['handshake_ms_saved'] += session.handshake_ms
+                    return session
+                if self._open_per_host.get(host, 0) < self.max_per_host or self._evict_idle_for_host(host):
+                    # Reserve the slot, then connect without holding the lock
+                    self._open_per_host[host] = self._open_per_host.get(host, 0) + 1
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise SSHPoolTimeout(host, timeout)
+                if not waited:
+                    waited = True
+                    self._stats['waits'] += 1
+                self._lock.wait(remaining)
+
+        started = time.perf_counter()
+        try:
+            client = self._connect(host, port, username, password, timeout, **connect_kwargs)
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+                self._open_per_host[host] -= 1
+                if not self._open_per_host[host]:
+                    del self._open_per_host[host]
+                self._stats['connect_errors'] += 1
+                self._lock.notify_all()
+            raise
+        handshake_ms = (time.perf_counter() - started) * 1000
+
+        session = PooledSSHSession(key, client, handshake_ms)
+        session.uses = 1
+        with self._lock:
+            self._stats['connects'] += 1
+            self._stats['handshake_ms_total'] += handshake_ms
+        self._start_reaper()
+        return session
+
+    def release(self, session: PooledSSHSession, discard: bool = False):
+        """Return a session to the pool (or close it if discard or no longer alive)."""
+        with self._lock:
+            self._in_use -= 1
+            if discard or self._closed.is_set() or not session.is_alive():
+                self._stats['discarded'] += 1
+                self._forget(session)
+                return
+            session.last_used = time.monotonic()
+            self._idle.setdefault(session.key, []).append(session)
+            self._lock.notify_all()
+
+    @contextmanager
+    def session(self, host: str, username: str, password: str = None, port: int = 22,
+                timeout: float = 30, **connect_kwargs):
+        """
+        Context manager yielding a pooled paramiko SSHClient.
+
+        The session is discarded if the block raises a transport error.
+        Do not close the client; open channels (exec_command, invoke_shell)
+        and close those instead.
+        """
+        pooled = self.acquire(host, username, password, port, timeout, **connect_kwargs)
+        try:
+            yield pooled.client
+        except BROKEN_SESSION_ERRORS:
+            self.release(pooled, discard=True)
+            raise
+        except BaseException:
+            self.release(pooled)
+            raise
+        else:
+            self.release(pooled)
+
+    def run(self, fn: Callable[[paramiko.SSHClient], Any], host: str, username: str,
+            password: str = None, port: int = 22, timeout: float = 30, **connect_kwargs) -> Any:
+        """
+        Call fn(client) on a pooled session and return its result.
+
+        If a reused session turns out to be dead before fn opened a channel
+        (the device closed it since the liveness check), fn is retried once
+        on a new session. Once a channel was opened the command may have
+        run, so timeouts and any later failure are raised, never retried;
+        so are authentication errors and failures on a new session.
+        """
+        pooled = self.acquire(host, username, password, port, timeout, **connect_kwargs)
+        channels_before = pooled.channels_opened
+        try:
+            result = fn(pooled.client)
+        except paramiko.AuthenticationException:
+            self.release(pooled, discard=True)
+            raise
+        except BROKEN_SESSION_ERRORS as e:
+            retry = self._safe_to_retry(pooled, channels_before, e)
+            self.release(pooled, discard=True)
+            if not retry:
+                raise
+            with self._lock:
+                self._stats['retries'] += 1
+            logger.debug(f"Pooled SSH session to {host} failed, reconnecting")
+            with self.session(host, username, password, port, timeout, **connect_kwargs) as client:
+                return fn(client)
+        except BaseException:
+            self.release(pooled)
+            raise
+        self.release(pooled)
+        return result
+
+    @staticmethod
+    def _safe_to_retry(session: PooledSSHSession, channels_before: int, error: BaseException) -> bool:
+        """True if fn failed on a reused session whose transport died before any channel opened."""
+        if session.uses <= 1 or isinstance(error, (socket.timeout, TimeoutError)):
+            return False
+        return session.channels_opened == channels_before and not session.is_alive()
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def prune(self) -> int:
+        """Close idle sessions past the idle TTL or no longer alive; returns number closed."""
+        now = time.monotonic()
+        closed = 0
+        with self._lock:
+            for key, sessions in list(self._idle.items()):
+                for session in list(sessions):
+                    if now - session.last_used >= self.idle_ttl or not session.is_alive():
+                        sessions.remove(session)
+                        self._forget(session)
+                        self._stats['expired'] += 1
+                        closed += 1
+        return closed
+
+    def _start_reaper(self):
+        if self._reaper is not None or self._closed.is_set():
+            return
+        with self._lock:
+            if self._reaper is not None:
+                return
+            self._reaper = threading.Thread(target=self._reap, name='ssh-pool-reaper', daemon=True)
+            self._reaper.start()
+
+    def _reap(self):
+        interval = max(1.0, min(self.idle_ttl, self.keepalive or self.idle_ttl) / 2)
+        while not self._closed.wait(interval):
+            try:
+                self.prune()
+            except Exception as e:
+                logger.warning(f"SSH pool prune failed: {e}")
+
+    def close(self):
+        """Close every idle session; sessions in use are closed when returned."""
+        self._closed.set()
+        with self._lock:
+            for sessions in list(self._idle.values()):
+                for session in list(sessions):
+                    sessions.remove(session)
+                    self._forget(session)
+            self._idle.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool occupancy, connect/reuse counts and handshake time saved."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['open'] = sum(self._open_per_host.values())
+            stats['idle'] = sum(len(s) for s in self._idle.values())
+            stats['in_use'] = self._in_use
+            stats['hosts'] = len(self._open_per_host)
+        stats['max_per_host'] = self.max_per_host
+        stats['idle_ttl'] = self.idle_ttl
+        stats['avg_handshake_ms'] = (
+            round(stats['handshake_ms_total'] / stats['connects'], 1) if stats['connects'] else 0.0
+        )
+        stats['handshake_ms_total'] = round(stats['handshake_ms_total'], 1)
+        stats['handshake_ms_saved'] = round(stats['handshake_ms_saved'], 1)
+        return stats
+
+
+_ssh_pool: Optional[SSHSessionPool] = None
+_ssh_pool_lock = threading.Lock()
+
+
+def get_ssh_pool() -> SSHSessionPool:
+    """Get the process-wide SSH session pool."""
+    global _ssh_pool
+    if _ssh_pool is None:
+        with _ssh_pool_lock:
+            if _ssh_pool is None:
+                _ssh_pool = SSHSessionPool()
+    return _ssh_pool
+
+
+def close_ssh_pool():
+    """Close the process-wide SSH session pool."""
+    global _ssh_pool
+    with _ssh_pool_lock:
+        if _ssh_pool is not None:
+            _ssh_pool.close()
+            _ssh_pool = None
@@ -213,7 +213,7 @@ class TemplateService:
                 json.dumps(available_variables or [])
             ))
             result = dict(cursor.fetchone())
-            self.db.get_connection().commit()
+            self.db.commit()
             return result
     
     def update_template(self, template_id: int, **kwargs) -> Optional[Dict]:
@@ -248,7 +248,7 @@ class TemplateService:
             
             row = cursor.fetchone()
             if row:
-                self.db.get_connection().commit()
+                self.db.commit()
                 return dict(row)
             return None
     
@@ -260,7 +260,7 @@ class TemplateService:
                 WHERE id = %s AND is_default = false
             """, (template_id,))
             deleted = cursor.rowcount > 0
-            self.db.get_connection().commit()
+            self.db.commit()
             return deleted
 
 
@@ -0,0 +1,178 @@
+"""
+Active Trap Alarm Index
+
+Authoritative in-memory map of open trap alarms for the trap receiver:
+- alarm_id -> raising event id, severity, first/last seen, occurrence count
+- Rebuilt from the active_trap_alarms view at startup (and after a failed
+  write), then kept current by the receiver's single batch writer
+- Dedup and clear correlation are dict lookups; a repeat raise bumps the
+  open alarm's count and last_seen instead of being dropped
+
+Changes for a batch are staged in an AlarmIndexBatch and only applied once
+the batch's transaction commits, so a rolled-back write never leaves the
+index ahead of the database.
+"""
+
+import logging
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ActiveAlarm:
+    """One open alarm."""
+    alarm_id: str
+    event_id: int
+    severity: str
+    first_seen: datetime
+    last_seen: datetime
+    count: int = 1
+
+
+class ActiveAlarmIndex:
+    """alarm_id -> ActiveAlarm for every alarm raised and not yet cleared."""
+
+    def __init__(self):
+        self._alarms: Dict[str, ActiveAlarm] = {}
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._alarms)
+
+    def __contains__(self, alarm_id: str) -> bool:
+        return alarm_id in self._alarms
+
+    def __iter__(self) -> Iterator[ActiveAlarm]:
+        return iter(self._alarms.values())
+
+    def get(self, alarm_id: str) -> Optional[ActiveAlarm]:
+        return self._alarms.get(alarm_id)
+
+    def load(self, cursor) -> int:
+        """
+        Rebuild the index from active_trap_alarms.
+
+        If the view holds several open raises for one alarm_id (possible
+        with rows written before the index existed), the newest wins.
+        """
+        cursor.execute("""
+            SELECT id, alarm_id, severity, created_at, last_seen_at, occurrence_count
+            FROM active_trap_alarms
+            ORDER BY id
+        """)
+        alarms = {}
+        for row in cursor.fetchall():
+            alarms[row['alarm_id']] = self._from_row(row)
+        self._alarms = alarms
+        self.loaded = True
+        logger.info(f"Loaded {len(alarms)} active alarms")
+        return len(alarms)
+
+    def refresh(self, cursor, alarm_ids) -> int:
+        """
+        Re-read the given alarm ids from the database.
+
+        Used when several receiver processes share the trap stream: any
+        process may have raised, repeated or cleared one of these alarms
+        (e.g. before sources were re-steered after a restart). Ids open in
+        the database are adopted or brought up to date; ids the database
+        no longer has open are evicted, so a new raise is not counted as
+        a repeat of a cleared alarm.
+
+        Returns:
+            Number of alarm ids open in the database
+        """
+        alarm_ids = list(set(alarm_ids))
+        if not alarm_ids:
+            return 0
+        cursor.execute("""
+            SELECT id, alarm_id, severity, created_at, last_seen_at, occurrence_count
+            FROM active_trap_alarms
+            WHERE alarm_id = ANY(%s)
+            ORDER BY id
+        """, (alarm_ids,))
+        open_alarms = {row['alarm_id']: self._from_row(row) for row in cursor.fetchall()}
+        for alarm_id in alarm_ids:
+            if alarm_id in open_alarms:
+                self._alarms[alarm_id] = open_alarms[alarm_id]
+            else:
+                self._alarms.pop(alarm_id, None)
+        return len(open_alarms)
+
+    @staticmethod
+    def _from_row(row) -> ActiveAlarm:
+        return ActiveAlarm(
+            alarm_id=row['alarm_id'],
+            event_id=row['id'],
+            severity=row['severity'],
+            first_seen=row['created_at'],
+            last_seen=row['last_seen_at'] or row['created_at'],
+            count=row['occurrence_count'] or 1,
+        )
+
+    def invalidate(self):
+        """Force a reload before the next batch."""
+        self.loaded = False
+
+    def batch(self) -> 'AlarmIndexBatch':
+        return AlarmIndexBatch(self)
+
+    def apply(self, staged: Dict[str, Optional[ActiveAlarm]]):
+        """Apply a committed batch's changes (None = cleared)."""
+        for alarm_id, alarm in staged.items():
+            if alarm is None:
+                self._alarms.pop(alarm_id, None)
+            else:
+                self._alarms[alarm_id] = alarm
+
+    def get_stats(self) -> Dict:
+        by_severity: Dict[str, int] = {}
+        for alarm in self._alarms.values():
+            by_severity[alarm.severity] = by_severity.get(alarm.severity, 0) + 1
+        return {'active_alarms': len(self._alarms), 'by_severity': by_severity}
+
+
+class AlarmIndexBatch:
+    """
+    Staged index changes for one write batch.
+
+    Lookups see the batch's own earlier changes layered over the index.
+    """
+
+    def __init__(self, index: ActiveAlarmIndex):
+        self.index = index
+        self.staged: Dict[str, Optional[ActiveAlarm]] = {}
+        # event_id -> (occurrences added, latest last_seen) for open alarms
+        self.repeats: Dict[int, Tuple[int, datetime]] = {}
+
+    def get(self, alarm_id: str) -> Optional[ActiveAlarm]:
+        if alarm_id in self.staged:
+            return self.staged[alarm_id]
+        return self.index.get(alarm_id)
+
+    def raise_alarm(self, alarm_id: str, event_id: int, severity: str, seen_at: datetime):
+        self.staged[alarm_id] = ActiveAlarm(alarm_id, event_id, severity, seen_at, seen_at)
+
+    def repeat(self, alarm: ActiveAlarm, seen_at: datetime) -> ActiveAlarm:
+        """Count another occurrence of an open alarm."""
+        if self.staged.get(alarm.alarm_id) is not alarm:
+            # Copy on first touch so the live index is untouched until commit
+            alarm = replace(alarm)
+            self.staged[alarm.alarm_id] = alarm
+        alarm.count += 1
+        alarm.last_seen = max(alarm.last_seen, seen_at)
+        added, _ = self.repeats.get(alarm.event_id, (0, seen_at))
+        self.repeats[alarm.event_id] = (added + 1, alarm.last_seen)
+        return alarm
+
+    def clear(self, alarm_id: str) -> Optional[ActiveAlarm]:
+        """Close an alarm; returns the alarm it cleared, if one was open."""
+        alarm = self.get(alarm_id)
+        self.staged[alarm_id] = None
+        return alarm
+
+    def commit(self):
+        self.index.apply(self.staged)
@@ -0,0 +1,188 @@
+"""
+Compiled OID dispatch for the SNMP trap receiver.
+
+Vendor prefixes, trap types and varbind fields are compiled once into arc
+tries. A lookup walks the OID's arcs and keeps the longest match, so its
+cost depends on OID length rather than table size, and matches always end
+on an arc boundary ('1.3.6.1.4.1.9' does not match '1.3.6.1.4.1.99').
+Resolved OIDs are memoised: a trap storm repeats a handful of trap and
+varbind OIDs.
+"""
+
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+
+class OidPrefixTable:
+    """
+    Longest-prefix map from OIDs to values.
+
+    Args:
+        entries: Initial (oid, value) pairs or a dict of them
+    """
+
+    __slots__ = ('_root', '_resolved', 'size')
+
+    # Resolved OIDs remembered per table; varbind OIDs carry instance
+    # suffixes, so this is bounded
+    MAX_RESOLVED = 50_000
+
+    def __init__(self, entries=None):
+        self._root: Dict = {}
+        self._resolved: Dict[str, Any] = {}
+        self.size = 0
+        if entries:
+            self.update(entries)
+
+    def add(self, oid: str, value: Any):
+        """Map oid and everything under it to value (replacing an existing entry)."""
+        node = self._root
+        for arc in oid.strip('.').split('.'):
+            node = node.setdefault(arc, {})
+        if None not in node:
+            self.size += 1
+        node[None] = value
+        self._resolved.clear()
+
+    def update(self, entries):
+        """Add (oid, value) pairs or a dict of them."""
+        for oid, value in (entries.items() if isinstance(entries, dict) else entries):
+            self.add(oid, value)
+
+    def get(self, oid: Optional[str], default: Any = None) -> Any:
+        """Value of the longest entry oid falls under, or default."""
+        if not oid:
+            return default
+        try:
+            value = self._resolved[oid]
+        except KeyError:
+            if len(self._resolved) >= self.MAX_RESOLVED:
+                self._resolved.clear()
+            value = self._resolved[oid] = self._walk(oid)
+        return default if value is None else value
+
+    def _walk(self, oid: str) -> Any:
+        node = self._root
+        value = None
+        for arc in oid.lstrip('.').split('.'):
+            node = node.get(arc)
+            if node is None:
+                break
+            if None in node:
+                value = node[None]
+        return value
+
+
+class VarbindExtractor:
+    """
+    Picks named fields out of a trap's varbinds.
+
+    Varbind OIDs under one of the declared columns map to its field
+    (instance suffixes included). Other OIDs go through the optional
+    fallback classifier, which keeps the loose matching vendors rely on
+    for undeclared OIDs. Either way each OID is classified once.
+
+    Args:
+        fields: Column OID -> field name
+        fallback: Callable(oid) -> field name or None for unmatched OIDs
+    """
+
+    __slots__ = ('_table', '_fallback', '_classified')
+
+    MAX_CLASSIFIED = 50_000
+
+    def __init__(self, fields: Optional[Dict[str, str]] = None,
+                 fallback: Optional[Callable[[str], Optional[str]]] = None):
+        self._table = OidPrefixTable(fields)
+        self._fallback = fallback
+        self._classified: Dict[str, Optional[str]] = {}
+
+    def field(self, oid: str) -> Optional[str]:
+        """Field name for a varbind OID, or None."""
+        try:
+            return self._classified[oid]
+        except KeyError:
+            pass
+        name = self._table.get(oid)
+        if name is None and self._fallback is not None:
+            name = self._fallback(oid)
+        if len(self._classified) >= self.MAX_CLASSIFIED:
+            self._classified.clear()
+        self._classified[oid] = name
+        return name
+
+    def extract(self, varbinds: Dict[str, Any]) -> Dict[str, Any]:
+        """Field name -> value; a later varbind wins over an earlier one."""
+        fields = {}
+        field = self.field
+        for oid, value in varbinds.items():
+            name = field(oid)
+            if name is not None:
+                fields[name] = value
+        return fields
+
+
+class TrapDispatchTable:
+    """
+    Memoised trap OID -> (vendor, handler, decoded trap type) dispatch.
+
+    The vendor comes from the enterprise OID, then the trap OID; traps of
+    no known vendor are 'standard' when their trap OID is one of
+    standard_traps and 'generic' otherwise. The handler for the vendor
+    decodes the trap OID once through its resolve(trap_oid) method; the
+    result is cached per (enterprise OID, trap OID) pair.
+
+    Args:
+        vendor_oids: Enterprise prefix -> vendor name
+        standard_traps: Standard trap OIDs (RFC 3418 snmpTraps)
+        handlers: Vendor name -> handler; 'generic' is the fallback
+    """
+
+    MAX_DECODED = 10_000
+
+    def __init__(self, vendor_oids: Dict[str, str], standard_traps: Iterable[str],
+                 handlers: Dict[str, Any]):
+        self.vendors = OidPrefixTable(vendor_oids)
+        self.standard_traps = frozenset(standard_traps)
+        self.handlers = handlers
+        self._decoded: Dict[Tuple[str, str], tuple] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def add_vendor(self, prefix: str, vendor: str):
+        """Route another enterprise prefix (e.g. from snmp_profiles)."""
+        self.vendors.add(prefix, vendor)
+        self._decoded.clear()
+
+    def vendor(self, enterprise_oid: str, trap_oid: str) -> str:
+        """Vendor name for a trap, 'standard' or 'generic'."""
+        vendor = self.vendors.get(enterprise_oid) or self.vendors.get(trap_oid)
+        if vendor:
+            return vendor
+        if trap_oid in self.standard_traps:
+            return 'standard'
+        return 'generic'
+
+    def dispatch(self, enterprise_oid: str, trap_oid: str) -> tuple:
+        """(vendor, handler, decoded) for a trap, from cache when seen before."""
+        key = (enterprise_oid, trap_oid)
+        route = self._decoded.get(key)
+        if route is not None:
+            self.hits += 1
+            return route
+        self.misses += 1
+        vendor = self.vendor(enterprise_oid, trap_oid)
+        handler = self.handlers.get(vendor) or self.handlers['generic']
+        route = (vendor, handler, handler.resolve(trap_oid))
+        if len(self._decoded) >= self.MAX_DECODED:
+            self._decoded.clear()
+        self._decoded[key] = route
+        return route
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Decode cache counters."""
+        return {
+            'vendor_prefixes': self.vendors.size,
+            'cached_routes': len(self._decoded),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
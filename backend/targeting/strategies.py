@@ -295,9 +295,8 @@ class NetBoxTargeting(BaseTargeting):
             if config.get('query'):
                 params['q'] = config['query']
             
-            # Fetch devices from NetBox
-            result = service.get_devices(**params)
-            devices = result.get('results', [])
+            # Fetch every matching device from NetBox, not just the first page
+            devices = service.get_all('dcim/devices/', params, fields=('id', 'primary_ip4', 'primary_ip'))
             
             # Extract primary IPs from devices
             targets = []
@@ -328,8 +327,10 @@ class NetBoxTargeting(BaseTargeting):
                     vm_params['cluster'] = config['cluster']
                 
                 try:
-                    vm_result = service._request('GET', 'virtualization/virtual-machines/', params={**vm_params, 'limit': 100})
-                    vms = vm_result.get('results', [])
+                    vms = service.get_all(
+                        'virtualization/virtual-machines/', vm_params,
+                        fields=('id', 'primary_ip4', 'primary_ip'),
+                    )
                     
                     for vm in vms:
                         primary_ip = vm.get('primary_ip4') or vm.get('primary_ip')
@@ -9,10 +9,18 @@ All polling should go through this task - no hardcoded OIDs.
 
 import asyncio
 import logging
-from datetime import datetime
-from typing import Dict, List, Any, Optional
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+
+from backend.services.counter_state import parse_timeticks
+from backend.services.metric_rollups import ROLLUP_SOURCES, update_rollups
 
 logger = logging.getLogger(__name__)
 
@@ -110,66 +118,670 @@ class MibMappingLoader:
             return [dict(row) for row in cursor.fetchall()]
 
 
-def apply_transform(value: Any, transform: str) -> Any:
-    """Apply transformation to SNMP value based on transform string."""
-    if not transform or value is None:
-        return value
+def _divide(divisor: float) -> Callable[[Any], Any]:
+    return lambda value: float(value) / divisor
+
+
+def _multiply(multiplier: float) -> Callable[[Any], Any]:
+    return lambda value: float(value) * multiplier
+
+
+def _hex_to_mac(value: Any) -> Any:
+    # Convert hex string to MAC address
+    if isinstance(value, bytes):
+        return ':'.join(f'{b:02x}' for b in value)
+    return str(value)
+
+
+def _timeticks_to_seconds(value: Any) -> Any:
+    return int(value) / 100
+
+
+@lru_cache(maxsize=256)
+def compile_transform(transform: Optional[str]) -> Optional[Callable[[Any], Any]]:
+    """
+    Parse a transform string (e.g. 'divide:10000') into a callable.
     
+    Returns None when no transformation applies, so callers can skip the
+    call entirely. Malformed transforms also compile to None.
+    """
+    if not transform:
+        return None
     try:
         if transform.startswith('divide:'):
-            divisor = float(transform.split(':')[1])
-            return float(value) / divisor
+            return _divide(float(transform.split(':')[1]))
         elif transform.startswith('multiply:'):
-            multiplier = float(transform.split(':')[1])
-            return float(value) * multiplier
+            return _multiply(float(transform.split(':')[1]))
         elif transform == 'hex_to_mac':
-            # Convert hex string to MAC address
-            if isinstance(value, bytes):
-                return ':'.join(f'{b:02x}' for b in value)
-            return str(value)
+            return _hex_to_mac
         elif transform == 'timeticks_to_seconds':
-            return int(value) / 100
-    except (ValueError, TypeError, IndexError):
+            return _timeticks_to_seconds
+    except (ValueError, IndexError):
         pass
+    return None
+
+
+def apply_transform(value: Any, transform: str) -> Any:
+    """Apply transformation to SNMP value based on transform string."""
+    fn = compile_transform(transform)
+    if fn is None or value is None:
+        return value
     
-    return value
+    try:
+        return fn(value)
+    except (ValueError, TypeError, ZeroDivisionError):
+        return value
 
 
-def parse_snmp_results(results: Dict[str, Any], oid_mappings: List[Dict]) -> Dict[str, Dict]:
+class CompiledMappings:
+    """
+    OID-prefix trie over a poll type's OID mappings.
+    
+    Each node is a dict of arc -> child node; the None key holds the
+    mapping that ends at that node as (name, group marker key, group name,
+    compiled transform). Resolving a varbind walks its arcs once and keeps
+    the longest matching mapping, so lookup cost depends on OID length
+    rather than the number of mappings.
+    """
+    
+    __slots__ = ('_root', '_resolved', 'size')
+    
+    # Resolved OIDs remembered per trie; the same table OIDs come back
+    # from every device of a poll type
+    MAX_RESOLVED = 200_000
+    
+    def __init__(self, oid_mappings: List[Dict]):
+        self._root: Dict = {}
+        self._resolved: Dict[str, Optional[Tuple[tuple, Any]]] = {}
+        self.size = 0
+        for mapping in oid_mappings:
+            node = self._root
+            for arc in mapping['oid'].strip('.').split('.'):
+                node = node.setdefault(arc, {})
+            if None not in node:
+                node[None] = (
+                    mapping['name'],
+                    f"_group_{mapping['name']}",
+                    mapping.get('group_name'),
+                    compile_transform(mapping.get('transform')),
+                )
+                self.size += 1
+    
+    def resolve(self, oid: str) -> Optional[Tuple[tuple, Any]]:
+        """
+        Resolve a varbind OID to (mapping entry, index).
+        
+        The index is the full OID suffix after the mapping: an int for
+        single-component indexes, a dotted string for multi-component ones.
+        Scalars matching a mapping exactly use their last arc (usually 0).
+        """
+        try:
+            return self._resolved[oid]
+        except KeyError:
+            pass
+        if len(self._resolved) >= self.MAX_RESOLVED:
+            self._resolved.clear()
+        match = self._resolved[oid] = self._walk(oid)
+        return match
+    
+    def _walk(self, oid: str) -> Optional[Tuple[tuple, Any]]:
+        arcs = oid.lstrip('.').split('.')
+        node = self._root
+        entry = None
+        depth = 0
+        for position, arc in enumerate(arcs, 1):
+            node = node.get(arc)
+            if node is None:
+                break
+            if None in node:
+                entry = node[None]
+                depth = position
+        if entry is None:
+            return None
+        
+        suffix = arcs[depth:] or arcs[-1:]
+        try:
+            if len(suffix) == 1:
+                return entry, int(suffix[0])
+            return entry, '.'.join(str(int(arc)) for arc in suffix)
+        except ValueError:
+            return None
+
+
+_compiled_mappings: Dict[tuple, CompiledMappings] = {}
+
+
+def get_compiled_mappings(oid_mappings: List[Dict]) -> CompiledMappings:
+    """
+    Get the compiled trie for a set of mappings, building it once.
+    
+    Cached by mapping content, so edits to snmp_oid_mappings produce a
+    fresh trie on the next poll.
+    """
+    key = tuple(
+        (m['oid'], m['name'], m.get('transform'), m.get('group_name'))
+        for m in oid_mappings
+    )
+    compiled = _compiled_mappings.get(key)
+    if compiled is None:
+        if len(_compiled_mappings) >= 64:
+            _compiled_mappings.clear()
+        compiled = _compiled_mappings[key] = CompiledMappings(oid_mappings)
+    return compiled
+
+
+def parse_snmp_results(results: Dict[str, Any], oid_mappings) -> Dict[Any, Dict]:
     """
     Parse SNMP results using OID mappings.
     
+    Args:
+        results: Varbind dict (OID -> value)
+        oid_mappings: Mapping dicts or a pre-built CompiledMappings
+    
     Returns dict keyed by index (e.g., port number) with field values.
     """
+    if not isinstance(oid_mappings, CompiledMappings):
+        oid_mappings = get_compiled_mappings(oid_mappings)
+    resolve = oid_mappings.resolve
+    
     parsed = {}  # index -> {field_name: value}
     
     for oid, raw_value in results.items():
-        # Normalize OID - remove leading dot if present
-        normalized_oid = oid.lstrip('.')
+        match = resolve(oid)
+        if match is None:
+            continue
+        (name, group_key, group_name, transform), index = match
         
-        # Find matching mapping
-        for mapping in oid_mappings:
-            mapping_oid = mapping['oid'].lstrip('.')
+        row = parsed.get(index)
+        if row is None:
+            row = parsed[index] = {}
+        
+        # Apply transform
+        if transform is not None and raw_value is not None:
+            try:
+                raw_value = transform(raw_value)
+            except (ValueError, TypeError, ZeroDivisionError):
+                pass
+        row[name] = raw_value
+        row[group_key] = group_name
+    
+    return parsed
+
+
+def _device_status(error: Optional[str]) -> str:
+    """Map a poll error to a polling_device_results status."""
+    text = (error or '').lower()
+    if 'timeout' in text or 'no response' in text:
+        return 'timeout'
+    if 'auth' in text or 'community' in text:
+        return 'auth_error'
+    if 'unreachable' in text or 'no route' in text:
+        return 'unreachable'
+    return 'error'
+
+
+class PollCyclePipeline:
+    """
+    Parse/store stage for one poll_by_type cycle.
+    
+    Device results are processed as they arrive: parsed through the
+    compiled mappings, buffered for their target table, and recorded in
+    polling_device_results. Every flush_rows buffered rows the buffer is
+    written from a single background thread while the event loop keeps
+    polling, and the polling_executions row is updated with progress.
+    """
+    
+    def __init__(
+        self,
+        db,
+        poll_type_name: str,
+        table_name: str,
+        compiled_mappings: CompiledMappings,
+        total_devices: int,
+        started_at: datetime,
+        poller=None,
+        flush_rows: Optional[int] = None,
+        executor=None,
+    ):
+        from backend.services.async_snmp_poller import CommonOIDs
+        from backend.services.metric_ingest import MetricIngestBuffer
+        
+        self.db = db
+        self.poll_type_name = poll_type_name
+        self.table_name = table_name
+        self.compiled_mappings = compiled_mappings
+        self.total_devices = total_devices
+        self.started_at = started_at
+        self.poller = poller
+        self.flush_rows = flush_rows or int(os.environ.get('POLL_FLUSH_ROWS', 5000))
+        self.ingest = MetricIngestBuffer(method=os.environ.get('METRIC_INGEST_METHOD', 'copy'))
+        # One timestamp per cycle keeps rows of a cycle aligned
+        self.recorded_at = datetime.now(timezone.utc)
+        self.counter_store = None
+        self.counter_bits: Optional[int] = None
+        self.execution_id: Optional[int] = None
+        self.queue: Optional[asyncio.Queue] = None
+        # Devices whose rows feed metric rollups, updated once in finish()
+        self.rollup_devices: set = set()
+        self._uptime_keys = ('.' + CommonOIDs.SYS_UPTIME, CommonOIDs.SYS_UPTIME)
+        # A shared executor (polling daemon) serializes every cycle's DB
+        # writes on one thread; otherwise the pipeline owns a private one
+        self._executor = executor
+        self._owns_executor = executor is None
+        
+        self.devices_done = 0
+        self.successful = 0
+        self.failed = 0
+        self.records_stored = 0
+    
+    def start_execution(self, config_id: Optional[int], task_id: Optional[str]):
+        """Insert the 'running' polling_executions row progress is reported to."""
+        try:
+            with self.db.cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO polling_executions (
+                        config_id, config_name, started_at, status,
+                        devices_targeted, devices_polled, devices_success,
+                        devices_failed, records_collected, triggered_by, celery_task_id
+                    ) VALUES (%s, %s, %s, 'running', %s, 0, 0, 0, 0, %s, %s)
+                    RETURNING id
+                """, (
+                    config_id, self.poll_type_name, self.started_at.isoformat(),
+                    self.total_devices, 'schedule', task_id,
+                ))
+                self.execution_id = cursor.fetchone()['id']
+                self.db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to create polling execution: {e}")
+    
+    def process(self, result):
+        """Parse and buffer one device result."""
+        self.devices_done += 1
+        device_ip = result.target.ip
+        records = 0
+        
+        if result.success and result.values:
+            self.successful += 1
             
-            # Check if this result OID starts with the mapping OID
-            if normalized_oid.startswith(mapping_oid + '.') or normalized_oid == mapping_oid:
-                try:
-                    # Extract index from OID (last component after the base OID)
-                    index = int(normalized_oid.split('.')[-1])
-                    
-                    if index not in parsed:
-                        parsed[index] = {}
-                    
-                    # Apply transform
-                    value = apply_transform(raw_value, mapping.get('transform'))
-                    parsed[index][mapping['name']] = value
-                    parsed[index][f"_group_{mapping['name']}"] = mapping['group_name']
-                    
-                except (ValueError, IndexError):
-                    continue
+            # Parse results using OID mappings
+            parsed_data = parse_snmp_results(result.values, self.compiled_mappings)
+            
+            if self.counter_store is not None:
+                uptime = result.values.get(self._uptime_keys[0]) or result.values.get(self._uptime_keys[1])
+                self.counter_store.observe_uptime(device_ip, parse_timeticks(uptime), self.recorded_at)
+            
+            # Store in target table or generic polling_data
+            records = _store_to_target_table(
+                self.ingest, self.table_name, device_ip, parsed_data,
+                self.recorded_at, self.counter_store, self.counter_bits,
+            )
+            self.records_stored += records
+            if records and self.table_name in ROLLUP_SOURCES:
+                self.rollup_devices.add(device_ip)
+            status = 'success'
+        else:
+            self.failed += 1
+            status = _device_status(result.error)
+            if result.error:
+                logger.debug(f"Poll failed for {device_ip}: {result.error}")
+        
+        if self.execution_id is not None:
+            self.ingest.add('polling_device_results', {
+                'execution_id': self.execution_id,
+                'device_ip': device_ip,
+                'status': status,
+                'duration_ms': int(result.duration * 1000),
+                'records_collected': records,
+                'error_message': None if result.success else result.error,
+                'polled_at': datetime.now(timezone.utc),
+            })
+    
+    async def consume(self, queue: asyncio.Queue):
+        """Process results from the queue until a None sentinel arrives."""
+        while True:
+            result = await queue.get()
+            if result is None:
                 break
+            self.process(result)
+            if self.ingest.pending >= self.flush_rows:
+                # Writes run off-loop so SNMP I/O continues meanwhile
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(self._get_executor(), self.flush)
     
-    return parsed
+    def drain(self):
+        """
+        Process results still sitting in the queue (after an interruption).
+        
+        Only called from finish(), once no flush can still be running.
+        """
+        if self.queue is None:
+            return
+        while not self.queue.empty():
+            result = self.queue.get_nowait()
+            if result is not None:
+                self.process(result)
+    
+    def _get_executor(self):
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='poll_ingest')
+        return self._executor
+    
+    def flush(self):
+        """Write buffered rows and report progress on the execution row."""
+        with self.db.connection() as conn:
+            self.ingest.flush(conn)
+        if self.counter_store is not None:
+            self.counter_store.persist()
+        
+        if self.execution_id is None:
+            return
+        try:
+            with self.db.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE polling_executions
+                    SET devices_polled = %s, devices_success = %s,
+                        devices_failed = %s, records_collected = %s
+                    WHERE id = %s
+                """, (
+                    self.devices_done, self.successful, self.failed,
+                    self.records_stored, self.execution_id,
+                ))
+                self.db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to update polling progress: {e}")
+    
+    def fail(self, error: Exception):
+        """Close the execution row as failed when the cycle raised."""
+        if self._executor is not None and self._owns_executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self.execution_id is None:
+            return
+        completed_at = datetime.utcnow()
+        try:
+            with self.db.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE polling_executions
+                    SET status = 'failed', completed_at = %s, duration_ms = %s,
+                        devices_polled = %s, devices_success = %s, devices_failed = %s,
+                        records_collected = %s, error_message = %s
+                    WHERE id = %s
+                """, (
+                    completed_at.isoformat(),
+                    int((completed_at - self.started_at).total_seconds() * 1000),
+                    self.devices_done, self.successful, self.failed,
+                    self.records_stored, str(error) or type(error).__name__, self.execution_id,
+                ))
+                self.db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to mark polling execution failed: {e}")
+    
+    def update_rollups(self) -> Optional[float]:
+        """Recompute the rollup buckets this cycle wrote to; returns milliseconds taken."""
+        if not self.rollup_devices:
+            return None
+        started = time.perf_counter()
+        try:
+            with self.db.cursor() as cursor:
+                update_rollups(cursor, self.table_name, self.recorded_at, device_ips=self.rollup_devices)
+        except Exception as e:
+            logger.warning(f"Failed to update {self.table_name} rollups: {e}")
+            return None
+        return round((time.perf_counter() - started) * 1000, 1)
+    
+    def finish(self, timed_out: bool = False) -> Dict[str, Any]:
+        """Store results still queued, flush what is left and build the task result."""
+        if self._executor is not None and self._owns_executor:
+            # Let an in-flight background flush complete first; it clears
+            # the ingest buffer, so nothing may be added to it meanwhile.
+            # A shared executor already runs this after any queued flush.
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.drain()
+        self.flush()
+        rollup_ms = self.update_rollups()
+        
+        completed_at = datetime.utcnow()
+        duration = (completed_at - self.started_at).total_seconds()
+        ingest_stats = self.ingest.get_stats()
+        logger.info(f"Poll '{self.poll_type_name}' complete: {self.successful}/{self.total_devices} devices, "
+                   f"{self.records_stored} records in {duration:.1f}s")
+        
+        result = {
+            'job_name': self.poll_type_name,
+            'started_at': self.started_at.isoformat(),
+            'completed_at': completed_at.isoformat(),
+            'total_devices': self.total_devices,
+            'devices_polled': self.devices_done,
+            'successful': self.successful,
+            'failed': self.failed,
+            'records_stored': self.records_stored,
+            'duration_seconds': duration,
+            'flush_ms': ingest_stats['flush_ms'],
+            'ingest_rows_per_sec': ingest_stats['rows_per_second'],
+            'rollup_ms': rollup_ms,
+            'execution_id': self.execution_id,
+        }
+        if self.poller is not None:
+            result['pdus_sent'] = self.poller.stats.pdus_sent
+            result['avg_pdus_per_device'] = round(self.poller.stats.avg_pdus_per_device, 1)
+            result['p95_latency_ms'] = round(self.poller.stats.p95_duration * 1000, 1)
+        if timed_out:
+            result['error'] = (f"Soft time limit exceeded after "
+                               f"{self.devices_done}/{self.total_devices} devices")
+        return result
+
+
+@dataclass
+class PollPlan:
+    """What a poll type collects: its definition, mappings and OIDs to walk."""
+    poll_type: Dict
+    oid_mappings: List[Dict]
+    compiled_mappings: CompiledMappings
+    oids: List[str]
+    
+    @property
+    def target_table(self) -> Optional[str]:
+        return self.poll_type.get('target_table')
+    
+    @property
+    def counter_bits(self) -> Optional[int]:
+        return COUNTER_BITS.get(
+            next((m['data_type'] for m in self.oid_mappings if m['name'] == 'rx_bytes'), None)
+        )
+
+
+def load_poll_plan(db, poll_type_name: str):
+    """
+    Load a poll type and its OID mappings.
+    
+    Returns:
+        PollPlan, or an error string when the poll type cannot be polled
+    """
+    from backend.services.async_snmp_poller import CommonOIDs
+    
+    loader = MibMappingLoader(db)
+    poll_type = loader.get_poll_type(poll_type_name)
+    if not poll_type:
+        logger.error(f"Poll type '{poll_type_name}' not found or disabled")
+        return f"Poll type '{poll_type_name}' not found"
+    
+    oid_mappings = loader.get_oids_for_poll_type(poll_type_name)
+    if not oid_mappings:
+        logger.error(f"No OID mappings found for poll type '{poll_type_name}'")
+        return 'No OID mappings configured'
+    
+    # Get unique base OIDs for walking
+    oids_to_poll = list(set(m['oid'] for m in oid_mappings))
+    if poll_type.get('target_table') == 'interface_metrics':
+        # sysUpTime lets rate computation spot counter resets
+        if CommonOIDs.SYS_UPTIME not in oids_to_poll:
+            oids_to_poll.append(CommonOIDs.SYS_UPTIME)
+    
+    logger.info(f"Poll type '{poll_type_name}': {len(oids_to_poll)} OIDs from {len(oid_mappings)} mappings")
+    return PollPlan(
+        poll_type=poll_type,
+        oid_mappings=oid_mappings,
+        compiled_mappings=get_compiled_mappings(oid_mappings),
+        oids=oids_to_poll,
+    )
+
+
+def load_poll_targets(db, vendor: Optional[str], device_filter: Optional[Dict] = None) -> List:
+    """Build SNMP targets from the device directory for a vendor and filter."""
+    from backend.services.async_snmp_poller import SNMPTarget
+    from backend.services.device_directory import get_device_directory
+    
+    return [
+        SNMPTarget(
+            ip=device.device_ip,
+            community='public',  # TODO: Get from credential service
+            device_type=device.manufacturer or 'unknown',
+            site=device.site_name or '',
+        )
+        for device in get_device_directory(db).select(vendor, device_filter)
+    ]
+
+
+def count_poll_targets(db, vendor: Optional[str], device_filter: Optional[Dict] = None) -> int:
+    """Number of devices load_poll_targets would return."""
+    from backend.services.device_directory import get_device_directory
+    return len(get_device_directory(db).select(vendor, device_filter))
+
+
+async def run_poll_cycle(
+    db,
+    poll_type_name: str,
+    poller,
+    device_filter: Optional[Dict] = None,
+    config_id: Optional[int] = None,
+    task_id: Optional[str] = None,
+    plan: Optional[PollPlan] = None,
+    targets: Optional[List] = None,
+    db_executor=None,
+    pipeline_ref: Optional[Dict] = None,
+) -> Dict[str, Any]:
+    """
+    Run one poll cycle for a poll type: schedule, walk, parse and store.
+    
+    Shared by the polling.generic task (fresh poller, blocking DB calls)
+    and the resident polling daemon, which passes a poller on its shared
+    transport, cached plan/targets and a single-thread db_executor so DB
+    work never blocks its event loop.
+    
+    Returns:
+        Dict with poll statistics
+    """
+    from backend.services.counter_state import get_counter_store
+    
+    loop = asyncio.get_running_loop()
+    
+    async def _db(fn, *args):
+        if db_executor is None:
+            return fn(*args)
+        return await loop.run_in_executor(db_executor, fn, *args)
+    
+    started_at = datetime.utcnow()
+    setup_started = loop.time()
+    
+    def _empty(**extra):
+        return {
+            'job_name': poll_type_name,
+            'started_at': started_at.isoformat(),
+            'completed_at': datetime.utcnow().isoformat(),
+            'total_devices': 0,
+            'successful': 0,
+            'failed': 0,
+            **extra,
+        }
+    
+    if plan is None:
+        plan = await _db(load_poll_plan, db, poll_type_name)
+    if isinstance(plan, str):
+        return _empty(error=plan)
+    
+    if targets is None:
+        targets = await _db(load_poll_targets, db, plan.poll_type['vendor'], device_filter)
+    if not targets:
+        logger.warning(f"No devices found for poll type '{poll_type_name}'")
+        return _empty(duration_seconds=0)
+    
+    # Learned per-device timeouts; devices failing repeatedly sit in a
+    # slow lane and are only retried once their backoff has elapsed.
+    # Scheduled once, by the poller, before the cycle is sized.
+    targets = poller.schedule(targets)
+    deferred = poller.deferred
+    
+    logger.info(f"Polling {len(targets)} devices for '{poll_type_name}' "
+                f"({len(deferred)} deferred in slow lane)")
+    
+    target_table = plan.target_table
+    pipeline = PollCyclePipeline(
+        db=db,
+        poll_type_name=poll_type_name,
+        table_name=target_table or poll_type_name,
+        compiled_mappings=plan.compiled_mappings,
+        total_devices=len(targets),
+        started_at=started_at,
+        poller=poller,
+        executor=db_executor,
+    )
+    if pipeline_ref is not None:
+        pipeline_ref['pipeline'] = pipeline
+    await _db(pipeline.start_execution, config_id, task_id)
+    
+    try:
+        # Interface rates come from the counter state store; load any
+        # devices this worker has not seen yet in one round-trip
+        if target_table == 'interface_metrics':
+            pipeline.counter_store = get_counter_store()
+            pipeline.counter_bits = plan.counter_bits
+        
+            def _prefetch():
+                with db.cursor() as cursor:
+                    pipeline.counter_store.prefetch(cursor, [t.ip for t in targets])
+            await _db(_prefetch)
+        
+        setup_ms = (loop.time() - setup_started) * 1000
+        
+        # 'stream' parses and stores each device as it completes, flushing
+        # in the background while SNMP continues; 'batch' gathers first
+        if os.environ.get('POLL_PIPELINE_MODE', 'stream') == 'stream':
+            queue = asyncio.Queue(maxsize=int(os.environ.get('POLL_QUEUE_SIZE', 100)))
+            pipeline.queue = queue
+            producer = asyncio.ensure_future(
+                poller.stream_walk_devices(targets, plan.oids, queue, scheduled=True)
+            )
+            consumer = asyncio.ensure_future(pipeline.consume(queue))
+            try:
+                # A failed consumer must not leave walks blocked on put(); the
+                # consumer only ends on its own by raising
+                await asyncio.wait({producer, consumer}, return_when=asyncio.FIRST_COMPLETED)
+                if consumer.done():
+                    consumer.result()
+                await producer
+                await queue.put(None)
+                await consumer
+            finally:
+                for task in (producer, consumer):
+                    if not task.done():
+                        task.cancel()
+        else:
+            for result in await poller.walk_devices(targets, plan.oids, scheduled=True):
+                pipeline.process(result)
+        
+        result = await _db(pipeline.finish)
+    except SoftTimeLimitExceeded:
+        # poll_by_type closes the execution as partial
+        raise
+    except Exception as e:
+        # Don't leave the execution 'running' forever
+        await _db(pipeline.fail, e)
+        raise
+    result['deferred_devices'] = len(deferred)
+    result['setup_ms'] = round(setup_ms, 1)
+    return result
 
 
 @shared_task(
@@ -201,303 +813,173 @@ def poll_by_type(
         Dict with poll statistics
     """
     from backend.database import DatabaseConnection
-    from backend.services.async_snmp_poller import AsyncSNMPPoller, SNMPTarget
+    from backend.services.async_snmp_poller import AsyncSNMPPoller
+    from backend.services.device_latency import get_latency_tracker
+    from backend.services.latency_sketch import record_worker_stats
     
     async def _poll():
         db = DatabaseConnection()
-        started_at = datetime.utcnow()
-        
-        # Load poll type and OID mappings from database
-        loader = MibMappingLoader(db)
-        poll_type = loader.get_poll_type(poll_type_name)
-        
-        if not poll_type:
-            logger.error(f"Poll type '{poll_type_name}' not found or disabled")
-            return {
-                'job_name': poll_type_name,
-                'started_at': started_at.isoformat(),
-                'completed_at': datetime.utcnow().isoformat(),
-                'error': f"Poll type '{poll_type_name}' not found",
-                'total_devices': 0,
-                'successful': 0,
-                'failed': 0,
-            }
-        
-        oid_mappings = loader.get_oids_for_poll_type(poll_type_name)
-        
-        if not oid_mappings:
-            logger.error(f"No OID mappings found for poll type '{poll_type_name}'")
-            return {
-                'job_name': poll_type_name,
-                'started_at': started_at.isoformat(),
-                'completed_at': datetime.utcnow().isoformat(),
-                'error': 'No OID mappings configured',
-                'total_devices': 0,
-                'successful': 0,
-                'failed': 0,
-            }
-        
-        # Get unique base OIDs for walking
-        oids_to_poll = list(set(m['oid'] for m in oid_mappings))
-        
-        logger.info(f"Poll type '{poll_type_name}': {len(oids_to_poll)} OIDs from {len(oid_mappings)} mappings")
-        
-        # Get target devices based on vendor profile and filter
-        vendor = poll_type['vendor']
-        with db.cursor() as cursor:
-            query = """
-                SELECT device_ip, device_name, site_name, manufacturer
-                FROM netbox_device_cache
-                WHERE device_ip IS NOT NULL
-            """
-            params = []
-            
-            # Filter by vendor/manufacturer
-            if vendor:
-                query += " AND manufacturer ILIKE %s"
-                params.append(f"%{vendor}%")
-            
-            # Apply additional filters
-            if device_filter:
-                if device_filter.get('site'):
-                    query += " AND site_name = %s"
-                    params.append(device_filter['site'])
-                if device_filter.get('role'):
-                    query += " AND role_name = %s"
-                    params.append(device_filter['role'])
-                if device_filter.get('manufacturer'):
-                    query += " AND manufacturer ILIKE %s"
-                    params.append(f"%{device_filter['manufacturer']}%")
-            
-            cursor.execute(query, params if params else None)
-            rows = cursor.fetchall()
-        
-        if not rows:
-            logger.warning(f"No devices found for poll type '{poll_type_name}'")
-            return {
-                'job_name': poll_type_name,
-                'started_at': started_at.isoformat(),
-                'completed_at': datetime.utcnow().isoformat(),
-                'total_devices': 0,
-                'successful': 0,
-                'failed': 0,
-                'duration_seconds': 0,
-            }
-        
-        # Build SNMP targets
-        targets = [
-            SNMPTarget(
-                ip=str(row['device_ip']),
-                community='public',  # TODO: Get from credential service
-                device_type=row.get('manufacturer', 'unknown'),
-                site=row.get('site_name', ''),
-            )
-            for row in rows
-        ]
-        
-        logger.info(f"Polling {len(targets)} devices for '{poll_type_name}'")
+        latency_tracker = get_latency_tracker()
+        latency_tracker.load()
         
         # Create async poller - optimized for 1000+ devices
         # max_concurrent=200: Allow 200 simultaneous SNMP connections
         # batch_size=50: Process 50 devices per batch for better throughput
         # default_timeout=5: Reduce timeout for faster failure detection
-        poller = AsyncSNMPPoller(max_concurrent=200, batch_size=50, default_timeout=5)
-        
-        # Poll all devices
-        results = await poller.walk_devices(targets, oids_to_poll)
-        
-        completed_at = datetime.utcnow()
-        successful = 0
-        failed = 0
-        records_stored = 0
-        
-        # Process and store results
-        target_table = poll_type.get('target_table')
-        
-        with db.cursor() as cursor:
-            for result in results:
-                if result.success and result.values:
-                    successful += 1
-                    
-                    # Parse results using OID mappings
-                    parsed_data = parse_snmp_results(result.values, oid_mappings)
-                    
-                    # Store in target table or generic polling_data
-                    if target_table:
-                        records_stored += _store_to_target_table(
-                            cursor, target_table, result.target.ip, parsed_data
-                        )
-                    else:
-                        # Store in generic polling_data table
-                        for index, data in parsed_data.items():
-                            # Remove internal group markers
-                            clean_data = {k: v for k, v in data.items() if not k.startswith('_group_')}
-                            cursor.execute("""
-                                INSERT INTO polling_data 
-                                (poll_type, device_ip, collected_at, data)
-                                VALUES (%s, %s, NOW(), %s)
-                            """, (poll_type_name, result.target.ip, 
-                                  __import__('json').dumps(clean_data)))
-                            records_stored += 1
-                else:
-                    failed += 1
-                    if result.error:
-                        logger.debug(f"Poll failed for {result.target.ip}: {result.error}")
-            
-            db.get_connection().commit()
-        
-        duration = (completed_at - started_at).total_seconds()
-        logger.info(f"Poll '{poll_type_name}' complete: {successful}/{len(targets)} devices, "
-                   f"{records_stored} records in {duration:.1f}s")
-        
-        return {
-            'job_name': poll_type_name,
-            'started_at': started_at.isoformat(),
-            'completed_at': completed_at.isoformat(),
-            'total_devices': len(targets),
-            'successful': successful,
-            'failed': failed,
-            'records_stored': records_stored,
-            'duration_seconds': duration,
-        }
+        # transport: 'native' multiplexes all queries over one UDP socket,
+        #            'subprocess' forks net-snmp per query (legacy)
+        poller = AsyncSNMPPoller(
+            max_concurrent=200,
+            batch_size=50,
+            default_timeout=5,
+            transport=os.environ.get('SNMP_POLLER_TRANSPORT', 'native'),
+            latency_tracker=latency_tracker,
+        )
+        try:
+            return await run_poll_cycle(
+                db, poll_type_name, poller,
+                device_filter=device_filter,
+                config_id=config_id,
+                task_id=self.request.id,
+                pipeline_ref=pipeline_ref,
+            )
+        finally:
+            poller.close()
+            latency_tracker.save()
+            record_worker_stats(poller.stats)
+    
+    pipeline_ref = {}
+    try:
+        result = _run_async(_poll())
+    except SoftTimeLimitExceeded:
+        # Keep what was collected: stop outstanding walks, store any
+        # results still queued and close the execution as partial
+        pipeline = pipeline_ref.get('pipeline')
+        if pipeline is None:
+            raise
+        logger.warning(f"Poll '{poll_type_name}' hit soft time limit after "
+                       f"{pipeline.devices_done}/{pipeline.total_devices} devices")
+        _cancel_pending_tasks(_get_event_loop())
+        result = pipeline.finish(timed_out=True)
     
-    result = _run_async(_poll())
     _record_execution(poll_type_name, result, config_id, self.request.id)
     return result
 
 
-def _store_to_target_table(cursor, table_name: str, device_ip: str, parsed_data: Dict) -> int:
+def _cancel_pending_tasks(loop):
+    """Cancel tasks left on the loop by an interrupted run_until_complete."""
+    tasks = [t for t in asyncio.all_tasks(loop) if not t.done()]
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+
+
+# snmp_oid_mappings.data_type -> counter width for wrap handling
+COUNTER_BITS = {'counter32': 32, 'counter64': 64}
+
+
+def _safe_int(val, default=0):
+    """Safely convert values to int, handling None and string values."""
+    if val is None:
+        return default
+    try:
+        return int(val)
+    except (ValueError, TypeError):
+        return default
+
+
+def _store_to_target_table(
+    ingest,
+    table_name: str,
+    device_ip: str,
+    parsed_data: Dict,
+    recorded_at: datetime,
+    counter_store=None,
+    counter_bits: Optional[int] = None,
+) -> int:
     """
-    Store parsed data to the appropriate target table.
+    Buffer parsed data for the appropriate target table.
+    
+    Rows are queued on the MetricIngestBuffer and written when the poll
+    cycle flushes. Interface rates come from counter_store (a
+    CounterStateStore) rather than the previous interface_metrics row.
     
-    Returns number of records stored.
+    Returns number of records buffered.
     """
     records = 0
     
     if table_name == 'optical_metrics':
         for index, data in parsed_data.items():
             if 'rx_power_dbm' in data or 'tx_power_dbm' in data:
-                cursor.execute("""
-                    INSERT INTO optical_metrics 
-                    (device_ip, interface_name, interface_index, rx_power, tx_power, recorded_at)
-                    VALUES (%s, %s, %s, %s, %s, NOW())
-                """, (
-                    device_ip,
-                    f"port{index}",
-                    index,
-                    data.get('rx_power_dbm'),
-                    data.get('tx_power_dbm')
-                ))
+                ingest.add('optical_metrics', {
+                    'device_ip': device_ip,
+                    'interface_name': f"port{index}",
+                    'interface_index': index if isinstance(index, int) else None,
+                    'rx_power': data.get('rx_power_dbm'),
+                    'tx_power': data.get('tx_power_dbm'),
+                    'recorded_at': recorded_at,
+                })
                 records += 1
     
     elif table_name == 'interface_metrics':
+        if counter_store is None:
+            from backend.services.counter_state import get_counter_store
+            counter_store = get_counter_store()
+        
         for index_key, data in parsed_data.items():
             if 'rx_bytes' in data or 'tx_bytes' in data:
-                # Safely convert values to int, handling None and string values
-                def safe_int(val, default=0):
-                    if val is None:
-                        return default
-                    try:
-                        return int(val)
-                    except (ValueError, TypeError):
-                        return default
-                
                 # Convert index to int (dict keys from JSON are strings)
-                index = safe_int(index_key, 0)
+                index = _safe_int(index_key, 0)
                 if index == 0:
                     continue
-                    
-                interface_name = f"port{index}"
-                rx_bytes = safe_int(data.get('rx_bytes'), None)
-                tx_bytes = safe_int(data.get('tx_bytes'), None)
-                rx_errors = safe_int(data.get('rx_errors')) + safe_int(data.get('rx_crc_errors'))
-                rx_discards = safe_int(data.get('rx_discard'), None)
-                
-                # Calculate rate (Mbps) from previous reading
-                rx_mbps = None
-                tx_mbps = None
                 
-                cursor.execute("""
-                    SELECT rx_bytes, tx_bytes, recorded_at 
-                    FROM interface_metrics 
-                    WHERE device_ip = %s AND interface_index = %s 
-                    ORDER BY recorded_at DESC LIMIT 1
-                """, (device_ip, index))
-                prev = cursor.fetchone()
+                rx_bytes = _safe_int(data.get('rx_bytes'), None)
+                tx_bytes = _safe_int(data.get('tx_bytes'), None)
                 
-                if prev and prev.get('rx_bytes') is not None and prev.get('tx_bytes') is not None and rx_bytes is not None and tx_bytes is not None:
-                    prev_rx, prev_tx, prev_time = prev['rx_bytes'], prev['tx_bytes'], prev['recorded_at']
-                    # Calculate time delta in seconds
-                    from datetime import datetime, timezone
-                    now = datetime.now(timezone.utc)
-                    # Make prev_time timezone-aware if it isn't
-                    if prev_time.tzinfo is None:
-                        prev_time = prev_time.replace(tzinfo=timezone.utc)
-                    delta_seconds = (now - prev_time).total_seconds()
-                    
-                    if delta_seconds > 0:
-                        # Handle counter wrap (32-bit counter wraps at 2^32)
-                        rx_delta = rx_bytes - prev_rx
-                        tx_delta = tx_bytes - prev_tx
-                        if rx_delta < 0:
-                            rx_delta += 2**32
-                        if tx_delta < 0:
-                            tx_delta += 2**32
-                        
-                        # Convert bytes/sec to Mbps (megabits per second)
-                        rx_mbps = round((rx_delta * 8) / (delta_seconds * 1_000_000), 3)
-                        tx_mbps = round((tx_delta * 8) / (delta_seconds * 1_000_000), 3)
+                # Rate from the previous counters held in the state store
+                rx_bps, tx_bps = counter_store.observe(
+                    device_ip, index, rx_bytes, tx_bytes, recorded_at, counter_bits
+                )
                 
-                cursor.execute("""
-                    INSERT INTO interface_metrics 
-                    (device_ip, interface_name, interface_index, 
-                     rx_bytes, tx_bytes, rx_packets, tx_packets,
-                     rx_bps, tx_bps, rx_errors, rx_discards, recorded_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                """, (
-                    device_ip,
-                    interface_name,
-                    index,
-                    rx_bytes,
-                    tx_bytes,
-                    safe_int(data.get('rx_pkts'), None),
-                    safe_int(data.get('tx_pkts'), None),
-                    int(rx_mbps * 1_000_000) if rx_mbps is not None else None,  # Store as bps for precision
-                    int(tx_mbps * 1_000_000) if tx_mbps is not None else None,  # Store as bps for precision
-                    rx_errors,
-                    rx_discards
-                ))
+                ingest.add('interface_metrics', {
+                    'device_ip': device_ip,
+                    'interface_name': f"port{index}",
+                    'interface_index': index,
+                    'rx_bytes': rx_bytes,
+                    'tx_bytes': tx_bytes,
+                    'rx_packets': _safe_int(data.get('rx_pkts'), None),
+                    'tx_packets': _safe_int(data.get('tx_pkts'), None),
+                    'rx_bps': rx_bps,
+                    'tx_bps': tx_bps,
+                    'rx_errors': _safe_int(data.get('rx_errors')) + _safe_int(data.get('rx_crc_errors')),
+                    'rx_discards': _safe_int(data.get('rx_discard'), None),
+                    'recorded_at': recorded_at,
+                })
                 records += 1
     
-    elif table_name == 'raps_status':
-        # Store G.8032 ring status
+    elif table_name in ('raps_status', 'device_alarms'):
+        # G.8032 ring status / alarms go to polling_data
+        poll_type = 'ciena_raps' if table_name == 'raps_status' else 'ciena_alarms'
         for index, data in parsed_data.items():
-            cursor.execute("""
-                INSERT INTO polling_data 
-                (poll_type, device_ip, collected_at, data)
-                VALUES ('ciena_raps', %s, NOW(), %s)
-            """, (device_ip, __import__('json').dumps(data)))
-            records += 1
-    
-    elif table_name == 'device_alarms':
-        # Store alarms
-        for index, data in parsed_data.items():
-            cursor.execute("""
-                INSERT INTO polling_data 
-                (poll_type, device_ip, collected_at, data)
-                VALUES ('ciena_alarms', %s, NOW(), %s)
-            """, (device_ip, __import__('json').dumps(data)))
+            ingest.add('polling_data', {
+                'poll_type': poll_type,
+                'device_ip': device_ip,
+                'collected_at': recorded_at,
+                'data': data,
+            })
             records += 1
     
     else:
         # Generic storage
         for index, data in parsed_data.items():
             clean_data = {k: v for k, v in data.items() if not k.startswith('_group_')}
-            cursor.execute("""
-                INSERT INTO polling_data 
-                (poll_type, device_ip, collected_at, data)
-                VALUES (%s, %s, NOW(), %s)
-            """, (table_name, device_ip, __import__('json').dumps(clean_data)))
+            ingest.add('polling_data', {
+                'poll_type': table_name,
+                'device_ip': device_ip,
+                'collected_at': recorded_at,
+                'data': clean_data,
+            })
             records += 1
     
     return records
@@ -510,31 +992,53 @@ def _record_execution(poll_type: str, result: Dict, config_id: Optional[int], ta
         db = DatabaseConnection()
         
         status = 'success' if result.get('failed', 0) == 0 else 'partial'
+        if result.get('devices_polled', result.get('total_devices', 0)) < result.get('total_devices', 0):
+            status = 'partial'
         if result.get('successful', 0) == 0 and result.get('total_devices', 0) > 0:
             status = 'failed'
         
         with db.cursor() as cursor:
-            cursor.execute("""
-                INSERT INTO polling_executions (
-                    config_id, config_name, started_at, completed_at, duration_ms,
-                    status, devices_targeted, devices_polled, devices_success,
-                    devices_failed, records_collected, triggered_by, celery_task_id
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                config_id,
-                result.get('job_name', poll_type),
-                result.get('started_at'),
-                result.get('completed_at'),
-                int(result.get('duration_seconds', 0) * 1000),
-                status,
-                result.get('total_devices', 0),
-                result.get('total_devices', 0),
-                result.get('successful', 0),
-                result.get('failed', 0),
-                result.get('records_stored', 0),
-                'schedule',
-                task_id
-            ))
+            if result.get('execution_id'):
+                # Close the row the streaming pipeline reported progress to
+                cursor.execute("""
+                    UPDATE polling_executions
+                    SET completed_at = %s, duration_ms = %s, status = %s,
+                        devices_polled = %s, devices_success = %s, devices_failed = %s,
+                        records_collected = %s, error_message = %s
+                    WHERE id = %s
+                """, (
+                    result.get('completed_at'),
+                    int(result.get('duration_seconds', 0) * 1000),
+                    status,
+                    result.get('devices_polled', result.get('total_devices', 0)),
+                    result.get('successful', 0),
+                    result.get('failed', 0),
+                    result.get('records_stored', 0),
+                    result.get('error'),
+                    result['execution_id'],
+                ))
+            else:
+                cursor.execute("""
+                    INSERT INTO polling_executions (
+                        config_id, config_name, started_at, completed_at, duration_ms,
+                        status, devices_targeted, devices_polled, devices_success,
+                        devices_failed, records_collected, triggered_by, celery_task_id
+                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, (
+                    config_id,
+                    result.get('job_name', poll_type),
+                    result.get('started_at'),
+                    result.get('completed_at'),
+                    int(result.get('duration_seconds', 0) * 1000),
+                    status,
+                    result.get('total_devices', 0),
+                    result.get('total_devices', 0),
+                    result.get('successful', 0),
+                    result.get('failed', 0),
+                    result.get('records_stored', 0),
+                    'schedule',
+                    task_id
+                ))
             
             # Update polling_configs if config_id provided
             if config_id:
@@ -556,79 +1060,75 @@ def _record_execution(poll_type: str, result: Dict, config_id: Optional[int], ta
                     config_id
                 ))
             
-            db.get_connection().commit()
+            db.commit()
     except Exception as e:
         logger.warning(f"Failed to record polling execution: {e}")
 
 
+def polling_daemon_enabled() -> bool:
+    """True when the resident polling daemon owns the polling_configs schedule."""
+    return os.environ.get('POLLING_MODE', 'celery') == 'daemon'
+
+
+def load_polling_configs(db, due_only: bool = True) -> List[Dict]:
+    """
+    Enabled polling_configs rows with their resolved poll type name.
+    
+    Args:
+        due_only: Only configs whose interval has elapsed since last_run_at
+    """
+    query = """
+        SELECT pc.id, pc.name, pc.poll_type, pc.interval_seconds, pc.last_run_at,
+               pc.target_type, pc.target_manufacturer, pc.target_role, pc.target_site_name,
+               pc.snmp_community, pc.batch_size, pc.max_concurrent,
+               pt.name as poll_type_name
+        FROM polling_configs pc
+        LEFT JOIN snmp_poll_types pt ON pt.name = pc.poll_type
+        WHERE pc.enabled = true
+    """
+    if due_only:
+        query += """
+        AND (
+            pc.last_run_at IS NULL 
+            OR pc.last_run_at + (pc.interval_seconds || ' seconds')::interval < NOW()
+        )
+        """
+    with db.cursor() as cursor:
+        cursor.execute(query)
+        return cursor.fetchall()
+
+
+def build_device_filter(config: Dict) -> Optional[Dict]:
+    """Device filter for poll_by_type from a polling_configs row."""
+    device_filter = {}
+    if config['target_manufacturer']:
+        device_filter['manufacturer'] = config['target_manufacturer']
+    if config['target_role']:
+        device_filter['role'] = config['target_role']
+    if config['target_site_name']:
+        device_filter['site'] = config['target_site_name']
+    return device_filter or None
+
+
 @shared_task(name='polling.scheduler_tick_v2', queue='polling')
 def polling_scheduler_tick_v2():
     """
     Scheduler tick that dispatches polls based on polling_configs.
     
     This replaces the old scheduler_tick and uses the generic poll_by_type task.
+    Configs are split into device shards placed on a time wheel
+    (polling_schedule_slots): each tick atomically claims the slots due in
+    the next window and dispatches them with ETAs paced to the fleet-wide
+    POLL_MAX_DEVICES_PER_SEC, so several schedulers can run side by side.
+    With POLLING_MODE=daemon the resident polling daemon runs the schedule
+    and this tick does nothing.
     """
     from backend.database import DatabaseConnection
+    from backend.services.poll_scheduler import get_poll_scheduler
     from celery_app import celery_app
     
-    db = DatabaseConnection()
-    
-    with db.cursor() as cursor:
-        # Find enabled configs that are due to run
-        cursor.execute("""
-            SELECT pc.id, pc.name, pc.poll_type, pc.interval_seconds, pc.last_run_at,
-                   pc.target_type, pc.target_manufacturer, pc.target_role, pc.target_site_name,
-                   pc.snmp_community, pc.batch_size, pc.max_concurrent,
-                   pt.name as poll_type_name
-            FROM polling_configs pc
-            LEFT JOIN snmp_poll_types pt ON pt.name = pc.poll_type
-            WHERE pc.enabled = true
-            AND (
-                pc.last_run_at IS NULL 
-                OR pc.last_run_at + (pc.interval_seconds || ' seconds')::interval < NOW()
-            )
-        """)
-        due_configs = cursor.fetchall()
-    
-    if not due_configs:
-        return {'dispatched': 0, 'message': 'No polls due'}
-    
-    dispatched = 0
-    for config in due_configs:
-        poll_type_name = config.get('poll_type_name') or config['poll_type']
-        
-        # Build device filter
-        device_filter = {}
-        if config['target_manufacturer']:
-            device_filter['manufacturer'] = config['target_manufacturer']
-        if config['target_role']:
-            device_filter['role'] = config['target_role']
-        if config['target_site_name']:
-            device_filter['site'] = config['target_site_name']
-        
-        try:
-            # Dispatch the generic polling task
-            celery_app.send_task(
-                'polling.generic',
-                kwargs={
-                    'poll_type_name': poll_type_name,
-                    'device_filter': device_filter if device_filter else None,
-                    'config_id': config['id'],
-                },
-                queue='polling'
-            )
-            dispatched += 1
-            logger.info(f"Dispatched poll '{poll_type_name}' for config '{config['name']}' (id={config['id']})")
-            
-            # Update last_run_at to prevent duplicate dispatches
-            with db.cursor() as cursor:
-                cursor.execute(
-                    "UPDATE polling_configs SET last_run_at = NOW() WHERE id = %s",
-                    (config['id'],)
-                )
-                db.get_connection().commit()
-                
-        except Exception as e:
-            logger.error(f"Failed to dispatch poll for config {config['id']}: {e}")
+    if polling_daemon_enabled():
+        return {'dispatched': 0, 'message': 'Polling daemon owns the schedule'}
     
-    return {'dispatched': dispatched, 'checked': len(due_configs)}
+    scheduler = get_poll_scheduler(DatabaseConnection())
+    return scheduler.tick(celery_app.send_task)
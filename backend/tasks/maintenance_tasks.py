@@ -0,0 +1,30 @@
+"""
+Celery Tasks for Database Maintenance
+
+- maintenance.partitions: pre-creates upcoming time partitions and retires
+  expired ones (backend.services.partition_manager)
+
+Queue: 'maintenance'
+"""
+
+import logging
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='maintenance.partitions', queue='maintenance')
+def partition_maintenance(dry_run: bool = False):
+    """
+    Run partition maintenance for every managed history table.
+
+    Scheduled hourly in celery_app.py beat_schedule; creating partitions is
+    idempotent, so a missed or repeated run is harmless.
+    """
+    from backend.services.partition_manager import PartitionManager
+
+    report = PartitionManager().run(dry_run=dry_run)
+    failed = {table: r['error'] for table, r in report['tables'].items() if r['error']}
+    if failed:
+        logger.warning(f"Partition maintenance errors: {failed}")
+    return report
@@ -34,10 +34,17 @@ def polling_scheduler_tick():
     
     It dispatches the generic 'polling.generic' task for each due config.
     The generic task reads OIDs from the database - no hardcoding.
+    
+    With POLLING_MODE=daemon the resident polling daemon
+    (backend.services.polling_daemon) runs the schedule instead.
     """
     from backend.database import DatabaseConnection
+    from backend.tasks.generic_polling_task import polling_daemon_enabled
     from celery_app import celery_app
     
+    if polling_daemon_enabled():
+        return {'dispatched': 0, 'message': 'Polling daemon owns the schedule'}
+    
     db = DatabaseConnection()
     
     with db.cursor() as cursor:
@@ -91,7 +98,7 @@ def polling_scheduler_tick():
                     "UPDATE polling_configs SET last_run_at = NOW() WHERE id = %s",
                     (config['id'],)
                 )
-                db.get_connection().commit()
+                db.commit()
                 
         except Exception as e:
             logger.error(f"Failed to dispatch poll for config {config['id']}: {e}")
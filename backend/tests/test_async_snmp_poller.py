@@ -6,6 +6,7 @@ Or directly: python backend/tests/test_async_snmp_poller.py
 """
 
 import asyncio
+import json
 import time
 import sys
 import os
@@ -14,9 +15,16 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from backend.services.async_snmp_poller import (
-    AsyncSNMPPoller, AsyncSNMPEngine, SNMPTarget, SNMPResult,
+    AsyncSNMPPoller, AsyncSNMPEngine, NativeSNMPEngine, SNMPTarget, SNMPResult,
     CommonOIDs, PollerStats, poll_devices_simple
 )
+from backend.services.snmp_transport import (
+    PDU_GETBULK, PDU_RESPONSE, TAG_COUNTER64, TAG_OCTET_STRING, TAG_INTEGER,
+    SNMPDatagramTransport, SNMPDecodeError,
+    decode_message, encode_message, encode_request, render_value,
+)
+from backend.benchmarks.snmp_agent_stub import SNMPAgentStub, build_interface_mib
+from backend.services.device_latency import DeviceLatencyTracker
 
 
 class TestSNMPTarget:
@@ -109,6 +117,39 @@ class TestPollerStats:
             stats.record(result)
         
         assert abs(stats.avg_duration - 0.2) < 0.001
+    
+    def test_percentiles_fixed_memory(self):
+        stats = PollerStats()
+        target = SNMPTarget(ip="192.168.1.1")
+        for i in range(1, 100001):
+            stats.record(SNMPResult(target=target, success=True, duration=i / 100000))
+        
+        # 1% relative accuracy, bucket count independent of sample count
+        assert abs(stats.p50_duration - 0.5) < 0.5 * 0.011
+        assert abs(stats.p95_duration - 0.95) < 0.95 * 0.011
+        assert abs(stats.p99_duration - 0.99) < 0.99 * 0.011
+        assert stats.latency.max == 1.0
+        assert len(stats.latency.buckets) < 600
+    
+    def test_breakdowns_merge_across_workers(self):
+        worker_a, worker_b = PollerStats(), PollerStats()
+        for i in range(50):
+            worker_a.record(SNMPResult(target=SNMPTarget(ip="10.0.0.1"), success=True, duration=0.01))
+            worker_b.record(SNMPResult(target=SNMPTarget(ip="10.0.0.2"), success=False,
+                                       error="Timeout: no response", duration=2.0))
+        
+        # Snapshots travel between processes as JSON
+        merged = PollerStats()
+        for stats in (worker_a, worker_b):
+            merged.merge(PollerStats.from_dict(json.loads(json.dumps(stats.to_dict()))))
+        
+        assert merged.total_queries == 100
+        assert merged.errors_by_type["Timeout"] == 50
+        assert set(merged.latency_by_device) == {"10.0.0.1", "10.0.0.2"}
+        assert abs(merged.latency_by_device["10.0.0.1"].quantile(0.95) - 0.01) < 0.0002
+        assert abs(merged.latency_by_error["Timeout"].quantile(0.5) - 2.0) < 0.02
+        assert abs(merged.p50_duration - 0.01) < 0.0002
+        assert merged.summary()["latency"]["max_ms"] == 2000.0
 
 
 class TestAsyncSNMPEngine:
@@ -165,6 +206,301 @@ class TestAsyncSNMPPoller:
         assert poller.progress_callback is not None
 
 
+class TestSNMPCodec:
+    """Tests for the native BER codec."""
+    
+    def test_request_round_trip(self):
+        payload = encode_request(1, "public", PDU_GETBULK, 4242,
+                                 ["1.3.6.1.2.1.31.1.1.1.6"], max_repetitions=25)
+        message = decode_message(payload)
+        assert message.version == 1
+        assert message.community == "public"
+        assert message.pdu_type == PDU_GETBULK
+        assert message.request_id == 4242
+        assert message.error_index == 25
+        assert message.varbinds[0][0] == "1.3.6.1.2.1.31.1.1.1.6"
+    
+    def test_response_values(self):
+        payload = encode_message(1, "public", PDU_RESPONSE, 7, [
+            ("1.3.6.1.2.1.31.1.1.1.6.1", TAG_COUNTER64, 2**64 - 1),
+            ("1.3.6.1.2.1.1.5.0", TAG_OCTET_STRING, b"switch-01"),
+            ("1.3.6.1.4.1.6141.2.60.4.1.1.1.1.16.200", TAG_INTEGER, -4123),
+        ])
+        varbinds = decode_message(payload).varbinds
+        assert varbinds[0][2] == 2**64 - 1
+        assert render_value(varbinds[1][1], varbinds[1][2]) == "switch-01"
+        assert varbinds[2] == ("1.3.6.1.4.1.6141.2.60.4.1.1.1.1.16.200", TAG_INTEGER, -4123)
+    
+    def test_binary_octet_string_renders_hex(self):
+        assert render_value(TAG_OCTET_STRING, b"\x00\x1b\x2c") == "00 1B 2C"
+    
+    def test_malformed_oid_is_a_decode_error(self):
+        payload = encode_message(1, "public", PDU_RESPONSE, 9, [
+            ("1.3.6.1.2.1.1.5.0", TAG_OCTET_STRING, b"switch-01"),
+        ])
+        name = b"\x06\x08\x2b\x06\x01\x02\x01\x01\x05\x00"
+        assert name in payload
+        transport = SNMPDatagramTransport()
+        # Only continuation bytes, then a subidentifier cut off mid-way
+        for body in (b"\x80" * 8, b"\x2b\x06\x01\x02\x01\x01\x85\x80"):
+            malformed = payload.replace(name, b"\x06\x08" + body)
+            try:
+                decode_message(malformed)
+                assert False, "expected SNMPDecodeError"
+            except SNMPDecodeError:
+                pass
+            transport._datagram_received(malformed, ("127.0.0.1", 161))
+        assert transport.malformed_responses == 2
+
+
+class TestNativeSNMPEngine:
+    """Tests for NativeSNMPEngine against a local agent stub."""
+    
+    def test_poller_selects_engine(self):
+        assert isinstance(AsyncSNMPPoller(transport="native").engine, NativeSNMPEngine)
+        assert type(AsyncSNMPPoller().engine) is AsyncSNMPEngine
+    
+    def test_get_and_walk(self):
+        async def run():
+            stub = SNMPAgentStub(build_interface_mib(num_ports=30))
+            host, port = await stub.start()
+            poller = AsyncSNMPPoller(transport="native")
+            target = SNMPTarget(ip=host, port=port)
+            try:
+                get_results = await poller.poll_devices([target], [CommonOIDs.SYS_NAME])
+                walk_results = await poller.walk_devices([target], [CommonOIDs.IF_HC_IN_OCTETS])
+            finally:
+                poller.close()
+                stub.stop()
+            return get_results[0], walk_results[0]
+        
+        get_result, walk_result = asyncio.run(run())
+        assert get_result.success
+        assert get_result.values == {".1.3.6.1.2.1.1.5.0": "stub-switch"}
+        assert walk_result.success
+        assert len(walk_result.values) == 30
+        assert walk_result.values[".1.3.6.1.2.1.31.1.1.1.6.30"] == str(10_000_000_000 + 30000)
+    
+    def test_pipelined_table_walk(self):
+        columns = [
+            CommonOIDs.IF_HC_IN_OCTETS, CommonOIDs.IF_HC_OUT_OCTETS,
+            "1.3.6.1.2.1.31.1.1.1.7", "1.3.6.1.2.1.31.1.1.1.11",
+            CommonOIDs.IF_IN_ERRORS, CommonOIDs.SYS_NAME,
+        ]
+        
+        async def run():
+            stub = SNMPAgentStub(build_interface_mib(num_ports=100))
+            host, port = await stub.start()
+            poller = AsyncSNMPPoller(transport="native")
+            target = SNMPTarget(ip=host, port=port)
+            try:
+                pipelined = (await poller.walk_devices([target], columns))[0]
+                pdus = poller.stats.pdus_by_device[host]
+                separate = {}
+                for oid in columns:
+                    separate.update((await poller.engine.get_bulk(target, oid)).values)
+            finally:
+                poller.close()
+                stub.stop()
+            return pipelined, pdus, separate
+        
+        pipelined, pdus, separate = asyncio.run(run())
+        assert pipelined.success
+        assert pipelined.values == separate
+        assert len(pipelined.values) == 5 * 100 + 1
+        # 500 column values at 150 varbinds per PDU, plus end-of-table and sysName GET
+        assert pdus <= 6
+    
+    def test_timeout_retries(self):
+        async def run():
+            stub = SNMPAgentStub({}, drop_rate=1.0)
+            host, port = await stub.start()
+            poller = AsyncSNMPPoller(transport="native")
+            try:
+                results = await poller.poll_devices(
+                    [SNMPTarget(ip=host, port=port, timeout=0.05, retries=2)],
+                    [CommonOIDs.SYS_DESCR],
+                )
+            finally:
+                poller.close()
+                stub.stop()
+            return results[0], stub.requests_received
+        
+        result, requests = asyncio.run(run())
+        assert not result.success
+        assert "timeout" in result.error
+        assert requests == 3
+    
+    def test_stream_walk_backpressure(self):
+        async def run():
+            stub = SNMPAgentStub(build_interface_mib(num_ports=4))
+            host, port = await stub.start()
+            poller = AsyncSNMPPoller(transport="native")
+            queue = asyncio.Queue(maxsize=2)
+            targets = [SNMPTarget(ip=host, port=port, timeout=1.0) for _ in range(20)]
+            received = []
+            max_depth = [0]
+            
+            async def consume():
+                while len(received) < len(targets):
+                    max_depth[0] = max(max_depth[0], queue.qsize())
+                    received.append(await queue.get())
+                    await asyncio.sleep(0.001)
+            
+            try:
+                queued, _ = await asyncio.gather(
+                    poller.stream_walk_devices(targets, [CommonOIDs.IF_HC_IN_OCTETS], queue, workers=4),
+                    consume(),
+                )
+            finally:
+                poller.close()
+                stub.stop()
+            return queued, received, max_depth[0]
+        
+        queued, received, max_depth = asyncio.run(run())
+        assert queued == 20
+        assert all(r.success and len(r.values) == 4 for r in received)
+        assert max_depth <= 2
+
+
+class TestDeviceLatencyTracker:
+    """Tests for per-device adaptive timeouts and the slow lane."""
+    
+    def test_timeout_follows_rtt(self):
+        tracker = DeviceLatencyTracker(min_timeout=0.2, max_timeout=5.0)
+        target = SNMPTarget(ip="10.0.0.1", timeout=2.0, retries=1)
+        assert tracker.timeout_for(target) == (2.0, 1)
+        
+        for _ in range(20):
+            tracker.observe(SNMPResult(target=target, success=True, rtt=0.05))
+        timeout, retries = tracker.timeout_for(target)
+        assert timeout == 0.2
+        assert retries == 1
+        
+        for _ in range(5):
+            tracker.observe(SNMPResult(target=target, success=True, rtt=1.0))
+        assert 0.2 < tracker.timeout_for(target)[0] <= 5.0
+    
+    def test_retried_and_unmeasured_results_are_not_rtt_samples(self):
+        tracker = DeviceLatencyTracker(min_timeout=0.01, max_timeout=5.0)
+        target = SNMPTarget(ip="10.0.0.2", timeout=2.0, retries=1)
+        tracker.observe(SNMPResult(target=target, success=True, rtt=0.5))
+        
+        # Karn's rule: a reply after a retransmit may answer the first send
+        tracker.observe(SNMPResult(target=target, success=True, rtt=0.001, retries_used=1))
+        # Subprocess engine: only the whole walk's duration, no round trip
+        tracker.observe(SNMPResult(target=target, success=True, duration=4.0))
+        state = tracker.get(target.ip)
+        assert (state.srtt, state.rttvar) == (0.5, 0.25)
+        assert state.failure_streak == 0 and state.last_success
+    
+    def test_slow_lane_backoff(self):
+        tracker = DeviceLatencyTracker(slow_lane_after=3, slow_lane_base=60, slow_lane_max=600)
+        dead = SNMPTarget(ip="10.0.0.9")
+        alive = SNMPTarget(ip="10.0.0.1")
+        
+        for i in range(3):
+            tracker.observe(SNMPResult(target=dead, success=False, error="timeout"), now=1000 + i)
+        assert tracker.in_slow_lane(dead.ip)
+        
+        to_poll, deferred = tracker.schedule([dead, alive], now=1010)
+        assert [t.ip for t in to_poll] == [alive.ip]
+        assert deferred == [dead]
+        
+        # Backoff elapsed: probed once with no retries
+        to_poll, deferred = tracker.schedule([dead], now=1070)
+        assert to_poll[0].retries == 0 and not deferred
+        
+        tracker.observe(SNMPResult(target=dead, success=False, error="timeout"), now=1070)
+        assert tracker.backoff_for(tracker.get(dead.ip)) == 120
+        tracker.observe(SNMPResult(target=dead, success=True, rtt=0.01), now=1200)
+        assert not tracker.in_slow_lane(dead.ip)
+    
+    def test_state_shared_through_redis_and_kept_in_process_when_down(self):
+        class FakeRedis:
+            def __init__(self):
+                self.data, self.down = {}, False
+            def hgetall(self, key):
+                if self.down:
+                    raise ConnectionError("refused")
+                return dict(self.data)
+            def hset(self, key, mapping):
+                if self.down:
+                    raise ConnectionError("refused")
+                self.data.update(mapping)
+            def expire(self, key, seconds):
+                pass
+        
+        redis = FakeRedis()
+        dead = SNMPTarget(ip="10.0.0.9")
+        first = DeviceLatencyTracker(slow_lane_after=2)
+        first._redis = redis
+        first.load()
+        for i in range(2):
+            first.observe(SNMPResult(target=dead, success=False, error="timeout"), now=1000 + i)
+        first.save()
+        
+        # Another worker process picks up the slow lane on its next run
+        second = DeviceLatencyTracker(slow_lane_after=2)
+        second._redis = redis
+        second.load()
+        assert second.in_slow_lane(dead.ip)
+        
+        redis.down = True
+        second.observe(SNMPResult(target=dead, success=True, rtt=0.01), now=2000)
+        second.save()
+        second.load()
+        assert not second.in_slow_lane(dead.ip)
+        assert second.get_stats()['redis'] is False
+        redis.down = False
+        second.load()
+        assert second.get_stats()['redis'] is True
+    
+    def test_poller_defers_dead_device(self):
+        async def run():
+            stub = SNMPAgentStub({}, drop_rate=1.0)
+            host, port = await stub.start()
+            tracker = DeviceLatencyTracker(slow_lane_after=2)
+            poller = AsyncSNMPPoller(transport="native", latency_tracker=tracker)
+            target = SNMPTarget(ip=host, port=port, timeout=0.05, retries=1)
+            counts = []
+            try:
+                for _ in range(3):
+                    results = await poller.poll_devices([target], [CommonOIDs.SYS_DESCR])
+                    counts.append((len(results), len(poller.deferred)))
+            finally:
+                poller.close()
+                stub.stop()
+            return counts, stub.requests_received
+        
+        counts, requests = asyncio.run(run())
+        assert counts == [(1, 0), (1, 0), (0, 1)]
+        # Both polled cycles retransmitted once: retries are honoured
+        assert requests == 4
+    
+    def test_prescheduled_targets_are_not_scheduled_again(self):
+        async def run():
+            stub = SNMPAgentStub(build_interface_mib(num_ports=2))
+            host, port = await stub.start()
+            tracker = DeviceLatencyTracker(slow_lane_after=1)
+            dead = SNMPTarget(ip="10.255.255.1", timeout=0.05, retries=0)
+            tracker.observe(SNMPResult(target=dead, success=False, error="timeout"), now=time.time())
+            poller = AsyncSNMPPoller(transport="native", latency_tracker=tracker)
+            live = SNMPTarget(ip=host, port=port)
+            try:
+                targets = poller.schedule([live, dead])
+                results = await poller.walk_devices(targets, [CommonOIDs.IF_HC_IN_OCTETS], scheduled=True)
+            finally:
+                poller.close()
+                stub.stop()
+            return targets, results, poller.deferred
+        
+        targets, results, deferred = asyncio.run(run())
+        assert len(targets) == 1 and len(results) == 1 and results[0].success
+        # The slow-lane bookkeeping from the one schedule() call survives the walk
+        assert [t.ip for t in deferred] == ["10.255.255.1"]
+
+
 async def test_poll_unreachable_device():
     """Test polling an unreachable device (should fail gracefully)."""
     poller = AsyncSNMPPoller(
@@ -305,6 +641,8 @@ def run_unit_tests():
     test_stats.test_record_success()
     test_stats.test_record_failure()
     test_stats.test_avg_duration()
+    test_stats.test_percentiles_fixed_memory()
+    test_stats.test_breakdowns_merge_across_workers()
     print("  PollerStats tests passed")
     
     # Test AsyncSNMPEngine
@@ -319,6 +657,27 @@ def run_unit_tests():
     test_poller.test_progress_callback()
     print("  AsyncSNMPPoller tests passed")
     
+    # Test native engine
+    test_codec = TestSNMPCodec()
+    test_codec.test_request_round_trip()
+    test_codec.test_response_values()
+    test_codec.test_binary_octet_string_renders_hex()
+    test_codec.test_malformed_oid_is_a_decode_error()
+    test_native = TestNativeSNMPEngine()
+    test_native.test_poller_selects_engine()
+    test_native.test_get_and_walk()
+    test_native.test_pipelined_table_walk()
+    test_native.test_timeout_retries()
+    test_native.test_stream_walk_backpressure()
+    test_latency = TestDeviceLatencyTracker()
+    test_latency.test_timeout_follows_rtt()
+    test_latency.test_slow_lane_backoff()
+    test_latency.test_retried_and_unmeasured_results_are_not_rtt_samples()
+    test_latency.test_state_shared_through_redis_and_kept_in_process_when_down()
+    test_latency.test_poller_defers_dead_device()
+    test_latency.test_prescheduled_targets_are_not_scheduled_again()
+    print("  NativeSNMPEngine tests passed")
+    
     print("\nAll unit tests passed!")
 
 
@@ -0,0 +1,324 @@
+"""
+Async Database Utility Functions
+
+Awaitable counterparts of backend.utils.db for async FastAPI routes. The
+API is the same, each call is just awaited:
+
+Usage:
+    from backend.utils.async_db import db_query, db_query_one, db_execute, db_transaction
+
+    alerts = await db_query("SELECT * FROM alerts WHERE status = %s", ('active',))
+    alert = await db_query_one("SELECT * FROM alerts WHERE id = %s", (alert_id,))
+    await db_execute("UPDATE alerts SET status = %s WHERE id = %s", ('resolved', alert_id))
+
+    async with db_transaction() as tx:
+        row = await tx.query_one("SELECT ... FOR UPDATE", (alert_id,))
+        await tx.execute("UPDATE ...", (...))
+
+Called directly from a coroutine, the sync helpers would stall the event
+loop for the length of every query. Here each statement runs on a bounded
+thread pool (DB_ASYNC_WORKERS threads) with a connection checked out of the
+shared DatabaseConnection pool for the duration of the statement. The event
+loop only awaits the result; when every worker is busy, further statements
+wait in the executor queue without blocking it.
+
+Transactions hold a dedicated pooled connection between awaits. They are
+limited to DB_ASYNC_TRANSACTIONS at a time, waiting on an asyncio semaphore
+rather than a worker thread. Size DB_POOL_MAX to at least workers plus
+transactions so async statements do not queue for connections.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from backend.database import get_db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = int(os.environ.get('DB_ASYNC_WORKERS', '20'))
+DEFAULT_TRANSACTIONS = int(os.environ.get('DB_ASYNC_TRANSACTIONS', '5'))
+
+
+class AsyncDatabase:
+    """
+    Bounded thread-pool executor over the shared connection pool.
+
+    Statements are plain functions of a cursor; run() executes one on a
+    worker thread with a pooled connection and returns the result to the
+    awaiting coroutine.
+    """
+
+    def __init__(self, workers: int = None, transactions: int = None, db=None):
+        self.workers = workers or DEFAULT_WORKERS
+        self.transactions = transactions or DEFAULT_TRANSACTIONS
+        self.db = db or get_db()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='db_async')
+        self._tx_slots = None
+        self._stats_lock = threading.Lock()
+        self._stats = {'statements': 0, 'errors': 0, 'in_flight': 0, 'max_in_flight': 0,
+                       'total_ms': 0.0}
+
+    def _count(self, key: str, amount: float = 1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _call(self, fn: Callable, args: Tuple, conn=None):
+        """Worker-thread side of run(): one statement on one connection."""
+        with self._stats_lock:
+            self._stats['in_flight'] += 1
+            self._stats['max_in_flight'] = max(self._stats['max_in_flight'], self._stats['in_flight'])
+        start = time.perf_counter()
+        try:
+            if conn is not None:
+                with conn.cursor() as cursor:
+                    return fn(cursor, *args)
+            with self.db.cursor() as cursor:
+                return fn(cursor, *args)
+        except Exception:
+            self._count('errors')
+            raise
+        finally:
+            with self._stats_lock:
+                self._stats['in_flight'] -= 1
+                self._stats['statements'] += 1
+                self._stats['total_ms'] += (time.perf_counter() - start) * 1000
+
+    async def run(self, fn: Callable, *args, conn=None):
+        """Run fn(cursor, *args) on a worker thread and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, fn, args, conn)
+
+    async def run_sync(self, fn: Callable, *args):
+        """Run any blocking callable (e.g. a sync service method) on a worker thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def transaction_slots(self) -> asyncio.Semaphore:
+        if self._tx_slots is None:
+            self._tx_slots = asyncio.Semaphore(self.transactions)
+        return self._tx_slots
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Executor counters (pool counters are in DatabaseConnection.get_stats())."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['workers'] = self.workers
+        stats['transactions'] = self.transactions
+        stats['avg_ms'] = round(stats['total_ms'] / stats['statements'], 3) if stats['statements'] else 0.0
+        stats['total_ms'] = round(stats['total_ms'], 3)
+        return stats
+
+    def close(self):
+        """Stop the workers (their connections are already back in the pool)."""
+        self._executor.shutdown(wait=True)
+
+
+_async_db: Optional[AsyncDatabase] = None
+_async_db_lock = threading.Lock()
+
+
+def get_async_db() -> AsyncDatabase:
+    """Get the process-wide AsyncDatabase."""
+    global _async_db
+    if _async_db is None:
+        with _async_db_lock:
+            if _async_db is None:
+                _async_db = AsyncDatabase()
+    return _async_db
+
+
+def close_async_db():
+    """Shut down the process-wide AsyncDatabase (app shutdown)."""
+    global _async_db
+    with _async_db_lock:
+        if _async_db is not None:
+            _async_db.close()
+            _async_db = None
+
+
+# ---------------------------------------------------------------------------
+# Cursor functions (run on a worker thread)
+# ---------------------------------------------------------------------------
+
+def _fetch_all(cursor, sql: str, params: Tuple) -> List[Dict[str, Any]]:
+    cursor.execute(sql, params)
+    if cursor.description:
+        return [dict(row) for row in cursor.fetchall()]
+    return []
+
+
+def _fetch_one(cursor, sql: str, params: Tuple) -> Optional[Dict[str, Any]]:
+    cursor.execute(sql, params)
+    row = cursor.fetchone()
+    return dict(row) if row else None
+
+
+def _execute(cursor, sql: str, params: Tuple, returning: bool) -> Union[int, Dict[str, Any], None]:
+    cursor.execute(sql, params)
+    if returning and cursor.description:
+        row = cursor.fetchone()
+        return dict(row) if row else None
+    return cursor.rowcount
+
+
+# ---------------------------------------------------------------------------
+# Public API (mirrors backend.utils.db)
+# ---------------------------------------------------------------------------
+
+async def db_query(sql: str, params: Tuple = None) -> List[Dict[str, Any]]:
+    """Execute a SELECT query and return all rows as list of dicts."""
+    return await get_async_db().run(_fetch_all, sql, params)
+
+
+async def db_query_one(sql: str, params: Tuple = None) -> Optional[Dict[str, Any]]:
+    """Execute a SELECT query and return single row as dict, or None."""
+    return await get_async_db().run(_fetch_one, sql, params)
+
+
+async def db_execute(sql: str, params: Tuple = None, returning: bool = False) -> Union[int, Dict[str, Any], None]:
+    """
+    Execute an INSERT/UPDATE/DELETE statement.
+
+    Returns the RETURNING row when returning=True, otherwise the number of
+    affected rows.
+    """
+    return await get_async_db().run(_execute, sql, params, returning)
+
+
+async def get_setting(key: str, default: Any = None) -> Any:
+    """Get a system setting by key (shares the backend.utils.db cache)."""
+    from backend.utils import db as sync_db
+
+    if sync_db._settings_cache_enabled and key in sync_db._settings_cache:
+        return sync_db._settings_cache[key]
+
+    row = await db_query_one("SELECT value FROM system_settings WHERE key = %s", (key,))
+    value = row['value'] if row else default
+    if sync_db._settings_cache_enabled:
+        sync_db._settings_cache[key] = value
+    return value
+
+
+async def get_settings_by_prefix(prefix: str) -> Dict[str, Any]:
+    """Get all settings matching a key prefix."""
+    rows = await db_query(
+        "SELECT key, value FROM system_settings WHERE key LIKE %s",
+        (f"{prefix}%",)
+    )
+    return {row['key']: row['value'] for row in rows}
+
+
+async def table_exists(table_name: str) -> bool:
+    """Check if a database table exists."""
+    row = await db_query_one("""
+        SELECT EXISTS (
+            SELECT FROM information_schema.tables
+            WHERE table_name = %s
+        ) as exists
+    """, (table_name,))
+    return row['exists'] if row else False
+
+
+async def count_rows(table_name: str, where: str = None, params: Tuple = None) -> int:
+    """Count rows in a table with optional WHERE clause."""
+    sql = f"SELECT COUNT(*) as count FROM {table_name}"
+    if where:
+        sql += f" WHERE {where}"
+
+    row = await db_query_one(sql, params)
+    return row['count'] if row else 0
+
+
+async def db_paginate(
+    select_sql: str,
+    count_sql: str,
+    params: List = None,
+    limit: int = 50
+) -> Dict[str, Any]:
+    """
+    Execute a paginated query with count and cursor support.
+
+    Same contract as backend.utils.db.db_paginate; the count and page
+    queries run concurrently.
+    """
+    params = list(params) if params else []
+
+    total_row, items = await asyncio.gather(
+        db_query_one(count_sql, tuple(params) if params else None),
+        db_query(select_sql + " LIMIT %s", tuple(params + [limit + 1])),
+    )
+    total = total_row['total'] if total_row else 0
+
+    has_more = len(items) > limit
+    if has_more:
+        items = items[:-1]
+
+    next_cursor = None
+    if has_more and items:
+        last_id = items[-1].get('id')
+        if last_id:
+            cursor_data = json.dumps({'last_id': str(last_id)})
+            next_cursor = base64.b64encode(cursor_data.encode()).decode()
+
+    return {
+        'items': items,
+        'total': total,
+        'limit': limit,
+        'cursor': next_cursor
+    }
+
+
+class db_transaction:
+    """
+    Async context manager for a transaction with multiple operations.
+
+    Usage:
+        async with db_transaction() as tx:
+            row = await tx.query_one("SELECT * FROM alerts WHERE id = %s", (alert_id,))
+            if row:
+                await tx.execute("UPDATE alerts SET status = %s WHERE id = %s", ('resolved', alert_id))
+            # Commits on exit, rolls back on exception
+    """
+
+    def __init__(self):
+        self.adb = None
+        self.conn = None
+        self._checkout = None
+
+    async def __aenter__(self):
+        self.adb = get_async_db()
+        await self.adb.transaction_slots().acquire()
+        try:
+            self._checkout = self.adb.db.transaction()
+            self.conn = await self.adb.run_sync(self._checkout.__enter__)
+        except BaseException:
+            self.adb.transaction_slots().release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        # DatabaseConnection.transaction() commits or rolls back
+        try:
+            await self.adb.run_sync(self._checkout.__exit__, exc_type, exc_val, exc_tb)
+        finally:
+            self.adb.transaction_slots().release()
+        return False
+
+    async def query(self, sql: str, params: Tuple = None) -> List[Dict[str, Any]]:
+        """Execute SELECT and return all rows."""
+        return await self.adb.run(_fetch_all, sql, params, conn=self.conn)
+
+    async def query_one(self, sql: str, params: Tuple = None) -> Optional[Dict[str, Any]]:
+        """Execute SELECT and return single row."""
+        return await self.adb.run(_fetch_one, sql, params, conn=self.conn)
+
+    async def execute(self, sql: str, params: Tuple = None) -> Union[int, Dict[str, Any]]:
+        """Execute INSERT/UPDATE/DELETE, returns row if RETURNING clause used."""
+        return await self.adb.run(_execute, sql, params, True, conn=self.conn)
@@ -323,21 +323,18 @@ class db_transaction:
     """
     
     def __init__(self):
-        self.db = None
+        self._transaction = None
         self.cursor = None
     
     def __enter__(self):
-        self.db = get_db()
-        self.cursor = self.db.cursor()
+        # Dedicated pooled connection, committed or rolled back on exit
+        self._transaction = get_db().transaction()
+        self.cursor = self._transaction.__enter__().cursor()
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if exc_type is None:
-            self.db.commit()
-        else:
-            self.db.rollback()
         self.cursor.close()
-        return False
+        return self._transaction.__exit__(exc_type, exc_val, exc_tb)
     
     def query(self, sql: str, params: Tuple = None) -> List[Dict[str, Any]]:
         """Execute SELECT and return all rows."""
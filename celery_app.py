@@ -23,7 +23,8 @@ def _make_celery() -> Celery:
         "opsconductor_monitor",
         broker=broker_url,
         backend=result_backend,
-        include=["backend.tasks.job_tasks", "backend.tasks.polling_tasks", "backend.tasks.generic_polling_task"],
+        include=["backend.tasks.job_tasks", "backend.tasks.polling_tasks", "backend.tasks.generic_polling_task",
+                 "backend.tasks.maintenance_tasks"],
     )
 
     # Optimized for high-throughput SNMP/SSH polling of 1000+ devices
@@ -53,6 +54,7 @@ def _make_celery() -> Celery:
             'workflows.*': {'queue': 'workflows'},
             'analysis.*': {'queue': 'analysis'},
             'notifications.*': {'queue': 'notifications'},
+            'maintenance.*': {'queue': 'maintenance'},
         },
         
         # Task time limits to prevent runaway tasks
@@ -80,9 +82,16 @@ def _make_celery() -> Celery:
             },
             # Dynamic polling scheduler - reads from polling_configs table
             # All polling schedules are now controlled via the frontend
+            # Time-wheel scheduler: claims the slots due in the next window,
+            # so the tick period must match POLL_SCHEDULER_WINDOW
             "opsconductor-polling-scheduler": {
-                "task": "polling.scheduler_tick",
-                "schedule": 30.0,  # Check for due polls every 30 seconds
+                "task": "polling.scheduler_tick_v2",
+                "schedule": float(os.getenv("POLL_SCHEDULER_WINDOW", "10")),
+            },
+            # Time-partitioned history: create upcoming partitions, drop expired ones
+            "opsconductor-partition-maintenance": {
+                "task": "maintenance.partitions",
+                "schedule": 3600.0,
             },
         },
     )
@@ -2,8 +2,12 @@
 """
 Script to sync NetBox devices to local cache.
 Run this periodically (e.g., every 15 minutes) to keep cache fresh.
+
+  --incremental  only fetch devices changed since the last sync; keep a full
+                 sync now and then (e.g., nightly) to pick up site renames
 """
 
+import argparse
 import os
 import sys
 
@@ -14,7 +18,7 @@ import psycopg2.pool
 from backend.services.netbox_cache_service import NetBoxCacheService
 
 
-def main():
+def main(args):
     # Create database pool
     db_pool = psycopg2.pool.SimpleConnectionPool(
         minconn=1,
@@ -48,12 +52,13 @@ def main():
     service = NetBoxCacheService(db_pool=db_pool)
     
     print("Starting NetBox device cache sync...")
-    result = service.sync_devices_to_cache()
+    result = service.sync_devices_to_cache(incremental=args.incremental)
     
     print(f"\nSync complete:")
     print(f"  Total devices fetched: {result['total']}")
     print(f"  Inserted: {result['inserted']}")
     print(f"  Updated: {result['updated']}")
+    print(f"  Unchanged: {result['unchanged']}")
     print(f"  Errors: {result['errors']}")
     
     # Show cache stats
@@ -67,4 +72,7 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Sync NetBox devices to netbox_device_cache")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only fetch devices changed since the last sync")
+    main(parser.parse_args())
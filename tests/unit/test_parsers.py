@@ -105,3 +105,44 @@ class TestCienaLldpRemoteParser:
         results = parser.parse('')
         
         assert results == []
+
+
+class TestParseSnmpResults:
+    """Tests for the compiled OID mapping trie in parse_snmp_results."""
+    
+    MAPPINGS = [
+        {'oid': '1.3.6.1.4.1.6141.2.60.4.1.1.1.1.105', 'name': 'rx_power_dbm',
+         'transform': 'divide:10000', 'group_name': 'xcvr'},
+        {'oid': '1.3.6.1.4.1.6141.2.60.47.1.3.1.1.2', 'name': 'ring_name',
+         'transform': None, 'group_name': 'virtual_ring'},
+        {'oid': '1.3.6.1.4.1.6141.2.60.47.1.1.1.1.0', 'name': 'global_state',
+         'transform': None, 'group_name': 'raps'},
+    ]
+    
+    def test_single_and_multi_component_indexes(self):
+        """Test full index suffixes and pre-compiled transforms."""
+        from backend.tasks.generic_polling_task import parse_snmp_results
+        
+        parsed = parse_snmp_results({
+            '.1.3.6.1.4.1.6141.2.60.4.1.1.1.1.105.7': '-31250',
+            '.1.3.6.1.4.1.6141.2.60.47.1.3.1.1.2.1.5': 'ring-a',
+            '.1.3.6.1.4.1.6141.2.60.47.1.3.1.1.2.2.5': 'ring-b',
+            '.1.3.6.1.4.1.6141.2.60.47.1.1.1.1.0': '2',
+            '.1.3.6.1.2.1.1.3.0': '100',
+        }, self.MAPPINGS)
+        
+        assert parsed[7]['rx_power_dbm'] == -3.125
+        assert parsed[7]['_group_rx_power_dbm'] == 'xcvr'
+        assert parsed['1.5']['ring_name'] == 'ring-a'
+        assert parsed['2.5']['ring_name'] == 'ring-b'
+        assert parsed[0]['global_state'] == '2'
+        assert len(parsed) == 4
+    
+    def test_bad_transform_value_kept(self):
+        """Test values that fail their transform pass through unchanged."""
+        from backend.tasks.generic_polling_task import apply_transform, compile_transform
+        
+        assert compile_transform('divide:abc') is None
+        assert compile_transform(None) is None
+        assert apply_transform('n/a', 'divide:10') == 'n/a'
+        assert apply_transform(bytes([0, 0x1b, 0x2c, 1, 2, 3]), 'hex_to_mac') == '00:1b:2c:01:02:03'
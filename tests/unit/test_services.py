@@ -73,3 +73,1372 @@ class TestNotificationService:
         service = NotificationService(['mailto://test@test.com'])
         result = service.send('Test', 'Test message')
         assert result == False
+
+
+class TestMetricIngestBuffer:
+    """Tests for MetricIngestBuffer."""
+    
+    def _mock_conn(self, autocommit=True):
+        conn = MagicMock()
+        conn.autocommit = autocommit
+        cursor = conn.cursor.return_value.__enter__.return_value
+        return conn, cursor
+    
+    def test_copy_flush_single_transaction(self):
+        """Test COPY flush escapes fields and wraps tables in one transaction."""
+        from backend.services.metric_ingest import MetricIngestBuffer
+        
+        ingest = MetricIngestBuffer(method='copy')
+        ingest.add('polling_data', {
+            'poll_type': 'generic',
+            'device_ip': '10.0.0.1',
+            'collected_at': None,
+            'data': {'descr': 'a\tb\\c'},
+        })
+        ingest.add('optical_metrics', {'device_ip': '10.0.0.1', 'interface_index': 1, 'rx_power': -3.5})
+        
+        conn, cursor = self._mock_conn()
+        payloads = []
+        cursor.copy_expert.side_effect = lambda sql, buf: payloads.append((sql, buf.read()))
+        
+        assert ingest.flush(conn) == 2
+        assert ingest.pending == 0
+        statements = [c.args[0] for c in cursor.execute.call_args_list]
+        assert statements == ["BEGIN", "COMMIT"]
+        sql, body = payloads[0]
+        assert sql.startswith("COPY polling_data (poll_type, device_ip, collected_at, data)")
+        assert body == 'generic\t10.0.0.1\t\\N\t{"descr": "a\\\\tb\\\\\\\\c"}\n'
+        assert ingest.get_stats()['rows_by_table'] == {'polling_data': 1, 'optical_metrics': 1}
+    
+    def test_flush_rolls_back_on_error(self):
+        """Test a failed flush rolls back and keeps rows buffered."""
+        from backend.services.metric_ingest import MetricIngestBuffer
+        
+        ingest = MetricIngestBuffer(method='copy')
+        ingest.add('interface_metrics', {'device_ip': '10.0.0.1', 'interface_index': 1})
+        
+        conn, cursor = self._mock_conn(autocommit=False)
+        cursor.copy_expert.side_effect = RuntimeError("boom")
+        
+        with pytest.raises(RuntimeError):
+            ingest.flush(conn)
+        conn.rollback.assert_called_once()
+        assert ingest.pending == 1
+        assert ingest.rows_written == 0
+
+
+class TestCounterStateStore:
+    """Tests for CounterStateStore rate computation."""
+    
+    def test_rates_and_32bit_wrap(self):
+        """Test first sample has no rate and 32-bit wrap is corrected."""
+        from datetime import datetime, timedelta, timezone
+        from backend.services.counter_state import CounterStateStore
+        
+        store = CounterStateStore()
+        t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        assert store.observe('10.0.0.1', 1, 1000, 2**32 - 1000, t0) == (None, None)
+        
+        rx_bps, tx_bps = store.observe('10.0.0.1', 1, 2000, 1000, t0 + timedelta(seconds=8))
+        assert rx_bps == 1000
+        assert tx_bps == 2000
+        assert store.wraps == 1
+    
+    def test_64bit_reset_is_discontinuity(self):
+        """Test a reset HC counter yields no rate instead of a 2^64 wrap."""
+        from datetime import datetime, timedelta, timezone
+        from backend.services.counter_state import CounterStateStore, counter_delta
+        
+        assert counter_delta(2**64 - 10, 5) == 15
+        
+        store = CounterStateStore()
+        t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        store.observe('10.0.0.1', 1, 10 * 2**32, 10 * 2**32, t0)
+        assert store.observe('10.0.0.1', 1, 100, 100, t0 + timedelta(seconds=60)) == (None, None)
+        assert store.discontinuities == 2
+    
+    def test_uptime_reset_discards_counters(self):
+        """Test a sysUpTime decrease restarts the rate baseline."""
+        from datetime import datetime, timedelta, timezone
+        from backend.services.counter_state import CounterStateStore, parse_timeticks
+        
+        assert parse_timeticks('Timeticks: (123456) 0:20:34.56') == 123456
+        assert parse_timeticks('1:2:03:04.50') == (86400 + 7384) * 100 + 50
+        
+        store = CounterStateStore()
+        t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        t1 = t0 + timedelta(seconds=60)
+        store.observe_uptime('10.0.0.1', 500000, t0)
+        store.observe('10.0.0.1', 1, 5000, 5000, t0)
+        store.observe_uptime('10.0.0.1', 3000, t1)
+        assert store.observe('10.0.0.1', 1, 100, 100, t1) == (None, None)
+
+
+class TestPollCyclePipeline:
+    """Tests for the streaming poll cycle pipeline."""
+    
+    def _pipeline(self, db):
+        from datetime import datetime
+        from backend.tasks.generic_polling_task import PollCyclePipeline
+        
+        pipeline = PollCyclePipeline(
+            db=db, poll_type_name='ciena_optical', table_name='optical_metrics',
+            compiled_mappings=MagicMock(), total_devices=3, started_at=datetime.utcnow(),
+        )
+        pipeline.execution_id = 7
+        return pipeline
+    
+    def _failed(self, ip):
+        from types import SimpleNamespace
+        return SimpleNamespace(target=SimpleNamespace(ip=ip), success=False, values=None,
+                               error='Timeout', duration=5.0)
+    
+    def test_finish_drains_queue_after_inflight_flush(self):
+        """Test queued results are stored only once a background flush has finished."""
+        import asyncio
+        import threading
+        
+        release = threading.Event()
+        flushed = []
+        db = MagicMock()
+        conn = db.connection.return_value.__enter__.return_value
+        cursor = conn.cursor.return_value.__enter__.return_value
+        
+        def copy(sql, buf):
+            release.wait(5)
+            flushed.append(buf.read().count('\n'))
+        cursor.copy_expert.side_effect = copy
+        
+        pipeline = self._pipeline(db)
+        pipeline.process(self._failed('10.0.0.1'))
+        inflight = pipeline._get_executor().submit(pipeline.flush)
+        
+        pipeline.queue = asyncio.Queue()
+        pipeline.queue.put_nowait(self._failed('10.0.0.2'))
+        pipeline.queue.put_nowait(self._failed('10.0.0.3'))
+        finisher = threading.Thread(target=pipeline.finish, args=(True,))
+        finisher.start()
+        finisher.join(0.2)
+        assert finisher.is_alive()
+        assert pipeline.devices_done == 1
+        
+        release.set()
+        finisher.join(5)
+        inflight.result()
+        assert flushed == [1, 2]
+        assert pipeline.devices_done == 3
+        assert pipeline.ingest.pending == 0
+    
+    def test_failed_cycle_closes_execution(self):
+        """Test a cycle that raises marks its execution failed instead of leaving it running."""
+        import asyncio
+        from types import SimpleNamespace
+        from backend.tasks.generic_polling_task import run_poll_cycle
+        
+        db = MagicMock()
+        cursor = db.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = {'id': 7}
+        poller = MagicMock(deferred=[])
+        poller.schedule.side_effect = lambda targets: targets
+        poller.stream_walk_devices.side_effect = RuntimeError("engine closed")
+        plan = SimpleNamespace(poll_type={'vendor': 'ciena'}, target_table='optical_metrics',
+                               compiled_mappings=MagicMock(), oids=[])
+        targets = [SimpleNamespace(ip='10.0.0.1')]
+        
+        with pytest.raises(RuntimeError):
+            asyncio.run(run_poll_cycle(db, 'ciena_optical', poller, plan=plan, targets=targets))
+        sql, params = cursor.execute.call_args.args
+        assert "status = 'failed'" in sql
+        assert params[-2:] == ('engine closed', 7)
+
+
+class TestPollingDaemon:
+    """Tests for the resident polling daemon schedule."""
+    
+    def _config(self, config_id=1, interval=60, last_run_at=None):
+        return {
+            'id': config_id, 'name': f'config-{config_id}', 'poll_type': 'ciena_optical',
+            'poll_type_name': 'ciena_optical', 'interval_seconds': interval,
+            'last_run_at': last_run_at, 'target_manufacturer': None,
+            'target_role': None, 'target_site_name': None,
+        }
+    
+    def test_slots_keep_phase_and_skip_missed(self):
+        """Test late starts keep the phase and missed slots are skipped."""
+        from backend.services.polling_daemon import PollingDaemon
+        
+        daemon = PollingDaemon()
+        daemon.apply_configs([self._config(interval=10)], now=1000.0)
+        
+        assert [e.config['id'] for e in daemon.due(1000.2)] == [1]
+        assert daemon.schedule[1].next_due == 1010.0
+        assert daemon.due(1009.9) == []
+        
+        # Three slots late: runs once, next slot stays on the 10s grid
+        assert len(daemon.due(1035.0)) == 1
+        assert daemon.schedule[1].next_due == 1040.0
+        assert abs(daemon.schedule_lag.max - 5.0) < 1e-9
+        assert daemon.missed_slots == 2
+    
+    def test_overrun_and_config_changes(self):
+        """Test a running config is not started twice and removed configs drop out."""
+        from datetime import datetime, timedelta
+        from backend.services.polling_daemon import PollingDaemon
+        
+        daemon = PollingDaemon()
+        recent = datetime.utcnow() - timedelta(seconds=20)
+        daemon.apply_configs([self._config(1, 60), self._config(2, 60, last_run_at=recent)], now=0.0)
+        assert 39 < daemon.schedule[2].next_due <= 40
+        
+        entry = daemon.due(0.0)[0]
+        entry.task = MagicMock(done=Mock(return_value=False))
+        assert [e.config['id'] for e in daemon.due(60.0)] == [2]
+        assert daemon.overruns == 1
+        
+        daemon.apply_configs([self._config(1, 30)], now=61.0)
+        assert list(daemon.schedule) == [1]
+        assert daemon.schedule[1].next_due == 90.0
+
+
+class TestPollScheduler:
+    """Tests for the time-wheel poll scheduler."""
+    
+    def test_phase_offsets_spread_shards(self):
+        """Test shards of a config are evenly spaced and phases are stable."""
+        from datetime import datetime, timezone
+        from backend.services.poll_scheduler import phase_offset, next_slot_time
+        
+        phases = sorted(phase_offset(7, i, 4, 300) for i in range(4))
+        gaps = [b - a for a, b in zip(phases, phases[1:])]
+        assert all(abs(gap - 75) < 1e-6 for gap in gaps)
+        assert phase_offset(7, 0, 4, 300) == phase_offset(7, 0, 4, 300)
+        assert phase_offset(7, 0, 1, 300) != phase_offset(8, 0, 1, 300)
+        
+        now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        slot = next_slot_time(now, 42.0, 300)
+        assert 0 <= (slot - now).total_seconds() < 300
+        assert (slot.timestamp() - 42.0) % 300 == 0
+    
+    def test_claim_paces_to_device_cap(self):
+        """Test due slots get ETAs paced to the cap and overflow waits."""
+        from datetime import datetime, timedelta, timezone
+        from backend.services.poll_scheduler import PollScheduler
+        
+        now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        slots = [
+            {'id': i, 'config_id': 1, 'shard_index': i, 'shard_count': 3, 'interval_seconds': 300,
+             'device_count': 250, 'next_run_at': now, 'name': 'optics', 'poll_type': 'ciena_optical',
+             'poll_type_name': 'ciena_optical', 'target_manufacturer': None, 'target_role': None,
+             'target_site_name': 'dc1'}
+            for i in range(3)
+        ]
+        db = MagicMock()
+        db.get_connection.return_value.autocommit = True
+        cursor = db.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = {'paced_until': now - timedelta(seconds=30)}
+        cursor.fetchall.return_value = slots
+        
+        scheduler = PollScheduler(db, max_devices_per_sec=25, window_seconds=10)
+        send_task = Mock()
+        with patch.object(PollScheduler, 'sync_slots'):
+            result = scheduler.tick(send_task, now=now)
+        
+        assert result['dispatched'] == 2
+        assert result['waiting'] == 1
+        etas = [c.kwargs['eta'] for c in send_task.call_args_list]
+        assert etas == [now, now + timedelta(seconds=10)]
+        assert send_task.call_args.kwargs['kwargs']['device_filter'] == {'site': 'dc1', 'shard': [1, 3]}
+        
+        sql = [c.args for c in cursor.execute.call_args_list]
+        assert sql[0] == ("BEGIN",)
+        assert any('SKIP LOCKED' in args[0] for args in sql)
+        assert any(len(args) > 1 and args[1][-1] == [0, 1] for args in sql)
+        assert sql[-1] == ("COMMIT",)
+
+
+class TestTrapBatchWriter:
+    """Tests for batched trap persistence."""
+    
+    def _items(self):
+        from datetime import datetime, timezone
+        from backend.services.snmp_trap_receiver import DecodedTrap, TrapEvent
+        
+        def item(alarm_id, is_clear=False):
+            trap = DecodedTrap(
+                received_at=datetime.now(timezone.utc), source_ip='10.0.0.1', source_port=162,
+                snmp_version='v2c', community='', enterprise_oid='1.3.6.1.4.1.6141',
+                trap_oid='1.3.6.1.4.1.6141.2.60.5.0.1', generic_trap=0, specific_trap=0,
+                uptime=100, varbinds={'1.3.6.1.2.1.2.2.1.1.5': '5'},
+            )
+            event = TrapEvent(
+                event_type='alarm_clear' if is_clear else 'alarm_raise', source_ip='10.0.0.1',
+                device_name=None, severity='major', object_type='port', object_id='5',
+                description='Link down', details={}, alarm_id=alarm_id, is_clear=is_clear,
+            )
+            return trap, 'ciena', event
+        
+        return [item('a'), item('a'), item('a', is_clear=True), item('b')]
+    
+    def test_batch_correlates_in_memory(self):
+        """Test repeats and clears resolve against the alarm index, not per-trap queries."""
+        from datetime import datetime, timezone
+        from backend.services.snmp_trap_receiver import TrapBatchWriter
+        
+        raised = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        conn = MagicMock(autocommit=True, closed=False)
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchall.side_effect = [
+            [{'id': 7, 'alarm_id': 'b', 'severity': 'major', 'created_at': raised,
+              'last_seen_at': raised, 'occurrence_count': 3}],   # active_trap_alarms
+            [{'id': 100}, {'id': 101}, {'id': 102}, {'id': 103}],  # trap_events ids
+            [{'id': 1}, {'id': 2}, {'id': 3}, {'id': 4}],          # trap_log ids
+        ]
+        copied = {}
+        cursor.copy_expert.side_effect = lambda sql, buf: copied.setdefault(sql.split()[1], buf.getvalue())
+        
+        directory = Mock()
+        directory.device_name.side_effect = {'10.0.0.1': 'sw1'}.get
+        writer = TrapBatchWriter(lambda: conn, directory=directory)
+        with patch('backend.services.snmp_trap_receiver.execute_values') as execute_values:
+            assert writer.write(self._items()) == 4
+        
+        columns = ['id', 'created_at', 'source_ip', 'device_name', 'event_type', 'severity',
+                   'object_type', 'object_id', 'description', 'details', 'trap_log_id',
+                   'alarm_id', 'is_clear', 'cleared_event_id', 'occurrence_count', 'last_seen_at']
+        events = [dict(zip(columns, line.split('\t'))) for line in copied['trap_events'].splitlines()]
+        assert [e['id'] for e in events] == ['100', '101']          # raise a, clear a
+        assert events[0]['device_name'] == 'sw1'
+        assert events[0]['occurrence_count'] == '2'                 # repeat within the batch
+        assert events[1]['cleared_event_id'] == '100'
+        log = [line.split('\t') for line in copied['trap_log'].splitlines()]
+        assert [row[-1] for row in log] == ['100', '100', '101', '7']
+        
+        # Repeat of an alarm from an earlier batch updates the stored event
+        assert [(r[0], r[1]) for r in execute_values.call_args.args[2]] == [(7, 1)]
+        assert 'a' not in writer.alarms
+        assert writer.alarms.get('b').count == 4
+        
+        sql = [c.args[0] for c in cursor.execute.call_args_list]
+        assert sql[-1] == "COMMIT"
+        assert not any('SELECT id FROM trap_events' in s for s in sql)
+        assert writer.get_stats()['repeats'] == 2
+    
+    def test_failed_batch_keeps_alarm_state(self):
+        """Test a failed write leaves the alarm index alone and reloads it next time."""
+        from datetime import datetime, timezone
+        from backend.services.snmp_trap_receiver import TrapBatchWriter
+        
+        raised = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        conn = MagicMock(autocommit=True, closed=False)
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchall.side_effect = [
+            [{'id': 7, 'alarm_id': 'b', 'severity': 'major', 'created_at': raised,
+              'last_seen_at': None, 'occurrence_count': 1}],
+            [{'id': i} for i in range(100, 104)],
+            [{'id': i} for i in range(1, 5)],
+        ]
+        cursor.copy_expert.side_effect = RuntimeError("connection lost")
+        
+        writer = TrapBatchWriter(lambda: conn, directory=Mock())
+        with pytest.raises(RuntimeError):
+            writer.write(self._items())
+        
+        assert [alarm.alarm_id for alarm in writer.alarms] == ['b']
+        assert writer.alarms.get('b').count == 1
+        assert writer.alarms.loaded is False
+        assert writer.ingest.pending == 0
+        assert writer.failed_batches == 1
+        assert ("ROLLBACK",) in [c.args for c in cursor.execute.call_args_list]
+    
+    def test_shared_alarms_adopt_other_process_raises(self):
+        """Test a multi-process writer looks up alarm ids it has not seen before correlating."""
+        from datetime import datetime, timezone
+        from backend.services.snmp_trap_receiver import TrapBatchWriter
+        
+        raised = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        conn = MagicMock(autocommit=True, closed=False)
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchall.side_effect = [
+            [{'id': 9, 'alarm_id': 'a', 'severity': 'major', 'created_at': raised,
+              'last_seen_at': raised, 'occurrence_count': 1}],   # raised by another process
+            [{'id': i} for i in range(100, 104)],
+            [{'id': i} for i in range(1, 5)],
+        ]
+        
+        writer = TrapBatchWriter(lambda: conn, directory=Mock(), shared_alarms=True)
+        writer.conn = conn
+        writer.alarms.loaded = True
+        with patch('backend.services.snmp_trap_receiver.execute_values') as execute_values:
+            writer.write(self._items())
+        
+        lookup = cursor.execute.call_args_list[0]
+        assert 'alarm_id = ANY' in lookup.args[0]
+        assert sorted(lookup.args[1][0]) == ['a', 'b']
+        # Both raises of 'a' count on the other process's event, the clear references it
+        assert [(r[0], r[1]) for r in execute_values.call_args.args[2]] == [(9, 2)]
+        assert 'a' not in writer.alarms
+    
+    def test_shared_alarms_evict_alarms_cleared_by_another_process(self):
+        """Test a multi-process writer re-checks known alarm ids, so a raise after another process's clear is new."""
+        from datetime import datetime, timezone
+        from backend.services.snmp_trap_receiver import TrapBatchWriter
+        from backend.services.trap_alarm_index import ActiveAlarm
+        
+        raised = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        conn = MagicMock(autocommit=True, closed=False)
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchall.side_effect = [
+            [],                                                   # 'b' was cleared elsewhere
+            [{'id': i} for i in range(100, 104)],
+            [{'id': i} for i in range(1, 5)],
+        ]
+        
+        writer = TrapBatchWriter(lambda: conn, directory=Mock(), shared_alarms=True)
+        writer.conn = conn
+        writer.alarms.loaded = True
+        writer.alarms._alarms['b'] = ActiveAlarm('b', 7, 'major', raised, raised)
+        with patch('backend.services.snmp_trap_receiver.execute_values') as execute_values:
+            writer.write(self._items())
+        
+        lookup = cursor.execute.call_args_list[0]
+        assert sorted(lookup.args[1][0]) == ['a', 'b']
+        # The raise of 'b' opens a new event instead of repeating cleared event 7
+        execute_values.assert_not_called()
+        assert writer.alarms.get('b').event_id == 102
+        assert writer.get_stats()['repeats'] == 1
+
+
+class TestTrapReceiverSockets:
+    """Tests for SO_REUSEPORT trap sockets."""
+    
+    def test_reuseport_group_steers_by_source(self):
+        """Test every datagram from one source lands on the same receiver socket."""
+        import socket
+        from backend.services.snmp_trap_receiver import open_trap_socket
+        
+        if not hasattr(socket, 'SO_REUSEPORT'):
+            pytest.skip("SO_REUSEPORT not supported")
+        first = open_trap_socket('127.0.0.1', 0, processes=2)
+        port = first.getsockname()[1]
+        second = open_trap_socket('127.0.0.1', port, processes=2)
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            for _ in range(20):
+                # A new source port each time: the 4-tuple hash alone would spread these
+                sender.close()
+                sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                sender.sendto(b'trap', ('127.0.0.1', port))
+            counts = []
+            for sock in (first, second):
+                sock.settimeout(0.2)
+                received = 0
+                try:
+                    while True:
+                        sock.recv(16)
+                        received += 1
+                except socket.timeout:
+                    pass
+                counts.append(received)
+            assert sorted(counts) == [0, 20]
+        finally:
+            sender.close()
+            first.close()
+            second.close()
+    
+    def test_status_aggregates_worker_rows(self):
+        """Test each process upserts its own row and recomputes the fleet totals."""
+        from backend.services.snmp_trap_receiver import SNMPTrapReceiver
+        
+        with patch('backend.services.snmp_trap_receiver.get_device_directory'):
+            receiver = SNMPTrapReceiver('127.0.0.1', 1162, worker_index=2, processes=4)
+        receiver.traps_received = 10
+        cursor = MagicMock()
+        receiver._publish_status(cursor)
+        
+        upsert, aggregate = [c.args for c in cursor.execute.call_args_list]
+        assert 'ON CONFLICT (hostname, worker_index)' in upsert[0]
+        assert upsert[1][:3] == (receiver.hostname, 2, os.getpid())
+        assert upsert[1][5] == 10
+        assert 'SUM(traps_received)' in aggregate[0] and 'WHERE s.id = 1' in aggregate[0]
+        assert receiver.writer.shared_alarms is True
+
+
+class TestTrapRouting:
+    """Tests for compiled trap dispatch."""
+    
+    def _trap(self, trap_oid, varbinds=None):
+        from datetime import datetime, timezone
+        from backend.services.snmp_trap_receiver import DecodedTrap
+        
+        return DecodedTrap(
+            received_at=datetime.now(timezone.utc), source_ip='10.0.0.1', source_port=162,
+            snmp_version='v2c', community='', enterprise_oid=trap_oid.rsplit('.', 2)[0],
+            trap_oid=trap_oid, generic_trap=0, specific_trap=0, uptime=100,
+            varbinds=varbinds or {},
+        )
+    
+    def _router(self):
+        from backend.services.snmp_trap_receiver import (
+            CienaTrapHandler, GenericTrapHandler, TrapRouter,
+        )
+        
+        generic = GenericTrapHandler()
+        return TrapRouter({'ciena': CienaTrapHandler(), 'cisco': generic,
+                           'standard': generic, 'generic': generic})
+    
+    def test_vendor_prefixes_match_whole_arcs(self):
+        """Test vendor lookup is longest-prefix on arc boundaries and memoised."""
+        router = self._router()
+        
+        assert router.route(self._trap('1.3.6.1.4.1.9.9.41.2.0.1')) == 'cisco'
+        assert router.route(self._trap('1.3.6.1.4.1.99.1.0.1')) == 'generic'
+        assert router.route(self._trap('1.3.6.1.6.3.1.1.5.1')) == 'standard'
+        
+        trap = self._trap('1.3.6.1.4.1.6141.2.60.5.0.2')
+        vendor, handler, decoded = router.dispatch(trap)
+        assert (vendor, decoded[0]) == ('ciena', 'alarmCleared')
+        assert router.dispatch(trap)[1] is handler
+        assert router.table.get_stats()['hits'] == 1
+    
+    def test_ciena_alarm_varbinds_by_column(self):
+        """Test instance-suffixed alarm varbinds resolve to their column, not the last arc."""
+        router = self._router()
+        trap = self._trap('1.3.6.1.4.1.6141.2.60.5.0.1', {
+            '1.3.6.1.4.1.6141.2.60.5.1.1.1.1': 'Port 12',
+            '1.3.6.1.4.1.6141.2.60.5.1.1.2.1': '2',
+            '1.3.6.1.4.1.6141.2.60.5.1.1.3.1': 'Loss of signal',
+            '1.3.6.1.4.1.6141.2.60.5.1.1.5.1': 'los-12',
+        })
+        
+        vendor, handler, decoded = router.dispatch(trap)
+        event = handler.handle(trap, decoded)
+        assert (event.object_type, event.object_id) == ('port', '12')
+        assert event.severity == 'major'
+        assert event.description == 'Loss of signal'
+        assert event.alarm_id == 'los-12'
+    
+    def test_load_profiles_adds_prefixes(self):
+        """Test snmp_profiles enterprise OIDs route to their vendor, built-ins win."""
+        router = self._router()
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [
+            {'enterprise_oid': '1.3.6.1.4.1.6141', 'vendor': 'other'},
+            {'enterprise_oid': '.1.3.6.1.4.1.30065', 'vendor': 'arista'},
+        ]
+        trap = self._trap('1.3.6.1.4.1.30065.3.11.0.1')
+        assert router.route(trap) == 'generic'
+        
+        assert router.load_profiles(cursor) == 1
+        vendor, handler, decoded = router.dispatch(trap)
+        assert vendor == 'arista'
+        assert handler is router.table.handlers['generic']
+        assert router.route(self._trap('1.3.6.1.4.1.6141.2.60.5.0.1')) == 'ciena'
+
+
+class TestDeviceDirectory:
+    """Tests for the in-process device directory."""
+    
+    def _row(self, netbox_id, ip, name, cached_at, manufacturer='Ciena', site='dc1', shard_hash=0):
+        return {
+            'netbox_device_id': netbox_id, 'device_ip': ip, 'device_name': name,
+            'device_type': 'SAOS', 'manufacturer': manufacturer, 'site_id': 1,
+            'site_name': site, 'role_name': 'access', 'shard_hash': shard_hash,
+            'cached_at': cached_at,
+        }
+    
+    def test_incremental_refresh_and_counters(self):
+        """Test lookups hit the snapshot and refreshes only read changed rows."""
+        from datetime import datetime, timedelta, timezone
+        from backend.services.device_directory import DeviceDirectory
+        
+        t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        t1 = datetime(2026, 1, 1, 0, 10, tzinfo=timezone.utc)
+        db = MagicMock()
+        cursor = db.cursor.return_value.__enter__.return_value
+        cursor.fetchall.side_effect = [
+            [self._row(1, '10.0.0.1', 'sw1', t0), self._row(2, '10.0.0.2', 'sw2', t0)],
+            [self._row(1, '10.0.0.9', 'sw1', t1)],   # sw1 moved to a new IP
+        ]
+        
+        directory = DeviceDirectory(db, max_age=3600, overlap_seconds=60)
+        assert directory.device_name('10.0.0.1') == 'sw1'
+        assert directory.get_by_id(2).device_name == 'sw2'
+        assert directory.get_by_ip('10.9.9.9') is None
+        assert cursor.execute.call_count == 1
+        
+        directory.refresh()
+        sql, params = cursor.execute.call_args.args
+        assert 'cached_at > %s' in sql
+        assert params[0] == t0 - timedelta(seconds=60)
+        assert directory.get_by_ip('10.0.0.1') is None
+        assert directory.device_name('10.0.0.9') == 'sw1'
+        assert directory.device_name('10.0.0.2') == 'sw2'
+        
+        stats = directory.get_stats()
+        assert stats['devices'] == 2
+        assert stats['hits'] == 4 and stats['misses'] == 2
+        assert stats['full_reloads'] == 1 and stats['refreshes'] == 2
+        assert stats['high_water'] == t1.isoformat()
+    
+    def test_select_matches_target_filters(self):
+        """Test vendor, site and shard filtering for poll targets."""
+        from datetime import datetime, timezone
+        from backend.services.device_directory import DeviceDirectory
+        
+        t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        db = MagicMock()
+        db.cursor.return_value.__enter__.return_value.fetchall.return_value = [
+            self._row(1, '10.0.0.1', 'sw1', t0, shard_hash=10),
+            self._row(2, '10.0.0.2', 'sw2', t0, shard_hash=11),
+            self._row(3, '10.0.0.3', 'ups1', t0, manufacturer='Eaton'),
+            self._row(4, '10.0.0.4', 'sw4', t0, site='dc2'),
+            self._row(5, None, 'no-ip', t0),
+        ]
+        
+        directory = DeviceDirectory(db)
+        names = lambda devices: sorted(d.device_name for d in devices)
+        assert names(directory.select('ciena')) == ['sw1', 'sw2', 'sw4']
+        assert names(directory.select('CIENA', {'site': 'dc1'})) == ['sw1', 'sw2']
+        assert names(directory.select('ciena', {'site': 'dc1', 'shard': [1, 2]})) == ['sw2']
+        assert names(directory.select(None, {'manufacturer': 'eat'})) == ['ups1']
+
+
+class TestPartitionManager:
+    """Tests for time partition creation and retention."""
+    
+    def test_plan_creates_chains_from_newest_partition(self):
+        """Test new partitions continue from the last upper bound up to the premake horizon."""
+        from datetime import datetime, timezone
+        from backend.services.partition_manager import (
+            PartitionManager, PartitionPolicy, parse_partition_bound,
+        )
+        
+        policy = PartitionPolicy('trap_log', 'received_at', 'day', 30, 2)
+        parts = [
+            parse_partition_bound('trap_log_before_2026_03_02', "FOR VALUES FROM (MINVALUE) TO ('2026-03-02 00:00:00+00')"),
+            parse_partition_bound('trap_log_2026_03_02', "FOR VALUES FROM ('2026-03-02 00:00:00+00') TO ('2026-03-03 00:00:00+00')"),
+        ]
+        manager = PartitionManager(db=MagicMock(), policies=[policy])
+        
+        now = datetime(2026, 3, 2, 15, 30, tzinfo=timezone.utc)
+        planned = manager.plan_creates(policy, parts, now)
+        assert [p.name for p in planned] == ['trap_log_2026_03_03', 'trap_log_2026_03_04']
+        assert planned[0].lower == parts[-1].upper
+        assert planned[-1].upper == datetime(2026, 3, 5, tzinfo=timezone.utc)
+        
+        monthly = PartitionPolicy('optical_metrics', 'recorded_at', 'month', 90, 1)
+        planned = manager.plan_creates(monthly, [], datetime(2026, 12, 20, tzinfo=timezone.utc))
+        assert [p.name for p in planned] == ['optical_metrics_2026_12', 'optical_metrics_2027_01']
+    
+    def test_run_expires_old_partitions_and_keeps_guarded(self):
+        """Test expired partitions are detached and dropped unless the guard holds them."""
+        from datetime import datetime, timezone
+        from backend.services.partition_manager import PartitionManager, PartitionPolicy
+        
+        policy = PartitionPolicy('trap_events', 'created_at', 'month', 60, 0, guard='SELECT 1 FROM {partition}')
+        db = MagicMock()
+        cursor = db.cursor.return_value.__enter__.return_value
+        cursor.fetchone.side_effect = [
+            {'relkind': 'p'},
+            {'?column?': 1},   # open alarm in trap_events_2026_01
+            None,
+        ]
+        cursor.fetchall.return_value = [
+            {'name': 'trap_events_2026_02', 'bound': "FOR VALUES FROM ('2026-02-01 00:00:00+00') TO ('2026-03-01 00:00:00+00')",
+             'detach_pending': False},
+            {'name': 'trap_events_2026_01', 'bound': "FOR VALUES FROM ('2026-01-01 00:00:00+00') TO ('2026-02-01 00:00:00+00')",
+             'detach_pending': False},
+            {'name': 'trap_events_2026_05', 'bound': "FOR VALUES FROM ('2026-05-01 00:00:00+00') TO ('2026-06-01 00:00:00+00')",
+             'detach_pending': False},
+        ]
+        
+        manager = PartitionManager(db=db, policies=[policy], mode='drop')
+        report = manager.run(now=datetime(2026, 5, 10, tzinfo=timezone.utc))
+        result = report['tables']['trap_events']
+        assert result == {
+            'created': [], 'expired': ['trap_events_2026_02'],
+            'kept': ['trap_events_2026_01'], 'error': None,
+        }
+        statements = [repr(c.args[0]) for c in cursor.execute.call_args_list]
+        dropped = [s for s in statements if 'DROP TABLE' in s]
+        assert len(dropped) == 1 and 'trap_events_2026_02' in dropped[0]
+        assert any('DETACH PARTITION' in s and 'CONCURRENTLY' in s for s in statements)
+        
+        cursor.reset_mock()
+        cursor.fetchone.side_effect = [None]
+        report = manager.run(dry_run=True)
+        assert report['tables']['trap_events']['error'] == 'not partitioned'
+    
+    def test_run_finalizes_interrupted_detach(self):
+        """Test a partition left pending detach is finalized and dropped before other detaches."""
+        from datetime import datetime, timezone
+        from backend.services.partition_manager import PartitionManager, PartitionPolicy
+        
+        policy = PartitionPolicy('trap_log', 'received_at', 'day', 30, 0)
+        db = MagicMock()
+        cursor = db.cursor.return_value.__enter__.return_value
+        cursor.fetchone.side_effect = [{'relkind': 'p'}]
+        cursor.fetchall.return_value = [
+            {'name': 'trap_log_2026_03_01', 'bound': "FOR VALUES FROM ('2026-03-01 00:00:00+00') TO ('2026-03-02 00:00:00+00')",
+             'detach_pending': True},
+            {'name': 'trap_log_2026_03_02', 'bound': "FOR VALUES FROM ('2026-03-02 00:00:00+00') TO ('2026-03-03 00:00:00+00')",
+             'detach_pending': False},
+            {'name': 'trap_log_2026_05_01', 'bound': "FOR VALUES FROM ('2026-05-01 00:00:00+00') TO ('2026-05-02 00:00:00+00')",
+             'detach_pending': False},
+        ]
+        
+        manager = PartitionManager(db=db, policies=[policy], mode='drop')
+        report = manager.run(now=datetime(2026, 5, 1, 12, tzinfo=timezone.utc))
+        assert report['tables']['trap_log']['expired'] == ['trap_log_2026_03_01', 'trap_log_2026_03_02']
+        statements = [repr(c.args[0]) for c in cursor.execute.call_args_list][2:]
+        assert 'FINALIZE' in statements[0] and 'trap_log_2026_03_01' in statements[0]
+        assert 'DROP TABLE' in statements[1] and 'trap_log_2026_03_01' in statements[1]
+        assert 'CONCURRENTLY' in statements[2] and 'trap_log_2026_03_02' in statements[2]
+
+
+class TestMetricRollups:
+    """Tests for metric rollup maintenance and resolution choice."""
+    
+    def test_choose_resolution_fits_max_points(self):
+        """Test the finest tier whose bucket count fits max_points is picked."""
+        from backend.services.metric_rollups import choose_resolution
+        
+        hour, day = 3600, 86400
+        assert choose_resolution(6 * hour, 500).name == '5m'
+        assert choose_resolution(7 * day, 500).name == '1h'
+        assert choose_resolution(7 * day, 100).name == '1d'
+        assert choose_resolution(365 * day, 100).name == '1d'
+    
+    def test_update_cascades_through_tiers(self):
+        """Test a cycle recomputes its 5-minute bucket, then the enclosing hour and day."""
+        from datetime import datetime, timedelta, timezone
+        from backend.services.metric_rollups import update_rollups
+        
+        cursor = MagicMock()
+        cursor.rowcount = 4
+        recorded_at = datetime(2026, 3, 2, 10, 17, 30, tzinfo=timezone.utc)
+        
+        counts = update_rollups(cursor, 'interface_metrics', recorded_at, device_ips={'10.0.0.2', '10.0.0.1'})
+        assert counts == {'5m': 4, '1h': 4, '1d': 4}
+        
+        (raw_sql, raw), (hour_sql, hour), (day_sql, day) = [c.args for c in cursor.execute.call_args_list]
+        assert 'FROM interface_metrics' in raw_sql and 'INSERT INTO metrics_5min' in raw_sql
+        assert raw['since'] == datetime(2026, 3, 2, 10, 15, tzinfo=timezone.utc)
+        assert raw['until'] == datetime(2026, 3, 2, 10, 20, tzinfo=timezone.utc)
+        assert raw['scan_from'] < raw['since']
+        assert raw['devices'] == ['10.0.0.1', '10.0.0.2']
+        
+        assert 'FROM metrics_5min' in hour_sql and 'INSERT INTO metrics_hourly' in hour_sql
+        assert (hour['since'], hour['until']) == (datetime(2026, 3, 2, 10, tzinfo=timezone.utc),
+                                                  datetime(2026, 3, 2, 11, tzinfo=timezone.utc))
+        assert 'rx_bps' in hour['metrics'] and 'rx_power' not in hour['metrics']
+        
+        assert 'FROM metrics_hourly' in day_sql and 'INSERT INTO metrics_daily' in day_sql
+        assert day['until'] - day['since'] == timedelta(days=1)
+
+
+class TestDatabasePool:
+    """Tests for the pooled DatabaseConnection."""
+    
+    @staticmethod
+    def make_pool(max_size=2, timeout=0.2):
+        """A private DatabaseConnection (not the singleton) over mock connections."""
+        import time
+        from backend.database import DatabaseConnection
+        
+        db = object.__new__(DatabaseConnection)
+        db._initialized = False
+        DatabaseConnection.__init__(db)
+        db.max_size, db.timeout = max_size, timeout
+        
+        def connect():
+            conn = MagicMock(closed=0, autocommit=True, last_used=time.monotonic())
+            conn.info.transaction_status = 0
+            cursor = conn.cursor.return_value
+            cursor.__enter__.return_value = cursor
+            cursor.connection = conn
+            cursor.description = [('n',)]
+            cursor.fetchall.return_value = [{'n': 1}]
+            db.stats.count('connects')
+            return conn
+        
+        db._connect = connect
+        return db
+    
+    def test_threads_share_bounded_pool_and_nested_cursors_reuse(self):
+        """Test nested cursors reuse the thread's connection and checkouts wait, then time out."""
+        import threading
+        from backend.database import PoolExhausted
+        
+        db = self.make_pool(max_size=2)
+        with db.cursor() as outer:
+            with db.cursor() as inner:
+                assert outer.connection is inner.connection
+            assert db.get_stats()['in_use'] == 1
+        assert db.get_stats()['idle'] == 1
+        
+        held = [db.getconn(), db.getconn()]
+        released = threading.Timer(0.05, db.putconn, args=(held[0],))
+        released.start()
+        with db.cursor():
+            pass
+        released.join()
+        held.append(db.getconn())
+        with pytest.raises(PoolExhausted):
+            with db.cursor():
+                pass
+        
+        stats = db.get_stats()
+        assert stats['connects'] == 2
+        assert stats['checkouts_waited'] == 1
+        assert stats['checkout_timeouts'] == 1
+        assert stats['pool_wait']['max_ms'] >= 40
+    
+    def test_lost_connections_are_replaced_and_statements_histogrammed(self):
+        """Test a closed connection is discarded on return and statement latency is bucketed."""
+        from backend.database import PoolStats, _statement_verb
+        
+        db = self.make_pool()
+        with db.cursor() as cursor:
+            conn = cursor.connection
+            conn.closed = 2
+        with db.cursor() as cursor:
+            assert cursor.connection is not conn
+        stats = db.get_stats()
+        assert (stats['discarded'], stats['connects'], stats['size']) == (1, 2, 1)
+        
+        assert _statement_verb("  \n  select 1") == 'SELECT'
+        assert _statement_verb(b"INSERT INTO t VALUES (1)") == 'INSERT'
+        assert _statement_verb("VACUUM t") == 'OTHER'
+        
+        pool_stats = PoolStats()
+        for seconds in (0.0004, 0.003, 0.003, 0.2, 9.0):
+            pool_stats.record_query('SELECT', seconds, failed=seconds > 5)
+        snapshot = pool_stats.snapshot()
+        histogram = snapshot['query_histogram']['SELECT']
+        assert (histogram['le_1ms'], histogram['le_5ms'], histogram['le_250ms'], histogram['inf']) == (1, 2, 1, 1)
+        assert snapshot['queries']['SELECT']['count'] == 5
+        assert snapshot['query_errors'] == 1
+
+
+class TestAsyncDatabase:
+    """Tests for the pooled async database layer."""
+    
+    def _database(self, workers, execute=None):
+        from backend.utils.async_db import AsyncDatabase
+        
+        db = TestDatabasePool.make_pool(max_size=workers + 1)
+        adb = AsyncDatabase(workers=workers, transactions=1, db=db)
+        if execute:
+            original = db._connect
+            
+            def connect():
+                conn = original()
+                conn.cursor.return_value.execute.side_effect = execute
+                return conn
+            db._connect = connect
+        return adb, db
+    def test_queries_run_concurrently_off_the_event_loop(self):
+        """Test slow statements overlap on workers while the loop keeps running."""
+        import asyncio
+        import time
+        from backend.utils import async_db
+        
+        adb, db = self._database(workers=8, execute=lambda sql, params: time.sleep(0.1))
+        ticks = []
+        
+        async def ticker():
+            while len(ticks) < 5:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+        
+        async def dashboard():
+            return await asyncio.gather(ticker(), *(async_db.db_query("SELECT 1") for _ in range(8)))
+        
+        with patch.object(async_db, '_async_db', adb):
+            start = time.perf_counter()
+            results = asyncio.run(dashboard())
+            elapsed = time.perf_counter() - start
+        adb.close()
+        
+        assert results[1:] == [[{'n': 1}]] * 8
+        assert elapsed < 0.5
+        assert ticks[-1] - ticks[0] < 0.09
+        assert adb.get_stats()['max_in_flight'] == 8
+        assert db.get_stats()['in_use'] == 0
+    
+    def test_transaction_commits_rolls_back_and_drops_lost_connections(self):
+        """Test a transaction holds one connection and a lost connection is not reused."""
+        import asyncio
+        import psycopg2
+        from backend.utils import async_db
+        
+        adb, db = self._database(workers=2)
+        seen = []
+        
+        async def work():
+            async with async_db.db_transaction() as tx:
+                seen.append(tx.conn)
+                await tx.query("SELECT 1")
+                await tx.execute("UPDATE alerts SET status = 'resolved'")
+                assert db.get_stats()['in_use'] == 1
+            try:
+                async with async_db.db_transaction() as tx:
+                    seen.append(tx.conn)
+                    await tx.execute("UPDATE alerts SET status = 'resolved'")
+                    raise ValueError('abort')
+            except ValueError:
+                pass
+            
+            def lost(sql, params):
+                conn.closed = 2
+                raise psycopg2.OperationalError('server closed the connection')
+            conn = seen[0]
+            conn.cursor.return_value.execute.side_effect = lost
+            with pytest.raises(psycopg2.OperationalError):
+                await async_db.db_execute("DELETE FROM alerts")
+        
+        with patch.object(async_db, '_async_db', adb):
+            asyncio.run(work())
+        adb.close()
+        
+        conn = seen[0]
+        assert seen[1] is conn
+        assert conn.commit.call_count == 1
+        assert conn.rollback.call_count == 1
+        stats = db.get_stats()
+        assert (stats['discarded'], stats['size'], stats['in_use']) == (1, 0, 0)
+
+
+class TestHealthService:
+    """Tests for set-based fleet health scoring."""
+    
+    def test_fleet_scored_from_grouped_aggregates_and_stored_in_one_insert(self):
+        """Test two fleet queries score every device, sites roll up, and one INSERT stores both."""
+        from backend.services.health_service import HealthService
+        
+        cursor = MagicMock()
+        cursor.__enter__.return_value = cursor
+        cursor.fetchall.side_effect = [
+            [
+                {'device_ip': '10.0.0.1', 'netbox_device_id': 1, 'site_id': 7, 'total': 10,
+                 'up_count': 10, 'snmp_up_count': 10, 'avg_latency': 5},
+                {'device_ip': '10.0.0.2', 'netbox_device_id': 2, 'site_id': 7, 'total': 10,
+                 'up_count': 5, 'snmp_up_count': None, 'avg_latency': 600},
+                {'device_ip': '10.0.0.3', 'netbox_device_id': 3, 'site_id': None, 'total': 4,
+                 'up_count': 4, 'snmp_up_count': 4, 'avg_latency': None},
+            ],
+            [{'device_ip': '10.0.0.2', 'total_errors': 2000, 'total_packets': 100000, 'avg_util': 97}],
+        ]
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        db = MagicMock()
+        db.transaction.return_value.__enter__.return_value = conn
+        service = HealthService(db=db)
+        
+        with patch('backend.services.health_service.execute_values') as execute_values:
+            assert service.calculate_and_store_all_device_health() == 3
+        
+        db.transaction.assert_called_once()
+        assert cursor.execute.call_count == 2
+        assert all('GROUP BY device_ip' in c.args[0] for c in cursor.execute.call_args_list)
+        
+        execute_values.assert_called_once()
+        rows = execute_values.call_args.args[2]
+        devices = {row[1]: row for row in rows if row[0] == 'device'}
+        assert devices['10.0.0.1'][4] == 100.0
+        assert devices['10.0.0.3'][4] == 100.0
+        # 50% up, >500ms latency, 2% errors, 97% utilization
+        assert devices['10.0.0.2'][5:9] == (50.0, 24.0, 0.0, 12.0)
+        assert devices['10.0.0.2'][4] == HealthService.combine_scores(50.0, 24.0, 0.0, 12.0)['overall_score']
+        
+        (site,) = [row for row in rows if row[0] == 'site']
+        assert site[3] == 7
+        assert site[5] == 75.0
+        assert (site[9], site[10]) == (0, 1)
+
+
+class TestSSHSessionPool:
+    """Tests for the keyed SSH session pool."""
+    
+    @staticmethod
+    def make_pool(**kwargs):
+        """A private pool whose connects return mock clients with live transports."""
+        from backend.services.ssh_pool import SSHSessionPool
+        
+        pool = SSHSessionPool(**kwargs)
+        pool._start_reaper = lambda: None
+        clients = []
+        
+        def connect(host, port, username, password, timeout, **connect_kwargs):
+            client = MagicMock()
+            transport = client.get_transport.return_value
+            transport.is_active.return_value = True
+            transport.is_authenticated.return_value = True
+            clients.append(client)
+            return client
+        
+        pool._connect = connect
+        return pool, clients
+    
+    def test_sessions_reused_per_credential_and_bounded_per_host(self):
+        """Test same host+credential reuses a session, other credentials evict idle ones, and full hosts time out."""
+        from backend.services.ssh_pool import SSHPoolTimeout
+        
+        pool, clients = self.make_pool(max_per_host=2)
+        with pool.session('10.0.0.1', 'su', 'wwp') as first:
+            pass
+        with pool.session('10.0.0.1', 'su', 'wwp') as second:
+            assert second is first
+        assert len(clients) == 1
+        
+        held = [pool.acquire('10.0.0.1', 'su', 'wwp'), pool.acquire('10.0.0.1', 'admin', 'other')]
+        assert len(clients) == 2
+        with pytest.raises(SSHPoolTimeout):
+            pool.acquire('10.0.0.1', 'su', 'wwp', timeout=0.05)
+        pool.release(held[1])
+        
+        # The idle 'admin' session is closed to make room for another 'su' session
+        extra = pool.acquire('10.0.0.1', 'su', 'wwp', timeout=0.05)
+        assert clients[1].close.called
+        assert extra.client is clients[2]
+        
+        stats = pool.get_stats()
+        assert (stats['connects'], stats['reuses'], stats['timeouts'], stats['open']) == (3, 2, 1, 2)
+        # Both reuses were of the first session, each saving its handshake
+        assert stats['handshake_ms_saved'] == round(2 * held[0].handshake_ms, 1)
+    
+    def test_dead_sessions_are_replaced_and_idle_sessions_expire(self):
+        """Test a reused session that fails is retried once on a new one, and idle TTL closes sessions."""
+        import paramiko
+        import time
+        
+        pool, clients = self.make_pool(idle_ttl=60)
+        assert pool.run(lambda client: 'ok', '10.0.0.2', 'su', 'wwp') == 'ok'
+        
+        calls = []
+        
+        def command(client):
+            calls.append(client)
+            if client is clients[0]:
+                # Dropped between the liveness check and the channel open
+                client.get_transport().is_active.return_value = False
+                raise paramiko.SSHException("SSH session not active")
+            return 'reconnected'
+        
+        assert pool.run(command, '10.0.0.2', 'su', 'wwp') == 'reconnected'
+        assert calls == [clients[0], clients[1]]
+        assert clients[0].close.called
+        
+        # A failure on a brand-new session is not retried
+        def drop(client):
+            raise EOFError()
+        
+        fresh_pool, fresh_clients = self.make_pool()
+        with pytest.raises(EOFError):
+            fresh_pool.run(drop, '10.0.0.3', 'su', 'wwp')
+        assert len(fresh_clients) == 1
+        
+        # Dropped while idle: replaced on checkout without a failed call
+        clients[1].get_transport.return_value.is_active.return_value = False
+        assert pool.run(lambda client: client, '10.0.0.2', 'su', 'wwp') is clients[2]
+        
+        for sessions in pool._idle.values():
+            for session in sessions:
+                session.last_used = time.monotonic() - 120
+        assert pool.prune() == 1
+        stats = pool.get_stats()
+        assert (stats['retries'], stats['reconnects'], stats['expired'], stats['open']) == (1, 1, 1, 0)
+    
+    def test_commands_are_not_rerun_after_a_timeout_or_an_opened_channel(self):
+        """Test a reused session that times out, or dies after its channel opened, does not run fn again."""
+        import socket
+        import paramiko
+        
+        pool, clients = self.make_pool()
+        pool.run(lambda client: 'warm', '10.0.0.4', 'su', 'wwp')
+        calls = []
+        
+        def slow(client):
+            calls.append('exec')
+            client.get_transport().open_channel('session')
+            raise socket.timeout('timed out')
+        
+        with pytest.raises(socket.timeout):
+            pool.run(slow, '10.0.0.4', 'su', 'wwp')
+        assert calls == ['exec']
+        assert clients[0].close.called
+        
+        pool.run(lambda client: 'warm', '10.0.0.4', 'su', 'wwp')
+        calls.clear()
+        
+        def dropped_mid_command(client):
+            calls.append('exec')
+            transport = client.get_transport()
+            transport.open_channel('session')
+            transport.is_active.return_value = False
+            raise EOFError()
+        
+        with pytest.raises(EOFError):
+            pool.run(dropped_mid_command, '10.0.0.4', 'su', 'wwp')
+        assert calls == ['exec']
+        assert len(clients) == 2 and pool.get_stats()['retries'] == 0
+
+
+class TestExpectShell:
+    """Tests for the prompt-driven SAOS shell runner."""
+    
+    def test_commands_complete_on_prompt_and_batches_split_on_sentinels(self):
+        """Test per-command and batched runs against the SAOS shell stub, with paging disabled."""
+        from backend.benchmarks.saos_ssh_stub import SAOSShellStub
+        from backend.services.ciena_ssh_service import CienaSSHService
+        from backend.services.ssh_pool import SSHSessionPool
+        
+        stub = SAOSShellStub(hostname='sw-5160')
+        host, port = stub.start()
+        pool = SSHSessionPool()
+        try:
+            service = CienaSSHService(timeout=5, pool=pool, port=port)
+            data = service.poll_switch(host)
+            assert data.success, data.error
+            assert len(data.ports) == 24 and len(data.optical) == 24 and len(data.traffic) == 24
+            assert data.system_info.hostname == 'sw-5160'
+            
+            service.batch_commands = True
+            raw = service._run_pooled(host, lambda client: service._execute_commands(
+                client, ['alarm show', 'bogus', 'port show']))
+            assert list(raw) == ['alarm show', 'bogus', 'port show']
+            assert raw['bogus'] == 'SHELL PARSER FAILURE: bogus'
+            assert 'Link down' in raw['alarm show'] and 'sw-5160>' not in raw['alarm show']
+            assert raw['port show'].count('\n') == 27
+            
+            assert stub.connections == 1
+            assert pool.get_stats()['reuses'] == 1
+        finally:
+            pool.close()
+            stub.stop()
+    
+    def test_pager_answered_and_deadline_enforced(self):
+        """Test a --More-- pager is answered when paging is on, and a missing prompt times out."""
+        import re
+        from backend.services.ssh_expect import ExpectShell, ExpectTimeout, prompt_pattern_for
+        
+        channel = MagicMock()
+        chunks = [b'\r\nbanner\r\nsw-1*> ', b'port show\r\n| 1 |\r\n--More--',
+                  b'\x08\x08 \x08\x08| 2 |\r\nsw-1> ']
+        channel.recv.side_effect = lambda size: chunks.pop(0)
+        shell = ExpectShell(channel, timeout=1)
+        shell.start()
+        assert shell.prompt.pattern == prompt_pattern_for('sw-1>').pattern
+        assert shell.run('port show') == '| 1 |\n| 2 |'
+        assert [c.args[0] for c in channel.sendall.call_args_list] == ['port show\n', ' ']
+        
+        import socket
+        channel.recv.side_effect = socket.timeout()
+        with pytest.raises(ExpectTimeout):
+            shell.run('alarm show', timeout=0.05)
+        assert re.search(shell.prompt, 'output\nsw-1*> ')
+
+
+class TestAsyncSSHEngine:
+    """Tests for the asyncio SSH fan-out engine."""
+    
+    def test_streams_each_host_and_reports_failures(self):
+        """Test commands run over one session per host against SAOS stubs, with unreachable hosts reported."""
+        import asyncio
+        import paramiko
+        from backend.benchmarks.saos_ssh_stub import SAOSShellStub
+        from backend.executors.async_ssh_executor import AsyncSSHEngine
+        
+        key = paramiko.RSAKey.generate(1024)
+        stubs, port = [], 0
+        for i in range(3):
+            stub = SAOSShellStub(hostname=f'sw-{i}', host_key=key)
+            _, port = stub.start(host=f'127.0.9.{i + 1}', port=port)
+            stubs.append(stub)
+        targets = [stub.address[0] for stub in stubs] + ['127.0.9.200']
+        engine = AsyncSSHEngine(per_host_rate=0)
+        config = {'username': 'su', 'password': 'wwp', 'port': port, 'timeout': 5}
+        
+        async def collect():
+            return [pair async for pair in engine.stream(targets, ['system show', 'bogus'], config)]
+        
+        try:
+            streamed = asyncio.run(collect())
+        finally:
+            for stub in stubs:
+                stub.stop()
+        
+        assert sorted(index for index, _ in streamed) == [0, 1, 2, 3]
+        results = {index: result for index, result in streamed}
+        for i in range(3):
+            shown, bogus = results[i]['commands']
+            assert results[i]['success'] and f'sw-{i}' in shown['output']
+            assert shown['exit_status'] == 0 and bogus['exit_status'] == 1
+            assert 'SHELL PARSER FAILURE' in bogus['error']
+            assert stubs[i].connections == 1
+        assert not results[3]['success'] and results[3]['error'].startswith('Connection error')
+        assert engine.get_stats()['sessions'] == 3
+    
+    def test_site_and_host_rate_limits(self):
+        """Test per-site concurrency caps, global caps and per-host spacing."""
+        import asyncio
+        import time
+        from collections import defaultdict
+        from backend.executors.async_ssh_executor import AsyncSSHEngine, HostRateLimiter
+        
+        open_by_site = defaultdict(int)
+        peak_by_site = defaultdict(int)
+        
+        class CountingEngine(AsyncSSHEngine):
+            async def _run_asyncssh(self, target, commands, config, limits, result):
+                site = result['site']
+                open_by_site[site] += 1
+                peak_by_site[site] = max(peak_by_site[site], open_by_site[site])
+                await asyncio.sleep(0.01)
+                open_by_site[site] -= 1
+        
+        engine = CountingEngine(max_concurrent=5, per_site_limit=2, per_host_rate=0)
+        targets = [f'10.0.{site}.{i}' for site in range(3) for i in range(6)]
+        results = asyncio.run(engine.run_all(targets, ['show'], site_of=lambda t: t.split('.')[2]))
+        
+        assert [r['target'] for r in results] == targets
+        assert max(peak_by_site.values()) == 2
+        assert engine.peak_in_flight <= 5
+        
+        async def spaced():
+            limiter = HostRateLimiter(rate=50)
+            started = time.monotonic()
+            for _ in range(3):
+                await limiter.wait('10.0.0.1')
+            await limiter.wait('10.0.0.2')
+            return time.monotonic() - started, limiter.waits
+        
+        elapsed, waits = asyncio.run(spaced())
+        assert elapsed >= 0.04 and waits == 2
+
+
+class TestCienaSNMPFleetPoll:
+    """Tests for concurrent Ciena SNMP polling."""
+    
+    def test_stream_poll_switches_reads_system_rings_and_alarms(self):
+        """Test each switch is read in six requests and unreachable switches are reported."""
+        import asyncio
+        from backend.benchmarks.snmp_agent_stub import SNMPAgentStub, build_ciena_mib
+        from backend.services.ciena_snmp_service import stream_poll_switches
+        
+        async def run():
+            agents, port = [], 0
+            for i in range(3):
+                agent = SNMPAgentStub(build_ciena_mib(num_rings=2, num_alarms=3, sys_name=f'sw-{i}'))
+                _, port = await agent.start(host=f'127.0.12.{i + 1}', port=port)
+                agents.append(agent)
+            hosts = [agent.address[0] for agent in agents] + ['127.0.12.200']
+            try:
+                streamed = [pair async for pair in stream_poll_switches(
+                    hosts, max_concurrent=2, timeout=1, retries=0, port=port)]
+            finally:
+                for agent in agents:
+                    agent.stop()
+            return agents, dict(streamed)
+        
+        agents, results = asyncio.run(run())
+        
+        assert sorted(results) == [0, 1, 2, 3]
+        for i in range(3):
+            result = results[i]
+            assert result['success'] and result['system']['name'] == f'sw-{i}'
+            assert result['raps_global'] == {
+                'host': f'127.0.12.{i + 1}', 'state': 'enabled', 'num_rings': 2, 'node_id': '00:03:18:00:00:01',
+            }
+            assert [ring['name'] for ring in result['virtual_rings']] == ['VR1', 'VR2']
+            assert result['virtual_rings'][0]['state'] == 'ok' and result['virtual_rings'][0]['vid'] == 2
+            assert [alarm['object_instance'] for alarm in result['active_alarms']] == ['21', '22', '23']
+            assert result['active_alarms'][0]['severity'] == 'major'
+            # system, RAPS global, ring names, one GET per ring, alarm table
+            assert agents[i].requests_received == 6
+        assert not results[3]['success'] and results[3]['error'].startswith('System info failed')
+    
+    def test_large_alarm_table_keeps_every_column(self):
+        """Test a table walk past 125 alarms still returns the last columns (description, timestamp)."""
+        import asyncio
+        from backend.benchmarks.snmp_agent_stub import SNMPAgentStub, build_ciena_mib
+        from backend.services.ciena_snmp_service import CienaSNMPService
+        
+        async def run():
+            agent = SNMPAgentStub(build_ciena_mib(num_rings=0, num_alarms=300))
+            host, port = await agent.start(host='127.0.12.10')
+            try:
+                return await CienaSNMPService(host, port=port, timeout=2, retries=0)._get_active_alarms_async()
+            finally:
+                agent.stop()
+        
+        alarms = asyncio.run(run())
+        
+        assert len(alarms) == 300
+        assert all(alarm['description'] == 'Link down' for alarm in alarms)
+        assert all(alarm['timestamp'] == '2026-01-01 00:00:00' for alarm in alarms)
+
+
+class TestNetBoxBulkSync:
+    """Tests for concurrent NetBox reads and the bulk device cache sync."""
+    
+    def test_get_all_reads_every_page_with_field_selection(self):
+        """Test pages beyond the first are fetched at NetBox's page cap, with fields and delta filters applied."""
+        from backend.benchmarks.netbox_api_stub import NetBoxAPIStub
+        from backend.services.netbox_service import NetBoxService
+        
+        stub = NetBoxAPIStub(num_devices=2500, max_page_size=300)
+        stub.start()
+        try:
+            service = NetBoxService(url=stub.url, token='x')
+            devices = service.get_all('dcim/devices/', fields=('id', 'name', 'primary_ip'), max_workers=4)
+            assert [d['id'] for d in devices] == list(range(1, 2501))
+            assert set(devices[0]) == {'id', 'name', 'primary_ip'}
+            assert stub.requests_served == 9
+            
+            # Device n was last updated n ms after the stub's epoch; touched ones after the rest
+            stub.touch(5)
+            changed = service.get_all('dcim/devices/', fields=('id', 'last_updated'),
+                                      updated_since='2026-01-01T00:00:02.500Z')
+            assert [d['id'] for d in changed] == [1, 2, 3, 4, 5, 2500]
+        finally:
+            stub.stop()
+    
+    def test_sync_upserts_in_one_statement_and_reports_unchanged(self):
+        """Test one execute_values upsert for all valid rows, bad addresses skipped and incremental watermark sent."""
+        from datetime import datetime, timezone
+        from backend.services.netbox_cache_service import NetBoxCacheService
+        
+        watermark = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        device = lambda i, ip: {
+            'id': i, 'name': f'sw-{i}', 'primary_ip': {'address': f'{ip}/24'},
+            'device_type': {'model': '5160', 'manufacturer': {'name': 'Ciena'}},
+            'site': {'id': 7, 'name': 'Site 7'}, 'role': {'name': 'Access'},
+            'last_updated': '2026-01-02T00:00:00Z',
+        }
+        netbox = MagicMock()
+        netbox.get_all.return_value = [device(1, '10.0.0.1'), device(2, 'bogus'), device(3, '10.0.0.3'),
+                                       device(1, '10.0.0.1')]
+        cursor = MagicMock()
+        cursor.__enter__.return_value = cursor
+        cursor.fetchone.return_value = (watermark,)
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        pool = MagicMock()
+        pool.getconn.return_value = conn
+        service = NetBoxCacheService(db_pool=pool, netbox=netbox)
+        
+        with patch('backend.services.netbox_cache_service.execute_values',
+                   return_value=[(True,)]) as execute_values, \
+             patch('backend.services.netbox_cache_service.get_device_directory') as directory:
+            result = service.sync_devices_to_cache(incremental=True)
+        
+        assert netbox.get_all.call_args.kwargs['updated_since'] == watermark
+        execute_values.assert_called_once()
+        sql, rows = execute_values.call_args.args[1:3]
+        assert 'IS DISTINCT FROM' in sql and 'ON CONFLICT (netbox_device_id)' in sql
+        assert [row[:3] for row in rows] == [(1, '10.0.0.1', 'sw-1'), (3, '10.0.0.3', 'sw-3')]
+        assert rows[0][3:] == ('5160', 'Ciena', 7, 'Site 7', 'Access', '2026-01-02T00:00:00Z')
+        assert result == {'inserted': 1, 'updated': 0, 'unchanged': 1, 'errors': 1, 'total': 4}
+        directory.return_value.invalidate.assert_called_once()